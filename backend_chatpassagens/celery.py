@@ -0,0 +1,19 @@
+# backend_chatpassagens/celery.py
+"""
+App Celery do projeto. As configurações vêm do settings do Django com o prefixo `CELERY_`.
+
+O app não é importado pelo pacote do projeto: só o carregam os workers e `chat/search_jobs.py`,
+quando as buscas são despachadas (`FLIGHT_SEARCH_BACKEND=celery` com `CELERY_BROKER_URL` definido).
+
+Worker das buscas de voos (ver `chat/tasks.py`):
+    celery -A backend_chatpassagens.celery worker -Q flight_search
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_chatpassagens.settings')
+
+app = Celery('backend_chatpassagens')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
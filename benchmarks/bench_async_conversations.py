@@ -0,0 +1,100 @@
+# benchmarks/bench_async_conversations.py
+"""
+Teste de carga: conversas concorrentes por processo, caminho síncrono vs assíncrono.
+
+Cada "conversa" executa `--searches` chamadas da tool `search_amadeus_flights` contra o servidor
+local (tests/stub_server.py) com latência simulada da Amadeus. Cada busca tem rota e data próprias
+e o cache de ofertas fica desligado: todas as chamadas chegam ao servidor, sem acertos de cache
+nem buscas idênticas agrupadas pelo single-flight.
+
+- sync: `tool.invoke` em um pool de `--threads` threads (como os workers síncronos de hoje);
+- async: `tool.ainvoke` de todas as conversas em um único event loop.
+
+Uso:
+    python -m benchmarks.bench_async_conversations --conversations 200 --threads 16 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from chat.tools import search_amadeus_flights
+from services.amadeus_http import get_async_http_client, reset_http_client
+from services.amadeus_token_provider import reset_token_providers
+from services.flight_offers_cache import reset_flight_offers_cache
+from tests.stub_server import StubAmadeusServer
+
+DESTINATIONS = ('GRU', 'GIG', 'BSB', 'CNF', 'SSA', 'REC', 'POA', 'CWB')
+
+
+def search_args(run, conversation, search, searches):
+    """Parâmetros distintos para cada busca de cada rodada (rota e data variam)."""
+    index = conversation * searches + search
+    return {'origin': 'VIX', 'destination': DESTINATIONS[index % len(DESTINATIONS)],
+            'departure_date': (date(2024, 8, 1) + timedelta(days=index // len(DESTINATIONS))).isoformat(),
+            'adults': run}
+
+
+def run_sync(conversations, searches, threads):
+    def conversation(index):
+        for search in range(searches):
+            search_amadeus_flights.invoke(search_args(1, index, search, searches))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(conversation, range(conversations)))
+    return time.perf_counter() - start
+
+
+def run_async(conversations, searches):
+    async def conversation(index):
+        for search in range(searches):
+            await search_amadeus_flights.ainvoke(search_args(2, index, search, searches))
+
+    async def main():
+        try:
+            await asyncio.gather(*(conversation(index) for index in range(conversations)))
+        finally:
+            # A sessão aiohttp pertence a este loop: fecha antes de o asyncio.run encerrá-lo
+            await get_async_http_client().aclose()
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - start
+
+
+def report(label, conversations, elapsed, workers):
+    print(f"{label:>6}: {conversations} conversas em {elapsed:6.2f}s -> "
+          f"{conversations / elapsed:7.1f} conversas/s ({workers})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--conversations', type=int, default=200)
+    parser.add_argument('--searches', type=int, default=2, help='buscas por conversa')
+    parser.add_argument('--threads', type=int, default=16, help='threads do caminho síncrono')
+    parser.add_argument('--latency', type=float, default=0.2, help='latência simulada da Amadeus (s)')
+    args = parser.parse_args()
+
+    with StubAmadeusServer(latency=args.latency) as server:
+        os.environ['AMADEUS_BASE_URL'] = server.url
+        os.environ['AMADEUS_HTTP_POOL_SIZE'] = str(max(args.conversations, args.threads))
+        # Mede a vazão do cliente, não o limite de TPS da Amadeus nem o cache de ofertas
+        os.environ.setdefault('AMADEUS_RATE_LIMITER', 'none')
+        os.environ['AMADEUS_CACHE_BACKEND'] = 'none'
+        reset_http_client()
+        reset_token_providers()
+        reset_flight_offers_cache()
+
+        elapsed = run_sync(args.conversations, args.searches, args.threads)
+        report('sync', args.conversations, elapsed, f'{args.threads} threads')
+
+        elapsed = run_async(args.conversations, args.searches)
+        report('async', args.conversations, elapsed, '1 event loop')
+        print(f"{server.count('/v2/shopping/flight-offers')} buscas chegaram ao servidor")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_chat_streaming.py
+"""
+Tempo até o primeiro token (TTFT) contra o tempo do turno completo no streaming do chat
+(`chat/streaming.py`, o mesmo usado pelo WebSocket), com um modelo falso que gera um caractere a
+cada `--token-delay` segundos, e várias sessões simultâneas no mesmo event loop.
+
+Sem streaming, o cliente só recebe algo quando o turno termina (TTFT = tempo do turno).
+
+Uso:
+    python -m benchmarks.bench_chat_streaming --sessions 1 10 50 --token-delay 0.01
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from chat.graph_registry import aget_graph, get_graph_registry, reset_graph_registry
+from chat.llm import reset_llm
+from chat.streaming import stream_chat_turn
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+ANSWER = ("Encontrei voos de Vitória para Guarulhos a partir de R$ 400,00, com saída às 06:00 "
+          "e chegada às 07:00. Quer que eu filtre por horário ou companhia?")
+
+
+class FakeToolChatModel(FakeListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+async def session(graph):
+    start = time.perf_counter()
+    first_token = None
+    async for event in stream_chat_turn(graph, "Voos de VIX para GRU dia 05/08?", str(uuid.uuid4())):
+        if event["type"] == "token" and first_token is None:
+            first_token = time.perf_counter() - start
+    return first_token, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(sessions):
+    graph = await aget_graph()
+    results = await asyncio.gather(*(session(graph) for _ in range(sessions)))
+    ttft = [first for first, _ in results]
+    total = [turn for _, turn in results]
+    print(f"{sessions:4d} sessões: TTFT p50={percentile(ttft, 0.5) * 1000:7.1f}ms p95={percentile(ttft, 0.95) * 1000:7.1f}ms"
+          f" | turno p50={percentile(total, 0.5) * 1000:7.1f}ms p95={percentile(total, 0.95) * 1000:7.1f}ms")
+
+
+async def main(args):
+    for sessions in args.sessions:
+        await run(sessions)
+    await get_graph_registry().aclose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--token-delay', type=float, default=0.01, help='segundos por caractere do modelo falso')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['CHECKPOINT_URL'] = f"sqlite:///{os.path.join(directory, 'checkpoints.sqlite')}"
+        os.environ['CHECKPOINT_COMPACT_INTERVAL'] = '0'
+        reset_graph_registry()
+        reset_llm(FakeToolChatModel(responses=[ANSWER], sleep=args.token_delay))
+        asyncio.run(main(args))
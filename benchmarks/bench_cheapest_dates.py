@@ -0,0 +1,83 @@
+# benchmarks/bench_cheapest_dates.py
+"""
+Pergunta de datas flexíveis ("qual o dia mais barato de agosto?") respondida de duas formas,
+contra o servidor local de tests/stub_server.py com latência simulada:
+
+- antes: uma busca de ofertas por data da janela (search_amadeus_flights_multi, em paralelo);
+- depois: a busca de datas mais baratas, com a matriz data -> preço da rota em cache
+  (primeira pergunta, pergunta repetida e janela sobreposta).
+
+Uso:
+    python -m benchmarks.bench_cheapest_dates --days 30 --offers 100 --latency 0.2
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=30, help='dias da janela de datas')
+    parser.add_argument('--offers', type=int, default=100, help='ofertas em cada resposta da busca de ofertas')
+    parser.add_argument('--latency', type=float, default=0.2, help='latência simulada da Amadeus (s)')
+    args = parser.parse_args()
+
+    os.environ.update(AMADEUS_API_KEY='stub', AMADEUS_API_SECRET='stub', AMADEUS_RATE_LIMIT='100000',
+                      AMADEUS_CACHE_BACKEND='memory', AMADEUS_MULTI_SEARCH_MAX_COMBINATIONS=str(args.days),
+                      FLIGHT_SEARCH_BACKEND='inline', SEARCH_LOG_FILE=os.devnull)
+
+    from services.amadeus_flight_dates_service import AmadeusFlightDatesService
+    from services.amadeus_flight_multi_search_service import AmadeusFlightMultiSearchService
+    from services.amadeus_http import reset_http_client
+    from services.amadeus_token_provider import reset_token_providers
+    from services.flight_dates_cache import reset_flight_dates_cache
+    from services.flight_offers_cache import reset_flight_offers_cache
+    from services.synthetic_flight_offers import generate_flight_offers_payload
+    from tests.payloads import make_flight_dates_payload
+    from tests.stub_server import StubAmadeusServer
+
+    start = date(2024, 8, 1)
+    end = start + timedelta(days=args.days - 1)
+    window = (start + timedelta(days=offset) for offset in range(args.days * 2))
+    prices = {day.isoformat(): f"{300 + day.toordinal() * 37 % 400}.00" for day in window}
+
+    def flight_dates(query):
+        first, _, last = query['departureDate'][0].partition(',')
+        return make_flight_dates_payload({day: price for day, price in prices.items()
+                                          if first <= day <= (last or first)}, 'VIX', 'GRU')
+
+    payload = generate_flight_offers_payload(args.offers, 'VIX', 'GRU', start.isoformat())
+    with StubAmadeusServer(payload=payload, latency=args.latency,
+                           handlers={'/v1/shopping/flight-dates': flight_dates}) as server:
+        os.environ['AMADEUS_BASE_URL'] = server.url
+        reset_http_client()
+        reset_token_providers()
+        reset_flight_offers_cache()
+        reset_flight_dates_cache()
+
+        def measure(label, call):
+            requests_before = len(server.requests)
+            began = time.perf_counter()
+            result = call()
+            elapsed = time.perf_counter() - began
+            calls = sum(1 for request in server.requests[requests_before:] if request['method'] == 'GET')
+            print(f"{label:<42} {elapsed * 1000:>8.0f}ms {calls:>10}")
+            return result
+
+        print(f"janela de {args.days} dias, {args.offers} ofertas por busca, latência {args.latency * 1000:.0f}ms")
+        print(f"{'':<42} {'tempo':>10} {'chamadas':>10}")
+        measure('antes: uma busca de ofertas por data', lambda: AmadeusFlightMultiSearchService().search(
+            ['VIX'], ['GRU'], date_from=start.isoformat(), date_to=end.isoformat()))
+        service = AmadeusFlightDatesService()
+        measure('datas mais baratas (primeira pergunta)',
+                lambda: service.cheapest_dates('VIX', 'GRU', start.isoformat(), end.isoformat()))
+        measure('datas mais baratas (mesma janela)',
+                lambda: service.cheapest_dates('VIX', 'GRU', start.isoformat(), end.isoformat(), max_price=500))
+        shifted = start + timedelta(days=args.days // 2)
+        measure('datas mais baratas (janela deslocada)', lambda: service.cheapest_dates(
+            'VIX', 'GRU', shifted.isoformat(), (shifted + timedelta(days=args.days - 1)).isoformat()))
+
+
+if __name__ == '__main__':
+    main()
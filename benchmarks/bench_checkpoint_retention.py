@@ -0,0 +1,138 @@
+# benchmarks/bench_checkpoint_retention.py
+"""
+Mede o tamanho do banco de checkpoints e a latência de `graph.get_state` numa conversa sintética
+longa (cada turno: pergunta, chamada de ferramenta com o resumo de uma busca de voos e resposta),
+comparando:
+
+- full: SqliteSaver padrão, que grava a lista inteira de mensagens a cada passo;
+- delta: CompactSqliteSaver (cada mensagem gravada uma única vez);
+- delta+compact: o mesmo após `compact()` (últimos N checkpoints por conversa) e VACUUM.
+
+get_state é medido no mesmo processo (mensagens já em cache no CompactSqliteSaver) e "a frio",
+com um saver novo aberto no mesmo arquivo (como após reiniciar o servidor).
+
+Uso:
+    python -m benchmarks.bench_checkpoint_retention --turns 100
+    python -m benchmarks.bench_checkpoint_retention --turns 100 --raw-offers 20
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Annotated
+
+from chat.checkpointers import SQLITE_PRAGMAS, create_sqlite_saver
+from chat.utils import render_tool_output
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import AnyMessage, add_messages
+from langgraph.prebuilt.tool_node import str_output
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+from tests.payloads import make_flight_offers_payload
+from typing_extensions import TypedDict
+
+
+class State(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+
+def build_graph(checkpointer, tool_content):
+    def search(state):
+        call_id = f"call_{uuid.uuid4().hex[:12]}"
+        return {"messages": [
+            AIMessage(content="", tool_calls=[{"name": "search_amadeus_flights", "args": {}, "id": call_id}]),
+            ToolMessage(content=tool_content, tool_call_id=call_id),
+        ]}
+
+    def answer(state):
+        return {"messages": [AIMessage(content="Encontrei estas opções; o voo mais barato custa R$ 400,00.")]}
+
+    builder = StateGraph(State)
+    builder.add_node("search", search)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "search")
+    builder.add_edge("search", "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def database_size(saver):
+    saver.conn.commit()
+    saver.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return saver.conn.execute('PRAGMA page_count').fetchone()[0] * saver.conn.execute('PRAGMA page_size').fetchone()[0]
+
+
+def get_state_latency(graph, config, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        graph.get_state(config)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def cold_get_state_latency(open_saver, tool_content, config, repeat):
+    timings = []
+    for _ in range(repeat):
+        saver = open_saver()
+        graph = build_graph(saver, tool_content)
+        start = time.perf_counter()
+        graph.get_state(config)
+        timings.append(time.perf_counter() - start)
+        saver.conn.close()
+    return sorted(timings)[len(timings) // 2]
+
+
+def run(name, open_saver, tool_content, turns, repeat, keep_last=None):
+    saver = open_saver()
+    graph = build_graph(saver, tool_content)
+    config = {"configurable": {"thread_id": "bench"}}
+    start = time.perf_counter()
+    for turn in range(turns):
+        graph.invoke({"messages": [("user", f"Voos de VIX para GRU, opção {turn}?")]}, config)
+    elapsed = time.perf_counter() - start
+    if keep_last:
+        saver.compact(keep_last)
+        saver.vacuum()
+    checkpoints = saver.conn.execute('SELECT COUNT(*) FROM checkpoints').fetchone()[0]
+    size = database_size(saver)
+    warm = get_state_latency(graph, config, repeat)
+    saver.conn.close()
+    cold = cold_get_state_latency(open_saver, tool_content, config, repeat)
+    print(f"{name:>14}: {size / 1024 / 1024:8.2f} MiB  {checkpoints:4d} checkpoints  "
+          f"get_state={warm * 1000:7.2f}ms (a frio {cold * 1000:7.2f}ms)  conversa={elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20, help='leituras de get_state para a mediana')
+    parser.add_argument('--keep-last', type=int, default=20)
+    parser.add_argument('--raw-offers', type=int,
+                        help='usa o JSON completo de N ofertas no ToolMessage (antes do resumo de user-010)')
+    args = parser.parse_args()
+
+    flight_offers = parse_flight_offers(json.dumps(make_flight_offers_payload(args.raw_offers or 250)).encode())
+    tool_content = str_output(flight_offers) if args.raw_offers else render_tool_output(flight_offers)
+    print(f"ToolMessage: {len(tool_content) / 1024:.1f} KiB por turno, {args.turns} turnos")
+
+    with tempfile.TemporaryDirectory() as directory:
+        def open_full():
+            conn = sqlite3.connect(os.path.join(directory, 'full.sqlite'), check_same_thread=False)
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            return SqliteSaver(conn)
+
+        run('full', open_full, tool_content, args.turns, args.repeat)
+        run('delta', lambda: create_sqlite_saver(os.path.join(directory, 'delta.sqlite')), tool_content,
+            args.turns, args.repeat)
+        run('delta+compact', lambda: create_sqlite_saver(os.path.join(directory, 'compact.sqlite')), tool_content,
+            args.turns, args.repeat, keep_last=args.keep_last)
+
+
+if __name__ == '__main__':
+    main()
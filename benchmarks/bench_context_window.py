@@ -0,0 +1,67 @@
+# benchmarks/bench_context_window.py
+"""
+Tokens do prompt e tempo de montagem da janela por turno numa conversa sintética longa (cada
+turno: pergunta, busca de voos com o resumo de 250 ofertas no ToolMessage e resposta), sem a
+janela de contexto (histórico inteiro) e com `chat/context_window.py`.
+
+O resumo usado aqui é o extrativo (sem chamar o LLM); com CONTEXT_SUMMARIZER=llm há uma chamada
+extra ao LLM nos turnos em que a janela é resumida (contados em "resumos").
+
+Uso:
+    python -m benchmarks.bench_context_window --turns 100 --budget 6000
+"""
+import argparse
+import json
+import time
+import uuid
+
+from chat.context_window import ContextWindow, ExtractiveSummarizer, message_tokens
+from chat.utils import render_tool_output
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+from tests.payloads import make_flight_offers_payload
+
+
+def make_turn(number, tool_content):
+    call_id = f"call_{uuid.uuid4().hex[:12]}"
+    return [
+        HumanMessage(content=f"E saindo no dia {number % 28 + 1}, quanto fica de VIX para GRU?", id=str(uuid.uuid4())),
+        AIMessage(content="", id=str(uuid.uuid4()), tool_calls=[
+            {"name": "search_amadeus_flights", "args": {"originLocationCode": "VIX", "destinationLocationCode": "GRU",
+                                                        "departureDate": f"2025-08-{number % 28 + 1:02d}"},
+             "id": call_id}]),
+        ToolMessage(content=tool_content, tool_call_id=call_id, name="search_amadeus_flights", id=str(uuid.uuid4())),
+        AIMessage(content=f"Para o dia {number % 28 + 1} o voo mais barato custa R$ 400,00, saindo às 06:00.",
+                  id=str(uuid.uuid4())),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=100)
+    parser.add_argument('--budget', type=int, default=6000, help='CONTEXT_TOKEN_BUDGET')
+    args = parser.parse_args()
+
+    tool_content = render_tool_output(parse_flight_offers(json.dumps(make_flight_offers_payload(250)).encode()))
+    window = ContextWindow(ExtractiveSummarizer(), budget=args.budget)
+    state = {"messages": []}
+    full_tokens = 0
+    summaries = 0
+    print(f"{'turno':>5} {'sem janela':>11} {'com janela':>11} {'montagem':>9}")
+    for number in range(1, args.turns + 1):
+        turn = make_turn(number, tool_content)
+        state["messages"] = state["messages"] + turn
+        full_tokens += sum(message_tokens(message) for message in turn)
+        start = time.perf_counter()
+        prompt_state, updates = window.prepare(state)
+        elapsed = time.perf_counter() - start
+        state.update(updates)
+        summaries += bool(updates)
+        if number == 1 or number % 10 == 0:
+            window_tokens = sum(message_tokens(message) for message in prompt_state["messages"])
+            print(f"{number:5d} {full_tokens:11d} {window_tokens:11d} {elapsed * 1000:7.2f}ms")
+    print(f"resumos: {summaries} em {args.turns} turnos")
+
+
+if __name__ == '__main__':
+    main()
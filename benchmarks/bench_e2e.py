@@ -0,0 +1,264 @@
+# benchmarks/bench_e2e.py
+"""
+Benchmark de ponta a ponta do grafo de `chat/run_chat_with_subgraphs.py`, sem rede: a Amadeus é
+o servidor local de tests/stub_server.py (com um payload gravado ou sintético) e o LLM é um modelo
+determinístico que repete as respostas gravadas em benchmarks/scenarios/conversations.json.
+
+Para cada nível de concorrência, executa `--conversations` conversas (as do cenário, em rodízio)
+com `graph.ainvoke` num único event loop e mede:
+
+- turnos por segundo e latência do turno (p50, p95, p99);
+- chamadas ao LLM e à Amadeus por turno;
+- memória retida por conversa (tracemalloc, numa passada separada, para não distorcer as latências).
+
+O resultado vai para um JSON (`--output`) com o commit atual; `--compare` mostra a diferença para
+um resultado anterior.
+
+Uso:
+    python -m benchmarks.bench_e2e --concurrency 1,8,32 --conversations 64 --output e2e.json
+    python -m benchmarks.bench_e2e --compare e2e.json --llm-latency 0.05 --amadeus-latency 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+
+DEFAULT_SCENARIO = os.path.join(os.path.dirname(__file__), 'scenarios', 'conversations.json')
+SEARCH_PATH = '/v2/shopping/flight-offers'
+CALLS = Counter()
+
+
+def load_scenario(path):
+    """
+    Lê as conversas gravadas e monta o roteiro do modelo: (mensagem do usuário, passo) -> resposta,
+    onde o passo é o número de AIMessages depois da mensagem do usuário.
+    """
+    with open(path) as f:
+        conversations = json.load(f)['conversations']
+    script = {}
+    for conversation in conversations:
+        for turn in conversation['turns']:
+            if any(key[0] == turn['user'] for key in script):
+                raise ValueError(f"Repeated user message in the scenario: {turn['user']!r}")
+            for step, reply in enumerate(turn['replies']):
+                script[(turn['user'], step)] = reply
+    return conversations, script
+
+
+class ReplayChatModel(BaseChatModel):
+    """Modelo determinístico: devolve a resposta gravada para a mensagem do usuário e o passo do turno."""
+
+    script: dict
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return 'replay'
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages):
+        CALLS['llm'] += 1
+        last_user = max(index for index, message in enumerate(messages) if isinstance(message, HumanMessage))
+        step = sum(isinstance(message, AIMessage) for message in messages[last_user + 1:])
+        try:
+            reply = self.script[(messages[last_user].content, step)]
+        except KeyError:
+            raise KeyError(f"No recorded reply for step {step} of {messages[last_user].content!r}")
+        tool_calls = [{"name": call["name"], "args": call["args"], "id": f"call_{uuid.uuid4().hex[:12]}"}
+                      for call in reply.get("tool_calls", [])]
+        message = AIMessage(content=reply.get("content", ""), tool_calls=tool_calls)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def run_conversation(graph, conversation, latencies):
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    for turn in conversation['turns']:
+        start = time.perf_counter()
+        result = await graph.ainvoke({"messages": [("user", turn['user'])]}, config)
+        latencies.append(time.perf_counter() - start)
+        expected = turn['replies'][-1].get('content')
+        if expected is not None and result["messages"][-1].content != expected:
+            raise AssertionError(f"Unexpected final answer for {turn['user']!r}: {result['messages'][-1].content!r}")
+
+
+async def run_level(build_graph, conversations, total, concurrency):
+    graph = build_graph(MemorySaver())
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def limited(conversation):
+        async with semaphore:
+            await run_conversation(graph, conversation, latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(conversations[index % len(conversations)]) for index in range(total)))
+    return time.perf_counter() - start, latencies
+
+
+async def measure_memory(build_graph, conversations, total):
+    """Memória retida por conversa (checkpoints e estado do grafo), medida sequencialmente."""
+    graph = build_graph(MemorySaver())
+    # Aquece imports, clientes e caches de classe antes de medir
+    await run_conversation(graph, conversations[0], [])
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index in range(total):
+        await run_conversation(graph, conversations[index % len(conversations)], [])
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return {'conversations': total, 'retained_bytes_per_conversation': retained / total, 'peak_bytes': peak}
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    print(f"\ncomparação com {previous.get('commit') or '?'} ({previous.get('timestamp', '?')}):")
+    changed = sorted(key for key, value in current['config'].items() if previous.get('config', {}).get(key) != value)
+    if changed:
+        print(f"  atenção: configuração diferente em {', '.join(changed)}")
+    old_levels = {level['concurrency']: level for level in previous.get('levels', [])}
+    for level in current['levels']:
+        old = old_levels.get(level['concurrency'])
+        if old is None:
+            continue
+        changes = []
+        for field in ('turns_per_sec', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if old[field]:
+                changes.append(f"{field} {old[field]:.1f} -> {level[field]:.1f} ({level[field] / old[field] - 1:+.0%})")
+        print(f"  concorrência {level['concurrency']:>3}: " + ', '.join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', default=DEFAULT_SCENARIO, help='conversas gravadas (JSON)')
+    parser.add_argument('--payload', help='resposta gravada da busca de ofertas (JSON); padrão: sintética')
+    parser.add_argument('--offers', type=int, default=50, help='ofertas da resposta sintética')
+    parser.add_argument('--concurrency', default='1,8,32', help='níveis de concorrência, separados por vírgula')
+    parser.add_argument('--conversations', type=int, default=64, help='conversas por nível')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='latência simulada do LLM (s)')
+    parser.add_argument('--amadeus-latency', type=float, default=0.0, help='latência simulada da Amadeus (s)')
+    parser.add_argument('--memory-conversations', type=int, default=20, help='conversas da passada de memória')
+    parser.add_argument('--output', help='grava o resultado neste arquivo JSON')
+    parser.add_argument('--compare', help='resultado JSON anterior para comparar')
+    args = parser.parse_args()
+
+    # Cada busca chega ao servidor local e cada turno chama o modelo: sem caches nem limite de TPS
+    os.environ.update(LLM_CACHE='none', AMADEUS_CACHE_BACKEND='none', AMADEUS_RATE_LIMIT='100000',
+                      CONTEXT_SUMMARIZER='extractive', FLIGHT_SEARCH_BACKEND='inline',
+                      AMADEUS_API_KEY='stub', AMADEUS_API_SECRET='stub')
+    os.environ.setdefault('OPENAI_API_KEY', 'unused')
+
+    from chat.llm import reset_llm
+    from chat.run_chat_with_subgraphs import build_graph
+    from services.amadeus_http import reset_http_client
+    from services.amadeus_rate_limiter import reset_rate_limiter
+    from services.amadeus_token_provider import reset_token_providers
+    from services.flight_offers_cache import reset_flight_offers_cache
+    from tests.payloads import make_flight_offers_payload
+    from tests.stub_server import StubAmadeusServer
+
+    conversations, script = load_scenario(args.scenario)
+    if args.payload:
+        with open(args.payload) as f:
+            payload = json.load(f)
+    else:
+        payload = make_flight_offers_payload(args.offers)
+    levels = [int(level) for level in args.concurrency.split(',')]
+    turns_per_conversation = sum(len(conversation['turns']) for conversation in conversations) / len(conversations)
+    print(f"{len(conversations)} conversas gravadas ({turns_per_conversation:.1f} turnos em média), "
+          f"{args.conversations} conversas por nível, LLM {args.llm_latency * 1000:.0f}ms, "
+          f"Amadeus {args.amadeus_latency * 1000:.0f}ms")
+
+    result = {
+        'commit': current_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'levels': [],
+    }
+    with StubAmadeusServer(payload=payload, latency=args.amadeus_latency) as server:
+        os.environ['AMADEUS_BASE_URL'] = server.url
+        os.environ['AMADEUS_HTTP_POOL_SIZE'] = str(max(levels) * 4)
+        reset_http_client()
+        reset_token_providers()
+        reset_rate_limiter()
+        reset_flight_offers_cache()
+        reset_llm(ReplayChatModel(script=script, latency=args.llm_latency))
+        try:
+            print(f"{'concorrência':>12} {'turnos/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'LLM/turno':>10} "
+                  f"{'Amadeus/turno':>14}")
+            for concurrency in levels:
+                CALLS.clear()
+                searches_before = server.count(SEARCH_PATH)
+                elapsed, latencies = asyncio.run(run_level(build_graph, conversations, args.conversations,
+                                                           concurrency))
+                turns = len(latencies)
+                level = {
+                    'concurrency': concurrency,
+                    'conversations': args.conversations,
+                    'turns': turns,
+                    'elapsed_s': elapsed,
+                    'turns_per_sec': turns / elapsed,
+                    'p50_ms': percentile(latencies, 0.50) * 1000,
+                    'p95_ms': percentile(latencies, 0.95) * 1000,
+                    'p99_ms': percentile(latencies, 0.99) * 1000,
+                    'llm_calls_per_turn': CALLS['llm'] / turns,
+                    'upstream_calls_per_turn': (server.count(SEARCH_PATH) - searches_before) / turns,
+                }
+                result['levels'].append(level)
+                print(f"{concurrency:>12} {level['turns_per_sec']:>9.1f} {level['p50_ms']:>6.1f}ms "
+                      f"{level['p95_ms']:>6.1f}ms {level['p99_ms']:>6.1f}ms {level['llm_calls_per_turn']:>10.2f} "
+                      f"{level['upstream_calls_per_turn']:>14.2f}")
+
+            result['memory'] = asyncio.run(measure_memory(build_graph, conversations, args.memory_conversations))
+            print(f"memória retida por conversa: {result['memory']['retained_bytes_per_conversation'] / 1024:.1f} KiB "
+                  f"(pico {result['memory']['peak_bytes'] / 1024 / 1024:.1f} MiB)")
+        finally:
+            reset_llm()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"resultado gravado em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_graph_startup.py
+"""
+Custo de inicialização e por requisição do grafo do chat.
+
+- inicialização: num interpretador novo, tempo de `import chat.run_chat_with_subgraphs` e até o
+  primeiro grafo compilado (`get_graph`), e se o cliente do LLM já foi criado nesse ponto;
+- por requisição: montar e compilar o grafo (e o checkpointer) a cada conversa, como o
+  `run_chatbot` fazia, contra reaproveitar o grafo do registro; e um turno completo com um
+  modelo falso (sem rede) em cada modo.
+
+Uso:
+    python -m benchmarks.bench_graph_startup --requests 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+from chat.checkpointers import create_checkpointer
+from chat.graph_registry import get_graph, reset_graph_registry
+from chat.llm import reset_llm
+from chat.run_chat_with_subgraphs import build_graph
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import chat.run_chat_with_subgraphs
+imported = time.perf_counter()
+from chat.graph_registry import get_graph
+get_graph(checkpoint_url='memory')
+compiled = time.perf_counter()
+import chat.llm
+print(json.dumps({'import': imported - start, 'first_graph': compiled - imported,
+                  'llm_created': chat.llm._llm is not None}))
+"""
+
+
+class FakeToolChatModel(FakeListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def measure_startup():
+    env = {**os.environ, 'CHECKPOINT_COMPACT_INTERVAL': '0'}
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True, env=env,
+                            check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def per_request(label, get, requests, run_turn):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        graph = get()
+        if run_turn:
+            graph.invoke({"messages": [("user", "oi")]}, {"configurable": {"thread_id": str(uuid.uuid4())}})
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{label:>32}: median={timings[len(timings) // 2] * 1000:8.3f}ms "
+          f"p95={timings[int(len(timings) * 0.95)] * 1000:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    os.environ['CHECKPOINT_COMPACT_INTERVAL'] = '0'
+
+    startup = measure_startup()
+    print(f"import: {startup['import'] * 1000:.0f}ms, primeiro grafo: {startup['first_graph'] * 1000:.1f}ms, "
+          f"cliente do LLM criado: {startup['llm_created']}")
+
+    reset_llm(FakeToolChatModel(responses=["Olá! Para onde você quer viajar?"]))
+    reset_graph_registry()
+    for run_turn in (False, True):
+        suffix = ' + turno' if run_turn else ''
+        per_request(f'build_graph por requisição{suffix}', lambda: build_graph(create_checkpointer('memory')),
+                    args.requests, run_turn)
+        per_request(f'get_graph (registro){suffix}', lambda: get_graph(checkpoint_url='memory'), args.requests,
+                    run_turn)
+    reset_graph_registry()
+    reset_llm()
+
+
+if __name__ == '__main__':
+    main()
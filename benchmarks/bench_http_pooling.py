@@ -0,0 +1,61 @@
+# benchmarks/bench_http_pooling.py
+"""
+Compara chamadas com `requests.get` avulso (uma conexão por requisição) e com o
+cliente pooled de `services.amadeus_http`, contra o servidor local de tests/stub_server.py.
+
+Uso:
+    python -m benchmarks.bench_http_pooling --requests 500 --threads 8 --latency 0.005
+
+O servidor local não usa TLS, então a diferença medida corresponde apenas ao handshake TCP;
+contra a API real (HTTPS) o ganho do keep-alive é maior.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from services.amadeus_http import AmadeusHttpClient
+from tests.payloads import make_flight_offers_payload
+from tests.stub_server import StubAmadeusServer
+
+
+def _timed(call):
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def run(label, call, total, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(lambda _: _timed(call), range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{label:>10}: p50={latencies[len(latencies) // 2] * 1000:7.2f}ms "
+          f"p95={latencies[int(len(latencies) * 0.95)] * 1000:7.2f}ms "
+          f"mean={statistics.mean(latencies) * 1000:7.2f}ms "
+          f"throughput={total / elapsed:8.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help='latência simulada do servidor (s)')
+    parser.add_argument('--offers', type=int, default=50, help='ofertas no payload de resposta')
+    args = parser.parse_args()
+
+    with StubAmadeusServer(payload=make_flight_offers_payload(args.offers), latency=args.latency) as server:
+        url = server.url + '/v2/shopping/flight-offers'
+        client = AmadeusHttpClient(base_url=server.url, pool_size=args.threads)
+
+        run('bare', lambda: requests.get(url).json(), args.requests, args.threads)
+        connections_before = server.connections
+        run('pooled', lambda: client.get(url).json(), args.requests, args.threads)
+        print(f"conexões abertas pelo cliente pooled: {server.connections - connections_before}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_intent_router.py
+"""
+Chamadas ao LLM por pergunta resolvida e latência do turno com e sem o pré-roteador por regras
+(`chat/intent_router.py`), nas perguntas rotuladas de tests/intent_questions.py.
+
+O modelo é simulado (responde depois de `--latency` segundos) e faz o que um bom roteador faria:
+no assistente principal, transfere as perguntas de voo para o assistente de voos; nos
+especializados, responde ao usuário. Sem o pré-roteador, uma pergunta de voo custa duas chamadas
+(roteamento e resposta); com ele, as que as regras reconhecem custam uma.
+
+Uso:
+    python -m benchmarks.bench_intent_router --latency 0.8 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+from collections import Counter
+
+from chat.intent_router import IntentRouter
+from chat.llm import reset_llm
+from chat.llm_cache import reset_llm_cache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from tests.intent_questions import QUESTIONS, TODAY
+
+import chat.run_chat_with_subgraphs as subgraphs
+
+CALLS = Counter()
+# Perguntas de voo sem parâmetros suficientes para as regras: o LLM ainda as transfere
+LLM_ONLY_FLIGHT_QUESTIONS = {"Quero um voo barato", "Quero viajar em agosto, alguma sugestão?"}
+
+
+class SimulatedRouterModel(BaseChatModel):
+    """Modelo falso com latência fixa: transfere perguntas de voo e responde às demais."""
+
+    latency: float = 0.5
+    flight_questions: frozenset = frozenset()
+
+    @property
+    def _llm_type(self):
+        return 'simulated-router'
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        CALLS['model'] += 1
+        time.sleep(self.latency)
+        question = next(message.content for message in reversed(messages) if message.type == 'human')
+        if any(isinstance(message, ToolMessage) for message in messages) or question not in self.flight_questions:
+            reply = AIMessage(content="Aqui está o que encontrei.")
+        else:
+            reply = AIMessage(content="", tool_calls=[{"name": "ToFlightSearchAssistant", "args": {"request": question},
+                                                       "id": f"call_{uuid.uuid4().hex[:12]}"}])
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+def replay(questions, router, latency, repeat):
+    subgraphs.intent_router = router
+    reset_llm(SimulatedRouterModel(latency=latency, flight_questions=frozenset(
+        [question for question, expected in questions if expected] + list(LLM_ONLY_FLIGHT_QUESTIONS))))
+    graph = subgraphs.build_graph(MemorySaver())
+    CALLS.clear()
+    latencies = []
+    for _ in range(repeat):
+        for question, _ in questions:
+            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            start = time.perf_counter()
+            graph.invoke({"messages": [("user", question)]}, config)
+            latencies.append(time.perf_counter() - start)
+    reset_llm()
+    return CALLS['model'], latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.5, help='latência simulada do modelo, em segundos')
+    parser.add_argument('--repeat', type=int, default=1, help='repetições do conjunto de perguntas')
+    args = parser.parse_args()
+
+    os.environ['LLM_CACHE'] = 'none'
+    reset_llm_cache()
+
+    router = IntentRouter()
+    start = time.perf_counter()
+    routed = sum(router.classify(question, TODAY) is not None for question, _ in QUESTIONS)
+    classify_us = (time.perf_counter() - start) / len(QUESTIONS) * 1e6
+    flight = sum(1 for question, expected in QUESTIONS if expected or question in LLM_ONLY_FLIGHT_QUESTIONS)
+    print(f"{len(QUESTIONS)} perguntas ({flight} de voo, {routed} reconhecidas pelas regras), "
+          f"classificação {classify_us:.0f}µs/pergunta, latência simulada {args.latency:.2f}s")
+
+    for label, pre_router in (("só LLM", None), ("pré-roteador", router)):
+        calls, latencies = replay(QUESTIONS, pre_router, args.latency, args.repeat)
+        turns = len(latencies)
+        print(f"{label:13s} chamadas/pergunta={calls / turns:.2f} "
+              f"latência média={statistics.mean(latencies):.2f}s "
+              f"p95={sorted(latencies)[int(turns * 0.95) - 1]:.2f}s total={sum(latencies):.1f}s")
+
+
+if __name__ == '__main__':
+    main()
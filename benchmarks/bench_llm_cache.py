@@ -0,0 +1,116 @@
+# benchmarks/bench_llm_cache.py
+"""
+Reproduz um log de perguntas no assistente principal (decisão de roteamento) com o cache do LLM
+desligado, exato e semântico (`chat/llm_cache.py`) e mostra acertos, chamadas ao modelo e a
+latência economizada.
+
+O modelo é simulado (responde depois de `--latency` segundos), então o benchmark roda sem rede.
+Sem `--openai-embeddings`, o nível semântico usa embeddings locais de trigramas de caracteres,
+que só aproximam perguntas com a mesma grafia; com ele, usa `LLM_CACHE_EMBEDDING_MODEL`.
+
+Uso:
+    python -m benchmarks.bench_llm_cache --latency 0.8
+    python -m benchmarks.bench_llm_cache --log perguntas.txt --similarity 0.9
+
+O log é um arquivo de texto com uma pergunta (primeira mensagem da conversa) por linha.
+"""
+import argparse
+import hashlib
+import os
+import time
+from collections import Counter
+
+import numpy as np
+from chat.llm_cache import LLMResponseCache, create_cache_embeddings, reset_llm_cache
+from chat.run_chat_with_subgraphs import assistant_runnable
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+CALLS = Counter()
+
+
+class SimulatedChatModel(FakeListChatModel):
+    """Modelo falso com latência fixa por chamada."""
+
+    latency: float = 0.5
+
+    def _call(self, *args, **kwargs):
+        CALLS['model'] += 1
+        time.sleep(self.latency)
+        return super()._call(*args, **kwargs)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class TrigramEmbeddings:
+    """Embeddings locais: trigramas de caracteres espalhados em 512 posições."""
+
+    def embed_query(self, text):
+        text = f"  {text.casefold()} "
+        vector = np.zeros(512)
+        for start in range(len(text) - 2):
+            vector[int(hashlib.md5(text[start:start + 3].encode()).hexdigest(), 16) % 512] += 1
+        return vector.tolist()
+
+
+def sample_log():
+    questions = [
+        "Quero passagens de VIX para São Paulo em agosto",
+        "quero passagens de vix para são paulo em agosto",
+        "Quais os melhores passeios no Rio de Janeiro?",
+        "Quais os melhores passeios no Rio de Janeiro",
+        "Oi, tudo bem?",
+        "oi tudo bem?",
+        "Voos baratos para Salvador no feriado",
+        "Quero passagens de VIX para São Paulo em agosto",
+        "O que fazer em Salvador?",
+        "Oi, tudo bem?",
+        "Quais os melhores passeios no Rio de Janeiro?",
+        "Voos baratos para Salvador no feriado!",
+    ]
+    return questions * 5
+
+
+def replay(questions, cache, latency):
+    CALLS.clear()
+    os.environ['LLM_CACHE'] = 'exact' if cache is not None else 'none'
+    reset_llm_cache(cache)
+    runnable = assistant_runnable(SimulatedChatModel(responses=["Posso ajudar com isso."], latency=latency))
+    start = time.perf_counter()
+    for question in questions:
+        runnable.invoke({"messages": [("user", question)]})
+    elapsed = time.perf_counter() - start
+    reset_llm_cache()
+    return elapsed, CALLS['model']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--log', help='arquivo com uma pergunta por linha')
+    parser.add_argument('--latency', type=float, default=0.5, help='latência simulada do modelo, em segundos')
+    parser.add_argument('--similarity', type=float, default=0.9, help='similaridade mínima do nível semântico')
+    parser.add_argument('--openai-embeddings', action='store_true', help='usa os embeddings da OpenAI')
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log) as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = sample_log()
+    embeddings = create_cache_embeddings() if args.openai_embeddings else TrigramEmbeddings()
+
+    print(f"{len(questions)} perguntas, latência simulada {args.latency:.2f}s")
+    for label, cache in (("sem cache", None),
+                         ("exato", LLMResponseCache()),
+                         ("semântico", LLMResponseCache(embeddings=embeddings, threshold=args.similarity))):
+        elapsed, calls = replay(questions, cache, args.latency)
+        line = f"{label:10s} chamadas={calls:4d} tempo={elapsed:7.2f}s"
+        if cache is not None:
+            stats = cache.stats.as_dict()
+            line += (f" acertos={stats['hits']:4d} (semânticos {stats['semantic_hits']}) "
+                     f"taxa={stats['hit_rate']:.0%} latência economizada={stats['latency_saved']:.2f}s")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_parse_flight_offers.py
+"""
+Compara o tempo de parse e o pico de memória de uma resposta da busca de ofertas em cada modo:
+
+- legacy: caminho antigo (`response.json()` -> `FlightOffersSearchResponse(**data)` ->
+  `model_dump()` -> `json.dumps(indent=4)` para o log);
+- full: `FlightOffersSearchResponse.model_validate_json(bytes)`;
+- lite: `LiteFlightOffersSearchResponse.model_validate_json(bytes)` (só os campos usados pelo chat).
+
+Uso:
+    python -m benchmarks.bench_parse_flight_offers --offers 250 --repeat 20
+    python -m benchmarks.bench_parse_flight_offers --payload gravacao.json
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from models.flight_offers_models import FlightOffersSearchResponse
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+from tests.payloads import make_flight_offers_payload
+
+
+def parse_legacy(content):
+    flight_offers = FlightOffersSearchResponse(**json.loads(content))
+    json.dumps(flight_offers.model_dump(), indent=4)
+    return flight_offers
+
+
+MODES = {
+    'legacy': parse_legacy,
+    'full': lambda content: parse_flight_offers(content, 'full'),
+    'lite': lambda content: parse_flight_offers(content, 'lite'),
+}
+
+
+def measure(parse, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(content)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = parse(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    timings.sort()
+    return timings[len(timings) // 2], timings[0], peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--offers', type=int, default=250, help='ofertas no payload sintético')
+    parser.add_argument('--payload', help='arquivo JSON com uma resposta gravada da Amadeus (substitui --offers)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, 'rb') as f:
+            content = f.read()
+    else:
+        content = json.dumps(make_flight_offers_payload(args.offers)).encode()
+    print(f"payload: {len(content) / 1024:.0f} KiB")
+
+    for name, parse in MODES.items():
+        median, best, peak = measure(parse, content, args.repeat)
+        print(f"{name:>7}: median={median * 1000:7.2f}ms best={best * 1000:7.2f}ms peak={peak / 1024:8.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
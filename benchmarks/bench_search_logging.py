@@ -0,0 +1,112 @@
+# benchmarks/bench_search_logging.py
+"""
+Vazão das buscas de voos (`AmadeusFlightOffersSearchService.search_flights`, sem cache, contra o
+servidor local de tests/stub_server.py) com o log de antes e com `services/search_logging.py`:
+
+- antes: FileHandler síncrono no logger raiz, corpo inteiro da resposta em INFO, o JSON das
+  ofertas re-serializado com indentação e `print(params)` em toda busca;
+- compacto: um registro curto por busca, ainda escrito na thread da requisição;
+- compacto + fila: o mesmo registro pelo QueueHandler/QueueListener;
+- json + fila + amostra: formato JSON, com o corpo de 1% das buscas.
+
+Uso:
+    python -m benchmarks.bench_search_logging --requests 200 --threads 8 --offers 250
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+from services.amadeus_http import reset_http_client
+from services.amadeus_rate_limiter import reset_rate_limiter
+from services.amadeus_token_provider import reset_token_providers
+from services.flight_offers_cache import reset_flight_offers_cache
+from services.search_logging import TEXT_FORMAT, SearchLog, configure_search_logging, reset_search_logging
+from tests.payloads import make_flight_offers_payload
+from tests.stub_server import StubAmadeusServer
+
+
+class LegacySearchLog(SearchLog):
+    """O log de antes: parâmetros no stdout e o corpo da resposta duas vezes, em INFO."""
+
+    def search(self, params, status, latency, offers=None, size=None, error=None):
+        print(params)
+
+    def payload(self, params, content):
+        self.logger.info(f"Request successful: {json.loads(content)}")
+        self.logger.info(f"Flight offers data: {json.dumps(json.loads(content), indent=4)}")
+
+
+def _use_file_handler(log_file):
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    logging.getLogger().addHandler(handler)
+    return handler
+
+
+def run(label, search_log, total, threads):
+    service = AmadeusFlightOffersSearchService(search_log=search_log)
+    start_date = date.today() + timedelta(days=30)
+
+    def search(number):
+        begin = time.perf_counter()
+        # Datas diferentes: nenhuma busca é compartilhada pelo single-flight
+        service.search_flights('VIX', 'GRU', (start_date + timedelta(days=number)).isoformat())
+        return time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(search, range(total)))
+    elapsed = time.perf_counter() - begin
+    return (f"{label:24s} vazão={total / elapsed:7.1f} buscas/s p50={latencies[len(latencies) // 2] * 1000:6.1f}ms "
+            f"p95={latencies[int(len(latencies) * 0.95)] * 1000:6.1f}ms média={statistics.mean(latencies) * 1000:6.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--offers', type=int, default=250, help='ofertas no payload de resposta')
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    with StubAmadeusServer(payload=make_flight_offers_payload(args.offers)) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        os.environ.update(AMADEUS_BASE_URL=server.url, AMADEUS_API_KEY='stub', AMADEUS_API_SECRET='stub',
+                          AMADEUS_RATE_LIMIT='100000', AMADEUS_CACHE_BACKEND='none')
+        reset_http_client()
+        reset_token_providers()
+        reset_rate_limiter()
+        reset_flight_offers_cache()
+        print(f"{args.requests} buscas, {args.threads} threads, {args.offers} ofertas por resposta")
+
+        for label, mode in (("antes", 'legacy'), ("compacto", 'compact'), ("compacto + fila", 'queue'),
+                            ("json + fila + amostra 1%", 'json')):
+            log_file = os.path.join(directory, f"{mode}.log")
+            handler = None
+            if mode in ('legacy', 'compact'):
+                handler = _use_file_handler(log_file)
+            else:
+                configure_search_logging(log_file, 'json' if mode == 'json' else 'text', force=True)
+            search_log = {'legacy': LegacySearchLog(root, payload_sample_rate=1),
+                          'json': SearchLog(root, payload_sample_rate=0.01)}.get(mode, SearchLog(root, 0))
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                line = run(label, search_log, args.requests, args.threads)
+            if handler is not None:
+                root.removeHandler(handler)
+                handler.close()
+            else:
+                reset_search_logging()
+            print(f"{line} log={os.path.getsize(log_file) / 1024:9.1f}KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_tool_result_tokens.py
+"""
+Mede os tokens enviados ao LLM por turno, antes (ToolMessage com o `FlightOffersSearchResponse`
+inteiro, como o ToolNode padrão fazia) e depois do resumo de `services/flight_offers_digest.py`.
+
+Cada turno do assistente reenvia todo o histórico, então os tokens por turno são a soma
+dos tokens de todas as mensagens até ali.
+
+Uso:
+    python -m benchmarks.bench_tool_result_tokens
+    python -m benchmarks.bench_tool_result_tokens --conversation conversa.json --budget 600
+
+O arquivo de conversa gravada é uma lista de mensagens {"role": "user"|"assistant", "content": ...}
+ou {"role": "tool", "payload": <resposta JSON da Amadeus>}.
+"""
+import argparse
+import json
+
+from chat.utils import render_tool_output
+from langgraph.prebuilt.tool_node import str_output
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+from services.flight_offers_digest import count_tokens
+from tests.payloads import make_flight_offers_payload
+
+
+def sample_conversation():
+    return [
+        {"role": "user", "content": "Quero ir de Vitória para São Paulo no dia 5 de agosto, só ida."},
+        {"role": "tool", "payload": make_flight_offers_payload(250)},
+        {"role": "assistant", "content": "Encontrei voos a partir de R$ 400,00. Prefere algum horário?"},
+        {"role": "user", "content": "E para Guarulhos saindo do Rio, mesmo dia?"},
+        {"role": "tool", "payload": make_flight_offers_payload(120, origin="GIG")},
+        {"role": "assistant", "content": "Saindo do Galeão o menor preço é R$ 400,00."},
+        {"role": "user", "content": "Mostre só os voos diretos de Vitória."},
+        {"role": "tool", "payload": make_flight_offers_payload(40)},
+        {"role": "assistant", "content": "Há 40 voos diretos; o mais barato custa R$ 400,00."},
+    ]
+
+
+def tokens_per_turn(conversation, render):
+    history = 0
+    turns = []
+    for message in conversation:
+        if message["role"] == "tool":
+            content = render(parse_flight_offers(json.dumps(message["payload"]).encode()))
+        else:
+            content = message["content"]
+        history += count_tokens(content)
+        if message["role"] == "tool":
+            # O assistente é chamado de novo logo após o resultado da ferramenta
+            turns.append(history)
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--conversation', help='arquivo JSON com uma conversa gravada')
+    parser.add_argument('--budget', type=int, help='orçamento de tokens do resumo (TOOL_RESULT_TOKEN_BUDGET)')
+    args = parser.parse_args()
+
+    if args.budget:
+        import os
+
+        os.environ['TOOL_RESULT_TOKEN_BUDGET'] = str(args.budget)
+    if args.conversation:
+        with open(args.conversation) as f:
+            conversation = json.load(f)
+    else:
+        conversation = sample_conversation()
+
+    before = tokens_per_turn(conversation, str_output)
+    after = tokens_per_turn(conversation, render_tool_output)
+    for turn, (old, new) in enumerate(zip(before, after), start=1):
+        print(f"turno {turn}: antes={old:8d} tokens  depois={new:6d} tokens  ({old / new:5.1f}x)")
+    print(f"total: antes={sum(before)} depois={sum(after)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# chat/consumers.py
+import asyncio
+import logging
+import re
+import uuid
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.core import signing
+
+from .graph_registry import aget_graph
+from .streaming import stream_chat_turn
+
+_THREAD_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+_THREAD_SIGNER = signing.Signer(salt='chat.consumers.thread')
+
+
+def sign_thread_id(thread_id):
+    """:return: Token que prova que a conversa `thread_id` foi aberta por este servidor"""
+    return _THREAD_SIGNER.sign(thread_id)
+
+
+def unsign_thread_id(token):
+    """
+    :return: O thread_id do token emitido por `sign_thread_id`
+    :raises signing.BadSignature: Se o token foi alterado ou não foi emitido por este servidor
+    """
+    thread_id = _THREAD_SIGNER.unsign(token)
+    if not _THREAD_ID.fullmatch(thread_id):
+        raise signing.BadSignature(f"Invalid thread id: {thread_id!r}")
+    return thread_id
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Chat por WebSocket (ws/chat/). Cada conexão é uma conversa com o seu `thread_id`, gerado na
+    conexão. O evento `session` traz também um `token` assinado (SECRET_KEY); só quem o recebeu
+    retoma a conversa salva no checkpointer, conectando com `?token=...`. Conexões com tokens
+    alterados ou forjados são recusadas.
+
+    O cliente envia {"message": "..."} e recebe os eventos de `chat.streaming.stream_chat_turn`
+    enquanto o turno roda. Todas as conexões compartilham o mesmo grafo compilado e o mesmo event
+    loop; um turno por conexão de cada vez.
+    """
+
+    async def connect(self):
+        self.turn = None
+        token = parse_qs(self.scope.get('query_string', b'').decode()).get('token', [''])[0]
+        if token:
+            try:
+                self.thread_id = unsign_thread_id(token)
+            except signing.BadSignature:
+                await self.close()
+                return
+        else:
+            self.thread_id = str(uuid.uuid4())
+        await self.accept()
+        await self.send_json({"type": "session", "thread_id": self.thread_id, "token": sign_thread_id(self.thread_id)})
+
+    async def disconnect(self, code):
+        if self.turn is not None and not self.turn.done():
+            self.turn.cancel()
+
+    async def receive_json(self, content, **kwargs):
+        message = content.get('message') if isinstance(content, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            await self.send_json({"type": "error", "detail": 'Send {"message": "<text>"}.'})
+            return
+        if self.turn is not None and not self.turn.done():
+            await self.send_json({"type": "error", "detail": "A message is already being answered."})
+            return
+        # O turno roda em uma tarefa para que a conexão continue recebendo (ex: o fechamento)
+        self.turn = asyncio.create_task(self._run_turn(message))
+
+    async def _run_turn(self, message):
+        try:
+            graph = await aget_graph()
+            async for event in stream_chat_turn(graph, message, self.thread_id):
+                await self.send_json(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.getLogger().exception(f"Chat turn failed for thread {self.thread_id}: {e!r}")
+            await self.send_json({"type": "error", "detail": "Sorry, something went wrong. Please try again."})
@@ -0,0 +1,226 @@
+# chat/context_window.py
+"""
+Janela de contexto enviada ao LLM pelos assistentes.
+
+O canal `messages` do State só cresce (o `add_messages` do LangGraph não remove mensagens), então
+a janela é aplicada no prompt: o histórico continua inteiro no checkpoint, mas cada chamada ao
+LLM recebe só
+
+- um resumo acumulado das mensagens antigas (guardado no State em `conversation_summary`);
+- os turnos mais recentes que cabem em `CONTEXT_TOKEN_BUDGET` tokens;
+- o conteúdo dos ToolMessages apenas dos últimos `CONTEXT_TOOL_PAYLOAD_TURNS` turnos; os mais
+  antigos viram um marcador curto (com a referência `ref=fs-...`, quando houver).
+
+Os cortes são sempre no início de um turno (mensagem do usuário), então toda AIMessage com
+tool_calls continua acompanhada dos seus ToolMessages, como a API da OpenAI exige.
+"""
+import json
+import logging
+import os
+import re
+
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import Runnable
+from services.flight_offers_digest import count_tokens
+
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_TOOL_PAYLOAD_TURNS = 1
+DEFAULT_SUMMARY_TOKENS = 400
+# Ao resumir, a janela é reduzida até esta fração do orçamento, para não resumir a cada turno
+LOW_WATERMARK = 0.6
+
+# Tag das chamadas ao LLM que atualizam o resumo (o streaming do chat não repassa esses tokens)
+SUMMARY_TAG = 'context_summary'
+
+_RESULT_REFERENCE = re.compile(r'ref=(fs-[0-9a-f]+)')
+
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a user and a travel assistant. "
+    "Update the summary with the new messages. Keep every fact needed to continue helping the user: "
+    "origin, destination, dates, passengers, budget and other preferences, flights already offered "
+    "(with prices) and decisions taken, and any search result reference (ref=fs-...). "
+    "Answer only with the updated summary, in at most {words} words."
+)
+
+
+def message_tokens(message):
+    """Tokens aproximados de uma mensagem: conteúdo mais os argumentos das tool_calls."""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tokens = count_tokens(content) + 4
+    for tool_call in getattr(message, 'tool_calls', None) or ():
+        tokens += count_tokens(tool_call['name'] + json.dumps(tool_call['args']))
+    return tokens
+
+
+def split_turns(messages):
+    """Agrupa as mensagens em turnos, cada um começando numa mensagem do usuário."""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def stub_tool_message(message):
+    """Troca o conteúdo de um ToolMessage antigo por um marcador, mantendo o tool_call_id."""
+    reference = _RESULT_REFERENCE.search(message.content if isinstance(message.content, str) else '')
+    note = f"[{message.name or 'tool'} result omitted from context"
+    if reference:
+        note += f"; full result ref={reference.group(1)} (use get_flight_search_result)"
+    return ToolMessage(content=note + "]", tool_call_id=message.tool_call_id, name=message.name, id=message.id)
+
+
+def render_transcript(messages):
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            role = 'user'
+        elif isinstance(message, ToolMessage):
+            role = 'tool'
+        else:
+            role = 'assistant'
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        for tool_call in getattr(message, 'tool_calls', None) or ():
+            content += f" [calls {tool_call['name']}({json.dumps(tool_call['args'], ensure_ascii=False)})]"
+        lines.append(f"{role}: {content}")
+    return '\n'.join(lines)
+
+
+class ExtractiveSummarizer:
+    """Resumo sem LLM: as mensagens do usuário e do assistente, truncadas, dentro do orçamento de tokens."""
+
+    def __init__(self, max_tokens=None, max_chars_per_message=200):
+        self.max_tokens = max_tokens or int(os.getenv('CONTEXT_SUMMARY_TOKENS', DEFAULT_SUMMARY_TOKENS))
+        self.max_chars_per_message = max_chars_per_message
+
+    def summarize(self, summary, messages):
+        lines = [line[:self.max_chars_per_message] for line in render_transcript(messages).splitlines()
+                 if not line.startswith('tool: ') or 'ref=' in line]
+        if summary:
+            lines = summary.splitlines() + lines
+        # Descarta as linhas mais antigas até caber no orçamento
+        while len(lines) > 1 and count_tokens('\n'.join(lines)) > self.max_tokens:
+            lines.pop(0)
+        return '\n'.join(lines)
+
+    async def asummarize(self, summary, messages):
+        return self.summarize(summary, messages)
+
+
+class LLMSummarizer:
+    """
+    Atualiza o resumo acumulado com um LLM (o mesmo dos assistentes, por padrão). `llm` pode ser
+    o modelo ou uma função que o retorna (ex: `chat.llm.get_llm`), chamada só no primeiro resumo.
+    """
+
+    def __init__(self, llm, max_tokens=None):
+        self._llm = llm
+        self.max_tokens = max_tokens or int(os.getenv('CONTEXT_SUMMARY_TOKENS', DEFAULT_SUMMARY_TOKENS))
+
+    @property
+    def llm(self):
+        return self._llm if isinstance(self._llm, Runnable) else self._llm()
+
+    def _prompt(self, summary, messages):
+        return [
+            SystemMessage(content=SUMMARY_PROMPT.format(words=int(self.max_tokens * 0.75))),
+            HumanMessage(content=f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n"
+                                 f"{render_transcript(messages)}"),
+        ]
+
+    def summarize(self, summary, messages):
+        return self.llm.invoke(self._prompt(summary, messages), config={"tags": [SUMMARY_TAG]}).content
+
+    async def asummarize(self, summary, messages):
+        return (await self.llm.ainvoke(self._prompt(summary, messages), config={"tags": [SUMMARY_TAG]})).content
+
+
+class ContextWindow:
+    """
+    Monta as mensagens do prompt de um assistente a partir do State (ver docstring do módulo).
+
+    `prepare`/`aprepare` devolvem o State para o prompt e as atualizações de State (novo resumo e
+    id da última mensagem resumida) que o assistente deve devolver junto com a resposta.
+    """
+
+    def __init__(self, summarizer=None, budget=None, tool_payload_turns=None):
+        self.summarizer = summarizer or ExtractiveSummarizer()
+        self.budget = budget or int(os.getenv('CONTEXT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET))
+        self.tool_payload_turns = (tool_payload_turns if tool_payload_turns is not None
+                                   else int(os.getenv('CONTEXT_TOOL_PAYLOAD_TURNS', DEFAULT_TOOL_PAYLOAD_TURNS)))
+        self.logger = logging.getLogger()
+
+    def _plan(self, state):
+        """
+        :return: (mensagens ainda não resumidas, compactadas; índice de corte da janela
+            nessas mensagens, ou None se tudo cabe no orçamento)
+        """
+        messages = state["messages"]
+        start = 0
+        summarized_until = state.get("summarized_until")
+        if summarized_until:
+            for index in range(len(messages) - 1, -1, -1):
+                if messages[index].id == summarized_until:
+                    start = index + 1
+                    break
+        turns = split_turns(messages[start:])
+        stale = len(turns) - self.tool_payload_turns
+        turns = [[stub_tool_message(message) if isinstance(message, ToolMessage) and index < stale else message
+                  for message in turn]
+                 for index, turn in enumerate(turns)]
+        sizes = [sum(message_tokens(message) for message in turn) for turn in turns]
+        compacted = [message for turn in turns for message in turn]
+        if sum(sizes) <= self.budget:
+            return compacted, None
+
+        # Mantém os turnos mais recentes que cabem abaixo do LOW_WATERMARK (sempre o turno atual)
+        kept, tokens = 0, 0
+        for size in reversed(sizes):
+            if kept and tokens + size > self.budget * LOW_WATERMARK:
+                break
+            kept += 1
+            tokens += size
+        cut = sum(len(turn) for turn in turns[:len(turns) - kept])
+        return compacted, cut if cut else None
+
+    def _result(self, state, compacted, cut, summary):
+        if cut is None:
+            window, updates = compacted, {}
+        else:
+            window = compacted[cut:]
+            updates = {"conversation_summary": summary, "summarized_until": compacted[cut - 1].id}
+            self.logger.info(f"Context window summarized {cut} messages; {len(window)} kept in the prompt")
+        if summary:
+            window = [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] + window
+        return {**state, "messages": window}, updates
+
+    def prepare(self, state):
+        compacted, cut = self._plan(state)
+        summary = state.get("conversation_summary") or ''
+        if cut is not None:
+            summary = self.summarizer.summarize(summary, compacted[:cut])
+        return self._result(state, compacted, cut, summary)
+
+    async def aprepare(self, state):
+        compacted, cut = self._plan(state)
+        summary = state.get("conversation_summary") or ''
+        if cut is not None:
+            summary = await self.summarizer.asummarize(summary, compacted[:cut])
+        return self._result(state, compacted, cut, summary)
+
+
+def create_context_window(llm=None):
+    """
+    ContextWindow configurada pelo ambiente; `CONTEXT_SUMMARIZER` escolhe o resumo: 'llm' (padrão,
+    usa `llm`, o modelo ou uma função que o cria), 'extractive' (sem chamadas extras ao LLM) ou
+    'none' (desliga a janela).
+    """
+    summarizer = os.getenv('CONTEXT_SUMMARIZER', 'llm')
+    if summarizer == 'none':
+        return None
+    if summarizer == 'llm' and llm is not None:
+        return ContextWindow(LLMSummarizer(llm))
+    if summarizer in ('llm', 'extractive'):
+        return ContextWindow(ExtractiveSummarizer())
+    raise ValueError(f"Unknown CONTEXT_SUMMARIZER: {summarizer}")
@@ -0,0 +1,135 @@
+# chat/graph_registry.py
+"""
+Grafos do chat compilados uma vez por processo.
+
+Montar o StateGraph, os nós e o checkpointer a cada conversa custa dezenas de milissegundos;
+`get_graph` compila cada grafo na primeira chamada e devolve o mesmo objeto nas seguintes. Os
+grafos compilados não guardam estado de conversa (ele fica no checkpointer, por thread_id), então
+podem ser compartilhados entre requisições e threads. Os grafos assíncronos usam conexões
+(aiosqlite) presas ao event loop que as abriu, então são compilados uma vez por event loop.
+"""
+import asyncio
+import importlib
+import os
+import threading
+import weakref
+
+from .checkpointers import DEFAULT_CHECKPOINT_URL, create_async_checkpointer, create_checkpointer
+
+# Nome do grafo -> função `build_graph(checkpointer)` que o monta e compila ('módulo:função')
+GRAPH_BUILDERS = {
+    'subgraphs': 'chat.run_chat_with_subgraphs:build_graph',
+    'simple': 'chat.run_chat:build_graph',
+}
+DEFAULT_GRAPH = 'subgraphs'
+
+
+def _load_builder(name):
+    try:
+        module_name, _, function = GRAPH_BUILDERS[name].partition(':')
+    except KeyError:
+        raise ValueError(f"Unknown graph: {name}")
+    return getattr(importlib.import_module(module_name), function)
+
+
+class GraphRegistry:
+    """
+    Cache de grafos compilados, por (nome do grafo, CHECKPOINT_URL); os assíncronos, também por
+    event loop.
+
+    Cada entrada tem seu próprio checkpointer; os assíncronos ficam abertos até `aclose` (ou até o
+    event loop ser descartado).
+    """
+
+    def __init__(self):
+        self._graphs = {}
+        self._checkpointers = {}
+        self._lock = threading.Lock()
+        # event loop -> ({chave: grafo}, {chave: checkpointer}, asyncio.Lock do loop)
+        self._async_graphs = weakref.WeakKeyDictionary()
+
+    def get(self, name=DEFAULT_GRAPH, checkpoint_url=None):
+        """Grafo para graph.stream / graph.invoke."""
+        key = (name, checkpoint_url or os.getenv('CHECKPOINT_URL', DEFAULT_CHECKPOINT_URL))
+        graph = self._graphs.get(key)
+        if graph is not None:
+            return graph
+        with self._lock:
+            if key not in self._graphs:
+                checkpointer = create_checkpointer(key[1])
+                self._graphs[key] = _load_builder(name)(checkpointer)
+                self._checkpointers[key] = checkpointer
+            return self._graphs[key]
+
+    def _loop_graphs(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_graphs.get(loop)
+            if entry is None:
+                entry = self._async_graphs[loop] = ({}, {}, asyncio.Lock())
+            return entry
+
+    async def aget(self, name=DEFAULT_GRAPH, checkpoint_url=None):
+        """Grafo para graph.astream / graph.ainvoke do event loop atual, com checkpointer assíncrono."""
+        key = (name, checkpoint_url or os.getenv('CHECKPOINT_URL', DEFAULT_CHECKPOINT_URL))
+        graphs, checkpointers, lock = self._loop_graphs()
+        graph = graphs.get(key)
+        if graph is not None:
+            return graph
+        async with lock:
+            if key not in graphs:
+                checkpointer = await create_async_checkpointer(key[1]).__aenter__()
+                graphs[key] = _load_builder(name)(checkpointer)
+                checkpointers[key] = checkpointer
+            return graphs[key]
+
+    def close(self):
+        """Fecha os checkpointers síncronos e esquece todos os grafos."""
+        with self._lock:
+            for checkpointer in self._checkpointers.values():
+                checkpointer.__exit__(None, None, None)
+            self._graphs.clear()
+            self._checkpointers.clear()
+            self._async_graphs.clear()
+
+    async def aclose(self):
+        """
+        Fecha os checkpointers assíncronos do event loop atual e os síncronos, e esquece os grafos.
+        Os checkpointers de outros event loops só podem ser fechados pelo próprio loop.
+        """
+        with self._lock:
+            entry = self._async_graphs.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            for checkpointer in entry[1].values():
+                await checkpointer.__aexit__(None, None, None)
+        self.close()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_graph_registry():
+    """Retorna o registro de grafos compartilhado do processo."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GraphRegistry()
+        return _registry
+
+
+def reset_graph_registry():
+    """Fecha e descarta o registro compartilhado (usado nos testes)."""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.close()
+
+
+def get_graph(name=DEFAULT_GRAPH, checkpoint_url=None):
+    return get_graph_registry().get(name, checkpoint_url)
+
+
+async def aget_graph(name=DEFAULT_GRAPH, checkpoint_url=None):
+    return await get_graph_registry().aget(name, checkpoint_url)
@@ -0,0 +1,246 @@
+# chat/intent_router.py
+"""
+Pré-roteador por regras, antes do assistente principal.
+
+Pedidos óbvios de busca de voos ("passagens de VIX para São Paulo em 05/08", "flights from GRU
+to LIS on August 5") não precisam de uma chamada ao LLM só para decidir `ToFlightSearchAssistant`:
+o grafo vai direto para o assistente de voos, com origem, destino, datas e passageiros já
+extraídos no pedido da transferência. O roteador só decide com destino e data, ou com origem e
+destino. Na dúvida (sem palavra de voo; com palavras de turismo, de datas flexíveis ou de dúvidas
+sobre um voo, como bagagem, pet ou reembolso; sem esses parâmetros), o assistente principal
+segue como antes.
+"""
+import os
+import re
+import unicodedata
+import uuid
+from datetime import date
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Palavras comparadas sem acentos e em minúsculas
+FLIGHT_KEYWORDS = (
+    'passagem', 'passagens', 'voo', 'voos', 'voar', 'aereo', 'aerea', 'aereas', 'aereos', 'bilhete',
+    'flight', 'flights', 'fly', 'airfare', 'airfares', 'plane ticket', 'plane tickets',
+)
+ENGLISH_KEYWORDS = ('flight', 'flights', 'fly', 'airfare', 'airfares', 'plane ticket', 'plane tickets')
+TOURISM_KEYWORDS = (
+    'turismo', 'turistico', 'turisticos', 'passeio', 'passeios', 'o que fazer', 'atracoes', 'atracao',
+    'roteiro', 'hotel', 'hoteis', 'restaurante', 'restaurantes', 'praias', 'museu', 'museus',
+    'tourism', 'tourist', 'attractions', 'things to do', 'sightseeing', 'itinerary', 'restaurants', 'museums',
+)
+# Perguntas de datas flexíveis ficam com o LLM, que usa a busca de datas mais baratas (find_cheapest_dates)
+FLEXIBLE_DATE_KEYWORDS = (
+    'datas mais baratas', 'data mais barata', 'dia mais barato', 'dias mais baratos', 'datas flexiveis',
+    'data flexivel', 'quando e mais barato', 'cheapest date', 'cheapest dates', 'cheapest day', 'cheapest days',
+    'flexible dates', 'flexible date', 'when is it cheapest',
+)
+# Perguntas sobre um voo (bagagem, pet, cancelamento...), e não pedidos de busca
+NOT_SEARCH_KEYWORDS = (
+    'bagagem', 'bagagens', 'mala', 'malas', 'pet', 'pets', 'cancelar', 'cancelamento', 'reembolso', 'atraso',
+    'atrasado', 'remarcar', 'luggage', 'baggage', 'refund', 'cancel', 'cancellation', 'delay', 'delayed',
+)
+RETURN_KEYWORDS = ('volta', 'retorno', 'voltando', 'ida e volta', 'return', 'returning', 'round trip', 'back on')
+
+# Cidades frequentes -> código IATA da cidade (a Amadeus aceita códigos de cidade na busca).
+# Ficam de fora nomes ambíguos em frases comuns (ex: Natal, no "feriado de Natal").
+CITY_CODES = {
+    'sao paulo': 'SAO', 'rio de janeiro': 'RIO', 'vitoria': 'VIX', 'brasilia': 'BSB', 'salvador': 'SSA',
+    'belo horizonte': 'BHZ', 'recife': 'REC', 'fortaleza': 'FOR', 'porto alegre': 'POA', 'curitiba': 'CWB',
+    'florianopolis': 'FLN', 'manaus': 'MAO', 'belem': 'BEL', 'goiania': 'GYN',
+    'maceio': 'MCZ', 'joao pessoa': 'JPA', 'foz do iguacu': 'IGU', 'lisboa': 'LIS', 'lisbon': 'LIS',
+    'porto': 'OPO', 'paris': 'PAR', 'londres': 'LON', 'london': 'LON', 'nova york': 'NYC',
+    'nova iorque': 'NYC', 'new york': 'NYC', 'miami': 'MIA', 'orlando': 'ORL', 'buenos aires': 'BUE',
+    'santiago': 'SCL', 'madri': 'MAD', 'madrid': 'MAD', 'roma': 'ROM', 'rome': 'ROM',
+}
+# Palavras de três letras em maiúsculas que não são aeroportos
+NOT_IATA = {'USD', 'BRL', 'EUR', 'GBP', 'ATE', 'DIA', 'UMA', 'VOO', 'MAS', 'SIM', 'NAO', 'THE', 'AND',
+            'YOU', 'QUE', 'POR', 'PRA', 'COM', 'SEM'}
+
+MONTHS = {
+    'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7, 'agosto': 8,
+    'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+}
+_MONTH = '|'.join(MONTHS)
+_ORIGIN_WORDS = ('de', 'do', 'da', 'desde', 'from', 'saindo de', 'partindo de', 'leaving')
+_DESTINATION_WORDS = ('para', 'pra', 'a', 'ao', 'ate', 'to', 'into', 'destino')
+
+
+def _words(keywords):
+    return re.compile(r'\b(?:' + '|'.join(re.escape(keyword) for keyword in keywords) + r')\b')
+
+
+_FLIGHT = _words(FLIGHT_KEYWORDS)
+_ENGLISH = _words(ENGLISH_KEYWORDS)
+_TOURISM = _words(TOURISM_KEYWORDS)
+_RETURN = _words(RETURN_KEYWORDS)
+_FLEXIBLE = _words(FLEXIBLE_DATE_KEYWORDS)
+_NOT_SEARCH = _words(NOT_SEARCH_KEYWORDS)
+# Nomes mais longos primeiro: "porto alegre" não conta também como "porto"
+_CITY = _words(sorted(CITY_CODES, key=len, reverse=True))
+_IATA = re.compile(r'\b[A-Z]{3}\b')
+_ISO_DATE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+_SLASH_DATE = re.compile(r'\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b')
+_DAY_MONTH = re.compile(rf'\b(\d{{1,2}})(?:st|nd|rd|th|o)?\s+(?:de\s+|of\s+)?({_MONTH})\b(?:\s+(?:de\s+)?(\d{{4}}))?')
+_MONTH_DAY = re.compile(rf'\b({_MONTH})\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?')
+_MONTH_WORD = _words(MONTHS)
+_NUMBER = re.compile(r'\d+')
+_PASSENGERS = re.compile(r'\b(\d{1,2})\s+(?:adultos?|adults?|pessoas|people|passageiros|passengers)\b')
+
+
+def fold(text):
+    """Minúsculas e sem acentos, para comparar palavras-chave."""
+    return ''.join(char for char in unicodedata.normalize('NFKD', text.casefold())
+                   if not unicodedata.combining(char))
+
+
+def _locations(text, folded):
+    """Locais citados, em ordem: [(posição, código IATA, papel 'origin'|'destination'|None)]."""
+    found = []
+    for match in _IATA.finditer(text):
+        if match.group() not in NOT_IATA:
+            found.append((match.start(), match.group()))
+    for match in _CITY.finditer(folded):
+        found.append((match.start(), CITY_CODES[match.group()]))
+    found.sort()
+    locations = []
+    for position, code in found:
+        before = folded[max(0, position - 12):position].split()
+        preceding = ' '.join(before[-2:])
+        last = before[-1] if before else ''
+        if last in _ORIGIN_WORDS or preceding in _ORIGIN_WORDS:
+            role = 'origin'
+        elif last in _DESTINATION_WORDS or preceding in _DESTINATION_WORDS:
+            role = 'destination'
+        else:
+            role = None
+        if not locations or locations[-1][1] != code:
+            locations.append((position, code, role))
+    return locations
+
+
+def entity_signature(text):
+    """
+    Entidades que mudam os parâmetros de uma busca, na ordem do texto: números (dias, anos,
+    passageiros), códigos de três letras e cidades (como código IATA) e meses (como número).
+    Usada pelo cache semântico (`chat/llm_cache.py`): só perguntas com a mesma assinatura
+    compartilham respostas.
+    """
+    folded = fold(text)
+    # Em maiúsculas, toda palavra de três letras vira um possível código: na dúvida, a assinatura muda
+    codes = [code for _, code, _ in _locations(folded.upper(), folded)]
+    return {'numbers': [int(number) for number in _NUMBER.findall(folded)], 'codes': codes,
+            'months': [MONTHS[month] for month in _MONTH_WORD.findall(folded)]}
+
+
+def _upcoming(day, month, year, today):
+    """A data informada; sem ano, a próxima ocorrência a partir de hoje."""
+    if year:
+        year = int(year) + (2000 if int(year) < 100 else 0)
+        return date(year, month, day)
+    candidate = date(today.year, month, day)
+    return candidate if candidate >= today else date(today.year + 1, month, day)
+
+
+def _dates(folded, today, month_first):
+    found = []
+    for match in _ISO_DATE.finditer(folded):
+        found.append((match.start(), date(int(match.group(1)), int(match.group(2)), int(match.group(3)))))
+    for match in _SLASH_DATE.finditer(folded):
+        first, second = int(match.group(1)), int(match.group(2))
+        day, month = (second, first) if month_first and first <= 12 else (first, second)
+        found.append((match.start(), (day, month, match.group(3))))
+    for match in _DAY_MONTH.finditer(folded):
+        found.append((match.start(), (int(match.group(1)), MONTHS[match.group(2)], match.group(3))))
+    for match in _MONTH_DAY.finditer(folded):
+        found.append((match.start(), (int(match.group(2)), MONTHS[match.group(1)], match.group(3))))
+    dates = []
+    for _, value in sorted(found, key=lambda item: item[0]):
+        try:
+            value = value if isinstance(value, date) else _upcoming(*value, today)
+        except ValueError:
+            continue  # ex: 31/02
+        if value not in dates:
+            dates.append(value)
+    return dates
+
+
+class FlightSearchIntent:
+    """Pedido de busca de voos reconhecido pelas regras, com os parâmetros extraídos."""
+
+    def __init__(self, question, origin=None, destination=None, departure_date=None, return_date=None, adults=None):
+        self.question = question
+        self.origin = origin
+        self.destination = destination
+        self.departure_date = departure_date
+        self.return_date = return_date
+        self.adults = adults
+
+    def params(self):
+        values = {'origin': self.origin, 'destination': self.destination,
+                  'departure_date': self.departure_date and self.departure_date.isoformat(),
+                  'return_date': self.return_date and self.return_date.isoformat(), 'adults': self.adults}
+        return {name: value for name, value in values.items() if value is not None}
+
+    def request(self):
+        """Texto do pedido de transferência para o assistente de voos."""
+        params = ', '.join(f"{name}={value}" for name, value in self.params().items())
+        return f"{self.question}\n(Pre-filled from the user's message: {params})" if params else self.question
+
+
+class IntentRouter:
+    """Classifica a mensagem do usuário; só decide quando o pedido de voo é óbvio."""
+
+    def classify(self, text, today=None):
+        """:return: FlightSearchIntent, ou None se a decisão deve ficar com o LLM"""
+        folded = fold(text)
+        if not _FLIGHT.search(folded) or any(words.search(folded) for words in (_TOURISM, _FLEXIBLE, _NOT_SEARCH)):
+            return None
+        locations = _locations(text, folded)
+        month_first = _ENGLISH.search(folded) is not None
+        dates = _dates(folded, today or date.today(), month_first)
+
+        origin = next((code for _, code, role in locations if role == 'origin'), None)
+        destination = next((code for _, code, role in locations if role == 'destination' and code != origin), None)
+        unassigned = [code for _, code, role in locations if code not in (origin, destination)]
+        if origin is None and destination is None and len(unassigned) >= 2:
+            origin, destination = unassigned[:2]
+        elif destination is None and unassigned:
+            destination = unassigned[0]
+        elif origin is None and unassigned:
+            origin = unassigned[0]
+        # Só destino ou só data ainda é vago ("passagem para Paris em dezembro?"): fica com o LLM
+        if destination is None or (origin is None and not dates):
+            return None
+
+        departure_date = dates[0] if dates else None
+        return_date = None
+        if len(dates) > 1 and (_RETURN.search(folded) or dates[1] > dates[0]):
+            return_date = dates[1]
+        passengers = _PASSENGERS.search(folded)
+        return FlightSearchIntent(text, origin, destination, departure_date, return_date,
+                                  int(passengers.group(1)) if passengers else None)
+
+    def route(self, messages, today=None):
+        """Classifica a última mensagem, se for do usuário. :return: FlightSearchIntent ou None"""
+        if not messages or not isinstance(messages[-1], HumanMessage) or not isinstance(messages[-1].content, str):
+            return None
+        return self.classify(messages[-1].content, today)
+
+
+def handoff_message(intent, tool_name):
+    """AIMessage sintética com a chamada de transferência, como o assistente principal a faria."""
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": tool_name, "args": {"request": intent.request()}, "id": f"call_{uuid.uuid4().hex[:24]}"}],
+        response_metadata={"router": "rules", "params": intent.params()},
+    )
+
+
+def create_intent_router():
+    """IntentRouter, ou None com `INTENT_PRE_ROUTER=off` (toda decisão volta a passar pelo LLM)."""
+    if os.getenv('INTENT_PRE_ROUTER', 'on') == 'off':
+        return None
+    return IntentRouter()
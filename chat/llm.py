@@ -0,0 +1,63 @@
+# chat/llm.py
+import os
+import threading
+
+from .llm_retry import DEFAULT_CALL_TIMEOUT
+
+DEFAULT_MODEL = 'gpt-4o-mini-2024-07-18'
+
+_llm = None
+_fallback_llm = None
+_llm_lock = threading.Lock()
+
+# Marca o modelo reserva já resolvido como "não configurado" (None seria confundido com "ainda não criado")
+_NO_FALLBACK = object()
+
+
+def _chat_openai(model):
+    """
+    Cliente ChatOpenAI com o tempo por chamada (`LLM_CALL_TIMEOUT`) aplicado na própria requisição
+    e sem novas tentativas internas: as tentativas são decididas por `chat/llm_retry.py`.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(api_key=os.getenv('OPENAI_API_KEY'), model=model,
+                      timeout=float(os.getenv('LLM_CALL_TIMEOUT', DEFAULT_CALL_TIMEOUT)), max_retries=0)
+
+
+def get_llm():
+    """
+    Retorna o cliente ChatOpenAI compartilhado do processo, criado no primeiro uso (`OPENAI_MODEL`
+    escolhe o modelo). Importar os módulos do chat não cria clientes nem exige `OPENAI_API_KEY`.
+    """
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = _chat_openai(os.getenv('OPENAI_MODEL', DEFAULT_MODEL))
+        return _llm
+
+
+def get_fallback_llm():
+    """
+    Retorna o modelo reserva (`OPENAI_FALLBACK_MODEL`, mais barato ou mais rápido), usado pelos
+    assistentes depois de falhas repetidas do modelo principal (ver `chat/llm_retry.py`).
+
+    :return: ChatOpenAI, ou None se não houver modelo reserva configurado
+    """
+    global _fallback_llm
+    with _llm_lock:
+        if _fallback_llm is None:
+            model = os.getenv('OPENAI_FALLBACK_MODEL')
+            if model:
+                _fallback_llm = _chat_openai(model)
+            else:
+                _fallback_llm = _NO_FALLBACK
+        return None if _fallback_llm is _NO_FALLBACK else _fallback_llm
+
+
+def reset_llm(llm=None, fallback=None):
+    """Descarta os clientes compartilhados ou os substitui por `llm`/`fallback` (ex: modelos falsos em testes)."""
+    global _llm, _fallback_llm
+    with _llm_lock:
+        _llm = llm
+        _fallback_llm = fallback
@@ -0,0 +1,388 @@
+# chat/llm_cache.py
+"""
+Cache das respostas do LLM para o assistente principal (decisão de roteamento) e o de turismo.
+
+É um `BaseCache` do LangChain ligado ao modelo (`ChatOpenAI(cache=...)`, ver `cached_llm`), então
+vale para invoke/ainvoke e para o streaming, sem mudar os assistentes. Dois níveis:
+
+- exato: chave = prompt normalizado + configuração do modelo (modelo, parâmetros, tools). A
+  normalização remove os ids das mensagens, ignora maiúsculas e espaços repetidos nas mensagens
+  do usuário e reduz o "Current time" do prompt de sistema à data;
+- semântico (`LLM_CACHE=semantic`): se a última mensagem é do usuário e o resto do prompt é
+  igual, procura uma pergunta parecida (similaridade do cosseno dos embeddings acima de
+  `LLM_CACHE_SIMILARITY`) num índice vetorial — em memória ou no Qdrant (`LLM_CACHE_VECTOR_INDEX`).
+  A pergunta parecida também precisa citar as mesmas entidades (números, códigos, cidades e meses,
+  ver `chat.intent_router.entity_signature`): "voos GRU para LIS dia 10" e "dia 11" ficam perto nos
+  embeddings, mas a resposta guardada é uma tool call com a data antiga.
+
+As entradas expiram em `LLM_CACHE_TTL` segundos e usam os backends do cache de ofertas
+(`LLM_CACHE_BACKEND`: memory, diskcache ou redis), com o mesmo despejo LRU. Nos acertos, a
+mensagem devolvida ganha ids novos (da mensagem e das tool calls), para não colidir no histórico.
+Respostas vazias (sem texto e sem tool calls) não são guardadas.
+"""
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration
+from services.flight_offers_cache import CacheStats, DiskCacheBackend, MemoryCacheBackend, RedisCacheBackend
+from services.metrics import register_collector
+
+from .intent_router import entity_signature
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_SIMILARITY = 0.95
+DEFAULT_EMBEDDING_MODEL = 'text-embedding-3-small'
+KEY_PREFIX = 'llm:response:'
+
+# "Current time: 2024-08-05 14:03:12.123456" -> "Current time: 2024-08-05"
+_CURRENT_TIME = re.compile(r'(Current time: \d{4}-\d{2}-\d{2})[^\n.]*(\.\d+)?')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt):
+    """
+    :param prompt: Mensagens serializadas com `langchain_core.load.dumps` (como o LangChain passa ao cache)
+    :return: (mensagens normalizadas, exceto a última; texto normalizado da última se for do usuário, ou None)
+    """
+    messages = []
+    for message in json.loads(prompt):
+        kind = message.get('id', [''])[-1]
+        kwargs = {key: value for key, value in message.get('kwargs', {}).items() if key != 'id'}
+        content = kwargs.get('content')
+        if isinstance(content, str):
+            if kind == 'HumanMessage':
+                kwargs['content'] = _SPACES.sub(' ', content).strip().casefold()
+            elif kind == 'SystemMessage':
+                kwargs['content'] = _CURRENT_TIME.sub(r'\1', content)
+        messages.append({**kwargs, 'class': kind})
+    if messages and messages[-1]['class'] == 'HumanMessage' and isinstance(messages[-1].get('content'), str):
+        return messages[:-1], messages[-1]['content']
+    return messages, None
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+def _is_empty(generation):
+    message = generation.message
+    return not message.content and not getattr(message, 'tool_calls', None)
+
+
+def _fresh_ids(generations):
+    """Cópias das gerações com ids novos para a mensagem e para as tool calls."""
+    fresh = []
+    for generation in generations:
+        message = generation.message
+        renamed = {tool_call['id']: f"call_{uuid.uuid4().hex[:24]}" for tool_call in message.tool_calls}
+        additional_kwargs = dict(message.additional_kwargs)
+        if additional_kwargs.get('tool_calls'):
+            additional_kwargs['tool_calls'] = [{**tool_call, 'id': renamed.get(tool_call['id'], tool_call['id'])}
+                                               for tool_call in additional_kwargs['tool_calls']]
+        message = message.copy(update={
+            'id': f"run-cache-{uuid.uuid4()}",
+            'tool_calls': [{**tool_call, 'id': renamed[tool_call['id']]} for tool_call in message.tool_calls],
+            'additional_kwargs': additional_kwargs,
+        })
+        fresh.append(generation.copy(update={'message': message}))
+    return fresh
+
+
+class MemoryVectorIndex:
+    """Índice vetorial em memória, separado por namespace, com TTL e despejo LRU por número de entradas."""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.getenv('LLM_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self._namespaces = {}
+        self._order = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, namespace, key, vector, ttl):
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._namespaces.setdefault(namespace, OrderedDict())[key] = (vector, time.time() + ttl)
+            self._order[key] = namespace
+            self._order.move_to_end(key)
+            while len(self._order) > self.max_entries:
+                old_key, old_namespace = self._order.popitem(last=False)
+                self._namespaces[old_namespace].pop(old_key, None)
+
+    def search(self, namespace, vector, threshold):
+        """:return: (chave, similaridade) da entrada mais parecida acima de `threshold`, ou None"""
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        now = time.time()
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if not entries:
+                return None
+            for key in [key for key, (_, expires_at) in entries.items() if expires_at <= now]:
+                del entries[key]
+                self._order.pop(key, None)
+            if not entries:
+                return None
+            keys = list(entries)
+            scores = np.stack([entries[key][0] for key in keys]) @ vector
+        best = int(np.argmax(scores))
+        return (keys[best], float(scores[best])) if scores[best] >= threshold else None
+
+    def clear(self):
+        with self._lock:
+            self._namespaces.clear()
+            self._order.clear()
+
+
+class QdrantVectorIndex:
+    """
+    Índice vetorial no Qdrant (`QDRANT_URL`; sem URL, o modo local em memória do qdrant-client).
+    A expiração é um filtro por `expires_at` e os pontos vencidos são apagados a cada inclusão.
+    """
+
+    def __init__(self, client=None, url=None, collection='llm_cache'):
+        if client is None:
+            from qdrant_client import QdrantClient
+
+            client = QdrantClient(url or os.getenv('QDRANT_URL') or ':memory:')
+        self.client = client
+        self.collection = collection
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_collection(self, size):
+        from qdrant_client import models
+
+        with self._lock:
+            if not self._ready:
+                existing = {collection.name for collection in self.client.get_collections().collections}
+                if self.collection not in existing:
+                    self.client.create_collection(self.collection, vectors_config=models.VectorParams(
+                        size=size, distance=models.Distance.COSINE))
+                self._ready = True
+
+    def add(self, namespace, key, vector, ttl):
+        from qdrant_client import models
+
+        self._ensure_collection(len(vector))
+        now = time.time()
+        self.client.delete(self.collection, points_selector=models.FilterSelector(filter=models.Filter(
+            must=[models.FieldCondition(key='expires_at', range=models.Range(lte=now))])))
+        self.client.upsert(self.collection, points=[models.PointStruct(
+            id=str(uuid.UUID(hex=key[-32:])), vector=list(vector),
+            payload={'namespace': namespace, 'key': key, 'expires_at': now + ttl},
+        )])
+
+    def search(self, namespace, vector, threshold):
+        from qdrant_client import models
+
+        if not self._ready:
+            return None
+        hits = self.client.search(self.collection, query_vector=list(vector), limit=1, score_threshold=threshold,
+                                  query_filter=models.Filter(must=[
+                                      models.FieldCondition(key='namespace', match=models.MatchValue(value=namespace)),
+                                      models.FieldCondition(key='expires_at', range=models.Range(gt=time.time())),
+                                  ]))
+        return (hits[0].payload['key'], hits[0].score) if hits else None
+
+    def clear(self):
+        with self._lock:
+            if self._ready:
+                self.client.delete_collection(self.collection)
+                self._ready = False
+
+
+class LLMCacheStats(CacheStats):
+    """Contadores do cache do LLM; `latency_saved` soma a latência original das respostas reaproveitadas."""
+
+    FIELDS = ('hits', 'semantic_hits', 'misses', 'stores', 'evictions', 'latency_saved')
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Cache exato e, com `embeddings`, semântico das respostas do LLM (ver docstring do módulo).
+
+    :param backend: Backend de bytes com TTL (padrão: MemoryCacheBackend)
+    :param embeddings: Modelo de embeddings (`embed_query`) para o nível semântico, ou None
+    :param index: Índice vetorial (padrão: MemoryVectorIndex)
+    """
+
+    def __init__(self, backend=None, ttl=None, embeddings=None, index=None, threshold=None):
+        self.backend = backend if backend is not None else MemoryCacheBackend(
+            max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)))
+        self.ttl = ttl if ttl is not None else int(os.getenv('LLM_CACHE_TTL', DEFAULT_TTL))
+        self.embeddings = embeddings
+        self.index = index if index is not None or embeddings is None else MemoryVectorIndex()
+        self.threshold = threshold or float(os.getenv('LLM_CACHE_SIMILARITY', DEFAULT_SIMILARITY))
+        self.stats = LLMCacheStats()
+        # Início das chamadas que deram miss, para medir a latência que um acerto futuro economiza
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    def _keys(self, prompt, llm_string):
+        context, question = normalize_prompt(prompt)
+        key = KEY_PREFIX + _digest(llm_string, context, question)
+        # O namespace inclui as entidades da pergunta: o índice só compara perguntas com as mesmas
+        namespace = _digest(llm_string, context, entity_signature(question)) if question is not None else None
+        return key, namespace, question
+
+    def _get(self, key):
+        value, _ = self.backend.get(key)
+        if value is None:
+            return None
+        entry = json.loads(value)
+        return [ChatGeneration(message=message) for message in messages_from_dict(entry['messages'])], entry['latency']
+
+    def lookup(self, prompt, llm_string):
+        key, namespace, question = self._keys(prompt, llm_string)
+        found = self._get(key)
+        if found is None and self.embeddings is not None and namespace is not None:
+            match = self.index.search(namespace, self.embeddings.embed_query(question), self.threshold)
+            if match is not None:
+                found = self._get(match[0])
+                if found is not None:
+                    self.stats.incr('semantic_hits')
+        if found is None:
+            self.stats.incr('misses')
+            with self._pending_lock:
+                self._pending[key] = time.perf_counter()
+            return None
+        generations, latency = found
+        self.stats.incr('hits')
+        self.stats.incr('latency_saved', latency)
+        return _fresh_ids(generations)
+
+    def update(self, prompt, llm_string, return_val):
+        key, namespace, question = self._keys(prompt, llm_string)
+        with self._pending_lock:
+            started = self._pending.pop(key, None)
+        # Resposta vazia (falha do modelo ou stream interrompido): repeti-la não ajudaria o usuário
+        if not return_val or any(_is_empty(generation) for generation in return_val):
+            return
+        latency = time.perf_counter() - started if started is not None else 0.0
+        # Sem ids: cada acerto recebe ids novos em `_fresh_ids`
+        messages = [generation.message.copy(update={'id': None}) for generation in return_val]
+        value = json.dumps({'messages': messages_to_dict(messages), 'latency': latency}).encode()
+        evicted = self.backend.set(key, value, self.ttl)
+        self.stats.incr('stores')
+        self.stats.incr('evictions', evicted)
+        if self.embeddings is not None and namespace is not None:
+            self.index.add(namespace, key, self.embeddings.embed_query(question), self.ttl)
+
+    def discard(self, prompt, llm_string):
+        """Esquece o início de uma chamada que deu miss e falhou (não haverá `update`)."""
+        key, _, _ = self._keys(prompt, llm_string)
+        with self._pending_lock:
+            self._pending.pop(key, None)
+
+    def clear(self, **kwargs):
+        self.backend.clear()
+        if self.index is not None:
+            self.index.clear()
+        with self._pending_lock:
+            self._pending.clear()
+
+
+def _create_backend(name):
+    max_entries = int(os.getenv('LLM_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    if name == 'memory':
+        return MemoryCacheBackend(max_entries=max_entries)
+    if name == 'diskcache':
+        return DiskCacheBackend(directory=os.getenv('LLM_CACHE_DIR', '.llm_cache'), max_entries=max_entries)
+    if name == 'redis':
+        return RedisCacheBackend(pattern=KEY_PREFIX + '*')
+    raise ValueError(f"Unknown LLM cache backend: {name}")
+
+
+def create_cache_embeddings():
+    """Modelo de embeddings do nível semântico (`LLM_CACHE_EMBEDDING_MODEL`)."""
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(api_key=os.getenv('OPENAI_API_KEY'),
+                            model=os.getenv('LLM_CACHE_EMBEDDING_MODEL', DEFAULT_EMBEDDING_MODEL))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Retorna o cache compartilhado do processo, configurado por `LLM_CACHE` (exact, semantic ou
+    none). Com 'none', retorna None e as respostas não são guardadas.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            mode = os.getenv('LLM_CACHE', 'exact')
+            if mode == 'none':
+                return None
+            if mode not in ('exact', 'semantic'):
+                raise ValueError(f"Unknown LLM_CACHE: {mode}")
+            backend = _create_backend(os.getenv('LLM_CACHE_BACKEND', 'memory'))
+            embeddings = index = None
+            if mode == 'semantic':
+                embeddings = create_cache_embeddings()
+                index = QdrantVectorIndex() if os.getenv('LLM_CACHE_VECTOR_INDEX', 'memory') == 'qdrant' \
+                    else MemoryVectorIndex()
+            _cache = LLMResponseCache(backend, embeddings=embeddings, index=index)
+        return _cache
+
+
+def reset_llm_cache(cache=None):
+    """Descarta o cache compartilhado ou o substitui por `cache` (ex: em testes)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+register_collector('llm_cache', lambda: _cache.stats.as_dict() if _cache is not None else None)
+
+
+class _DiscardPendingOnError:
+    """
+    Mixin do modelo com cache: se a chamada ao LLM falhar depois de um miss, o LangChain não chama
+    `update`, então o início da chamada guardado no `lookup` é descartado aqui.
+    """
+
+    def _generate_with_cache(self, messages, stop=None, run_manager=None, **kwargs):
+        try:
+            return super()._generate_with_cache(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except BaseException:
+            self.cache.discard(dumps(messages), self._get_llm_string(stop=stop, **kwargs))
+            raise
+
+    async def _agenerate_with_cache(self, messages, stop=None, run_manager=None, **kwargs):
+        try:
+            return await super()._agenerate_with_cache(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except BaseException:
+            self.cache.discard(dumps(messages), self._get_llm_string(stop=stop, **kwargs))
+            raise
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_model_class(model_class):
+    return type(model_class.__name__, (_DiscardPendingOnError, model_class), {})
+
+
+def cached_llm(llm):
+    """
+    O mesmo modelo com o cache de respostas ligado. Os campos são validados de novo, mas os
+    clientes HTTP do modelo original são reaproveitados. Sem cache configurado, devolve `llm` como está.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return llm
+    # `llm.copy()` descartaria os campos marcados com exclude=True (client, callbacks...)
+    return _cached_model_class(type(llm))(**{**llm.__dict__, 'cache': cache})
@@ -0,0 +1,242 @@
+# chat/llm_retry.py
+"""
+Novas tentativas das chamadas dos assistentes ao LLM, com limites de tentativas e de tempo.
+
+Uma chamada pode falhar de três jeitos: erro do provedor, estouro do tempo por chamada
+(`LLM_CALL_TIMEOUT`, aplicado pelo próprio cliente do modelo, ver `chat/llm.py`) ou resposta vazia
+(sem texto e sem tool calls). Todas contam como
+tentativa (`LLM_MAX_ATTEMPTS`) e nenhuma começa depois do prazo total do turno (`LLM_DEADLINE`).
+Depois de `LLM_FALLBACK_AFTER` falhas, as tentativas seguintes usam o modelo reserva
+(`OPENAI_FALLBACK_MODEL`), se houver.
+
+Cada tentativa é registrada no log e em `get_llm_call_stats()` (latência e tokens).
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+from openai import APITimeoutError
+from services.metrics import get_metrics, register_collector
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_CALL_TIMEOUT = 30.0
+DEFAULT_DEADLINE = 60.0
+DEFAULT_FALLBACK_AFTER = 2
+DEFAULT_BASE_DELAY = 0.5
+
+EMPTY_RESPONSE_PROMPT = "Respond with a real output."
+# Resposta do turno quando todas as tentativas devolvem mensagens vazias
+EXHAUSTED_REPLY = "Desculpe, não consegui gerar uma resposta agora. Pode repetir a pergunta?"
+
+
+class LLMRetryPolicy:
+    """
+    Limites das tentativas de uma chamada de assistente. Erros e estouros de tempo esperam um
+    backoff exponencial com jitter (`LLM_RETRY_BASE_DELAY`); respostas vazias são repetidas na hora.
+    """
+
+    def __init__(self, max_attempts=None, call_timeout=None, deadline=None, fallback_after=None, base_delay=None):
+        self.max_attempts = int(max_attempts or os.getenv('LLM_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+        self.call_timeout = float(call_timeout or os.getenv('LLM_CALL_TIMEOUT', DEFAULT_CALL_TIMEOUT))
+        self.deadline = float(deadline or os.getenv('LLM_DEADLINE', DEFAULT_DEADLINE))
+        self.fallback_after = int(fallback_after or os.getenv('LLM_FALLBACK_AFTER', DEFAULT_FALLBACK_AFTER))
+        self.base_delay = float(base_delay if base_delay is not None
+                                else os.getenv('LLM_RETRY_BASE_DELAY', DEFAULT_BASE_DELAY))
+
+    def timeout(self, elapsed):
+        """:return: Tempo máximo da próxima tentativa, ou None se o prazo total já acabou"""
+        remaining = self.deadline - elapsed
+        return min(self.call_timeout, remaining) if remaining > 0 else None
+
+    def delay(self, attempt, elapsed):
+        """Espera antes de repetir um erro, sem passar do prazo total."""
+        backoff = random.uniform(0, self.base_delay * 2 ** (attempt - 1))
+        return max(0.0, min(backoff, self.deadline - elapsed))
+
+
+class LLMCallStats:
+    """Contadores das tentativas de chamada ao LLM (thread-safe), por resultado."""
+
+    FIELDS = ('attempts', 'ok', 'empty', 'errors', 'timeouts', 'fallbacks', 'exhausted',
+              'input_tokens', 'output_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+        self._latency = 0.0
+
+    def record(self, outcome, latency, fallback, usage):
+        with self._lock:
+            self._counts['attempts'] += 1
+            self._counts[outcome] += 1
+            self._counts['fallbacks'] += int(fallback)
+            self._counts['input_tokens'] += usage.get('input_tokens', 0)
+            self._counts['output_tokens'] += usage.get('output_tokens', 0)
+            self._latency += latency
+
+    def incr(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def as_dict(self):
+        with self._lock:
+            counts = dict(self._counts)
+            latency = self._latency
+        counts['mean_latency'] = latency / counts['attempts'] if counts['attempts'] else 0.0
+        return counts
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_llm_call_stats():
+    """Retorna os contadores compartilhados do processo."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = LLMCallStats()
+        return _stats
+
+
+def reset_llm_call_stats():
+    global _stats
+    with _stats_lock:
+        _stats = None
+
+
+register_collector('llm_calls', lambda: _stats.as_dict() if _stats is not None else None)
+
+
+_OUTCOME_FIELDS = {'ok': 'ok', 'empty': 'empty', 'error': 'errors', 'timeout': 'timeouts'}
+
+
+class _Attempts:
+    """Estado das tentativas de uma chamada: escolhe o modelo, registra cada tentativa e decide o fim."""
+
+    def __init__(self, runnable, fallback, state, policy, is_empty, name):
+        self.runnable = runnable
+        self.fallback = fallback
+        self.state = state
+        self.policy = policy
+        self.is_empty = is_empty
+        self.name = name or 'assistant'
+        self.logger = logging.getLogger()
+        self.started = time.monotonic()
+        self.number = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_outcome = None
+        self.using_fallback = False
+
+    def next(self):
+        """:return: (runnable, timeout) da próxima tentativa, ou None se as tentativas ou o prazo acabaram"""
+        if self.number >= self.policy.max_attempts:
+            return None
+        timeout = self.policy.timeout(time.monotonic() - self.started)
+        if timeout is None:
+            return None
+        self.number += 1
+        self.using_fallback = self.fallback is not None and self.failures >= self.policy.fallback_after
+        return (self.fallback if self.using_fallback else self.runnable), timeout
+
+    def finish(self, result, error, latency):
+        """Registra a tentativa. :return: True se `result` é a resposta final"""
+        if isinstance(error, (asyncio.TimeoutError, APITimeoutError)):
+            outcome = 'timeout'
+        elif error is not None:
+            outcome = 'error'
+        else:
+            outcome = 'empty' if self.is_empty(result) else 'ok'
+        usage = (getattr(result, 'usage_metadata', None) or {}) if error is None else {}
+        get_llm_call_stats().record(_OUTCOME_FIELDS[outcome], latency, self.using_fallback, usage)
+        metrics = get_metrics()
+        metrics.observe('llm_call_seconds', latency, node=self.name, outcome=outcome)
+        metrics.incr('llm_tokens_total', usage.get('input_tokens', 0), node=self.name, kind='input')
+        metrics.incr('llm_tokens_total', usage.get('output_tokens', 0), node=self.name, kind='output')
+        self.logger.info(f"LLM attempt {self.number}/{self.policy.max_attempts} in {self.name}: {outcome} "
+                         f"in {latency * 1000:.0f}ms{' (fallback model)' if self.using_fallback else ''}, "
+                         f"tokens in={usage.get('input_tokens', '?')} out={usage.get('output_tokens', '?')}"
+                         + (f", error: {error!r}" if outcome == 'error' else ''))
+        self.last_outcome = outcome
+        if outcome == 'ok':
+            return True
+        self.failures += 1
+        if outcome == 'empty':
+            self.state = {**self.state, "messages": self.state["messages"] + [("user", EMPTY_RESPONSE_PROMPT)]}
+        else:
+            self.last_error = error
+        return False
+
+    def delay(self):
+        """Espera antes da próxima tentativa (só depois de erros e estouros de tempo)."""
+        if self.last_outcome == 'empty' or self.number >= self.policy.max_attempts:
+            return 0.0
+        return self.policy.delay(self.number, time.monotonic() - self.started)
+
+    def exhausted(self):
+        """Resultado quando as tentativas acabam: o último erro, ou uma resposta de desculpas se o modelo só devolveu vazio."""
+        get_llm_call_stats().incr('exhausted')
+        self.logger.warning(f"LLM attempts exhausted in {self.name} after {self.number} attempts "
+                            f"and {time.monotonic() - self.started:.1f}s")
+        if self.last_outcome != 'empty' and self.last_error is not None:
+            raise self.last_error
+        if self.last_outcome is None:
+            raise TimeoutError(f"LLM deadline of {self.policy.deadline:.0f}s exceeded in {self.name}")
+        return AIMessage(content=EXHAUSTED_REPLY)
+
+
+def invoke_with_retry(runnable, state, policy=None, fallback=None, is_empty=None, name=None):
+    """
+    Chama `runnable.invoke(state)` dentro dos limites de `policy`.
+
+    A chamada roda na própria thread do caller: o tempo por chamada é o timeout do cliente do modelo
+    (`ChatOpenAI(timeout=LLM_CALL_TIMEOUT, max_retries=0)`, ver `chat/llm.py`), que encerra a
+    requisição e levanta `APITimeoutError`. Nenhuma thread fica presa com uma tentativa abandonada.
+
+    :param fallback: Runnable equivalente com o modelo reserva, ou None
+    :param is_empty: Função que diz se a resposta é vazia (padrão: sem texto e sem tool calls)
+    :param name: Nome do nó, para o log
+    :return: A resposta do modelo (AIMessage)
+    """
+    attempts = _Attempts(runnable, fallback, state, policy or LLMRetryPolicy(), is_empty or is_empty_response, name)
+    while (current := attempts.next()) is not None:
+        current_runnable, _ = current
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = current_runnable.invoke(attempts.state)
+        except Exception as e:
+            error = e
+        if attempts.finish(result, error, time.perf_counter() - start):
+            return result
+        time.sleep(attempts.delay())
+    return attempts.exhausted()
+
+
+async def ainvoke_with_retry(runnable, state, policy=None, fallback=None, is_empty=None, name=None):
+    """Versão assíncrona de `invoke_with_retry`; o tempo por chamada cancela a tentativa."""
+    attempts = _Attempts(runnable, fallback, state, policy or LLMRetryPolicy(), is_empty or is_empty_response, name)
+    while (current := attempts.next()) is not None:
+        current_runnable, timeout = current
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await asyncio.wait_for(current_runnable.ainvoke(attempts.state), timeout)
+        except Exception as e:
+            error = e
+        if attempts.finish(result, error, time.perf_counter() - start):
+            return result
+        await asyncio.sleep(attempts.delay())
+    return attempts.exhausted()
+
+
+def is_empty_response(result) -> bool:
+    return not result.tool_calls and (                                                 # se não houver chamadas de ferramenta
+        not result.content                                                             # ou se não houver conteúdo
+        or isinstance(result.content, list) and not result.content[0].get("text")      # ou se o conteúdo for uma lista e o primeiro item não tiver texto
+    )
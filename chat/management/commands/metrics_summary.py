@@ -0,0 +1,41 @@
+# chat/management/commands/metrics_summary.py
+import os
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from services.metrics import parse_histograms
+
+DEFAULT_METRICS_URL = 'http://127.0.0.1:8000/metrics'
+
+
+class Command(BaseCommand):
+    help = 'Resume os histogramas de latência do endpoint /metrics (contagem, média, p50, p95, p99)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help=f'endpoint de métricas do servidor (padrão: METRICS_URL ou {DEFAULT_METRICS_URL})')
+        parser.add_argument('--metric', help='mostra só os histogramas com este nome (ex: graph_node_seconds)')
+
+    def handle(self, *args, **options):
+        # As métricas ficam na memória de cada processo do servidor: o comando lê o endpoint, não o registro local
+        url = options['url'] or os.getenv('METRICS_URL', DEFAULT_METRICS_URL)
+        try:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise CommandError(f"Não foi possível ler as métricas de {url}: {e}")
+
+        histograms = parse_histograms(response.text)
+        if options['metric']:
+            histograms = {key: value for key, value in histograms.items() if key[0] == options['metric']}
+        if not histograms:
+            self.stdout.write("Nenhum histograma registrado ainda.")
+            return
+
+        self.stdout.write(f"{'métrica':<26} {'rótulos':<44} {'n':>7} {'média':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for (name, labels), histogram in sorted(histograms.items()):
+            summary = histogram.summary()
+            label_text = ','.join(f"{key}={value}" for key, value in labels)
+            self.stdout.write(
+                f"{name:<26} {label_text:<44} {summary['count']:>7} "
+                + ' '.join(f"{summary[field] * 1000:>7.1f}ms" for field in ('mean', 'p50', 'p95', 'p99'))
+            )
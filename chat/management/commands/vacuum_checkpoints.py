@@ -0,0 +1,39 @@
+# chat/management/commands/vacuum_checkpoints.py
+import os
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from chat.checkpointers import DEFAULT_CHECKPOINT_URL, create_checkpointer
+
+
+def _sqlite_size(url):
+    if not url.startswith('sqlite:///'):
+        return None
+    path = url[len('sqlite:///'):]
+    return sum(os.path.getsize(file) for file in (path, path + '-wal') if os.path.exists(file))
+
+
+class Command(BaseCommand):
+    help = 'Compacta o histórico de checkpoints do chat e apaga conversas inativas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='CHECKPOINT_URL do banco (padrão: variável de ambiente)')
+        parser.add_argument('--keep-last', type=int, help='checkpoints mantidos por conversa (CHECKPOINT_KEEP_LAST)')
+        parser.add_argument('--older-than-days', type=float,
+                            help='apaga as conversas sem atividade há mais de N dias')
+        parser.add_argument('--no-vacuum', action='store_true', help='não executa VACUUM no final')
+
+    def handle(self, *args, **options):
+        url = options['url'] or os.getenv('CHECKPOINT_URL', DEFAULT_CHECKPOINT_URL)
+        size_before = _sqlite_size(url)
+        with create_checkpointer(url) as saver:
+            if options['older_than_days'] is not None:
+                cutoff = datetime.now(timezone.utc) - timedelta(days=options['older_than_days'])
+                threads = saver.delete_threads(cutoff)
+                self.stdout.write(f"Conversas apagadas: {threads}")
+            deleted, orphans = saver.compact(options['keep_last'])
+            self.stdout.write(f"Checkpoints apagados: {deleted}, mensagens sem referência apagadas: {orphans}")
+            if not options['no_vacuum']:
+                saver.vacuum()
+        if size_before is not None:
+            self.stdout.write(f"Tamanho do banco: {size_before / 1024:.0f} KiB -> {_sqlite_size(url) / 1024:.0f} KiB")
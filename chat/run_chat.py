@@ -5,14 +5,14 @@ from typing_extensions import TypedDict
 from langgraph.graph.message import AnyMessage, add_messages
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import Runnable, RunnableConfig
-from langchain_openai import ChatOpenAI
 from datetime import datetime
 from .tools import search_amadeus_flights
-from langgraph.checkpoint.sqlite import SqliteSaver
+from .graph_registry import get_graph
+from .llm import get_llm
+from .llm_retry import LLMRetryPolicy, invoke_with_retry
 from langgraph.graph import END, StateGraph, START
-from .utils import create_tool_node_with_fallback, _print_event
+from .utils import create_tool_node_with_fallback, instrument_nodes, _print_event
 from langgraph.prebuilt import tools_condition
-from IPython.display import Image, display
 from dotenv import load_dotenv
 import os
 
@@ -22,46 +22,48 @@ class State(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
 
 class Assistant:
-    def __init__(self, runnable: Runnable):
+    def __init__(self, runnable: Runnable, retry_policy: LLMRetryPolicy = None):
         self.runnable = runnable
+        self.retry_policy = retry_policy or LLMRetryPolicy()
 
     def __call__(self, state: State, config: RunnableConfig):
-        result = None
-        while True:
-            configuration = config.get("configurable", {})
-            result = self.runnable.invoke(state, configuration)
-            if result:
-                break
+        # Tentativas limitadas (ver chat/llm_retry.py): respostas vazias ou falhas não prendem o turno
+        result = invoke_with_retry(self.runnable, state, self.retry_policy, name="assistant")
         return {"messages": result}
 
-def run_chatbot():
-    llm = ChatOpenAI(api_key=os.getenv('OPENAI_API_KEY'), model="gpt-4o-mini-2024-07-18")
-    primary_assistant_prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                " You are an assistant specializing in travel inquiries, particularly flight bookings. "
-                " Your task is to interpret the user's question and select the most appropriate tool to provide accurate and helpful information. "
-                " Focus on delivering the best results related to flight options, booking details, and other travel-related services."
-                " Ensure comprehensive searches and do not hesitate to use multiple tools if necessary."
-                "\nCurrent time: {time}.",
-            ),
-            ("placeholder", "{messages}"),
-        ]
-    ).partial(time=datetime.now())
-    
-    tools = [search_amadeus_flights]
-    assistant_runnable = primary_assistant_prompt | llm.bind_tools(tools)
-    
+primary_assistant_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            " You are an assistant specializing in travel inquiries, particularly flight bookings. "
+            " Your task is to interpret the user's question and select the most appropriate tool to provide accurate and helpful information. "
+            " Focus on delivering the best results related to flight options, booking details, and other travel-related services."
+            " Ensure comprehensive searches and do not hesitate to use multiple tools if necessary."
+            "\nCurrent time: {time}.",
+        ),
+        ("placeholder", "{messages}"),
+    ]
+).partial(time=datetime.now)
+
+tools = [search_amadeus_flights]
+
+
+def build_graph(checkpointer):
+    """Monta e compila o grafo de um assistente só; use `get_graph('simple')` para reaproveitá-lo."""
+    assistant_runnable = primary_assistant_prompt | get_llm().bind_tools(tools)
+
     builder = StateGraph(State)
     builder.add_node("assistant", Assistant(assistant_runnable))
     builder.add_node("tools", create_tool_node_with_fallback(tools))
     builder.add_edge(START, "assistant")
     builder.add_conditional_edges("assistant", tools_condition)
     builder.add_edge("tools", "assistant")
-    
-    memory = SqliteSaver.from_conn_string(":memory:")
-    graph = builder.compile(checkpointer=memory)
+    return instrument_nodes(builder).compile(checkpointer=checkpointer)
+
+
+def run_chatbot():
+    # Grafo compilado uma vez por processo, com o checkpointer de CHECKPOINT_URL
+    graph = get_graph('simple')
 
     config = {
         "configurable": {
@@ -78,6 +80,9 @@ def run_chatbot():
         _print_event(event, _printed)
     
     try:
+        # IPython só é importado aqui: a importação custa ~0,4s na inicialização do processo
+        from IPython.display import Image, display
+
         display(Image(graph.get_graph(xray=True).draw_mermaid_png()))
     except Exception:
         pass
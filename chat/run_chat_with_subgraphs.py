@@ -1,25 +1,35 @@
 # chat/run_chat.py
 
-from typing import Annotated, Optional, Literal
+from typing import Annotated, Optional, Literal, Union
 from typing_extensions import TypedDict
 from langgraph.graph.message import AnyMessage, add_messages
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import Runnable, RunnableConfig
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
 from datetime import datetime
-from .tools import search_amadeus_flights
+from .tools import (
+    find_cheapest_dates,
+    get_flight_search_result,
+    search_amadeus_flights,
+    search_amadeus_flights_multi,
+    search_amadeus_flights_shortlist,
+)
 from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, StateGraph, START
-from .utils import create_tool_node_with_fallback, _print_event
+from .graph_registry import get_graph
+from .context_window import ContextWindow, create_context_window
+from .intent_router import create_intent_router, handoff_message
+from .llm import get_fallback_llm, get_llm
+from .llm_cache import cached_llm
+from .llm_retry import LLMRetryPolicy, ainvoke_with_retry, invoke_with_retry, is_empty_response
+from .utils import create_tool_node_with_fallback, instrument_nodes, _print_event
 from langgraph.prebuilt import tools_condition
-from IPython.display import Image, display
 from dotenv import load_dotenv
 import os
 from langchain_core.pydantic_v1 import BaseModel, Field
 
 from typing import Callable
 
-from langchain_core.messages import ToolMessage
+from langchain_core.messages import AIMessage, ToolMessage
 from typing import Literal
 
 from langgraph.checkpoint.sqlite import SqliteSaver
@@ -31,7 +41,10 @@ import uuid
 
 load_dotenv()  # Carrega as variáveis de ambiente do arquivo .env
 
-llm = ChatOpenAI(api_key=os.getenv('OPENAI_API_KEY'), model="gpt-4o-mini-2024-07-18")
+# Limita o histórico enviado ao LLM (resumo das mensagens antigas + turnos recentes); ver chat/context_window.py
+context_window = create_context_window(get_llm)
+# Pedidos óbvios de busca de voos vão direto ao assistente de voos, sem a chamada de roteamento ao LLM; ver chat/intent_router.py
+intent_router = create_intent_router()
 
 def update_dialog_stack(left: list[str], right: Optional[str]) -> list[str]:
     """Push or pop the state."""
@@ -50,10 +63,16 @@ class State(TypedDict):
                 "assistant",
                 "flight_search_assistant",
                 "inspiration_tourism",
+                "tourism_assistant",
             ]
         ],
         update_dialog_stack,
     ]
+    # Resumo das mensagens que já saíram da janela de contexto e id da última delas
+    conversation_summary: str
+    summarized_until: str
+    # Parâmetros do pedido de voo reconhecido pelo pré-roteador neste turno (None se ficou com o LLM)
+    pre_routed_intent: Optional[dict]
    
 # Vamos criar um assistente para cada tipo de interesse do usuário
 # 1. Assistente de voos 
@@ -67,25 +86,63 @@ class State(TypedDict):
 
 
 class Assistant:
-    def __init__(self, runnable: Runnable):
-        self.runnable = runnable
+    def __init__(self,
+                 runnable: Union[Runnable, Callable[[], Runnable]],
+                 context: Optional[ContextWindow] = None,
+                 fallback: Optional[Callable[[], Optional[Runnable]]] = None,
+                 retry_policy: Optional[LLMRetryPolicy] = None):
+        # `runnable` pode ser uma função que o cria: assim o cliente do LLM só é construído na primeira chamada
+        if isinstance(runnable, Runnable):
+            self._runnable, self._factory = runnable, None
+        else:
+            self._runnable, self._factory = None, runnable
+        self.context = context
+        # `fallback` cria o mesmo assistente com o modelo reserva (ou devolve None, se não houver)
+        self._fallback, self._fallback_factory = None, fallback
+        self.retry_policy = retry_policy or LLMRetryPolicy()
+
+    @property
+    def runnable(self) -> Runnable:
+        if self._runnable is None:
+            self._runnable = self._factory()
+        return self._runnable
+
+    @property
+    def fallback(self) -> Optional[Runnable]:
+        if self._fallback_factory is not None:
+            self._fallback, self._fallback_factory = self._fallback_factory(), None
+        return self._fallback
 
     def __call__(self, state: State, config: RunnableConfig):
-        while True:
-            result = self.runnable.invoke(state)
-            #  se o assistente não tiver ferramentas ou informações para responder à pergunta específica, 
-            #  ele pode não conseguir fornecer uma resposta útil. O design do método garante que o assistente 
-            # tente várias vezes até obter uma resposta válida ou até que o sistema determine que não pode ajudar com a consulta específica.
-            if not result.tool_calls and (                                                 # se não houver chamadas de ferramenta
-                not result.content                                                         # ou se não houver conteúdo
-                or isinstance(result.content, list) and not result.content[0].get("text")  # ou se o conteúdo for uma lista e se for una lista se o primeiro item não tiver texto 
-            ):
-                messages = state["messages"] + [("user", "Respond with a real output.")] # cria uma nova mensagem do usuário com o texto "Respond with a real output."
-                state = {**state, "messages": messages}                                  # atualiza o estado com a nova mensagem, adicionando-a à lista de mensagens do state   
-            else:
-                break
-        return {"messages": result}
-    
+        updates = {}
+        if self.context is not None:
+            state, updates = self.context.prepare(state)
+        #  se o assistente não tiver ferramentas ou informações para responder à pergunta específica,
+        #  ele pode não conseguir fornecer uma resposta útil: a chamada é repetida (pedindo "Respond with a real output.")
+        #  até obter uma resposta válida, dentro dos limites de tentativas e de tempo da política (ver chat/llm_retry.py).
+        result = invoke_with_retry(self.runnable, state, self.retry_policy, self.fallback, self._is_empty,
+                                   self._node_name(config))
+        return {"messages": result, **updates}
+
+    async def acall(self, state: State, config: RunnableConfig):
+        # Mesma lógica de __call__, mas sem bloquear o event loop (usado por graph.astream / graph.ainvoke)
+        updates = {}
+        if self.context is not None:
+            state, updates = await self.context.aprepare(state)
+        result = await ainvoke_with_retry(self.runnable, state, self.retry_policy, self.fallback, self._is_empty,
+                                          self._node_name(config))
+        return {"messages": result, **updates}
+
+    def as_node(self) -> Runnable:
+        """Expõe o assistente como um nó com implementações síncrona e assíncrona."""
+        return RunnableLambda(self.__call__, afunc=self.acall)
+
+    @staticmethod
+    def _node_name(config: RunnableConfig) -> Optional[str]:
+        return (config or {}).get("metadata", {}).get("langgraph_node")
+
+    _is_empty = staticmethod(is_empty_response)
+
 class CompleteOrEscalate(BaseModel): # https://python.langchain.com/v0.2/docs/how_to/tool_calling/#pydantic-class
     """A tool to mark the current task as completed and/or to escalate control of the dialog to the main assistant,
     who can re-route the dialog based on the user's needs."""
@@ -128,10 +185,18 @@ flight_search_assistant_prompt = ChatPromptTemplate.from_messages(
             ),
             ("placeholder", "{messages}"),
         ]
-    ).partial(time=datetime.now())
-
-flight_search_assistant_tools = [search_amadeus_flights, CompleteOrEscalate]
-flight_search_assistant_runnable = flight_search_assistant_prompt | llm.bind_tools(flight_search_assistant_tools)
+    ).partial(time=datetime.now)
+
+flight_search_assistant_tools = [
+    search_amadeus_flights,
+    search_amadeus_flights_multi,
+    search_amadeus_flights_shortlist,
+    get_flight_search_result,
+    find_cheapest_dates,
+    CompleteOrEscalate,
+]
+def flight_search_assistant_runnable(llm=None) -> Runnable:
+    return flight_search_assistant_prompt | (llm or get_llm()).bind_tools(flight_search_assistant_tools)
 
 # Tourism Assistent
 tourism_assistant_prompt = ChatPromptTemplate.from_messages(
@@ -143,10 +208,12 @@ tourism_assistant_prompt = ChatPromptTemplate.from_messages(
             ),
             ("placeholder", "{messages}"),
         ]
-    ).partial(time=datetime.now())
+    ).partial(time=datetime.now)
 
 tourism_assistant_tools = [CompleteOrEscalate]
-tourism_assistant_runnable = tourism_assistant_prompt | llm.bind_tools(tourism_assistant_tools)
+def tourism_assistant_runnable(llm=None) -> Runnable:
+    # Respostas de turismo se repetem muito entre usuários: passam pelo cache do LLM (chat/llm_cache.py)
+    return tourism_assistant_prompt | cached_llm(llm or get_llm()).bind_tools(tourism_assistant_tools)
 
 # Definição do assistente principal	e suas tools
 # As classes Pydantic são usadas para definir ferramentas que a LLM pode invocar durante suas operações. Elas funcionam da seguinte forma:
@@ -188,11 +255,21 @@ primary_assistant_prompt = ChatPromptTemplate.from_messages(
         ),
         ("placeholder", "{messages}"),
     ]
-).partial(time=datetime.now())
+).partial(time=datetime.now)
 
 primary_assistant_tools = [ToFlightSearchAssistant, ToTourismAssistant]
 
-assistant_runnable = primary_assistant_prompt | llm.bind_tools(primary_assistant_tools)
+def assistant_runnable(llm=None) -> Runnable:
+    # A decisão de roteamento para a mesma pergunta é reaproveitada do cache do LLM
+    return primary_assistant_prompt | cached_llm(llm or get_llm()).bind_tools(primary_assistant_tools)
+
+
+def with_fallback_llm(factory: Callable[..., Runnable]) -> Callable[[], Optional[Runnable]]:
+    """Função que cria o runnable de `factory` com o modelo reserva, ou devolve None se não houver reserva."""
+    def create():
+        llm = get_fallback_llm()
+        return factory(llm) if llm is not None else None
+    return create
 
 # A função entry_node retorna um dicionário contendo uma mensagem ToolMessage que informa ao usuário q
 # ue o assistente especializado está no comando e que ele deve refletir sobre a conversa anterior entre o assistente principal e o usuário. 
@@ -200,37 +277,63 @@ assistant_runnable = primary_assistant_prompt | llm.bind_tools(primary_assistant
 # O parâmetro state é passado para a função interna entry_node quando o grafo de estado está sendo executado. Vamos detalhar como isso acontece.
 # A função create_entry_node retorna a função entry_node. Esta função é adicionada ao grafo de estado como um nó. Quando o grafo de estado é executado, 
 # ele invoca a função entry_node, passando o estado atual do grafo como argumento.
-# builder.add_node(enter_flight_search_assistant", create_entry_node("Flight Search Assistant", "flight_search_assistant"))
+# builder.add_node(enter_flight_search_assistant", create_entry_node("Flight Search Assistant", "flight_search_assistant", "ToFlightSearchAssistant"))
 # A ToolMessage irá dizer qual assistente está no comando.
-def create_entry_node(assistant_name: str, new_dialog_state: str) -> Callable:
-    def entry_node(state: State) -> dict:
-        print(f"--- entry_node() interna----")
-        print(f"---Entering {assistant_name} ----")
-        print(f"---\n state: {state} \n----")
+def pending_tool_calls(messages) -> list:
+    """Tool calls da última AIMessage que ainda não têm ToolMessage (a API exige uma resposta para cada uma)."""
+    answered = set()
+    for message in reversed(messages):
+        if isinstance(message, ToolMessage):
+            answered.add(message.tool_call_id)
+        elif isinstance(message, AIMessage):
+            return [tc for tc in message.tool_calls if tc["id"] not in answered]
+        else:
+            break
+    return []
 
+
+def create_entry_node(assistant_name: str, new_dialog_state: str, handoff_tool: str) -> Callable:
+    def entry_node(state: State) -> dict:
         # Verifique se há tool_calls antes de tentar acessá-lo
-        if not state["messages"] or not hasattr(state["messages"][-1], 'tool_calls') or not state["messages"][-1].tool_calls:
+        tool_calls = pending_tool_calls(state["messages"])
+        if not tool_calls:
             return state  # Se não houver chamadas de ferramentas, retorne o estado atual.
 
-        tool_call_id = state["messages"][-1].tool_calls[0]["id"]
-
-        return {
-            "messages": [
-                ToolMessage(
-                    content=f"The assistant is now the {assistant_name}. Reflect on the above conversation between the host assistant and the user."
+        # O modelo pode chamar várias ferramentas de uma vez: todas recebem um ToolMessage.
+        # A primeira transferência para este assistente leva as instruções; as demais para ele são
+        # atendidas junto, e as transferências para outros assistentes ficam para depois.
+        entry_call = next((tc for tc in tool_calls if tc["name"] == handoff_tool), tool_calls[0])
+        messages = []
+        for tool_call in tool_calls:
+            if tool_call is entry_call:
+                content = (
+                    f"The assistant is now the {assistant_name}. Reflect on the above conversation between the host assistant and the user."
                     f" The user's intent is unsatisfied. Use the provided tools to assist the user. Remember, you are {assistant_name},"
                     " and the booking, update, or other action is not complete until after you have successfully invoked the appropriate tool."
                     " If the user changes their mind or needs help for other tasks, call the CompleteOrEscalate function to let the primary host assistant take control."
-                    " Do not mention who you are - just act as the proxy for the assistant.",
-                    tool_call_id=tool_call_id,
+                    " Do not mention who you are - just act as the proxy for the assistant."
                 )
-            ],
+            elif tool_call["name"] == handoff_tool:
+                content = f"The {assistant_name} will handle this request together with the previous one."
+            else:
+                content = (f"Not started: the {assistant_name} is handling the conversation now."
+                           " Delegate this request again after it finishes, if it is still needed.")
+            messages.append(ToolMessage(content=content, tool_call_id=tool_call["id"]))
+        return {
+            "messages": messages,
             "dialog_state": new_dialog_state,
         }
 
     return entry_node
 
-def run_chatbot():
+def build_graph(checkpointer):
+    """
+    Monta e compila o grafo com o assistente principal e os assistentes especializados.
+
+    Os nós dos assistentes e das tools têm variantes síncrona e assíncrona, então o grafo pode ser
+    executado com graph.stream (checkpointer síncrono, ex: SqliteSaver) ou com graph.astream
+    (checkpointer assíncrono, ex: AsyncSqliteSaver), atendendo várias conversas no mesmo event loop.
+    """
     # Construção dos subgrafos - cada um assisntente especializado terá seu próprio subgrafo, serão todos muito parecidos.
     # node 1: enter_*: utilizamos a função create_entry_node para adicionar uma tool message sinalizando que um agente especializado está no comando
     # node 2: assistant: um prompt + llm que recebe o state atual que poderá utilizar uma tool, perguntar uma questão do usuário ou finalizar o workflow (retornal ao assistente principal)
@@ -248,12 +351,38 @@ def run_chatbot():
         if route == END:
             return END
         tool_calls = state["messages"][-1].tool_calls # state["messages"][-1].tool_calls está verificando as chamadas de ferramentas feitas no nó flight_search_assistant (ou qualquer nó que esteja atualmente sendo executado)
-        did_cancel = any(tc["name"] == CompleteOrEscalate.__name__ for tc in tool_calls) # verifica se alguma das chamadas de ferramentas (tool_calls) realizadas pelo assistente foi uma chamada à ferramenta CompleteOrEscalate. A função any verifica se alguma das chamadas de ferramentas em tool_calls possui o nome "CompleteOrEscalate". Se ao menos uma chamada de ferramenta for CompleteOrEscalate, any retorna True; caso contrário, retorna False.
-        if did_cancel: # did_cancel será True se alguma das chamadas de ferramentas for CompleteOrEscalate e cancel estiver configurado como True. 
+        did_cancel = all(tc["name"] == CompleteOrEscalate.__name__ for tc in tool_calls) # se todas as chamadas forem CompleteOrEscalate, o assistente só quer devolver o controle
+        if did_cancel:
             return "leave_skill" # Isso indica que o assistente deve interromper seu trabalho atual e retornar o controle ao assistente principal.
+        # Buscas em paralelo (e um eventual CompleteOrEscalate junto com elas): as buscas rodam primeiro
         return "flight_search_tools"
+
+    # Depois das ferramentas: se o assistente também pediu CompleteOrEscalate, devolve o controle
+    # (com os resultados já no histórico); senão, volta ao assistente de voos.
+    def route_flight_search_tools(
+        state: State,
+    ) -> Literal[
+        "flight_search_assistant",
+        "leave_skill",
+    ]:
+        if any(tc["name"] == CompleteOrEscalate.__name__ for tc in pending_tool_calls(state["messages"])):
+            return "leave_skill"
+        return "flight_search_assistant"
     
     
+    # O assistente de turismo só tem a tool CompleteOrEscalate: ou responde ao usuário, ou devolve o controle.
+    def route_tourism(
+        state: State,
+    ) -> Literal[
+        "leave_skill",
+        "__end__",
+    ]:
+        route = tools_condition(state)
+        if route == END:
+            return END
+        return "leave_skill"
+
+
     # A função pop_dialog_state é usada para gerenciar a transição do controle do fluxo de diálogo de volta para o assistente principal, retirando o estado atual da pilha de diálogo. Isso é útil para garantir que, após a execução de um assistente especializado, o controle seja retornado ao assistente principal, que pode então continuar a gerenciar a interação com o usuário.
     def pop_dialog_state(state: State) -> dict:
         """Pop the dialog stack and return to the main assistant.
@@ -261,15 +390,16 @@ def run_chatbot():
         This lets the full graph explicitly track the dialog flow and delegate control
         to specific sub-graphs.
         """
-        messages = []
-        if state["messages"][-1].tool_calls:
-            # Note: Doesn't currently handle the edge case where the llm performs parallel tool calls
-            messages.append(
-                ToolMessage(
-                    content="Resuming dialog with the host assistant. Please reflect on the past conversation and assist the user as needed.",
-                    tool_call_id=state["messages"][-1].tool_calls[0]["id"],
-                )
+        # Responde todas as chamadas ainda sem resposta (as buscas feitas junto já têm a sua)
+        messages = [
+            ToolMessage(
+                content="Resuming dialog with the host assistant. Please reflect on the past conversation and assist the user as needed."
+                if tc["name"] == CompleteOrEscalate.__name__
+                else "Not executed: the task was handed back to the host assistant.",
+                tool_call_id=tc["id"],
             )
+            for tc in pending_tool_calls(state["messages"])
+        ]
         return {
             "dialog_state": "pop",
             "messages": messages,
@@ -282,6 +412,7 @@ def run_chatbot():
     ) -> Literal[
         "primary_assistant_tools",
         "enter_flight_search_assistant",
+        "enter_tourism_assistant",
         "__end__",
     ]:
         route = tools_condition(state)
@@ -290,23 +421,41 @@ def run_chatbot():
         # A função verifica quais ferramentas foram chamadas na última mensagem (state["messages"][-1].tool_calls).
         tool_calls = state["messages"][-1].tool_calls
         if tool_calls: # Baseado no nome da ferramenta chamada, a função retorna um valor literal que corresponde a um dos nós de destino.
-            if tool_calls[0]["name"] == ToFlightSearchAssistant.__name__:
-                return "enter_flight_search_assistant"
-            elif tool_calls[0]["name"] == ToTourismAssistant.__name__:
-                return "enter_tourism_assistant"
+            # Com chamadas em paralelo, a primeira transferência decide; o nó de entrada responde as demais
+            for tool_call in tool_calls:
+                if tool_call["name"] == ToFlightSearchAssistant.__name__:
+                    return "enter_flight_search_assistant"
+                elif tool_call["name"] == ToTourismAssistant.__name__:
+                    return "enter_tourism_assistant"
             return "primary_assistant_tools"
         raise ValueError("Invalid route")
     
     
+    # Classifica a mensagem uma única vez por turno; o resultado fica no estado para o roteamento
+    def classify_intent(state: State) -> dict:
+        intent = None
+        if intent_router is not None and not state.get("dialog_state"):
+            intent = intent_router.route(state["messages"])
+        if intent is None:
+            return {"pre_routed_intent": None}
+        # Transferência decidida pelas regras: a mesma chamada de ToFlightSearchAssistant que o
+        # assistente principal faria, com os parâmetros extraídos da mensagem no pedido.
+        return {"pre_routed_intent": intent.params(),
+                "messages": [handoff_message(intent, ToFlightSearchAssistant.__name__)]}
+
     # Each delegated workflow can directly respond to the user
     # When the user responds, we want to return to the currently active workflow
     def route_to_workflow(
             state: State,
         ) -> Literal[
             "primary_assistant",
-            "flight_search_assistant"
+            "enter_flight_search_assistant",
+            "flight_search_assistant",
+            "tourism_assistant",
         ]:
             """If we are in a delegated state, route directly to the appropriate assistant."""
+            if state.get("pre_routed_intent"):
+                return "enter_flight_search_assistant"
             dialog_state = state.get("dialog_state")
             if not dialog_state:
                 return "primary_assistant"
@@ -322,22 +471,34 @@ def run_chatbot():
     builder = StateGraph(State)
     
 
-    builder.add_node("enter_flight_search_assistant", create_entry_node("Flight Search Assistant", "flight_search_assistant"))
-    builder.add_node("flight_search_assistant", Assistant(flight_search_assistant_runnable))
-    builder.add_node("flight_search_tools", create_tool_node_with_fallback(flight_search_assistant_tools))
+    builder.add_node("enter_flight_search_assistant", create_entry_node("Flight Search Assistant", "flight_search_assistant",
+                                                                        ToFlightSearchAssistant.__name__))
+    builder.add_node("flight_search_assistant", Assistant(flight_search_assistant_runnable, context_window,
+                                                           with_fallback_llm(flight_search_assistant_runnable)).as_node())
+    builder.add_node("flight_search_tools", create_tool_node_with_fallback(flight_search_assistant_tools,
+                                                                           handoffs=[CompleteOrEscalate.__name__]))
     builder.add_node("leave_skill", pop_dialog_state)
     
     
     # builder.set_entry_point("enter_flight_search_assistant")
-    builder.add_edge(START, "primary_assistant")
-    builder.add_conditional_edges("primary_assistant", route_to_workflow)
+    builder.add_node("classify_intent", classify_intent)
+    builder.add_edge(START, "classify_intent")
+    builder.add_conditional_edges("classify_intent", route_to_workflow)
     builder.add_edge("enter_flight_search_assistant", "flight_search_assistant")
-    builder.add_edge("flight_search_tools", "flight_search_assistant")
-    builder.add_conditional_edges("flight_search_tools", route_search_flight)
+    builder.add_conditional_edges("flight_search_tools", route_flight_search_tools)
+    builder.add_conditional_edges("flight_search_assistant", route_search_flight)
+
+    builder.add_node("enter_tourism_assistant", create_entry_node("Tourism Assistant", "tourism_assistant",
+                                                                  ToTourismAssistant.__name__))
+    builder.add_node("tourism_assistant", Assistant(tourism_assistant_runnable, context_window,
+                                                     with_fallback_llm(tourism_assistant_runnable)).as_node())
+    builder.add_edge("enter_tourism_assistant", "tourism_assistant")
+    builder.add_conditional_edges("tourism_assistant", route_tourism)
    
     builder.add_edge("leave_skill", "primary_assistant")
     # Criação do assistente primário
-    builder.add_node("primary_assistant", Assistant(assistant_runnable))
+    builder.add_node("primary_assistant", Assistant(assistant_runnable, context_window,
+                                                     with_fallback_llm(assistant_runnable)).as_node())
     builder.add_node(
         "primary_assistant_tools", create_tool_node_with_fallback(primary_assistant_tools)
     )
@@ -348,17 +509,25 @@ def run_chatbot():
         route_primary_assistant,
         {
             "enter_flight_search_assistant": "enter_flight_search_assistant", # se route_primary_assistant retornar "enter_flight_search_assistant", o grafo transita para "enter_flight_search_assistant". 
+            "enter_tourism_assistant": "enter_tourism_assistant",
             "primary_assistant_tools": "primary_assistant_tools", # Se retornar "primary_assistant_tools", transita para "primary_assistant_tools". Se retornar END, o grafo termina a execução.
             END: END,
         },
     )
     builder.add_edge("primary_assistant_tools", "primary_assistant")
-    builder.add_conditional_edges("primary_assistant", route_to_workflow)
+
+    # Duração de cada nó no histograma graph_node_seconds (services/metrics.py)
+    instrument_nodes(builder)
 
     # Compile graph
-    memory = SqliteSaver.from_conn_string(":memory:")
-    graph = builder.compile(
-    checkpointer=memory,)
+    return builder.compile(
+    checkpointer=checkpointer,)
+
+
+def run_chatbot():
+    # Grafo compilado uma vez por processo (chat/graph_registry.py), com o checkpointer de
+    # CHECKPOINT_URL: memory (padrão), sqlite:///arquivo.db ou postgresql://...
+    graph = get_graph()
     
     
     # ---- INICIANDO A CONVERSAÇÃO -----
@@ -0,0 +1,134 @@
+# chat/search_jobs.py
+"""
+Despacho das buscas de voos para os workers Celery (`FLIGHT_SEARCH_BACKEND=celery`).
+
+Com o backend padrão ('inline') as ferramentas buscam no próprio processo web. Com 'celery' (e um
+broker definido explicitamente em `CELERY_BROKER_URL`), cada combinação origem x destino x data
+vira uma tarefa (`chat.tasks.search_flight_offers`) e o grafo só espera o resultado: a versão
+assíncrona fala com o broker e o result backend em uma thread e espera com `asyncio.sleep` entre
+as consultas, então o event loop continua atendendo as outras conversas enquanto os workers buscam.
+
+O andamento (buscas concluídas / total) é enviado a quem estiver ouvindo em `progress_listener`
+(o streaming do chat, ver `chat/streaming.py`).
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import time
+
+from services.amadeus_flight_multi_search_service import merge_or_raise
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+
+DEFAULT_TIMEOUT = 120
+DEFAULT_POLL_INTERVAL = 0.2
+
+# Função que recebe os eventos de andamento ({"type": "progress", ...}) da execução atual
+progress_listener = contextvars.ContextVar('flight_search_progress_listener', default=None)
+
+
+def use_search_jobs():
+    """
+    Indica se as ferramentas de busca devem despachar as buscas para os workers Celery.
+
+    Só com `FLIGHT_SEARCH_BACKEND=celery` e `CELERY_BROKER_URL` definido: sem broker explícito,
+    as buscas continuam no processo web em vez de irem para o Redis padrão de localhost.
+    """
+    backend = os.getenv('FLIGHT_SEARCH_BACKEND', 'inline')
+    if backend not in ('inline', 'celery'):
+        raise ValueError(f"Unknown FLIGHT_SEARCH_BACKEND: {backend}")
+    if backend == 'celery' and not os.getenv('CELERY_BROKER_URL'):
+        logging.getLogger().warning("FLIGHT_SEARCH_BACKEND=celery ignored: CELERY_BROKER_URL is not set")
+        return False
+    return backend == 'celery'
+
+
+def report_progress(name, completed, total):
+    listener = progress_listener.get()
+    if listener is not None:
+        listener({"type": "progress", "name": name, "completed": completed, "total": total})
+
+
+class FlightSearchJobs:
+    """
+    Envia buscas aos workers e espera os resultados, no máximo `FLIGHT_SEARCH_JOB_TIMEOUT` segundos.
+
+    As buscas de uma chamada formam um `group`; as que falham são ignoradas e, se todas
+    falharem, a última exceção é propagada (como em `AmadeusFlightMultiSearchService`).
+    """
+
+    def __init__(self, timeout=None, poll_interval=None):
+        self.timeout = timeout or float(os.getenv('FLIGHT_SEARCH_JOB_TIMEOUT', DEFAULT_TIMEOUT))
+        self.poll_interval = poll_interval or float(os.getenv('FLIGHT_SEARCH_JOB_POLL_INTERVAL',
+                                                              DEFAULT_POLL_INTERVAL))
+        self.logger = logging.getLogger()
+
+    def submit(self, searches):
+        """
+        :param searches: Lista de parâmetros de `AmadeusFlightOffersSearchService.search_flights`, um por busca
+        :return: GroupResult com uma tarefa por busca
+        """
+        import backend_chatpassagens.celery  # noqa: F401 (configura o app Celery das tarefas)
+        from celery import group
+
+        from .tasks import search_flight_offers
+
+        return group(search_flight_offers.s(search_kwargs) for search_kwargs in searches).apply_async()
+
+    def search(self, searches, name='search_amadeus_flights'):
+        """Envia as buscas e bloqueia até terminarem. :return: FlightOffersSearchResponse combinado"""
+        group_result = self.submit(searches)
+        deadline = time.monotonic() + self.timeout
+        completed = -1
+        while True:
+            completed = self._progress(group_result, name, completed)
+            if completed == len(group_result):
+                return self._collect(searches, group_result)
+            self._check_deadline(group_result, deadline)
+            time.sleep(self.poll_interval)
+
+    async def asearch(self, searches, name='search_amadeus_flights'):
+        """
+        Versão assíncrona de `search`: espera sem bloquear o event loop. O envio ao broker e as
+        consultas ao result backend (estado, resultados, revogação) rodam em uma thread.
+        """
+        group_result = await asyncio.to_thread(self.submit, searches)
+        deadline = time.monotonic() + self.timeout
+        completed = -1
+        while True:
+            completed = await asyncio.to_thread(self._progress, group_result, name, completed)
+            if completed == len(group_result):
+                return await asyncio.to_thread(self._collect, searches, group_result)
+            await asyncio.to_thread(self._check_deadline, group_result, deadline)
+            await asyncio.sleep(self.poll_interval)
+
+    @staticmethod
+    def _progress(group_result, name, reported):
+        completed = sum(1 for result in group_result.results if result.ready())
+        if completed != reported:
+            report_progress(name, completed, len(group_result))
+        return completed
+
+    def _check_deadline(self, group_result, deadline):
+        if time.monotonic() >= deadline:
+            try:
+                group_result.revoke()
+            except Exception as e:
+                self.logger.warning(f"Could not revoke flight search jobs {group_result.id}: {e!r}")
+            raise TimeoutError(f"Flight search jobs did not finish in {self.timeout:.0f}s")
+
+    def _collect(self, searches, group_result):
+        results = []
+        for result in group_result.results:
+            if result.successful():
+                results.append(parse_flight_offers(result.result))
+            else:
+                results.append(result.result)
+            result.forget()
+        if len(results) == 1:
+            # Busca única: devolve a resposta como veio da Amadeus (sem a reordenação da combinação)
+            if isinstance(results[0], BaseException):
+                raise results[0]
+            return results[0]
+        combinations = [(search['origin'], search['destination'], search['departure_date']) for search in searches]
+        return merge_or_raise(combinations, results, self.logger)
@@ -0,0 +1,84 @@
+# chat/streaming.py
+"""
+Converte a execução de um turno do grafo (`graph.astream_events`) em eventos JSON para o cliente:
+
+- {"type": "node", "node": "flight_search_assistant"}     nó do grafo começou
+- {"type": "token", "node": ..., "content": "Enc"}        pedaço da resposta do LLM, assim que chega
+- {"type": "tool_start", "name": ..., "args": {...}}       ferramenta chamada
+- {"type": "progress", "name": ..., "completed": 3, "total": 12}  buscas concluídas pelos workers
+- {"type": "tool_end", "name": ...}                        ferramenta terminou
+- {"type": "message", "content": ...}                      resposta final do turno
+- {"type": "done", "thread_id": ...}
+"""
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from .context_window import SUMMARY_TAG
+from .search_jobs import progress_listener
+
+_END = object()
+
+
+def _text(content):
+    if isinstance(content, str):
+        return content
+    return ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+
+
+def _translate(event):
+    """Converte um evento do `astream_events` no evento do cliente, ou None se não interessa ao cliente."""
+    kind = event["event"]
+    node = event.get("metadata", {}).get("langgraph_node")
+    if kind == "on_chain_start" and node and event["name"] == node:
+        return {"type": "node", "node": node}
+    if kind == "on_chat_model_stream" and SUMMARY_TAG not in event.get("tags", ()):
+        content = _text(event["data"]["chunk"].content)
+        if content:
+            return {"type": "token", "node": node, "content": content}
+    elif kind == "on_tool_start":
+        return {"type": "tool_start", "name": event["name"], "args": event["data"].get("input")}
+    elif kind == "on_tool_end":
+        return {"type": "tool_end", "name": event["name"]}
+    return None
+
+
+async def stream_chat_turn(graph, message, thread_id):
+    """
+    Executa um turno da conversa `thread_id` e produz os eventos à medida que acontecem.
+
+    O grafo roda numa task própria que, junto com o andamento das buscas nos workers
+    (`chat.search_jobs.progress_listener`), alimenta uma única fila de eventos.
+
+    :param graph: Grafo compilado com checkpointer assíncrono (ver `chat.graph_registry.aget_graph`)
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    async def run_graph():
+        try:
+            async for event in graph.astream_events({"messages": [("user", message)]}, config, version="v2"):
+                queue.put_nowait(_translate(event))
+        finally:
+            queue.put_nowait(_END)
+
+    # A task copia o contexto atual, então as ferramentas do grafo enxergam o listener
+    token = progress_listener.set(lambda event: loop.call_soon_threadsafe(queue.put_nowait, event))
+    try:
+        task = asyncio.create_task(run_graph())
+    finally:
+        progress_listener.reset(token)
+    try:
+        while (event := await queue.get()) is not _END:
+            if event is not None:
+                yield event
+        await task
+    finally:
+        task.cancel()
+
+    state = await graph.aget_state(config)
+    messages = state.values.get("messages") or []
+    if messages and isinstance(messages[-1], AIMessage) and not messages[-1].tool_calls:
+        yield {"type": "message", "content": _text(messages[-1].content)}
+    yield {"type": "done", "thread_id": thread_id}
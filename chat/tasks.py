@@ -0,0 +1,20 @@
+# chat/tasks.py
+"""
+Tarefas Celery das buscas de voos, executadas pelos workers da fila `flight_search`.
+
+Cada tarefa faz uma única busca na Amadeus; buscas com várias combinações viram um `group`
+(ver `chat/search_jobs.py`). O cache de respostas (`services/flight_offers_cache.py`) fica no
+worker: com `AMADEUS_CACHE_BACKEND=redis` ele é compartilhado por todos os workers.
+"""
+from celery import shared_task
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+
+
+@shared_task(name='chat.tasks.search_flight_offers')
+def search_flight_offers(search_kwargs):
+    """
+    :param search_kwargs: Parâmetros de `AmadeusFlightOffersSearchService.search_flights`
+    :return: A resposta da busca serializada em JSON (str), para ser validada de volta com `parse_flight_offers`
+    """
+    flight_offers = AmadeusFlightOffersSearchService().search_flights(**search_kwargs)
+    return flight_offers.model_dump_json(by_alias=True)
@@ -1,10 +1,38 @@
 #chat/tools.py
 
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
+from services.amadeus_flight_dates_service import AmadeusFlightDatesService, AsyncAmadeusFlightDatesService
+from services.amadeus_flight_multi_search_service import (
+    AmadeusFlightMultiSearchService,
+    AsyncAmadeusFlightMultiSearchService,
+    build_search_combinations,
+    expand_departure_dates,
+    multi_search_currency,
+)
 from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+from services.async_amadeus_flight_offers_search_service import AsyncAmadeusFlightOffersSearchService
+from services.flight_offers_digest import get_result_store
+from services.flight_offers_table import shortlist
 
-@tool
-def search_amadeus_flights(
+from .search_jobs import FlightSearchJobs, use_search_jobs
+
+
+def _search_kwargs(arguments):
+    """Parâmetros de uma busca para a tarefa Celery, a partir dos argumentos da ferramenta."""
+    return {name: value for name, value in arguments.items() if value is not None}
+
+
+def _multi_searches(origins, destinations, departure_dates, date_from, date_to, max_results_per_search, **search_kwargs):
+    """Uma busca (parâmetros de `search_flights`) por combinação de origem, destino e data, todas na mesma moeda."""
+    combinations = build_search_combinations(origins, destinations,
+                                             expand_departure_dates(departure_dates, date_from, date_to))
+    search_kwargs['currency_code'] = multi_search_currency(search_kwargs.get('currency_code'))
+    return [_search_kwargs({'origin': origin, 'destination': destination, 'departure_date': departure_date,
+                            'max_results': max_results_per_search, **search_kwargs})
+            for origin, destination, departure_date in combinations]
+
+
+def _search_amadeus_flights(
     origin: str,
     destination: str,
     departure_date: str,
@@ -34,10 +62,316 @@ def search_amadeus_flights(
     - currency_code (str, opcional): Código da moeda preferida (ex: 'USD').
     - max_results (int, opcional): Número máximo de resultados a retornar (padrão: 5).
     """
+    if use_search_jobs():
+        return FlightSearchJobs().search([_search_kwargs(locals())])
     service = AmadeusFlightOffersSearchService()
     return service.search_flights(
-        origin, destination, departure_date, return_date, adults, 
-        children, infants, travel_class, max_price, non_stop, 
-        included_airline_codes, excluded_airline_codes, currency_code, 
+        origin, destination, departure_date, return_date, adults,
+        children, infants, travel_class, max_price, non_stop,
+        included_airline_codes, excluded_airline_codes, currency_code,
         max_results
     )
+
+
+async def _asearch_amadeus_flights(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: str = None,
+    adults: int = 1,
+    children: int = 0,
+    infants: int = 0,
+    travel_class: str = None,
+    max_price: float = None,
+    non_stop: bool = None,
+    included_airline_codes: list = None,
+    excluded_airline_codes: list = None,
+    currency_code: str = None,
+    max_results: int = 250
+) -> dict:
+    # Variante usada por tool.ainvoke (graph.astream / ToolNode assíncrono): não bloqueia o event loop
+    if use_search_jobs():
+        return await FlightSearchJobs().asearch([_search_kwargs(locals())])
+    service = AsyncAmadeusFlightOffersSearchService()
+    return await service.search_flights(
+        origin, destination, departure_date, return_date, adults,
+        children, infants, travel_class, max_price, non_stop,
+        included_airline_codes, excluded_airline_codes, currency_code,
+        max_results
+    )
+
+
+search_amadeus_flights = StructuredTool.from_function(
+    func=_search_amadeus_flights,
+    coroutine=_asearch_amadeus_flights,
+    name="search_amadeus_flights",
+)
+
+
+def _search_amadeus_flights_multi(
+    origins: list[str],
+    destinations: list[str],
+    departure_dates: list[str] = None,
+    date_from: str = None,
+    date_to: str = None,
+    return_date: str = None,
+    adults: int = 1,
+    children: int = 0,
+    infants: int = 0,
+    travel_class: str = None,
+    max_price: float = None,
+    non_stop: bool = None,
+    currency_code: str = None,
+    max_results_per_search: int = 50
+) -> dict:
+    """
+    Busca passagens para várias combinações de aeroportos e datas em uma única chamada, executando as buscas em paralelo. Use quando o usuário aceita mais de um aeroporto (ex: "qualquer aeroporto de São Paulo" -> GRU, CGH, VCP) ou tem datas flexíveis, em vez de chamar search_amadeus_flights várias vezes. O resultado combina todas as buscas, sem ofertas repetidas, ordenado do menor para o maior preço.
+
+    Parâmetros:
+    - origins (list[str]): Códigos IATA dos aeroportos de origem (ex: ['VIX']).
+    - destinations (list[str]): Códigos IATA dos aeroportos de destino (ex: ['GRU', 'CGH', 'VCP']).
+    - departure_dates (list[str], opcional): Datas de partida no formato 'YYYY-MM-DD'.
+    - date_from (str, opcional): Início de uma janela de datas de partida ('YYYY-MM-DD').
+    - date_to (str, opcional): Fim da janela de datas de partida ('YYYY-MM-DD').
+    - return_date (str, opcional): Data de retorno no formato 'YYYY-MM-DD'.
+    - adults (int, opcional): Número de adultos (padrão: 1).
+    - max_price (int, opcional): Preço máximo para os voos.
+    - non_stop (bool, opcional): 'True' para apenas voos diretos.
+    - currency_code (str, opcional): Código da moeda de todas as buscas (padrão: 'BRL').
+    - max_results_per_search (int, opcional): Máximo de ofertas por combinação (padrão: 50).
+    """
+    if use_search_jobs():
+        return FlightSearchJobs().search(_multi_searches(
+            origins, destinations, departure_dates, date_from, date_to, max_results_per_search,
+            return_date=return_date, adults=adults, children=children, infants=infants,
+            travel_class=travel_class, max_price=max_price, non_stop=non_stop, currency_code=currency_code
+        ), name="search_amadeus_flights_multi")
+    return AmadeusFlightMultiSearchService().search(
+        origins, destinations, departure_dates, date_from, date_to,
+        max_results_per_search=max_results_per_search, return_date=return_date,
+        adults=adults, children=children, infants=infants, travel_class=travel_class,
+        max_price=max_price, non_stop=non_stop, currency_code=currency_code
+    )
+
+
+async def _asearch_amadeus_flights_multi(
+    origins: list[str],
+    destinations: list[str],
+    departure_dates: list[str] = None,
+    date_from: str = None,
+    date_to: str = None,
+    return_date: str = None,
+    adults: int = 1,
+    children: int = 0,
+    infants: int = 0,
+    travel_class: str = None,
+    max_price: float = None,
+    non_stop: bool = None,
+    currency_code: str = None,
+    max_results_per_search: int = 50
+) -> dict:
+    if use_search_jobs():
+        return await FlightSearchJobs().asearch(_multi_searches(
+            origins, destinations, departure_dates, date_from, date_to, max_results_per_search,
+            return_date=return_date, adults=adults, children=children, infants=infants,
+            travel_class=travel_class, max_price=max_price, non_stop=non_stop, currency_code=currency_code
+        ), name="search_amadeus_flights_multi")
+    return await AsyncAmadeusFlightMultiSearchService().search(
+        origins, destinations, departure_dates, date_from, date_to,
+        max_results_per_search=max_results_per_search, return_date=return_date,
+        adults=adults, children=children, infants=infants, travel_class=travel_class,
+        max_price=max_price, non_stop=non_stop, currency_code=currency_code
+    )
+
+
+search_amadeus_flights_multi = StructuredTool.from_function(
+    func=_search_amadeus_flights_multi,
+    coroutine=_asearch_amadeus_flights_multi,
+    name="search_amadeus_flights_multi",
+)
+
+
+def _shortlist_filters(max_stops, max_duration_hours, min_checked_bags, depart_after, depart_before):
+    return {
+        'max_stops': max_stops,
+        'max_duration_minutes': int(max_duration_hours * 60) if max_duration_hours else None,
+        'min_checked_bags': min_checked_bags,
+        'depart_after': depart_after,
+        'depart_before': depart_before,
+    }
+
+
+def _search_amadeus_flights_shortlist(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: str = None,
+    adults: int = 1,
+    children: int = 0,
+    infants: int = 0,
+    travel_class: str = None,
+    max_price: float = None,
+    non_stop: bool = None,
+    currency_code: str = None,
+    sort_by: str = "price",
+    limit: int = 5,
+    max_stops: int = None,
+    max_duration_hours: float = None,
+    min_checked_bags: int = None,
+    depart_after: str = None,
+    depart_before: str = None
+) -> dict:
+    """
+    Busca passagens na API Amadeus e retorna apenas as melhores opções, já ordenadas, em formato resumido (preço, duração em minutos, conexões, companhias, horários e bagagem). Prefira esta ferramenta quando o usuário quer "as mais baratas", "as mais rápidas" ou opções com filtros como número de conexões, duração máxima, bagagem despachada ou horário de partida.
+
+    Parâmetros:
+    - origin (str): Código IATA do aeroporto de origem (ex: 'VIX').
+    - destination (str): Código IATA do aeroporto de destino (ex: 'GRU').
+    - departure_date (str): Data de partida no formato 'YYYY-MM-DD'.
+    - return_date (str, opcional): Data de retorno no formato 'YYYY-MM-DD'.
+    - adults (int, opcional): Número de adultos (padrão: 1).
+    - max_price (int, opcional): Preço máximo para os voos.
+    - non_stop (bool, opcional): 'True' para apenas voos diretos.
+    - currency_code (str, opcional): Código da moeda preferida (ex: 'BRL').
+    - sort_by (str, opcional): 'price', 'duration', 'stops', 'departure' ou 'best' (equilíbrio entre preço e duração).
+    - limit (int, opcional): Quantidade de opções a retornar (padrão: 5).
+    - max_stops (int, opcional): Número máximo de conexões.
+    - max_duration_hours (float, opcional): Duração total máxima, em horas.
+    - min_checked_bags (int, opcional): Mínimo de bagagens despachadas incluídas.
+    - depart_after (str, opcional): Partida a partir de 'YYYY-MM-DDTHH:MM'.
+    - depart_before (str, opcional): Partida até 'YYYY-MM-DDTHH:MM'.
+    """
+    flight_offers = AmadeusFlightOffersSearchService().search_flights(
+        origin, destination, departure_date, return_date, adults, children, infants,
+        travel_class, max_price, non_stop, currency_code=currency_code
+    )
+    filters = _shortlist_filters(max_stops, max_duration_hours, min_checked_bags, depart_after, depart_before)
+    return shortlist(flight_offers, limit, sort_by, **filters)
+
+
+async def _asearch_amadeus_flights_shortlist(
+    origin: str,
+    destination: str,
+    departure_date: str,
+    return_date: str = None,
+    adults: int = 1,
+    children: int = 0,
+    infants: int = 0,
+    travel_class: str = None,
+    max_price: float = None,
+    non_stop: bool = None,
+    currency_code: str = None,
+    sort_by: str = "price",
+    limit: int = 5,
+    max_stops: int = None,
+    max_duration_hours: float = None,
+    min_checked_bags: int = None,
+    depart_after: str = None,
+    depart_before: str = None
+) -> dict:
+    flight_offers = await AsyncAmadeusFlightOffersSearchService().search_flights(
+        origin, destination, departure_date, return_date, adults, children, infants,
+        travel_class, max_price, non_stop, currency_code=currency_code
+    )
+    filters = _shortlist_filters(max_stops, max_duration_hours, min_checked_bags, depart_after, depart_before)
+    return shortlist(flight_offers, limit, sort_by, **filters)
+
+
+search_amadeus_flights_shortlist = StructuredTool.from_function(
+    func=_search_amadeus_flights_shortlist,
+    coroutine=_asearch_amadeus_flights_shortlist,
+    name="search_amadeus_flights_shortlist",
+)
+
+
+def _find_cheapest_dates(
+    origin: str,
+    destination: str,
+    date_from: str = None,
+    date_to: str = None,
+    one_way: bool = False,
+    duration: str = None,
+    non_stop: bool = None,
+    max_price: float = None,
+    limit: int = 5
+) -> dict:
+    """
+    Encontra as datas mais baratas para voar entre duas cidades numa janela de datas flexível (ex: "quais são as datas mais baratas para ir de São Paulo a Paris?"), com uma única consulta rápida em vez de uma busca de ofertas por data. Retorna só a data e o preço mais baixo de cada dia; para ver os voos da data escolhida, use depois search_amadeus_flights.
+
+    Parâmetros:
+    - origin (str): Código IATA da cidade ou aeroporto de origem (ex: 'SAO').
+    - destination (str): Código IATA da cidade ou aeroporto de destino (ex: 'PAR').
+    - date_from (str, opcional): Início da janela de datas de partida, 'YYYY-MM-DD' (padrão: hoje).
+    - date_to (str, opcional): Fim da janela de datas de partida, 'YYYY-MM-DD' (padrão: 30 dias a partir do início).
+    - one_way (bool, opcional): True para só ida; False para ida e volta (padrão: False).
+    - duration (str, opcional): Dias de estadia, para ida e volta (ex: '7' ou '5,10').
+    - non_stop (bool, opcional): True para apenas voos diretos.
+    - max_price (float, opcional): Preço máximo.
+    - limit (int, opcional): Quantidade de datas a retornar (padrão: 5).
+    """
+    return AmadeusFlightDatesService().cheapest_dates(origin, destination, date_from, date_to, one_way, duration,
+                                                      non_stop, max_price, limit)
+
+
+async def _afind_cheapest_dates(
+    origin: str,
+    destination: str,
+    date_from: str = None,
+    date_to: str = None,
+    one_way: bool = False,
+    duration: str = None,
+    non_stop: bool = None,
+    max_price: float = None,
+    limit: int = 5
+) -> dict:
+    return await AsyncAmadeusFlightDatesService().cheapest_dates(origin, destination, date_from, date_to, one_way,
+                                                                 duration, non_stop, max_price, limit)
+
+
+find_cheapest_dates = StructuredTool.from_function(
+    func=_find_cheapest_dates,
+    coroutine=_afind_cheapest_dates,
+    name="find_cheapest_dates",
+)
+
+
+def _get_flight_search_result(
+    reference: str,
+    offer_ids: list[str] = None,
+    sort_by: str = "price",
+    limit: int = 5,
+    max_stops: int = None,
+    max_duration_hours: float = None,
+    min_checked_bags: int = None,
+    depart_after: str = None,
+    depart_before: str = None
+) -> dict:
+    """
+    Consulta o resultado completo de uma busca de voos já feita, pela referência informada no resumo (ref=fs-...). Use para ver os detalhes de ofertas específicas (offer_ids) ou para reordenar/filtrar todas as ofertas da busca sem chamar a API novamente.
+
+    Parâmetros:
+    - reference (str): Referência do resultado (ex: 'fs-1a2b3c4d5e').
+    - offer_ids (list[str], opcional): Ids das ofertas a detalhar (ex: ['3', '12']).
+    - sort_by (str, opcional): 'price', 'duration', 'stops', 'departure' ou 'best'.
+    - limit (int, opcional): Quantidade de opções a retornar (padrão: 5).
+    - max_stops (int, opcional): Número máximo de conexões.
+    - max_duration_hours (float, opcional): Duração total máxima, em horas.
+    - min_checked_bags (int, opcional): Mínimo de bagagens despachadas incluídas.
+    - depart_after (str, opcional): Partida a partir de 'YYYY-MM-DDTHH:MM'.
+    - depart_before (str, opcional): Partida até 'YYYY-MM-DDTHH:MM'.
+    """
+    flight_offers = get_result_store().get(reference)
+    if flight_offers is None:
+        raise ValueError(f"Search result {reference} not found or expired; run the search again.")
+    if offer_ids:
+        wanted = {str(offer_id) for offer_id in offer_ids}
+        return {'offers': [offer.model_dump(by_alias=True, exclude_none=True)
+                           for offer in flight_offers.data if offer.id in wanted]}
+    filters = _shortlist_filters(max_stops, max_duration_hours, min_checked_bags, depart_after, depart_before)
+    return {'reference': reference, **shortlist(flight_offers, limit, sort_by, **filters)}
+
+
+get_flight_search_result = StructuredTool.from_function(
+    func=_get_flight_search_result,
+    name="get_flight_search_result",
+)
@@ -1,6 +1,32 @@
-from langchain_core.messages import ToolMessage
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
 from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import get_executor_for_config
 from langgraph.prebuilt import ToolNode
+from langgraph.prebuilt.tool_node import str_output
+from langgraph.utils import RunnableCallable
+from models.flight_offers_models import FlightOffersSearchResponse, LiteFlightOffersSearchResponse
+from services.amadeus_errors import AmadeusError
+from services.flight_offers_digest import summarize_flight_offers
+from services.metrics import get_metrics
+
+
+def describe_tool_error(error) -> str:
+    """
+    Texto devolvido ao LLM quando uma ferramenta falha.
+
+    Erros temporários da Amadeus (429, 5xx, rede) já foram repetidos pelo serviço, então o
+    modelo é instruído a não repetir a chamada; erros de parâmetros pedem correção.
+    """
+    if isinstance(error, AmadeusError) and error.retryable:
+        return (f"Error: the flight search service is temporarily unavailable ({error.status_code or 'network'}) "
+                "and was already retried. Do not call the tool again now; tell the user to try again in a few minutes.")
+    if isinstance(error, AmadeusError):
+        return (f"Error: the flight search request was rejected ({error.status_code}): {error.detail or error}\n"
+                " please fix the parameters before calling the tool again.")
+    return f"Error: {repr(error)}\n please fix your mistakes."
 
 
 def handle_tool_error(state) -> dict:
@@ -9,7 +35,7 @@ def handle_tool_error(state) -> dict:
     return {
         "messages": [
             ToolMessage(
-                content=f"Error: {repr(error)}\n please fix your mistakes.",
+                content=describe_tool_error(error),
                 tool_call_id=tc["id"],
             )
             for tc in tool_calls
@@ -17,12 +43,133 @@ def handle_tool_error(state) -> dict:
     }
 
 
-def create_tool_node_with_fallback(tools: list) -> dict:
-    return ToolNode(tools).with_fallbacks(
+def render_tool_output(output) -> str:
+    """
+    Conteúdo do ToolMessage para o resultado de uma ferramenta. Respostas da busca de ofertas
+    viram um resumo dentro do orçamento de tokens (o resultado completo fica guardado por referência).
+    """
+    if isinstance(output, (FlightOffersSearchResponse, LiteFlightOffersSearchResponse)):
+        text, _ = summarize_flight_offers(output)
+        return text
+    return str_output(output)
+
+
+class CompactToolNode(ToolNode):
+    """
+    `ToolNode` que passa os resultados por `render_tool_output` antes de criar os ToolMessages.
+    Como no ToolNode original, várias tool calls da mesma mensagem rodam em paralelo.
+
+    Cada chamada produz o seu ToolMessage: se uma delas falha, só ela recebe a mensagem de erro
+    e os resultados das outras são mantidos. Chamadas às ferramentas de `handoffs` (ex:
+    CompleteOrEscalate) não são executadas aqui; o grafo as responde no nó de transição.
+    """
+
+    def __init__(self, tools, *, handoffs=(), **kwargs):
+        super().__init__(tools, **kwargs)
+        self.handoffs = set(handoffs)
+
+    def _func(self, input, config):
+        message = self._last_ai_message(input)
+
+        def run_one(call):
+            start = time.perf_counter()
+            try:
+                output = self.tools_by_name[call["name"]].invoke(call["args"], config)
+            except Exception as e:
+                self._observe(call, start, 'error')
+                return self._error_message(call, e)
+            self._observe(call, start, 'ok')
+            return self._tool_message(call, output)
+
+        with get_executor_for_config(config) as executor:
+            outputs = [*executor.map(run_one, self._calls(message))]
+        return outputs if isinstance(input, list) else {"messages": outputs}
+
+    async def _afunc(self, input, config):
+        message = self._last_ai_message(input)
+
+        async def run_one(call):
+            start = time.perf_counter()
+            try:
+                output = await self.tools_by_name[call["name"]].ainvoke(call["args"], config)
+            except Exception as e:
+                self._observe(call, start, 'error')
+                return self._error_message(call, e)
+            self._observe(call, start, 'ok')
+            return self._tool_message(call, output)
+
+        outputs = await asyncio.gather(*(run_one(call) for call in self._calls(message)))
+        return outputs if isinstance(input, list) else {"messages": outputs}
+
+    def _calls(self, message):
+        return [call for call in message.tool_calls if call["name"] not in self.handoffs]
+
+    @staticmethod
+    def _observe(call, start, outcome):
+        get_metrics().observe('tool_seconds', time.perf_counter() - start, tool=call["name"], outcome=outcome)
+
+    @staticmethod
+    def _last_ai_message(input):
+        messages = input if isinstance(input, list) else input.get("messages", [])
+        if not messages:
+            raise ValueError("No message found in input")
+        if not isinstance(messages[-1], AIMessage):
+            raise ValueError("Last message is not an AIMessage")
+        return messages[-1]
+
+    @staticmethod
+    def _tool_message(call, output):
+        return ToolMessage(content=render_tool_output(output), name=call["name"], tool_call_id=call["id"])
+
+    @staticmethod
+    def _error_message(call, error):
+        return ToolMessage(content=describe_tool_error(error), name=call["name"], tool_call_id=call["id"])
+
+
+def create_tool_node_with_fallback(tools: list, handoffs=()) -> dict:
+    return CompactToolNode(tools, handoffs=handoffs).with_fallbacks(
         [RunnableLambda(handle_tool_error)], exception_key="error"
     )
 
 
+def timed_node(name, node):
+    """
+    Envolve o nó `name` para medir a sua duração (histograma `graph_node_seconds`). O invólucro
+    não cria um run a mais no trace: eventos e tokens do streaming continuam saindo do nó original.
+    """
+    def observe(start, outcome):
+        get_metrics().observe('graph_node_seconds', time.perf_counter() - start, node=name, outcome=outcome)
+
+    def run(state, config):
+        start = time.perf_counter()
+        try:
+            result = node.invoke(state, config)
+        except BaseException:
+            observe(start, 'error')
+            raise
+        observe(start, 'ok')
+        return result
+
+    async def arun(state, config):
+        start = time.perf_counter()
+        try:
+            result = await node.ainvoke(state, config)
+        except BaseException:
+            observe(start, 'error')
+            raise
+        observe(start, 'ok')
+        return result
+
+    return RunnableCallable(run, arun, name=name, trace=False, recurse=False)
+
+
+def instrument_nodes(builder):
+    """Mede todos os nós já adicionados ao `StateGraph` (chamar antes de `compile`)."""
+    for name, node in list(builder.nodes.items()):
+        builder.nodes[name] = timed_node(name, node)
+    return builder
+
+
 def _print_event(event: dict, _printed: set, max_length=1500):
     current_state = event.get("dialog_state")
     if current_state:
@@ -1,3 +1,41 @@
-from django.shortcuts import render
+import ipaddress
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from services.metrics import get_metrics
+
+# Importados pelos coletores que registram: cache de ofertas, cache e chamadas do LLM
+import chat.llm_cache  # noqa: F401
+import chat.llm_retry  # noqa: F401
+import services.flight_offers_cache  # noqa: F401
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _metrics_allowed(request):
+    """
+    Libera o /metrics para usuários staff e para os IPs ou redes de `METRICS_ALLOWED_IPS`.
+
+    Usa o REMOTE_ADDR da conexão (não o X-Forwarded-For, que o cliente pode forjar).
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
+
+
+@require_GET
+def metrics(request):
+    """
+    Métricas do processo no formato de texto do Prometheus (ver services/metrics.py).
+
+    Expõe latências e contadores internos: só responde a IPs internos ou usuários staff (403 para os demais).
+    """
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(get_metrics().render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Resposta da API Flight Cheapest Date Search (GET /v1/shopping/flight-dates)
+
+class FlightDatePrice(BaseModel):
+    total: str
+
+class FlightDate(BaseModel):
+    type: str
+    origin: str
+    destination: str
+    departureDate: str
+    returnDate: Optional[str] = None
+    price: FlightDatePrice
+    links: Optional[dict] = None
+
+class FlightDatesMeta(BaseModel):
+    currency: str
+    links: dict
+    defaults: Optional[dict] = None
+
+class FlightDatesResponse(BaseModel):
+    # Ao contrário da busca de ofertas, uma lista vazia é válida: nenhuma data com preço na janela
+    data: List[FlightDate]
+    meta: FlightDatesMeta
+    dictionaries: Optional[dict] = None
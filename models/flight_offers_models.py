@@ -98,3 +98,53 @@ class FlightOffersSearchResponse(BaseModel):
         if not v:
             raise ValueError("Data field cannot be empty")
         return v
+
+
+# Modelos "lite": apenas os campos usados pelo chat (preço, itinerários, segmentos e bagagem).
+# Campos ausentes aqui são ignorados na validação, o que reduz o tempo de parse e a memória
+# de respostas grandes (max=250). Usados quando AMADEUS_PARSE_MODE=lite.
+
+class LiteSegment(BaseModel):
+    id: str
+    departure: FlightEndPoint
+    arrival: FlightEndPoint
+    carrierCode: str
+    number: str
+    duration: str
+    numberOfStops: int
+
+class LiteItinerary(BaseModel):
+    duration: str
+    segments: List[LiteSegment]
+
+class LitePrice(BaseModel):
+    currency: str
+    total: str
+    grandTotal: Optional[str] = None
+
+class LiteFareDetailsBySegment(BaseModel):
+    segmentId: str
+    cabin: Optional[str] = None
+    includedCheckedBags: Optional[IncludedCheckedBags] = None
+
+class LiteTravelerPricing(BaseModel):
+    travelerId: str
+    fareDetailsBySegment: List[LiteFareDetailsBySegment]
+
+class LiteFlightOffer(BaseModel):
+    id: str
+    numberOfBookableSeats: Optional[int] = None
+    itineraries: List[LiteItinerary]
+    price: LitePrice
+    validatingAirlineCodes: List[str]
+    travelerPricings: List[LiteTravelerPricing]
+
+class LiteFlightOffersSearchResponse(BaseModel):
+    meta: CollectionMeta
+    data: List[LiteFlightOffer]
+
+    @field_validator('data')
+    def validate_data(cls, v):
+        if not v:
+            raise ValueError("Data field cannot be empty")
+        return v
@@ -1,13 +1,18 @@
 # services/amadeus_auth.py
-import requests
 import os
 from datetime import datetime, timedelta
 
+from services.amadeus_http import get_http_client
+from services.amadeus_token_provider import TOKEN_PATH, get_token_provider
+
 class AmadeusAuthService:
     """
     Serviço para gerenciar a autenticação com a API da Amadeus.
     Responsável por obter e armazenar tokens de acesso, verificando sua validade.
 
+    Os tokens vêm do provedor compartilhado do processo (`AmadeusTokenProvider`), de modo que
+    várias instâncias do serviço reutilizam o mesmo token até que ele precise ser renovado.
+
     Estrutura da resposta do token:
     {
         'access_token': 'str',
@@ -22,13 +27,14 @@ class AmadeusAuthService:
     }
     """
 
-    def __init__(self):
+    def __init__(self, token_provider=None):
         """Inicializa o serviço com as credenciais da API e configura o estado inicial."""
         self.client_id = os.getenv('AMADEUS_API_KEY')
         self.client_secret = os.getenv('AMADEUS_API_SECRET')
-        self.token_url = "https://test.api.amadeus.com/v1/security/oauth2/token"
+        self.token_url = get_http_client().url(TOKEN_PATH)
         self.token_data = None
         self.token_expiry = None
+        self.token_provider = token_provider or get_token_provider(self.client_id, self.client_secret)
 
     def get_full_response(self):
         """
@@ -54,27 +60,20 @@ class AmadeusAuthService:
 
     def _fetch_token(self):
         """
-        Faz uma solicitação para obter um novo token de acesso.
+        Obtém o token atual do provedor compartilhado (que só chama a API quando necessário).
         Atualiza `token_data` com a resposta e define o tempo de expiração do token.
         """
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret
-        }
-        response = requests.post(self.token_url, headers=headers, data=data)
-        response.raise_for_status()
-        self.token_data = response.json()
-        self.token_expiry = datetime.now() + timedelta(seconds=self.token_data.get("expires_in", 0))
+        entry = self.token_provider.get_token_entry()
+        self.token_data = entry["token_data"]
+        self.token_expiry = datetime.fromtimestamp(entry["expires_at"])
 
     def _is_token_expired(self):
         """
-        Verifica se o token atual está expirado.
+        Verifica se o token atual está expirado (ou dentro da margem de renovação do provedor).
 
         Retorna:
             bool: True se o token estiver expirado ou ausente, False caso contrário.
         """
         if self.token_expiry is None:
             return True
-        return datetime.now() >= self.token_expiry
+        return datetime.now() >= self.token_expiry - timedelta(seconds=self.token_provider.refresh_margin)
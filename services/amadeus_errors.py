@@ -0,0 +1,101 @@
+# services/amadeus_errors.py
+import time
+from email.utils import parsedate_to_datetime
+
+
+class AmadeusError(Exception):
+    """
+    Erro base das chamadas à Amadeus.
+
+    `retryable` indica se repetir a mesma chamada mais tarde pode dar certo (limite de
+    requisições, erro temporário do servidor, falha de rede). Erros não repetíveis vêm de
+    parâmetros inválidos ou de credenciais e só se resolvem mudando a requisição.
+    """
+
+    retryable = False
+
+    def __init__(self, message, status_code=None, detail=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AmadeusRetryableError(AmadeusError):
+    """Falha temporária: a chamada pode ser repetida após um intervalo."""
+
+    retryable = True
+
+
+class AmadeusRateLimitError(AmadeusRetryableError):
+    """HTTP 429: limite de transações por segundo (ou cota) excedido."""
+
+
+class AmadeusServerError(AmadeusRetryableError):
+    """HTTP 5xx da Amadeus."""
+
+
+class AmadeusConnectionError(AmadeusRetryableError):
+    """Falha de rede ou timeout antes de receber uma resposta."""
+
+
+class AmadeusClientError(AmadeusError):
+    """HTTP 4xx (exceto 429): a requisição é inválida e não deve ser repetida como está."""
+
+
+class AmadeusAuthenticationError(AmadeusClientError):
+    """HTTP 401/403: credenciais ou token rejeitados."""
+
+
+class AmadeusValidationError(AmadeusError):
+    """A resposta chegou com sucesso, mas o corpo não corresponde ao modelo esperado."""
+
+
+def parse_retry_after(value):
+    """
+    Converte o cabeçalho `Retry-After` (segundos ou data HTTP) em segundos de espera.
+
+    :return: float >= 0, ou None se o cabeçalho estiver ausente ou for inválido
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _error_detail(response):
+    try:
+        errors = response.json().get('errors') or []
+    except Exception:
+        return response.text[:500]
+    if not errors:
+        return response.text[:500]
+    first = errors[0]
+    return ' - '.join(str(part) for part in (first.get('title'), first.get('detail')) if part)
+
+
+def error_from_response(response):
+    """
+    Cria a exceção adequada para uma resposta HTTP de erro (requests ou `AmadeusResponse`).
+    A mensagem mantém o formato antigo ("Erro: <status>, <corpo>").
+    """
+    status = response.status_code
+    message = f"Erro: {status}, {response.text}"
+    detail = _error_detail(response)
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    if status == 429:
+        error_class = AmadeusRateLimitError
+    elif status >= 500:
+        error_class = AmadeusServerError
+    elif status in (401, 403):
+        error_class = AmadeusAuthenticationError
+    else:
+        error_class = AmadeusClientError
+    return error_class(message, status_code=status, detail=detail, retry_after=retry_after)
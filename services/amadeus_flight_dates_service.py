@@ -0,0 +1,256 @@
+# services/amadeus_flight_dates_service.py
+import asyncio
+import logging
+import os
+import time
+from datetime import date, timedelta
+
+import aiohttp
+import requests
+from models.flight_dates_models import FlightDatesResponse
+from pydantic import ValidationError
+from services.amadeus_auth_service import AmadeusAuthService
+from services.amadeus_errors import AmadeusConnectionError, AmadeusValidationError, error_from_response
+from services.amadeus_flight_offers_search_service import search_error_status
+from services.amadeus_http import get_async_http_client, get_http_client
+from services.amadeus_rate_limiter import get_rate_limiter
+from services.amadeus_retry import RetryPolicy, acall_with_retry, call_with_retry
+from services.amadeus_token_provider import get_async_token_provider
+from services.flight_dates_cache import FlightDatesMatrixCache, date_runs, get_flight_dates_cache, make_route_key
+from services.metrics import get_metrics
+from services.single_flight import AsyncSingleFlight, SingleFlight
+
+FLIGHT_DATES_PATH = '/v1/shopping/flight-dates'
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_MAX_WINDOW_DAYS = 180
+
+# Atualizações em andamento do mesmo trecho da mesma rota compartilham uma única chamada
+inflight_refreshes = SingleFlight()
+ainflight_refreshes = AsyncSingleFlight()
+
+
+def build_flight_dates_route(origin, destination, one_way=False, duration=None, non_stop=None):
+    """
+    Parâmetros fixos da rota na API de datas mais baratas (tudo menos a janela de datas),
+    normalizados como em `build_search_params`; também identificam a matriz no cache.
+
+    :param duration: Duração da estadia em dias, para ida e volta (ex: 7 ou '5,10')
+    :return: Dicionário de parâmetros no formato esperado pela Amadeus
+    """
+    if isinstance(one_way, str):
+        one_way = one_way.strip().lower() in ('true', '1', 'yes', 'sim')
+    route = {
+        'origin': origin.strip().upper(),
+        'destination': destination.strip().upper(),
+        'oneWay': 'true' if one_way else 'false',
+        # Uma linha por data de partida (a mais barata), e não por duração
+        'viewBy': 'DATE',
+    }
+    if duration and not one_way:
+        route['duration'] = ','.join(str(int(days)) for days in str(duration).replace(' ', '').split(','))
+    if isinstance(non_stop, str):
+        non_stop = non_stop.strip().lower() in ('true', '1', 'yes', 'sim')
+    if non_stop is not None:
+        route['nonStop'] = 'true' if non_stop else 'false'
+    return route
+
+
+def dates_window(date_from=None, date_to=None, max_days=None, today=None):
+    """
+    Datas de partida (YYYY-MM-DD) da janela [date_from, date_to]; sem `date_from`, começa hoje e,
+    sem `date_to`, dura 30 dias.
+    """
+    max_days = max_days or int(os.getenv('AMADEUS_DATES_MAX_DAYS', DEFAULT_MAX_WINDOW_DAYS))
+    start = date.fromisoformat(date_from) if date_from else (today or date.today())
+    end = date.fromisoformat(date_to) if date_to else start + timedelta(days=DEFAULT_WINDOW_DAYS - 1)
+    if end < start:
+        raise ValueError(f"date_to ({date_to}) must not be before date_from ({date_from})")
+    if (end - start).days + 1 > max_days:
+        raise ValueError(f"The date window has {(end - start).days + 1} days; the limit is {max_days}.")
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+def cheapest_from_matrix(route, matrix, dates, max_price=None, limit=5):
+    """
+    Consulta local da matriz: as `limit` datas mais baratas da janela, com preço até `max_price`.
+
+    :return: dict compacto para o LLM (rota, moeda, datas mais baratas e cobertura da janela)
+    """
+    priced = []
+    for day in dates:
+        entry = matrix['dates'].get(day)
+        # Só preços na moeda da matriz: datas em outra moeda não são comparáveis
+        if entry is not None and entry['price'] is not None \
+                and entry.get('currency', matrix['currency']) == matrix['currency']:
+            priced.append((float(entry['price']), day, entry['returnDate']))
+    if max_price is not None:
+        priced = [item for item in priced if item[0] <= float(max_price)]
+    priced.sort()
+    cheapest = []
+    for price, day, return_date in priced[:limit]:
+        option = {'departure_date': day, 'price': f"{price:.2f}"}
+        if return_date:
+            option['return_date'] = return_date
+        cheapest.append(option)
+    return {
+        'origin': route['origin'],
+        'destination': route['destination'],
+        'currency': matrix['currency'],
+        'cheapest_dates': cheapest,
+        'dates_checked': len(dates),
+        'dates_with_price': len(priced),
+    }
+
+
+def parse_flight_dates(response):
+    """
+    Valida a resposta da API. Um 404 (a Amadeus não tem preços para a rota) vira None, para que
+    as datas fiquem registradas como sem preço em vez de serem consultadas de novo a cada pergunta.
+
+    :raises AmadeusError: Para os demais status de erro ou se o corpo não passar na validação
+    """
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise error_from_response(response)
+    try:
+        return FlightDatesResponse.model_validate_json(response.content)
+    except ValidationError as e:
+        raise AmadeusValidationError(f"Validation error: {str(e)}", status_code=response.status_code)
+
+
+def _window_params(route, start, end):
+    return {**route, 'departureDate': start if start == end else f"{start},{end}"}
+
+
+class AmadeusFlightDatesService:
+    """
+    Datas mais baratas de uma rota (API Flight Cheapest Date Search), com a matriz data -> preço
+    de `services/flight_dates_cache.py`: só as datas ausentes ou vencidas da janela vão à API, em
+    uma chamada por trecho contíguo, e a resposta é montada a partir da matriz.
+    """
+
+    def __init__(self, auth_service=None, http_client=None, cache=None, rate_limiter=None, retry_policy=None):
+        self.auth_service = auth_service or AmadeusAuthService()
+        self.http_client = http_client or get_http_client()
+        self.cache = cache if cache is not None else get_flight_dates_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.base_url = self.http_client.url(FLIGHT_DATES_PATH)
+        self.logger = logging.getLogger()
+
+    def cheapest_dates(self,
+                       origin,
+                       destination,
+                       date_from=None,
+                       date_to=None,
+                       one_way=False,
+                       duration=None,
+                       non_stop=None,
+                       max_price=None,
+                       limit=5):
+        """
+        :param origin: Código IATA da cidade ou aeroporto de origem (ex: 'MAD')
+        :param destination: Código IATA da cidade ou aeroporto de destino (ex: 'PAR')
+        :param date_from: (Opcional) Início da janela de datas de partida (YYYY-MM-DD; padrão: hoje)
+        :param date_to: (Opcional) Fim da janela de datas de partida (YYYY-MM-DD; padrão: 30 dias)
+        :param one_way: Só ida (True) ou ida e volta (False)
+        :param duration: (Opcional) Duração da estadia em dias, para ida e volta (ex: 7 ou '5,10')
+        :param non_stop: (Opcional) Apenas voos diretos
+        :param max_price: (Opcional) Preço máximo, aplicado na consulta local da matriz
+        :param limit: Quantidade de datas a retornar
+        :return: dict com as datas mais baratas (ver `cheapest_from_matrix`)
+        """
+        route = build_flight_dates_route(origin, destination, one_way, duration, non_stop)
+        dates = dates_window(date_from, date_to)
+        return cheapest_from_matrix(route, self.price_matrix(route, dates), dates, max_price, limit)
+
+    def price_matrix(self, route, dates):
+        """Matriz da rota com todas as `dates` atualizadas (busca só as ausentes ou vencidas)."""
+        # Sem cache compartilhado, a matriz vale só para esta consulta
+        cache = self.cache if self.cache is not None else FlightDatesMatrixCache()
+        matrix = cache.get(route)
+        for start, end in date_runs(cache.missing_dates(matrix, dates)):
+            matrix = inflight_refreshes.do(f"{make_route_key(route)}:{start}:{end}",
+                                           lambda start=start, end=end: self._refresh(cache, route, start, end))
+        return matrix
+
+    def _refresh(self, cache, route, start, end):
+        started = time.perf_counter()
+        try:
+            flight_dates = call_with_retry(lambda: self._send(route, start, end), self.retry_policy,
+                                           self.rate_limiter, self.logger)
+        except Exception as e:
+            get_metrics().observe('amadeus_flight_dates_seconds', time.perf_counter() - started,
+                                  status=search_error_status(e))
+            raise
+        get_metrics().observe('amadeus_flight_dates_seconds', time.perf_counter() - started, status='ok')
+        return cache.update(route, start, end, flight_dates)
+
+    def _send(self, route, start, end):
+        headers = {
+            'Authorization': "Bearer " + self.auth_service.get_access_token()
+        }
+        try:
+            response = self.http_client.get(self.base_url, headers=headers, params=_window_params(route, start, end))
+        except requests.RequestException as e:
+            raise AmadeusConnectionError(f"Erro de conexão com a Amadeus: {e}") from e
+        return parse_flight_dates(response)
+
+
+class AsyncAmadeusFlightDatesService:
+    """
+    Versão assíncrona de `AmadeusFlightDatesService` (mesma matriz e mesmos parâmetros); os
+    trechos da janela que precisam da API são buscados em paralelo.
+    Deve ser instanciado dentro de um event loop em execução.
+    """
+
+    def __init__(self, token_provider=None, http_client=None, cache=None, rate_limiter=None, retry_policy=None):
+        self.token_provider = token_provider or get_async_token_provider()
+        self.http_client = http_client or get_async_http_client()
+        self.cache = cache if cache is not None else get_flight_dates_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.base_url = self.http_client.url(FLIGHT_DATES_PATH)
+        self.logger = logging.getLogger()
+
+    async def cheapest_dates(self, origin, destination, date_from=None, date_to=None, one_way=False, duration=None,
+                             non_stop=None, max_price=None, limit=5):
+        route = build_flight_dates_route(origin, destination, one_way, duration, non_stop)
+        dates = dates_window(date_from, date_to)
+        return cheapest_from_matrix(route, await self.price_matrix(route, dates), dates, max_price, limit)
+
+    async def price_matrix(self, route, dates):
+        cache = self.cache if self.cache is not None else FlightDatesMatrixCache()
+        # O backend pode ser Redis ou diskcache: as leituras e gravações rodam fora do event loop
+        runs = date_runs(cache.missing_dates(await asyncio.to_thread(cache.get, route), dates))
+        # Trechos em paralelo; `cache.update` mescla cada um na matriz sob o lock da rota
+        await asyncio.gather(*(
+            ainflight_refreshes.do(f"{make_route_key(route)}:{start}:{end}",
+                                   lambda start=start, end=end: self._refresh(cache, route, start, end))
+            for start, end in runs
+        ))
+        return await asyncio.to_thread(cache.get, route)
+
+    async def _refresh(self, cache, route, start, end):
+        started = time.perf_counter()
+        try:
+            flight_dates = await acall_with_retry(lambda: self._send(route, start, end), self.retry_policy,
+                                                  self.rate_limiter, self.logger)
+        except Exception as e:
+            get_metrics().observe('amadeus_flight_dates_seconds', time.perf_counter() - started,
+                                  status=search_error_status(e))
+            raise
+        get_metrics().observe('amadeus_flight_dates_seconds', time.perf_counter() - started, status='ok')
+        return await asyncio.to_thread(cache.update, route, start, end, flight_dates)
+
+    async def _send(self, route, start, end):
+        headers = {
+            'Authorization': "Bearer " + await self.token_provider.get_access_token()
+        }
+        try:
+            response = await self.http_client.get(self.base_url, headers=headers,
+                                                  params=_window_params(route, start, end))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise AmadeusConnectionError(f"Erro de conexão com a Amadeus: {e!r}") from e
+        return parse_flight_dates(response)
@@ -0,0 +1,204 @@
+# services/amadeus_flight_multi_search_service.py
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from models.flight_offers_models import CollectionMeta, FlightOffersSearchResponse
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+from services.async_amadeus_flight_offers_search_service import AsyncAmadeusFlightOffersSearchService
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_COMBINATIONS = 30
+DEFAULT_RESULTS_PER_SEARCH = 50
+# Moeda pedida em todas as buscas combinadas quando o usuário não escolhe uma: sem `currencyCode`,
+# a Amadeus pode responder rotas diferentes em moedas diferentes, e os preços não seriam comparáveis
+DEFAULT_CURRENCY = 'BRL'
+
+
+def expand_departure_dates(departure_dates=None, date_from=None, date_to=None):
+    """
+    Retorna a lista de datas de partida (YYYY-MM-DD) a partir de uma lista explícita
+    e/ou de uma janela [date_from, date_to] (inclusiva).
+    """
+    dates = list(departure_dates or [])
+    if date_from:
+        start = date.fromisoformat(date_from)
+        end = date.fromisoformat(date_to or date_from)
+        if end < start:
+            raise ValueError(f"date_to ({date_to}) must not be before date_from ({date_from})")
+        dates.extend((start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1))
+    if not dates:
+        raise ValueError("Provide departure_dates or a date window (date_from/date_to)")
+    return sorted(set(dates))
+
+
+def multi_search_currency(currency_code=None):
+    """Moeda das buscas combinadas: a pedida ou `AMADEUS_MULTI_SEARCH_CURRENCY` (padrão: BRL)."""
+    return (currency_code or os.getenv('AMADEUS_MULTI_SEARCH_CURRENCY', DEFAULT_CURRENCY)).strip().upper()
+
+
+def build_search_combinations(origins, destinations, departure_dates, max_combinations=None):
+    """Produto cartesiano origem x destino x data, ignorando pares com origem igual ao destino."""
+    if max_combinations is None:
+        max_combinations = int(os.getenv('AMADEUS_MULTI_SEARCH_MAX_COMBINATIONS', DEFAULT_MAX_COMBINATIONS))
+    combinations = [
+        (origin.strip().upper(), destination.strip().upper(), departure_date)
+        for origin in origins
+        for destination in destinations
+        for departure_date in departure_dates
+        if origin.strip().upper() != destination.strip().upper()
+    ]
+    if not combinations:
+        raise ValueError("No valid origin/destination combination to search")
+    if len(combinations) > max_combinations:
+        raise ValueError(f"Too many searches ({len(combinations)}); the limit is {max_combinations}. "
+                         "Reduce the number of airports or dates.")
+    return combinations
+
+
+def _offer_signature(offer):
+    segments = tuple(
+        (segment.carrierCode, segment.number, segment.departure.iataCode, segment.departure.at)
+        for itinerary in offer.itineraries
+        for segment in itinerary.segments
+    )
+    return segments, offer.price.currency, offer.price.grandTotal or offer.price.total
+
+
+def _offer_price(offer):
+    return float(offer.price.grandTotal or offer.price.total)
+
+
+def merge_flight_offers(responses):
+    """
+    Junta as respostas de várias buscas em uma única `FlightOffersSearchResponse`:
+    remove ofertas idênticas (mesmos voos e mesmo preço), ordena por preço e renumera os ids.
+
+    :raises ValueError: Se as ofertas não estiverem todas na mesma moeda
+    """
+    currencies = {offer.price.currency for response in responses for offer in response.data}
+    if len(currencies) > 1:
+        raise ValueError(f"Cannot merge flight offers in different currencies: {', '.join(sorted(currencies))}")
+    seen = set()
+    offers = []
+    for response in responses:
+        for offer in response.data:
+            signature = _offer_signature(offer)
+            if signature not in seen:
+                seen.add(signature)
+                offers.append(offer)
+    offers.sort(key=_offer_price)
+    offers = [offer.model_copy(update={'id': str(index)}) for index, offer in enumerate(offers, start=1)]
+    # Mantém o modelo das respostas (completo ou lite, conforme AMADEUS_PARSE_MODE)
+    response_class = type(responses[0]) if responses else FlightOffersSearchResponse
+    return response_class(meta=CollectionMeta(count=len(offers), links={}), data=offers)
+
+
+def merge_or_raise(combinations, results, logger):
+    """
+    Combina os resultados das buscas, ignorando (e registrando no log) as que falharam.
+
+    :param combinations: (origem, destino, data) de cada busca, na ordem de `results`
+    :param results: FlightOffersSearchResponse ou a exceção de cada busca
+    :return: FlightOffersSearchResponse combinado (ver `merge_flight_offers`)
+    :raises Exception: A última exceção, se todas as buscas falharam
+    """
+    responses = []
+    errors = []
+    for combination, result in zip(combinations, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Search {combination} failed: {result}")
+            errors.append(result)
+        else:
+            responses.append(result)
+    if not responses:
+        raise errors[-1]
+    return merge_flight_offers(responses)
+
+
+class AmadeusFlightMultiSearchService:
+    """
+    Executa buscas de ofertas para várias origens, destinos e datas em paralelo
+    (pool limitado de threads) e devolve o resultado combinado.
+
+    Buscas que falham (ex: rota sem voos) são ignoradas; se todas falharem, a última exceção é propagada.
+    """
+
+    def __init__(self, search_service=None, max_workers=None):
+        self.search_service = search_service or AmadeusFlightOffersSearchService()
+        self.max_workers = max_workers or int(os.getenv('AMADEUS_MULTI_SEARCH_WORKERS', DEFAULT_MAX_WORKERS))
+        self.logger = logging.getLogger()
+
+    def search(self,
+               origins,
+               destinations,
+               departure_dates=None,
+               date_from=None,
+               date_to=None,
+               max_results_per_search=DEFAULT_RESULTS_PER_SEARCH,
+               **search_kwargs):
+        """
+        :param origins: Lista de códigos IATA de origem
+        :param destinations: Lista de códigos IATA de destino
+        :param departure_dates: (Opcional) Lista de datas de partida (YYYY-MM-DD)
+        :param date_from: (Opcional) Início da janela de datas de partida (YYYY-MM-DD)
+        :param date_to: (Opcional) Fim da janela de datas de partida (YYYY-MM-DD)
+        :param max_results_per_search: Máximo de ofertas pedidas em cada busca individual
+        :param search_kwargs: Demais parâmetros de `search_flights` (return_date, adults, ...); todas as
+            buscas usam a mesma moeda (`currency_code`, ou a padrão de `multi_search_currency`)
+        :return: FlightOffersSearchResponse com as ofertas de todas as buscas, ordenadas por preço
+        """
+        dates = expand_departure_dates(departure_dates, date_from, date_to)
+        combinations = build_search_combinations(origins, destinations, dates)
+        search_kwargs['currency_code'] = multi_search_currency(search_kwargs.get('currency_code'))
+
+        def run_one(combination):
+            origin, destination, departure_date = combination
+            try:
+                return self.search_service.search_flights(
+                    origin, destination, departure_date,
+                    max_results=max_results_per_search, **search_kwargs
+                )
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(combinations))) as executor:
+            results = list(executor.map(run_one, combinations))
+        return merge_or_raise(combinations, results, self.logger)
+
+
+class AsyncAmadeusFlightMultiSearchService:
+    """Versão assíncrona de `AmadeusFlightMultiSearchService`, com concorrência limitada por semáforo."""
+
+    def __init__(self, search_service=None, max_concurrency=None):
+        self.search_service = search_service or AsyncAmadeusFlightOffersSearchService()
+        self.max_concurrency = max_concurrency or int(os.getenv('AMADEUS_MULTI_SEARCH_WORKERS', DEFAULT_MAX_WORKERS))
+        self.logger = logging.getLogger()
+
+    async def search(self,
+                     origins,
+                     destinations,
+                     departure_dates=None,
+                     date_from=None,
+                     date_to=None,
+                     max_results_per_search=DEFAULT_RESULTS_PER_SEARCH,
+                     **search_kwargs):
+        """Mesmos parâmetros de `AmadeusFlightMultiSearchService.search`."""
+        dates = expand_departure_dates(departure_dates, date_from, date_to)
+        combinations = build_search_combinations(origins, destinations, dates)
+        search_kwargs['currency_code'] = multi_search_currency(search_kwargs.get('currency_code'))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(combination):
+            origin, destination, departure_date = combination
+            async with semaphore:
+                return await self.search_service.search_flights(
+                    origin, destination, departure_date,
+                    max_results=max_results_per_search, **search_kwargs
+                )
+
+        results = await asyncio.gather(*(run_one(combination) for combination in combinations),
+                                       return_exceptions=True)
+        return merge_or_raise(combinations, results, self.logger)
@@ -1,19 +1,44 @@
-import requests
 from services.amadeus_auth_service import AmadeusAuthService
-from models.flight_offers_models import FlightOffersSearchResponse
+from services.amadeus_errors import AmadeusConnectionError, AmadeusValidationError, error_from_response
+from services.amadeus_http import get_http_client
+from services.amadeus_rate_limiter import get_rate_limiter
+from services.amadeus_retry import RetryPolicy, call_with_retry
+from services.flight_offers_cache import get_flight_offers_cache, make_cache_key
+from services.search_logging import get_search_log
+from services.single_flight import SingleFlight
+from models.flight_offers_models import FlightOffersSearchResponse, LiteFlightOffersSearchResponse
 import logging
-import json
+import os
+import time
+import requests
+
+PARSE_MODELS = {
+    'full': FlightOffersSearchResponse,
+    'lite': LiteFlightOffersSearchResponse,
+}
+
+# Buscas idênticas em andamento (em qualquer thread do processo) compartilham uma única chamada à Amadeus
+inflight_searches = SingleFlight()
 
 
 class AmadeusFlightOffersSearchService:
-    def __init__(self):
-        self.access_token = "Bearer " + AmadeusAuthService().get_access_token()
-        self.base_url = 'https://test.api.amadeus.com/v2/shopping/flight-offers'
-        # Configuração do logger
-        logging.basicConfig(filename='flight_offers.log', level=logging.INFO, 
-                            format='%(asctime)s - %(levelname)s - %(message)s')
+    def __init__(self, auth_service=None, http_client=None, cache=None, rate_limiter=None, retry_policy=None,
+                 search_log=None):
+        self.auth_service = auth_service or AmadeusAuthService()
+        self.http_client = http_client or get_http_client()
+        self.cache = cache if cache is not None else get_flight_offers_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.base_url = self.http_client.url('/v2/shopping/flight-offers')
+        # Registros compactos por busca, escritos em arquivo fora da thread da requisição (services/search_logging.py)
+        self.search_log = search_log or get_search_log()
         self.logger = logging.getLogger()
 
+    @property
+    def access_token(self):
+        """Cabeçalho Authorization com o token atual do provedor compartilhado."""
+        return "Bearer " + self.auth_service.get_access_token()
+
     def search_flights(self, 
                        origin, 
                        destination, 
@@ -48,64 +73,156 @@ class AmadeusFlightOffersSearchService:
         :param max_results: (Opcional) Número máximo de resultados a retornar
         :return: Dados da resposta em formato JSON
         """
-        params = {
-            'originLocationCode': origin,
-            'destinationLocationCode': destination,
-            'departureDate': departure_date,
-            'adults': adults,
-            'children': children,
-            'infants': infants,
-            'max': max_results
-        }
-        if return_date:
-            params['returnDate'] = return_date
-        if travel_class:
-            params['travelClass'] = travel_class
-        if max_price:
-            try:
-                max_price = int(max_price)
-            except ValueError:
-                raise ValueError(f"max_price must be a number, got {max_price}")
-            params['maxPrice'] = max_price
-        if non_stop is not None:
-            params['nonStop'] = 'true' if non_stop else 'false'
-        if currency_code:
-            params['currencyCode'] = currency_code
-        if included_airline_codes and excluded_airline_codes:
-            self.logger.warning("Both included_airline_codes and excluded_airline_codes provided. Using excluded_airline_codes.")
-            included_airline_codes = None
-
-        if included_airline_codes:
-            params['includedAirlineCodes'] = ','.join(included_airline_codes)
-        elif excluded_airline_codes:
-            params['excludedAirlineCodes'] = ','.join(excluded_airline_codes)
+        params = build_search_params(
+            origin, destination, departure_date, return_date, adults, children, infants,
+            travel_class, max_price, non_stop, included_airline_codes, excluded_airline_codes,
+            currency_code, max_results, logger=self.logger
+        )
+        start = time.perf_counter()
+        cached = self.cache.get(params) if self.cache is not None else None
+        if cached is not None:
+            flight_offers = parse_flight_offers(cached)
+            self.search_log.search(params, 'cached', time.perf_counter() - start, len(flight_offers.data), len(cached))
+            return flight_offers
+        return inflight_searches.do(make_cache_key(params), lambda: self._fetch_offers(params))
 
+    def _fetch_offers(self, params):
+        """
+        Chama a Amadeus com os parâmetros já montados, valida a resposta e a grava no cache.
+        Passa pelo limitador de taxa e repete erros temporários (429, 5xx, rede) com backoff.
+        """
+        start = time.perf_counter()
+        try:
+            response = call_with_retry(lambda: self._send(params), self.retry_policy, self.rate_limiter, self.logger)
+            flight_offers = handle_flight_offers_response(response, self.logger)
+        except Exception as e:
+            self.search_log.search(params, search_error_status(e), time.perf_counter() - start, error=e)
+            raise
+        self.search_log.search(params, 'ok', time.perf_counter() - start, len(flight_offers.data), len(response.content))
+        self.search_log.payload(params, response.content)
+        if self.cache is not None:
+            self.cache.set(params, response.content)
+        return flight_offers
+
+    def _send(self, params):
         headers = {
             'Authorization': self.access_token
         }
-        
-        print(params)
+        try:
+            response = self.http_client.get(self.base_url, headers=headers, params=params)
+        except requests.RequestException as e:
+            raise AmadeusConnectionError(f"Erro de conexão com a Amadeus: {e}") from e
+        if response.status_code != 200:
+            raise error_from_response(response)
+        return response
 
-        response = requests.get(self.base_url, headers=headers, params=params)
-        
 
-        if response.status_code == 200:
-            response_data = response.json()
-            self.logger.info(f"Request successful: {response_data}")
-            try:
-                flight_offers = FlightOffersSearchResponse(**response_data)
-                flight_offers_dict = flight_offers.model_dump()
-                flight_offers_json = json.dumps(flight_offers_dict, indent=4)
-                self.logger.info("-----------------------------------------")
-                self.logger.info(f"Flight offers data: {flight_offers_json}")
-                return flight_offers
-            except Exception as e:
-                self.logger.error(f"Validation error: {str(e)}")
-                raise Exception(f"Validation error: {str(e)}")
-        else:
-            error_message = f"Erro: {response.status_code}, {response.text}"
-            self.logger.error(error_message)
-            raise Exception(error_message)
+def build_search_params(origin,
+                        destination,
+                        departure_date,
+                        return_date=None,
+                        adults=1,
+                        children=0,
+                        infants=0,
+                        travel_class=None,
+                        max_price=None,
+                        non_stop=None,
+                        included_airline_codes=None,
+                        excluded_airline_codes=None,
+                        currency_code=None,
+                        max_results=250,
+                        logger=None):
+    """
+    Monta os parâmetros de query da API de busca de ofertas de voo.
+    Compartilhado pelas versões síncrona e assíncrona do serviço (mesmos parâmetros de `search_flights`).
+
+    Os valores são normalizados (códigos IATA e de moeda em maiúsculas, listas de companhias
+    ordenadas, booleanos vindos como texto), de modo que buscas equivalentes geram exatamente
+    os mesmos parâmetros — o que também serve de chave para o cache de respostas.
+
+    :return: Dicionário de parâmetros no formato esperado pela Amadeus
+    """
+    params = {
+        'originLocationCode': origin.strip().upper(),
+        'destinationLocationCode': destination.strip().upper(),
+        'departureDate': departure_date,
+        'adults': int(adults),
+        'children': int(children),
+        'infants': int(infants),
+        'max': int(max_results)
+    }
+    if return_date:
+        params['returnDate'] = return_date
+    if travel_class:
+        params['travelClass'] = travel_class.strip().upper()
+    if max_price:
+        try:
+            max_price = int(max_price)
+        except ValueError:
+            raise ValueError(f"max_price must be a number, got {max_price}")
+        params['maxPrice'] = max_price
+    if isinstance(non_stop, str):
+        non_stop = non_stop.strip().lower() in ('true', '1', 'yes', 'sim')
+    if non_stop is not None:
+        params['nonStop'] = 'true' if non_stop else 'false'
+    if currency_code:
+        params['currencyCode'] = currency_code.strip().upper()
+    if included_airline_codes and excluded_airline_codes:
+        (logger or logging.getLogger()).warning("Both included_airline_codes and excluded_airline_codes provided. Using excluded_airline_codes.")
+        included_airline_codes = None
+
+    if included_airline_codes:
+        params['includedAirlineCodes'] = _join_airline_codes(included_airline_codes)
+    elif excluded_airline_codes:
+        params['excludedAirlineCodes'] = _join_airline_codes(excluded_airline_codes)
+    return params
+
+
+def _join_airline_codes(codes):
+    if isinstance(codes, str):
+        codes = codes.split(',')
+    return ','.join(sorted({code.strip().upper() for code in codes if code.strip()}))
+
+
+def parse_flight_offers(content, mode=None):
+    """
+    Valida o corpo JSON (bytes ou str) direto no modelo, sem passar por `json.loads` e dicts intermediários.
+
+    :param content: Corpo da resposta da busca de ofertas
+    :param mode: 'full' (todos os campos) ou 'lite' (só o que o chat usa); padrão: `AMADEUS_PARSE_MODE` ou 'full'
+    :return: FlightOffersSearchResponse ou LiteFlightOffersSearchResponse
+    """
+    mode = mode or os.getenv('AMADEUS_PARSE_MODE', 'full')
+    try:
+        model = PARSE_MODELS[mode]
+    except KeyError:
+        raise ValueError(f"Unknown parse mode: {mode}")
+    return model.model_validate_json(content)
+
+
+def search_error_status(error):
+    """Status de uma busca que falhou, para o log: o status HTTP, se houver, senão o nome do erro."""
+    return getattr(error, 'status_code', None) or type(error).__name__
+
+
+def handle_flight_offers_response(response, logger, mode=None):
+    """
+    Valida a resposta HTTP da busca (requests ou `AmadeusResponse`) e converte o corpo em `FlightOffersSearchResponse`
+    (ou no modelo lite, conforme `mode`).
+
+    :raises AmadeusError: Se o status não for 200 (subclasse conforme o status) ou se o corpo não passar na validação
+    """
+    if response.status_code == 200:
+        try:
+            flight_offers = parse_flight_offers(response.content, mode)
+        except ValueError as e:
+            logger.error(f"Validation error: {str(e)}")
+            raise AmadeusValidationError(f"Validation error: {str(e)}", status_code=response.status_code)
+        return flight_offers
+    else:
+        error = error_from_response(response)
+        logger.error(str(error))
+        raise error
         
         
 # Usage example:
@@ -0,0 +1,250 @@
+# services/amadeus_http.py
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+
+import aiohttp
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from services.amadeus_recording import get_http_corpus, get_http_mode, get_http_replayer, reset_http_corpus
+
+DEFAULT_BASE_URL = 'https://test.api.amadeus.com'
+DEFAULT_POOL_SIZE = 20
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+
+def _resolve_settings(base_url, pool_size, connect_timeout, read_timeout):
+    """Completa os parâmetros ausentes com as variáveis de ambiente (ou os valores padrão)."""
+    base_url = (base_url or os.getenv('AMADEUS_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+    if pool_size is None:
+        pool_size = int(os.getenv('AMADEUS_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE))
+    if connect_timeout is None:
+        connect_timeout = float(os.getenv('AMADEUS_HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT))
+    if read_timeout is None:
+        read_timeout = float(os.getenv('AMADEUS_HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT))
+    return base_url, pool_size, connect_timeout, read_timeout
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Adaptador normal que também grava cada par requisição/resposta no corpus (modo record)."""
+
+    def __init__(self, corpus, **kwargs):
+        super().__init__(**kwargs)
+        self.corpus = corpus
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # `content` lê o corpo inteiro (já descompactado) antes de devolver a resposta
+        self.corpus.record(request.method, request.url, None, response.status_code, response.headers,
+                           response.content)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Responde com o corpus, sem abrir conexões (modo replay); ver services/amadeus_recording.py."""
+
+    def __init__(self, replayer):
+        super().__init__()
+        self.replayer = replayer
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status, headers, content, delay = self.replayer.respond(request.method, request.url)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(f"Replay latency {delay:.3f}s exceeds the read timeout",
+                                                  request=request)
+        time.sleep(delay)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = headers
+        response._content = content
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+class AmadeusHttpClient:
+    """
+    Camada de transporte compartilhada pelos serviços Amadeus.
+
+    Mantém uma única `requests.Session` com pool de conexões keep-alive, de modo que as
+    chamadas reaproveitam conexões TCP/TLS já abertas em vez de abrir uma nova por requisição.
+    Todas as requisições recebem timeouts de conexão e leitura e aceitam respostas gzip.
+
+    Configuração (variáveis de ambiente):
+        AMADEUS_BASE_URL: host da API (padrão: https://test.api.amadeus.com)
+        AMADEUS_HTTP_POOL_SIZE: conexões mantidas por host (padrão: 20)
+        AMADEUS_HTTP_CONNECT_TIMEOUT: timeout de conexão em segundos (padrão: 5)
+        AMADEUS_HTTP_READ_TIMEOUT: timeout de leitura em segundos (padrão: 30)
+        AMADEUS_HTTP_MODE: live (padrão), record ou replay (ver services/amadeus_recording.py)
+    """
+
+    def __init__(self, base_url=None, pool_size=None, connect_timeout=None, read_timeout=None, mode=None):
+        self.base_url, pool_size, connect_timeout, read_timeout = _resolve_settings(
+            base_url, pool_size, connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.mode = get_http_mode(mode)
+
+        self.session = requests.Session()
+        if self.mode == 'replay':
+            adapter = ReplayAdapter(get_http_replayer())
+        elif self.mode == 'record':
+            adapter = RecordingAdapter(get_http_corpus(), pool_connections=pool_size, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+
+    def url(self, path):
+        """Monta a URL completa de um endpoint da API (ex: '/v2/shopping/flight-offers')."""
+        return self.base_url + path
+
+    def request(self, method, url, **kwargs):
+        """Executa a requisição na sessão compartilhada, aplicando o timeout padrão."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Retorna o cliente HTTP compartilhado do processo, criando-o na primeira chamada."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AmadeusHttpClient()
+        return _client
+
+
+def reset_http_client():
+    """Fecha e descarta o cliente compartilhado (útil em testes ou após mudar a configuração)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+    # Os clientes assíncronos pertencem aos seus loops; basta esquecê-los
+    _async_clients.clear()
+    reset_http_corpus()
+
+
+class AmadeusResponse:
+    """
+    Resposta HTTP já lida por completo, com a mesma interface básica de `requests.Response`
+    (`status_code`, `headers`, `content`, `text`, `json()`).
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error: {self.text}", response=self)
+
+
+class AsyncAmadeusHttpClient:
+    """
+    Equivalente assíncrono de `AmadeusHttpClient`, baseado em `aiohttp.ClientSession`.
+
+    Usa as mesmas variáveis de ambiente. Uma sessão aiohttp fica presa ao event loop em que
+    foi criada, por isso `get_async_http_client` mantém um cliente por loop.
+    As respostas são lidas por completo e devolvidas como `AmadeusResponse`. No modo replay,
+    nenhuma sessão é aberta e as respostas vêm do corpus.
+    """
+
+    def __init__(self, base_url=None, pool_size=None, connect_timeout=None, read_timeout=None, mode=None):
+        self.base_url, pool_size, connect_timeout, read_timeout = _resolve_settings(
+            base_url, pool_size, connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.read_timeout = read_timeout
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self.mode = get_http_mode(mode)
+        self.replayer = get_http_replayer() if self.mode == 'replay' else None
+        self.corpus = get_http_corpus() if self.mode == 'record' else None
+        if self.replayer is not None:
+            self.session = None
+            return
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size),
+            timeout=self.timeout,
+            headers={'Accept-Encoding': 'gzip, deflate'},
+        )
+
+    def url(self, path):
+        return self.base_url + path
+
+    async def request(self, method, url, **kwargs):
+        if self.replayer is not None:
+            return await self._replay(method, url, kwargs.get('params'))
+        async with self.session.request(method, url, **kwargs) as response:
+            content = await response.read()
+        if self.corpus is not None:
+            await asyncio.to_thread(self.corpus.record, method, url, kwargs.get('params'), response.status,
+                                    response.headers, content)
+        return AmadeusResponse(response.status, response.headers, content)
+
+    async def _replay(self, method, url, params):
+        status, headers, content, delay = self.replayer.respond(method, url, params)
+        if delay > self.read_timeout:
+            await asyncio.sleep(self.read_timeout)
+            raise asyncio.TimeoutError(f"Replay latency {delay:.3f}s exceeds the read timeout")
+        await asyncio.sleep(delay)
+        return AmadeusResponse(status, headers, content)
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def aclose(self):
+        if self.session is not None:
+            await self.session.close()
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client():
+    """Retorna o cliente HTTP assíncrono do event loop atual, criando-o na primeira chamada."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncAmadeusHttpClient()
+        _async_clients[loop] = client
+    return client
@@ -0,0 +1,143 @@
+# services/amadeus_rate_limiter.py
+import asyncio
+import os
+import threading
+import time
+
+from services.backend_io import run_backend_io
+
+# A Amadeus limita o ambiente de testes a 10 TPS por aplicação (40 TPS em produção)
+DEFAULT_RATE = 10.0
+
+_REDIS_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local ceiling = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(math.min(capacity, tokens + math.max(now - ts, 0) * rate) - requested, ceiling)
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket em memória, compartilhado pelas threads (e event loops) do processo.
+
+    `reserve` desconta o token na hora e retorna quanto tempo o caller deve esperar antes de
+    enviar a requisição; assim nenhuma trava fica presa durante a espera e a mesma instância
+    serve tanto para `acquire` (bloqueante) quanto para `aacquire` (asyncio).
+    """
+
+    blocking = False
+
+    def __init__(self, rate=None, capacity=None):
+        self.rate = float(rate or os.getenv('AMADEUS_RATE_LIMIT', DEFAULT_RATE))
+        self.capacity = float(capacity or os.getenv('AMADEUS_RATE_LIMIT_BURST', self.rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        return self._take(tokens, self.capacity)
+
+    def pause(self, seconds):
+        """
+        Esvazia o bucket para que nenhuma requisição saia nos próximos `seconds` segundos
+        (usado quando a Amadeus responde 429). Pausas simultâneas não se acumulam.
+        """
+        self._take(0, -seconds * self.rate)
+
+    def _take(self, tokens, ceiling):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens = min(self._tokens - tokens, ceiling)
+            return max(-self._tokens / self.rate, 0.0)
+
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens=1):
+        wait = await run_backend_io(self, self.reserve, tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def apause(self, seconds):
+        """Versão assíncrona de `pause`."""
+        await run_backend_io(self, self.pause, seconds)
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket no Redis, compartilhado por todos os workers que usam a mesma chave.
+
+    O cálculo é feito atomicamente por um script Lua com o relógio do próprio Redis,
+    então workers em máquinas diferentes não dependem de relógios sincronizados. Em código
+    assíncrono (`aacquire`, `apause`), o script roda em uma thread para não bloquear o event loop.
+    """
+
+    blocking = True
+
+    def __init__(self, rate=None, capacity=None, client=None, url=None, key='amadeus:rate-limit'):
+        super().__init__(rate, capacity)
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        self._client = client
+        self.key = key
+
+    def _take(self, tokens, ceiling):
+        wait = self._client.eval(_REDIS_BUCKET_SCRIPT, 1, self.key, self.rate, self.capacity, tokens, ceiling)
+        return float(wait)
+
+
+RATE_LIMITERS = {
+    'memory': TokenBucket,
+    'redis': RedisTokenBucket,
+}
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Retorna o limitador compartilhado do processo, configurado por `AMADEUS_RATE_LIMITER`
+    (memory, redis ou none), `AMADEUS_RATE_LIMIT` (requisições por segundo) e
+    `AMADEUS_RATE_LIMIT_BURST`. Com 'none', retorna None e as chamadas não são limitadas.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            name = os.getenv('AMADEUS_RATE_LIMITER', 'memory')
+            if name == 'none':
+                return None
+            try:
+                limiter_class = RATE_LIMITERS[name]
+            except KeyError:
+                raise ValueError(f"Unknown rate limiter: {name}")
+            _limiter = limiter_class()
+        return _limiter
+
+
+def reset_rate_limiter():
+    """Descarta o limitador compartilhado (útil em testes ou após mudar a configuração)."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = None
@@ -0,0 +1,251 @@
+# services/amadeus_recording.py
+"""
+Gravação e reprodução das chamadas HTTP à Amadeus, para testes de carga e de regressão sem rede.
+
+`AMADEUS_HTTP_MODE` escolhe o modo da camada de transporte (`services/amadeus_http.py`):
+
+- 'live' (padrão): chamadas normais à API.
+- 'record': chamadas normais, e cada par requisição/resposta vai para o corpus em disco.
+- 'replay': nenhuma chamada sai do processo; as respostas vêm do corpus.
+
+O corpus (`AMADEUS_HTTP_CORPUS`, padrão amadeus_corpus/) tem um arquivo gzip por requisição
+distinta (método, caminho e parâmetros de query), com as respostas gravadas para ela; na
+reprodução, as respostas de uma mesma requisição se revezam. Credenciais nunca são gravadas: o
+corpo do POST de token e o cabeçalho Authorization ficam de fora da chave e do arquivo, e o
+`access_token` das respostas é substituído.
+
+No modo replay (variáveis de ambiente):
+    AMADEUS_REPLAY_LATENCY: latência simulada de cada resposta, em segundos (padrão: 0)
+    AMADEUS_REPLAY_JITTER: variação aleatória somada à latência, em segundos (padrão: 0)
+    AMADEUS_REPLAY_ERROR_RATE: fração das buscas que falham (padrão: 0; o token nunca falha)
+    AMADEUS_REPLAY_ERROR_STATUSES: status sorteados para as falhas (padrão: 500,429)
+    AMADEUS_REPLAY_MISSING: 'error' (padrão) levanta ReplayMissError para requisições fora do
+        corpus; 'synthetic' responde a busca de ofertas com um payload gerado a partir dos
+        parâmetros (ver services/synthetic_flight_offers.py)
+    AMADEUS_REPLAY_SEED: semente do sorteio de latência e erros (padrão: aleatória)
+"""
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+from urllib.parse import parse_qsl, urlsplit
+
+from requests.structures import CaseInsensitiveDict
+from services.synthetic_flight_offers import generate_flight_offers_payload
+
+HTTP_MODES = ('live', 'record', 'replay')
+DEFAULT_CORPUS_DIR = 'amadeus_corpus'
+DEFAULT_MAX_RESPONSES = 10
+TOKEN_PATH = '/v1/security/oauth2/token'
+SEARCH_PATH = '/v2/shopping/flight-offers'
+REDACTED = 'redacted'
+# Só estes cabeçalhos importam para quem lê a resposta; o corpo é gravado já descompactado
+KEPT_HEADERS = ('Content-Type', 'Retry-After')
+ERROR_BODIES = {
+    429: {"code": 38194, "title": "Too many requests", "detail": "The network rate limit is exceeded"},
+    500: {"code": 141, "title": "SYSTEM ERROR HAS OCCURRED"},
+    503: {"code": 141, "title": "SERVICE UNAVAILABLE"},
+}
+
+
+class ReplayMissError(LookupError):
+    """Requisição sem resposta gravada no corpus (modo replay com AMADEUS_REPLAY_MISSING=error)."""
+
+
+def get_http_mode(mode=None):
+    mode = (mode or os.getenv('AMADEUS_HTTP_MODE', 'live')).lower()
+    if mode not in HTTP_MODES:
+        raise ValueError(f"Unknown AMADEUS_HTTP_MODE: {mode}")
+    return mode
+
+
+def request_key(method, url, params=None):
+    """
+    Identidade de uma requisição no corpus: método, caminho e parâmetros de query ordenados,
+    todos como texto (a URL já montada pelo requests e o `params` do aiohttp dão a mesma chave).
+
+    :return: (chave, descrição legível da requisição)
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query += [(str(name), str(value)) for name, value in (params or {}).items()]
+    request = {'method': method.upper(), 'path': parts.path, 'query': sorted(query)}
+    digest = hashlib.sha256(json.dumps(request, separators=(',', ':')).encode()).hexdigest()
+    return f"{request['method'].lower()}-{digest[:24]}", request
+
+
+def _redact(path, content):
+    if path != TOKEN_PATH:
+        return content
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return content
+    if isinstance(body, dict) and 'access_token' in body:
+        body['access_token'] = REDACTED
+    return json.dumps(body).encode()
+
+
+class HttpCorpus:
+    """
+    Pares requisição/respostas gravados em disco, um arquivo `<chave>.json.gz` por requisição.
+
+    :param directory: Diretório do corpus (criado na primeira gravação)
+    :param max_responses: Respostas mantidas por requisição (as mais antigas saem primeiro)
+    """
+
+    def __init__(self, directory=None, max_responses=DEFAULT_MAX_RESPONSES):
+        self.directory = directory or os.getenv('AMADEUS_HTTP_CORPUS', DEFAULT_CORPUS_DIR)
+        self.max_responses = max_responses
+        self._entries = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _load(self, key):
+        if key not in self._entries:
+            try:
+                with gzip.open(self.path(key), 'rt', encoding='utf-8') as f:
+                    self._entries[key] = json.load(f)
+            except FileNotFoundError:
+                self._entries[key] = None
+        return self._entries[key]
+
+    def record(self, method, url, params, status, headers, content):
+        """Acrescenta uma resposta (corpo já descompactado) à requisição e regrava o arquivo dela."""
+        key, request = request_key(method, url, params)
+        response = {
+            'status': status,
+            'headers': {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            'body': _redact(request['path'], content).decode('utf-8'),
+        }
+        with self._lock:
+            entry = self._load(key) or {'request': request, 'responses': []}
+            entry['responses'] = (entry['responses'] + [response])[-self.max_responses:]
+            self._entries[key] = entry
+            os.makedirs(self.directory, exist_ok=True)
+            temporary = f"{self.path(key)}.{os.getpid()}.tmp"
+            with gzip.open(temporary, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(temporary, self.path(key))
+
+    def lookup(self, method, url, params=None):
+        """
+        Próxima resposta gravada para a requisição (em rodízio).
+
+        :return: (status, cabeçalhos, corpo em bytes), ou None se a requisição não está no corpus
+        """
+        key, _ = request_key(method, url, params)
+        with self._lock:
+            entry = self._load(key)
+            if not entry or not entry['responses']:
+                return None
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+            response = entry['responses'][index % len(entry['responses'])]
+        return response['status'], CaseInsensitiveDict(response['headers']), response['body'].encode('utf-8')
+
+    def __len__(self):
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.json.gz'))
+
+
+class HttpReplayer:
+    """
+    Serve as respostas do corpus com latência e erros simulados.
+
+    Os parâmetros ausentes vêm das variáveis AMADEUS_REPLAY_* (ver o docstring do módulo).
+    `respond` não espera a latência: devolve o atraso para o adaptador síncrono dormir ou o
+    cliente assíncrono aguardar.
+    """
+
+    def __init__(self, corpus, latency=None, jitter=None, error_rate=None, error_statuses=None, missing=None,
+                 seed=None):
+        self.corpus = corpus
+        self.latency = float(latency if latency is not None else os.getenv('AMADEUS_REPLAY_LATENCY', 0))
+        self.jitter = float(jitter if jitter is not None else os.getenv('AMADEUS_REPLAY_JITTER', 0))
+        self.error_rate = float(error_rate if error_rate is not None else os.getenv('AMADEUS_REPLAY_ERROR_RATE', 0))
+        if error_statuses is None:
+            error_statuses = os.getenv('AMADEUS_REPLAY_ERROR_STATUSES', '500,429').split(',')
+        self.error_statuses = [int(status) for status in error_statuses]
+        self.missing = missing or os.getenv('AMADEUS_REPLAY_MISSING', 'error')
+        if self.missing not in ('error', 'synthetic'):
+            raise ValueError(f"Unknown AMADEUS_REPLAY_MISSING: {self.missing}")
+        seed = seed if seed is not None else os.getenv('AMADEUS_REPLAY_SEED')
+        self._random = random.Random(int(seed) if seed is not None else None)
+        self._random_lock = threading.Lock()
+        self._synthetic = {}
+
+    def respond(self, method, url, params=None):
+        """
+        :return: (status, cabeçalhos, corpo em bytes, atraso em segundos)
+        :raises ReplayMissError: Requisição fora do corpus que não pode ser sintetizada
+        """
+        path = urlsplit(url).path
+        with self._random_lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = path != TOKEN_PATH and self.error_rate > 0 and self._random.random() < self.error_rate
+            error_status = self._random.choice(self.error_statuses) if failed else None
+        if failed:
+            error = {"status": error_status, **ERROR_BODIES.get(error_status, {"title": "ERROR"})}
+            headers = CaseInsensitiveDict({'Content-Type': 'application/vnd.amadeus+json'})
+            return error_status, headers, json.dumps({"errors": [error]}).encode(), delay
+        recorded = self.corpus.lookup(method, url, params)
+        if recorded is None:
+            recorded = self._synthesize(method, url, params)
+        return (*recorded, delay)
+
+    def _synthesize(self, method, url, params):
+        key, request = request_key(method, url, params)
+        query = dict(request['query'])
+        if request['path'] == TOKEN_PATH:
+            # Os tokens gravados já são substituídos; responder sem corpus dá no mesmo
+            body = {"type": "amadeusOAuth2Token", "access_token": REDACTED, "expires_in": 1799, "state": "approved"}
+        elif self.missing == 'synthetic' and request['path'] == SEARCH_PATH and method.upper() == 'GET':
+            body = self._synthetic.get(key)
+            if body is None:
+                body = self._synthetic[key] = json.dumps(generate_flight_offers_payload(
+                    int(query.get('max', 250)), query['originLocationCode'], query['destinationLocationCode'],
+                    query['departureDate'], query.get('returnDate'), int(query.get('adults', 1)),
+                    query.get('currencyCode', 'BRL'), seed=int(key.split('-')[1][:8], 16),
+                ), separators=(',', ':'))
+        else:
+            raise ReplayMissError(f"No recorded response for {request['method']} {request['path']} "
+                                  f"{request['query']} in {self.corpus.directory}")
+        content = body if isinstance(body, str) else json.dumps(body)
+        return 200, CaseInsensitiveDict({'Content-Type': 'application/json'}), content.encode('utf-8')
+
+
+_corpus = None
+_replayer = None
+_corpus_lock = threading.Lock()
+
+
+def get_http_corpus():
+    """Corpus compartilhado do processo (diretório em AMADEUS_HTTP_CORPUS)."""
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = HttpCorpus()
+        return _corpus
+
+
+def get_http_replayer():
+    """Reprodutor compartilhado do processo, sobre o corpus de `get_http_corpus()`."""
+    global _replayer
+    corpus = get_http_corpus()
+    with _corpus_lock:
+        if _replayer is None:
+            _replayer = HttpReplayer(corpus)
+        return _replayer
+
+
+def reset_http_corpus():
+    global _corpus, _replayer
+    with _corpus_lock:
+        _corpus = _replayer = None
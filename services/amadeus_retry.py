@@ -0,0 +1,101 @@
+# services/amadeus_retry.py
+import asyncio
+import logging
+import os
+import random
+import time
+
+from services.amadeus_errors import AmadeusError, AmadeusRateLimitError
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 8.0
+
+
+class RetryPolicy:
+    """
+    Política de novas tentativas para erros repetíveis da Amadeus (`AmadeusError.retryable`).
+
+    O intervalo segue backoff exponencial com jitter completo (aleatório entre 0 e
+    `base_delay * 2**(tentativa-1)`, limitado a `max_delay`). Se a resposta trouxer
+    `Retry-After`, ele é respeitado como intervalo mínimo; se pedir mais que `max_delay`,
+    a chamada desiste na hora em vez de segurar a conversa.
+    """
+
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None):
+        self.max_attempts = int(max_attempts or os.getenv('AMADEUS_RETRY_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+        self.base_delay = float(base_delay if base_delay is not None
+                                else os.getenv('AMADEUS_RETRY_BASE_DELAY', DEFAULT_BASE_DELAY))
+        self.max_delay = float(max_delay if max_delay is not None
+                               else os.getenv('AMADEUS_RETRY_MAX_DELAY', DEFAULT_MAX_DELAY))
+
+    def delay(self, attempt, error):
+        """
+        :param attempt: Número da tentativa que acabou de falhar (começa em 1)
+        :param error: AmadeusError levantado pela tentativa
+        :return: Segundos a esperar antes da próxima tentativa, ou None para desistir
+        """
+        if not error.retryable or attempt >= self.max_attempts:
+            return None
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if error.retry_after is None:
+            return backoff
+        if error.retry_after > self.max_delay:
+            return None
+        return max(error.retry_after, backoff)
+
+
+def _log_retry(logger, attempt, policy, error, delay):
+    logger.warning(f"Amadeus call failed (attempt {attempt}/{policy.max_attempts}, "
+                   f"status {error.status_code}): retrying in {delay:.2f}s")
+
+
+def call_with_retry(send, policy=None, rate_limiter=None, logger=None):
+    """
+    Executa `send()` respeitando o limitador de taxa e repetindo erros temporários.
+
+    Em um 429, o limitador compartilhado é pausado pelo intervalo calculado, de modo que as
+    demais threads também recuam em vez de continuar estourando o limite.
+
+    :raises AmadeusError: O erro da última tentativa, se não for repetível ou as tentativas acabarem
+    """
+    policy = policy or RetryPolicy()
+    logger = logger or logging.getLogger()
+    attempt = 0
+    while True:
+        attempt += 1
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return send()
+        except AmadeusError as e:
+            delay = policy.delay(attempt, e)
+            if delay is None:
+                raise
+            _log_retry(logger, attempt, policy, e, delay)
+            if isinstance(e, AmadeusRateLimitError) and rate_limiter is not None:
+                rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+
+async def acall_with_retry(send, policy=None, rate_limiter=None, logger=None):
+    """Versão assíncrona de `call_with_retry`: `send` é uma função que retorna uma corrotina."""
+    policy = policy or RetryPolicy()
+    logger = logger or logging.getLogger()
+    attempt = 0
+    while True:
+        attempt += 1
+        if rate_limiter is not None:
+            await rate_limiter.aacquire()
+        try:
+            return await send()
+        except AmadeusError as e:
+            delay = policy.delay(attempt, e)
+            if delay is None:
+                raise
+            _log_retry(logger, attempt, policy, e, delay)
+            if isinstance(e, AmadeusRateLimitError) and rate_limiter is not None:
+                await rate_limiter.apause(delay)
+            else:
+                await asyncio.sleep(delay)
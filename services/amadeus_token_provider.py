@@ -0,0 +1,303 @@
+# services/amadeus_token_provider.py
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+
+from services.amadeus_http import get_async_http_client, get_http_client
+from services.backend_io import run_backend_io
+
+TOKEN_PATH = "/v1/security/oauth2/token"
+DEFAULT_REFRESH_MARGIN = 60
+
+
+def request_token(client_id, client_secret):
+    """
+    Faz a chamada OAuth2 (client_credentials) à API da Amadeus.
+
+    Retorna:
+        dict: Resposta completa do token (access_token, expires_in, ...).
+    """
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    data = {
+        "grant_type": "client_credentials",
+        "client_id": client_id,
+        "client_secret": client_secret
+    }
+    http_client = get_http_client()
+    response = http_client.post(http_client.url(TOKEN_PATH), headers=headers, data=data)
+    response.raise_for_status()
+    return response.json()
+
+
+async def arequest_token(client_id, client_secret):
+    """Versão assíncrona de `request_token`, usando o cliente HTTP assíncrono do loop atual."""
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    data = {
+        "grant_type": "client_credentials",
+        "client_id": client_id,
+        "client_secret": client_secret
+    }
+    http_client = get_async_http_client()
+    response = await http_client.post(http_client.url(TOKEN_PATH), headers=headers, data=data)
+    response.raise_for_status()
+    return response.json()
+
+
+class InMemoryTokenBackend:
+    """Guarda os tokens na memória do processo atual."""
+
+    blocking = False
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, entry, ttl):
+        with self._lock:
+            self._entries[key] = entry
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class DiskCacheTokenBackend:
+    """Guarda os tokens em disco (diskcache), compartilhando-os entre processos da mesma máquina."""
+
+    blocking = True
+
+    def __init__(self, directory=None):
+        import diskcache
+
+        directory = directory or os.getenv('AMADEUS_TOKEN_CACHE_DIR', '.amadeus_token_cache')
+        self._cache = diskcache.Cache(directory)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, entry, ttl):
+        self._cache.set(key, entry, expire=max(ttl, 1))
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+
+class RedisTokenBackend:
+    """
+    Guarda os tokens no Redis, compartilhando-os entre todos os workers do deploy.
+
+    Aceita qualquer cliente com a interface `get`/`set(ex=...)`/`delete` do redis-py.
+    """
+
+    blocking = True
+
+    def __init__(self, client=None, url=None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        self._client = client
+
+    def get(self, key):
+        raw = self._client.get(key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key, entry, ttl):
+        self._client.set(key, json.dumps(entry), ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+TOKEN_BACKENDS = {
+    'memory': InMemoryTokenBackend,
+    'diskcache': DiskCacheTokenBackend,
+    'redis': RedisTokenBackend,
+}
+
+
+def create_token_backend(name=None):
+    """Cria o backend configurado em `AMADEUS_TOKEN_BACKEND` (memory, diskcache ou redis)."""
+    name = name or os.getenv('AMADEUS_TOKEN_BACKEND', 'memory')
+    try:
+        backend_class = TOKEN_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown token backend: {name}")
+    return backend_class()
+
+
+class AmadeusTokenProvider:
+    """
+    Provedor de tokens compartilhado por todas as instâncias dos serviços Amadeus.
+
+    - Apenas uma thread busca um novo token por vez (single-flight); as demais aguardam o resultado.
+    - O token é renovado `refresh_margin` segundos antes de expirar. Durante essa janela,
+      uma thread renova o token enquanto as outras continuam usando o token atual.
+    - O armazenamento é plugável (memória, diskcache ou Redis), permitindo que vários
+      workers compartilhem o mesmo token.
+
+    Cada entrada armazenada tem o formato {'token_data': dict, 'expires_at': float (epoch)}.
+    """
+
+    def __init__(self, client_id, client_secret, backend=None, refresh_margin=None, fetcher=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.backend = backend or create_token_backend()
+        if refresh_margin is None:
+            refresh_margin = int(os.getenv('AMADEUS_TOKEN_REFRESH_MARGIN', DEFAULT_REFRESH_MARGIN))
+        self.refresh_margin = refresh_margin
+        self.fetcher = fetcher or request_token
+        self.cache_key = f"amadeus:token:{client_id}"
+        self.fetch_count = 0
+        self._lock = threading.Lock()
+
+    def get_token_entry(self):
+        """
+        Retorna a entrada do token atual, buscando um novo token se necessário.
+
+        Retorna:
+            dict: {'token_data': dict, 'expires_at': float}
+        """
+        entry = self.backend.get(self.cache_key)
+        if self.is_fresh(entry):
+            return entry
+        if entry is not None and time.time() < entry['expires_at']:
+            # Renovação proativa: quem conseguir o lock renova, os demais seguem com o token atual.
+            if not self._lock.acquire(blocking=False):
+                return entry
+            try:
+                return self._refresh()
+            finally:
+                self._lock.release()
+        with self._lock:
+            return self._refresh()
+
+    def get_token_data(self):
+        """Retorna a resposta completa do token atual."""
+        return self.get_token_entry()['token_data']
+
+    def get_access_token(self):
+        """Retorna apenas o access_token atual."""
+        return self.get_token_data().get('access_token')
+
+    def invalidate(self):
+        """Descarta o token armazenado, forçando uma nova busca na próxima chamada."""
+        self.backend.delete(self.cache_key)
+
+    def is_fresh(self, entry):
+        """True se a entrada existe e ainda está fora da janela de renovação."""
+        return entry is not None and time.time() < entry['expires_at'] - self.refresh_margin
+
+    def store(self, token_data):
+        """Grava no backend a resposta de um token recém-obtido e retorna a entrada criada."""
+        expires_in = token_data.get('expires_in', 0)
+        entry = {'token_data': token_data, 'expires_at': time.time() + expires_in}
+        self.backend.set(self.cache_key, entry, expires_in)
+        self.fetch_count += 1
+        return entry
+
+    def _refresh(self):
+        # Outro caller (ou outro worker, via backend compartilhado) pode ter renovado enquanto esperávamos o lock.
+        entry = self.backend.get(self.cache_key)
+        if self.is_fresh(entry):
+            return entry
+        return self.store(self.fetcher(self.client_id, self.client_secret))
+
+
+class AsyncAmadeusTokenProvider:
+    """
+    Fachada assíncrona sobre um `AmadeusTokenProvider`.
+
+    Compartilha o backend (e portanto o token) com o provedor síncrono, mas faz a chamada
+    OAuth sem bloquear o event loop e coordena os callers concorrentes com um `asyncio.Lock`. As
+    leituras e gravações no backend (diskcache, Redis) rodam em uma thread (`run_backend_io`).
+    """
+
+    def __init__(self, provider, fetcher=None):
+        self.provider = provider
+        self.fetcher = fetcher or arequest_token
+        self._lock = asyncio.Lock()
+
+    @property
+    def refresh_margin(self):
+        return self.provider.refresh_margin
+
+    async def _read(self):
+        return await run_backend_io(self.provider.backend, self.provider.backend.get, self.provider.cache_key)
+
+    async def get_token_entry(self):
+        entry = await self._read()
+        if self.provider.is_fresh(entry):
+            return entry
+        if entry is not None and time.time() < entry['expires_at'] and self._lock.locked():
+            # Renovação proativa já em andamento: segue com o token atual
+            return entry
+        async with self._lock:
+            entry = await self._read()
+            if self.provider.is_fresh(entry):
+                return entry
+            token_data = await self.fetcher(self.provider.client_id, self.provider.client_secret)
+            return await run_backend_io(self.provider.backend, self.provider.store, token_data)
+
+    async def get_token_data(self):
+        return (await self.get_token_entry())['token_data']
+
+    async def get_access_token(self):
+        return (await self.get_token_data()).get('access_token')
+
+    def invalidate(self):
+        self.provider.invalidate()
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_token_provider(client_id=None, client_secret=None):
+    """
+    Retorna o provedor de tokens do processo para o `client_id` informado (singleton por client_id).
+
+    Sem argumentos, usa as credenciais de `AMADEUS_API_KEY` e `AMADEUS_API_SECRET`.
+    """
+    client_id = client_id or os.getenv('AMADEUS_API_KEY')
+    client_secret = client_secret or os.getenv('AMADEUS_API_SECRET')
+    with _providers_lock:
+        provider = _providers.get(client_id)
+        if provider is None:
+            provider = AmadeusTokenProvider(client_id, client_secret)
+            _providers[client_id] = provider
+        return provider
+
+
+_async_providers = weakref.WeakKeyDictionary()
+
+
+def get_async_token_provider(client_id=None, client_secret=None):
+    """
+    Retorna o provedor assíncrono do event loop atual para o `client_id` informado.
+
+    O token é o mesmo do provedor síncrono (`get_token_provider`), pois ambos usam o mesmo backend.
+    """
+    provider = get_token_provider(client_id, client_secret)
+    providers = _async_providers.setdefault(asyncio.get_running_loop(), {})
+    async_provider = providers.get(provider.client_id)
+    if async_provider is None:
+        async_provider = AsyncAmadeusTokenProvider(provider)
+        providers[provider.client_id] = async_provider
+    return async_provider
+
+
+def reset_token_providers():
+    """Descarta os provedores registrados (útil em testes)."""
+    with _providers_lock:
+        _providers.clear()
+    _async_providers.clear()
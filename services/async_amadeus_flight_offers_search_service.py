@@ -0,0 +1,105 @@
+# services/async_amadeus_flight_offers_search_service.py
+import asyncio
+import logging
+import time
+
+import aiohttp
+from services.amadeus_errors import AmadeusConnectionError, error_from_response
+from services.amadeus_flight_offers_search_service import (
+    build_search_params,
+    handle_flight_offers_response,
+    parse_flight_offers,
+    search_error_status,
+)
+from services.amadeus_http import get_async_http_client
+from services.amadeus_rate_limiter import get_rate_limiter
+from services.amadeus_retry import RetryPolicy, acall_with_retry
+from services.amadeus_token_provider import get_async_token_provider
+from services.flight_offers_cache import get_flight_offers_cache, make_cache_key
+from services.search_logging import get_search_log
+from services.single_flight import AsyncSingleFlight
+
+# Buscas idênticas em andamento no mesmo event loop compartilham uma única chamada à Amadeus
+inflight_searches = AsyncSingleFlight()
+
+
+class AsyncAmadeusFlightOffersSearchService:
+    """
+    Versão assíncrona de `AmadeusFlightOffersSearchService`.
+
+    Usa o cliente aiohttp do event loop atual e o provedor de tokens assíncrono, de modo que
+    várias buscas (e várias conversas) podem aguardar a Amadeus no mesmo loop sem ocupar threads.
+    Deve ser instanciado dentro de um event loop em execução.
+    """
+
+    def __init__(self, token_provider=None, http_client=None, cache=None, rate_limiter=None, retry_policy=None,
+                 search_log=None):
+        self.token_provider = token_provider or get_async_token_provider()
+        self.http_client = http_client or get_async_http_client()
+        self.cache = cache if cache is not None else get_flight_offers_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.base_url = self.http_client.url('/v2/shopping/flight-offers')
+        self.search_log = search_log or get_search_log()
+        self.logger = logging.getLogger()
+
+    async def search_flights(self,
+                             origin,
+                             destination,
+                             departure_date,
+                             return_date=None,
+                             adults=1,
+                             children=0,
+                             infants=0,
+                             travel_class=None,
+                             max_price=None,
+                             non_stop=None,
+                             included_airline_codes=None,
+                             excluded_airline_codes=None,
+                             currency_code=None,
+                             max_results=250):
+        """
+        Faz uma chamada assíncrona à API de busca de ofertas de voo.
+        Os parâmetros são os mesmos de `AmadeusFlightOffersSearchService.search_flights`.
+
+        :return: FlightOffersSearchResponse
+        """
+        params = build_search_params(
+            origin, destination, departure_date, return_date, adults, children, infants,
+            travel_class, max_price, non_stop, included_airline_codes, excluded_airline_codes,
+            currency_code, max_results, logger=self.logger
+        )
+        start = time.perf_counter()
+        cached = await self.cache.aget(params) if self.cache is not None else None
+        if cached is not None:
+            flight_offers = parse_flight_offers(cached)
+            self.search_log.search(params, 'cached', time.perf_counter() - start, len(flight_offers.data), len(cached))
+            return flight_offers
+        return await inflight_searches.do(make_cache_key(params), lambda: self._fetch_offers(params))
+
+    async def _fetch_offers(self, params):
+        start = time.perf_counter()
+        try:
+            response = await acall_with_retry(lambda: self._send(params), self.retry_policy, self.rate_limiter,
+                                              self.logger)
+            flight_offers = handle_flight_offers_response(response, self.logger)
+        except Exception as e:
+            self.search_log.search(params, search_error_status(e), time.perf_counter() - start, error=e)
+            raise
+        self.search_log.search(params, 'ok', time.perf_counter() - start, len(flight_offers.data), len(response.content))
+        self.search_log.payload(params, response.content)
+        if self.cache is not None:
+            await self.cache.aset(params, response.content)
+        return flight_offers
+
+    async def _send(self, params):
+        headers = {
+            'Authorization': "Bearer " + await self.token_provider.get_access_token()
+        }
+        try:
+            response = await self.http_client.get(self.base_url, headers=headers, params=params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise AmadeusConnectionError(f"Erro de conexão com a Amadeus: {e!r}") from e
+        if response.status_code != 200:
+            raise error_from_response(response)
+        return response
@@ -0,0 +1,17 @@
+# services/backend_io.py
+"""
+Chamadas a backends síncronos (cache de ofertas, tokens, limitador de requisições) a partir de
+código assíncrono. Cada backend declara em `blocking` se faz E/S (diskcache, Redis) ou se fica só
+em memória.
+"""
+import asyncio
+
+
+async def run_backend_io(backend, function, *args):
+    """
+    Executa `function(*args)` de um backend a partir de código assíncrono sem bloquear o event loop:
+    em uma thread para backends com E/S (diskcache, Redis; `blocking = True`) e direto nos em memória.
+    """
+    if getattr(backend, 'blocking', True):
+        return await asyncio.to_thread(function, *args)
+    return function(*args)
@@ -0,0 +1,164 @@
+# services/flight_dates_cache.py
+"""
+Matriz data -> preço por rota, alimentada pela busca de datas mais baratas (Flight Cheapest Date
+Search) e consultada localmente.
+
+Cada rota (origem, destino, ida ou ida e volta, duração da estadia, só voos diretos) tem uma
+entrada no backend do cache de ofertas (memória, diskcache ou Redis, por `AMADEUS_CACHE_BACKEND`)
+com o preço mais barato de cada data de partida já consultada. Cada data guarda a hora em que
+foi buscada e vale por `AMADEUS_DATES_CACHE_TTL` segundos (padrão: 6 horas): uma nova pergunta só
+busca na API as datas ausentes ou vencidas da janela pedida, e o resto vem da matriz.
+
+As atualizações de uma mesma rota são serializadas no processo (leitura, mescla e gravação sob o
+lock da rota). Entre processos (diskcache ou Redis), uma gravação concorrente ainda pode se perder;
+as datas perdidas são apenas buscadas de novo na próxima pergunta.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from services.flight_offers_cache import CACHE_BACKENDS, CacheStats, MemoryCacheBackend
+from services.metrics import register_collector
+
+DEFAULT_TTL = 6 * 3600
+KEY_PREFIX = 'amadeus:flight-dates:'
+# Locks por rota, distribuídos em faixas fixas para não crescer com o número de rotas
+LOCK_STRIPES = 64
+
+
+def make_route_key(route):
+    """
+    Chave da matriz de uma rota, a partir dos parâmetros já normalizados por `build_flight_dates_route`.
+
+    :return: str no formato 'amadeus:flight-dates:<sha256>'
+    """
+    canonical = json.dumps(route, sort_keys=True, separators=(',', ':'))
+    return KEY_PREFIX + hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def date_runs(dates):
+    """Agrupa datas (YYYY-MM-DD) em intervalos contíguos: [(início, fim), ...]."""
+    runs = []
+    for day in sorted(set(dates)):
+        if runs and date.fromisoformat(runs[-1][1]) + timedelta(days=1) == date.fromisoformat(day):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def is_current(matrix, day, now, ttl):
+    """A data está na matriz, não venceu e tem preço na moeda da matriz (ou nenhum voo)."""
+    entry = matrix['dates'].get(day)
+    if entry is None or now - entry['fetchedAt'] >= ttl:
+        return False
+    return entry['price'] is None or entry.get('currency', matrix['currency']) == matrix['currency']
+
+
+class FlightDatesMatrixCache:
+    """
+    Matrizes data -> preço por rota, guardadas como JSON (bytes) no backend.
+
+    Formato da matriz: {'currency': 'EUR', 'dates': {'2024-08-05': {'price': '123.45',
+    'currency': 'EUR', 'returnDate': '2024-08-12', 'fetchedAt': 1722800000.0}, ...}}. Datas
+    consultadas sem nenhum voo ficam com `price` e `currency` None, para não serem buscadas de novo
+    antes de vencer. `currency` da matriz é a da última resposta; se a moeda da API mudar, as datas
+    guardadas na moeda anterior contam como ausentes e são buscadas de novo, nunca comparadas.
+
+    Nos contadores, `hits` e `misses` são datas atendidas pela matriz e datas que precisaram da API.
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl if ttl is not None else int(os.getenv('AMADEUS_DATES_CACHE_TTL', DEFAULT_TTL))
+        self.stats = CacheStats()
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock(self, key):
+        return self._locks[int(key[-8:], 16) % LOCK_STRIPES]
+
+    def get(self, route):
+        """Matriz da rota (vazia se ainda não há nada guardado)."""
+        value, expired = self.backend.get(make_route_key(route))
+        if expired:
+            self.stats.incr('expirations')
+        if value is None:
+            return {'currency': None, 'dates': {}}
+        return json.loads(value)
+
+    def missing_dates(self, matrix, dates, now=None):
+        """Datas de `dates` ausentes da matriz ou já vencidas."""
+        now = now if now is not None else time.time()
+        missing = [day for day in dates if not is_current(matrix, day, now, self.ttl)]
+        self.stats.incr('hits', len(dates) - len(missing))
+        self.stats.incr('misses', len(missing))
+        return missing
+
+    def update(self, route, start, end, flight_dates, now=None):
+        """
+        Grava na matriz o resultado da busca do intervalo [start, end] (inclusivo). As datas do
+        intervalo que não vieram na resposta ficam sem preço; as vencidas saem da matriz.
+
+        :param flight_dates: FlightDatesResponse, ou None quando a API não tem dados para a rota
+        :return: A matriz atualizada
+        """
+        now = now if now is not None else time.time()
+        key = make_route_key(route)
+        with self._lock(key):
+            matrix = self.get(route)
+            currency = flight_dates.meta.currency if flight_dates is not None else matrix['currency']
+            # As datas em outra moeda ficam na matriz, mas deixam de valer (ver `is_current`)
+            dates = {day: entry for day, entry in matrix['dates'].items() if now - entry['fetchedAt'] < self.ttl}
+            day, last = date.fromisoformat(start), date.fromisoformat(end)
+            while day <= last:
+                dates[day.isoformat()] = {'price': None, 'currency': None, 'returnDate': None, 'fetchedAt': now}
+                day += timedelta(days=1)
+            for item in (flight_dates.data if flight_dates is not None else []):
+                if start <= item.departureDate <= end:
+                    dates[item.departureDate] = {'price': item.price.total, 'currency': currency,
+                                                 'returnDate': item.returnDate, 'fetchedAt': now}
+            matrix = {'currency': currency, 'dates': dates}
+            evicted = self.backend.set(key, json.dumps(matrix, separators=(',', ':')).encode(), self.ttl)
+        self.stats.incr('stores')
+        self.stats.incr('evictions', evicted)
+        return matrix
+
+    def clear(self):
+        self.backend.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_flight_dates_cache():
+    """
+    Retorna o cache de matrizes compartilhado do processo, no mesmo backend do cache de ofertas
+    (`AMADEUS_CACHE_BACKEND`). Com 'none', retorna None e cada consulta busca a janela inteira.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            name = os.getenv('AMADEUS_CACHE_BACKEND', 'memory')
+            if name == 'none':
+                return None
+            try:
+                backend_class = CACHE_BACKENDS[name]
+            except KeyError:
+                raise ValueError(f"Unknown cache backend: {name}")
+            backend = backend_class(pattern=KEY_PREFIX + '*') if name == 'redis' else backend_class()
+            _cache = FlightDatesMatrixCache(backend)
+        return _cache
+
+
+def reset_flight_dates_cache():
+    """Descarta o cache compartilhado (útil em testes ou após mudar a configuração)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+register_collector('flight_dates_cache', lambda: _cache.stats.as_dict() if _cache is not None else None)
@@ -0,0 +1,273 @@
+# services/flight_offers_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from services.backend_io import run_backend_io
+from services.metrics import register_collector
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def make_cache_key(params):
+    """
+    Gera a chave do cache a partir dos parâmetros já normalizados por `build_search_params`.
+
+    :param params: Dicionário de parâmetros da busca
+    :return: str no formato 'amadeus:flight-offers:<sha256>'
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return 'amadeus:flight-offers:' + hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CacheStats:
+    """Contadores do cache (thread-safe), para dimensionamento em produção."""
+
+    FIELDS = ('hits', 'misses', 'stores', 'evictions', 'expirations')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field, amount=1):
+        if amount:
+            with self._lock:
+                self._counts[field] += amount
+
+    def as_dict(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = counts['hits'] / lookups if lookups else 0.0
+        return counts
+
+
+class MemoryCacheBackend:
+    """
+    Cache LRU em memória, limitado por número de entradas e por total de bytes.
+
+    `set` retorna quantas entradas foram despejadas para abrir espaço.
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries or int(os.getenv('AMADEUS_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.max_bytes = max_bytes or int(os.getenv('AMADEUS_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna (valor, expirou) — o valor é None se ausente ou expirado."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                self._remove(key)
+                return None, True
+            self._entries.move_to_end(key)
+            return value, False
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time() + ttl)
+            self.total_bytes += len(value)
+            evicted = 0
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self.total_bytes -= len(value)
+
+
+class DiskCacheBackend:
+    """
+    Cache em disco (diskcache), compartilhado entre processos da mesma máquina.
+
+    O limite de bytes e o despejo LRU ficam a cargo do próprio diskcache (`size_limit` +
+    política 'least-recently-used'); o limite de entradas é aplicado removendo as mais antigas.
+    """
+
+    blocking = True
+
+    def __init__(self, directory=None, max_entries=None, max_bytes=None):
+        import diskcache
+
+        self.max_entries = max_entries or int(os.getenv('AMADEUS_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        max_bytes = max_bytes or int(os.getenv('AMADEUS_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        directory = directory or os.getenv('AMADEUS_CACHE_DIR', '.amadeus_offers_cache')
+        self._cache = diskcache.Cache(directory, size_limit=max_bytes,
+                                      eviction_policy='least-recently-used')
+
+    def get(self, key):
+        value = self._cache.get(key)
+        # O diskcache descarta as entradas expiradas sem nos avisar; contamos como miss comum
+        return value, False
+
+    def set(self, key, value, ttl):
+        before = len(self._cache)
+        existed = key in self._cache
+        self._cache.set(key, value, expire=ttl)
+        while len(self._cache) > self.max_entries:
+            oldest_key, _ = self._cache.peekitem(last=False)
+            self._cache.delete(oldest_key)
+        return max(before + (0 if existed else 1) - len(self._cache), 0)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class RedisCacheBackend:
+    """
+    Cache no Redis, compartilhado por todos os workers.
+
+    A expiração usa o TTL nativo das chaves; o limite de memória e o despejo LRU devem ser
+    configurados no servidor (`maxmemory` + `maxmemory-policy allkeys-lru`). Os despejos feitos
+    pelo servidor aparecem em `server_evictions()`.
+    """
+
+    blocking = True
+
+    def __init__(self, client=None, url=None, pattern='amadeus:flight-offers:*'):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        self._client = client
+        # Chaves apagadas por `clear` (o mesmo servidor pode guardar outros caches)
+        self.pattern = pattern
+
+    def get(self, key):
+        return self._client.get(key), False
+
+    def set(self, key, value, ttl):
+        self._client.set(key, value, ex=max(int(ttl), 1))
+        return 0
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.pattern):
+            self._client.delete(key)
+
+    def server_evictions(self):
+        return self._client.info('stats').get('evicted_keys', 0)
+
+
+CACHE_BACKENDS = {
+    'memory': MemoryCacheBackend,
+    'diskcache': DiskCacheBackend,
+    'redis': RedisCacheBackend,
+}
+
+
+class FlightOffersCache:
+    """
+    Cache TTL das respostas da busca de ofertas, indexado pelos parâmetros normalizados.
+
+    Guarda o corpo JSON (bytes) das respostas válidas, para que todos os backends
+    (memória, diskcache, Redis) tenham o mesmo formato e o tamanho em bytes seja exato.
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl if ttl is not None else int(os.getenv('AMADEUS_CACHE_TTL', DEFAULT_TTL))
+        self.stats = CacheStats()
+
+    def get(self, params):
+        """Retorna o corpo em cache para os parâmetros, ou None."""
+        value, expired = self.backend.get(make_cache_key(params))
+        if expired:
+            self.stats.incr('expirations')
+        if value is None:
+            self.stats.incr('misses')
+            return None
+        self.stats.incr('hits')
+        return value
+
+    def set(self, params, content):
+        evicted = self.backend.set(make_cache_key(params), content, self.ttl)
+        self.stats.incr('stores')
+        self.stats.incr('evictions', evicted)
+
+    async def aget(self, params):
+        """`get` para código assíncrono (não bloqueia o event loop com diskcache ou Redis)."""
+        return await run_backend_io(self.backend, self.get, params)
+
+    async def aset(self, params, content):
+        await run_backend_io(self.backend, self.set, params, content)
+
+    def invalidate(self, params):
+        self.backend.delete(make_cache_key(params))
+
+    def clear(self):
+        self.backend.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_flight_offers_cache():
+    """
+    Retorna o cache compartilhado do processo, configurado por `AMADEUS_CACHE_BACKEND`
+    (memory, diskcache, redis ou none). Com 'none', retorna None e o cache fica desativado.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            name = os.getenv('AMADEUS_CACHE_BACKEND', 'memory')
+            if name == 'none':
+                return None
+            try:
+                backend_class = CACHE_BACKENDS[name]
+            except KeyError:
+                raise ValueError(f"Unknown cache backend: {name}")
+            _cache = FlightOffersCache(backend_class())
+        return _cache
+
+
+def reset_flight_offers_cache():
+    """Descarta o cache compartilhado (útil em testes ou após mudar a configuração)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+# Contadores exportados em /metrics (só depois que o cache é criado)
+register_collector('flight_offers_cache', lambda: _cache.stats.as_dict() if _cache is not None else None)
@@ -0,0 +1,191 @@
+# services/flight_offers_digest.py
+import functools
+import logging
+import os
+import threading
+import uuid
+
+import pandas as pd
+from models.flight_offers_models import LiteFlightOffersSearchResponse
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+from services.flight_offers_cache import CACHE_BACKENDS, MemoryCacheBackend
+from services.flight_offers_table import flight_offers_to_frame, top_k
+
+DEFAULT_TOKEN_BUDGET = 800
+DEFAULT_MODEL = 'gpt-4o-mini'
+DEFAULT_RESULT_TTL = 3600
+RESULT_KEY_PREFIX = 'amadeus:search-result:'
+
+# Colunas que identificam o mesmo conjunto de voos; tarifas diferentes para eles são "quase idênticas"
+_ITINERARY_COLUMNS = ['carriers', 'origin', 'destination', 'departure_at', 'arrival_at',
+                      'return_departure_at', 'return_arrival_at']
+
+_CRITERIA = (('cheapest', 'price'), ('fastest', 'duration'), ('fewest_stops', 'stops'))
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_counter(model=None):
+    """
+    Retorna uma função que conta tokens de um texto com o tokenizer do modelo (tiktoken).
+
+    Se o arquivo de encoding não puder ser carregado (ex: sem acesso à rede para baixá-lo),
+    usa a aproximação de 4 bytes por token e registra um aviso.
+    """
+    model = model or os.getenv('OPENAI_MODEL_FOR_TOKENS', DEFAULT_MODEL)
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(model)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logging.getLogger().warning(f"tiktoken encoding for {model} unavailable ({e!r}); approximating token counts")
+        return lambda text: (len(text.encode('utf-8')) + 3) // 4
+
+
+def count_tokens(text, model=None):
+    return get_token_counter(model)(text)
+
+
+class FlightSearchResultStore:
+    """
+    Guarda os resultados completos das buscas para que o LLM receba só o resumo e possa pedir
+    detalhes depois pela referência. Usa os mesmos backends do cache de ofertas; com diskcache ou
+    redis, a referência criada por um worker (ex: Celery) é lida por qualquer outro (ex: ASGI).
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        self.backend = backend if backend is not None else MemoryCacheBackend(max_entries=200)
+        self.ttl = ttl if ttl is not None else int(os.getenv('TOOL_RESULT_TTL', DEFAULT_RESULT_TTL))
+
+    def put(self, flight_offers):
+        """:return: Referência curta (str) para recuperar o resultado com `get`"""
+        reference = 'fs-' + uuid.uuid4().hex[:10]
+        mode = b'lite' if isinstance(flight_offers, LiteFlightOffersSearchResponse) else b'full'
+        self.backend.set(self._key(reference), mode + b':' + flight_offers.model_dump_json(by_alias=True).encode(),
+                         self.ttl)
+        return reference
+
+    def get(self, reference):
+        """:return: O resultado guardado, ou None se a referência não existir ou tiver expirado"""
+        value, _ = self.backend.get(self._key(reference))
+        if value is None:
+            return None
+        mode, _, content = value.partition(b':')
+        return parse_flight_offers(content, mode.decode())
+
+    @staticmethod
+    def _key(reference):
+        return RESULT_KEY_PREFIX + reference
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """
+    Retorna o repositório de resultados compartilhado, no mesmo backend do cache de ofertas
+    (`AMADEUS_CACHE_BACKEND`). Com 'none' (ou 'memory'), os resultados ficam na memória do processo.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            name = os.getenv('AMADEUS_CACHE_BACKEND', 'memory')
+            if name in ('none', 'memory'):
+                backend = None
+            elif name == 'redis':
+                backend = CACHE_BACKENDS[name](pattern=RESULT_KEY_PREFIX + '*')
+            elif name in CACHE_BACKENDS:
+                backend = CACHE_BACKENDS[name]()
+            else:
+                raise ValueError(f"Unknown cache backend: {name}")
+            _store = FlightSearchResultStore(backend)
+        return _store
+
+
+def reset_result_store():
+    """Descarta o repositório compartilhado (útil em testes ou após mudar a configuração)."""
+    global _store
+    with _store_lock:
+        _store = None
+
+
+def dedupe_fares(frame):
+    """Mantém só a tarifa mais barata de cada conjunto de voos idêntico (mesmos voos e horários)."""
+    return frame.sort_values('price', kind='stable').drop_duplicates(_ITINERARY_COLUMNS, keep='first')
+
+
+def _format_minutes(minutes):
+    return f"{minutes // 60}h{minutes % 60:02d}"
+
+
+def _format_offer(row, tags):
+    line = (f"#{row.id} {row.price:.2f} {row.currency} | {_format_minutes(int(row.duration_minutes))} | "
+            f"{int(row.stops)} stop(s) | {row.carriers} | {row.origin} {row.departure_at:%m-%d %H:%M}"
+            f"->{row.destination} {row.arrival_at:%m-%d %H:%M}")
+    if pd.notna(row.return_departure_at):
+        line += f" | back {row.return_departure_at:%m-%d %H:%M}->{row.return_arrival_at:%m-%d %H:%M}"
+    return line + f" | bags {int(row.checked_bags)} [{','.join(tags)}]"
+
+
+def _ranked_offers(distinct, max_per_criterion):
+    """
+    :return: (ids na ordem de prioridade — o 1º de cada critério, depois o 2º... —, {id: critérios})
+    """
+    rankings = [(tag, list(top_k(distinct, max_per_criterion, by)['id'])) for tag, by in _CRITERIA]
+    priority, tags = [], {}
+    for position in range(max_per_criterion):
+        for tag, ranking in rankings:
+            if position < len(ranking):
+                offer_id = ranking[position]
+                if offer_id not in tags:
+                    priority.append(offer_id)
+                tags.setdefault(offer_id, []).append(tag)
+    return priority, tags
+
+
+def _header(frame, distinct, reference):
+    currency = frame['currency'].iloc[0]
+    return (f"{len(frame)} offers ({len(distinct)} distinct itineraries), "
+            f"price {frame['price'].min():.2f}-{frame['price'].max():.2f} {currency}, "
+            f"{int(frame['stops'].min())}-{int(frame['stops'].max())} stops.\n"
+            f"Full result ref={reference} (get_flight_search_result for details or other filters).")
+
+
+def _render_rows(header, chosen, tags):
+    """Cabeçalho e as ofertas escolhidas, da mais barata para a mais cara."""
+    chosen = chosen.sort_values('price', kind='stable')
+    return '\n'.join([header, *(_format_offer(row, tags[row.id]) for row in chosen.itertuples())])
+
+
+def summarize_flight_offers(flight_offers, budget=None, reference=None, model=None, max_per_criterion=5):
+    """
+    Resume uma resposta da busca em texto compacto dentro de um orçamento de tokens.
+
+    Lista as melhores ofertas por critério (mais baratas, mais rápidas, menos conexões), sem
+    repetir voos idênticos com tarifas diferentes: até `max_per_criterion` por critério, incluídas
+    na ordem de prioridade (a melhor de cada critério primeiro) enquanto o texto couber em
+    `budget` tokens (`TOOL_RESULT_TOKEN_BUDGET`). O cabeçalho com a referência sempre é enviado.
+
+    :param reference: Referência do resultado completo; se None, o resultado é guardado em `get_result_store()`
+    :return: (texto, número de tokens)
+    """
+    budget = budget or int(os.getenv('TOOL_RESULT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET))
+    reference = reference or get_result_store().put(flight_offers)
+    counter = get_token_counter(model)
+    frame = flight_offers_to_frame(flight_offers)
+    distinct = dedupe_fares(frame)
+    priority, tags = _ranked_offers(distinct, max_per_criterion)
+    rows = distinct.set_index('id', drop=False)
+    header = _header(frame, distinct, reference)
+    included = []
+    tokens = counter(header)
+    for offer_id in priority:
+        # Conta o texto inteiro a cada linha: o orçamento vale para o que o LLM vai receber
+        candidate = included + [offer_id]
+        text = _render_rows(header, rows.loc[candidate], tags)
+        candidate_tokens = counter(text)
+        if candidate_tokens > budget:
+            break
+        included, tokens = candidate, candidate_tokens
+    return _render_rows(header, rows.loc[included], tags), tokens
@@ -0,0 +1,186 @@
+# services/flight_offers_table.py
+import re
+
+import numpy as np
+import pandas as pd
+
+_ISO_DURATION = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+(?:\.\d+)?S)?)?')
+
+SORT_KEYS = {
+    'price': ['price', 'duration_minutes', 'stops'],
+    'duration': ['duration_minutes', 'price', 'stops'],
+    'stops': ['stops', 'price', 'duration_minutes'],
+    'departure': ['departure_at', 'price'],
+}
+
+SHORTLIST_COLUMNS = ['id', 'price', 'currency', 'duration_minutes', 'stops', 'carriers', 'origin', 'destination',
+                     'departure_at', 'arrival_at', 'return_departure_at', 'return_arrival_at', 'checked_bags']
+
+
+def parse_iso_duration(value):
+    """Converte uma duração ISO 8601 da Amadeus (ex: 'PT1H30M', 'P1DT2H') em minutos."""
+    match = _ISO_DURATION.fullmatch(value or '')
+    if not match:
+        raise ValueError(f"Invalid ISO 8601 duration: {value}")
+    days, hours, minutes = (int(part or 0) for part in match.groups())
+    return days * 1440 + hours * 60 + minutes
+
+
+def _checked_bags(offer):
+    # Menor franquia entre os segmentos do primeiro viajante (o que vale para a viagem inteira)
+    if not offer.travelerPricings:
+        return 0
+    quantities = [
+        (fare.includedCheckedBags.quantity or 0) if fare.includedCheckedBags else 0
+        for fare in offer.travelerPricings[0].fareDetailsBySegment
+    ]
+    return min(quantities, default=0)
+
+
+def flight_offers_to_frame(flight_offers):
+    """
+    Converte uma resposta da busca (modelo completo ou lite) em um DataFrame com uma linha por oferta.
+
+    Colunas: id, price (float), currency, duration_minutes (soma dos itinerários), stops (conexões +
+    escalas técnicas), carriers ('LA,G3'), validating_carrier, origin, destination, departure_at/arrival_at
+    (ida), return_departure_at/return_arrival_at (volta, NaT se só ida) e checked_bags.
+    """
+    columns = {name: [] for name in (
+        'id', 'price', 'currency', 'duration_minutes', 'stops', 'carriers', 'validating_carrier',
+        'origin', 'destination', 'departure_at', 'arrival_at', 'return_departure_at', 'return_arrival_at',
+        'checked_bags')}
+    for offer in flight_offers.data:
+        outbound = offer.itineraries[0]
+        inbound = offer.itineraries[1] if len(offer.itineraries) > 1 else None
+        segments = [segment for itinerary in offer.itineraries for segment in itinerary.segments]
+        columns['id'].append(offer.id)
+        columns['price'].append(offer.price.grandTotal or offer.price.total)
+        columns['currency'].append(offer.price.currency)
+        columns['duration_minutes'].append(sum(parse_iso_duration(itinerary.duration)
+                                               for itinerary in offer.itineraries))
+        columns['stops'].append(len(segments) - len(offer.itineraries)
+                                + sum(segment.numberOfStops for segment in segments))
+        columns['carriers'].append(','.join(sorted({segment.carrierCode for segment in segments})))
+        columns['validating_carrier'].append(offer.validatingAirlineCodes[0] if offer.validatingAirlineCodes else None)
+        columns['origin'].append(outbound.segments[0].departure.iataCode)
+        columns['destination'].append(outbound.segments[-1].arrival.iataCode)
+        columns['departure_at'].append(outbound.segments[0].departure.at)
+        columns['arrival_at'].append(outbound.segments[-1].arrival.at)
+        columns['return_departure_at'].append(inbound.segments[0].departure.at if inbound else None)
+        columns['return_arrival_at'].append(inbound.segments[-1].arrival.at if inbound else None)
+        columns['checked_bags'].append(_checked_bags(offer))
+
+    frame = pd.DataFrame(columns)
+    frame['price'] = frame['price'].astype(np.float64)
+    frame['duration_minutes'] = frame['duration_minutes'].astype(np.int32)
+    frame['stops'] = frame['stops'].astype(np.int8)
+    frame['checked_bags'] = frame['checked_bags'].astype(np.int8)
+    for column in ('currency', 'validating_carrier', 'origin', 'destination'):
+        frame[column] = frame[column].astype('category')
+    for column in ('departure_at', 'arrival_at', 'return_departure_at', 'return_arrival_at'):
+        frame[column] = pd.to_datetime(frame[column])
+    return frame
+
+
+def filter_offers(frame,
+                  max_price=None,
+                  max_stops=None,
+                  max_duration_minutes=None,
+                  carriers=None,
+                  excluded_carriers=None,
+                  min_checked_bags=None,
+                  depart_after=None,
+                  depart_before=None):
+    """
+    Filtra o DataFrame com máscaras booleanas (sem laço por oferta).
+
+    :param carriers: Mantém ofertas em que algum segmento é operado por uma dessas companhias
+    :param excluded_carriers: Remove ofertas com algum segmento dessas companhias
+    :param depart_after: Horário mínimo de partida da ida ('YYYY-MM-DDTHH:MM' ou Timestamp)
+    :param depart_before: Horário máximo de partida da ida
+    """
+    mask = np.ones(len(frame), dtype=bool)
+    if max_price is not None:
+        mask &= frame['price'].to_numpy() <= float(max_price)
+    if max_stops is not None:
+        mask &= frame['stops'].to_numpy() <= int(max_stops)
+    if max_duration_minutes is not None:
+        mask &= frame['duration_minutes'].to_numpy() <= int(max_duration_minutes)
+    if min_checked_bags is not None:
+        mask &= frame['checked_bags'].to_numpy() >= int(min_checked_bags)
+    if carriers:
+        mask &= frame['carriers'].str.contains(_carrier_pattern(carriers)).to_numpy()
+    if excluded_carriers:
+        mask &= ~frame['carriers'].str.contains(_carrier_pattern(excluded_carriers)).to_numpy()
+    if depart_after is not None:
+        mask &= (frame['departure_at'] >= pd.Timestamp(depart_after)).to_numpy()
+    if depart_before is not None:
+        mask &= (frame['departure_at'] <= pd.Timestamp(depart_before)).to_numpy()
+    return frame[mask]
+
+
+def _carrier_pattern(codes):
+    if isinstance(codes, str):
+        codes = codes.split(',')
+    alternatives = '|'.join(re.escape(code.strip().upper()) for code in codes if code.strip())
+    return f'(?:^|,)(?:{alternatives})(?:,|$)'
+
+
+def rank_offers(frame, by='price'):
+    """
+    Ordena as ofertas por 'price', 'duration', 'stops', 'departure' ou 'best'.
+
+    'best' combina preço, duração e conexões normalizados (0 a 1) com pesos 0.6 / 0.3 / 0.1.
+    """
+    if by == 'best':
+        return frame.iloc[np.argsort(_best_score(frame), kind='stable')]
+    try:
+        keys = SORT_KEYS[by]
+    except KeyError:
+        raise ValueError(f"Unknown sort key: {by}")
+    return frame.sort_values(keys, kind='stable')
+
+
+def _best_score(frame):
+    def normalized(column):
+        values = frame[column].to_numpy(dtype=np.float64)
+        spread = values.max() - values.min() if len(values) else 0
+        return (values - values.min()) / spread if spread else np.zeros_like(values)
+
+    return 0.6 * normalized('price') + 0.3 * normalized('duration_minutes') + 0.1 * normalized('stops')
+
+
+def top_k(frame, k=5, by='price'):
+    """
+    Retorna as k melhores ofertas segundo `by`. Para preço e duração usa `np.argpartition`,
+    que seleciona as k menores sem ordenar o DataFrame inteiro.
+    """
+    if by in ('price', 'duration') and len(frame) > k:
+        values = frame[SORT_KEYS[by][0]].to_numpy()
+        # Inclui empates com o k-ésimo valor para que o desempate siga o mesmo critério de rank_offers
+        threshold = values[np.argpartition(values, k - 1)[k - 1]]
+        frame = frame[values <= threshold]
+    return rank_offers(frame, by).head(k)
+
+
+def shortlist(flight_offers, k=5, by='price', **filters):
+    """
+    Resumo das k melhores ofertas em formato compacto (lista de dicts), para devolver ao LLM
+    no lugar do objeto completo.
+
+    :param filters: Mesmos parâmetros de `filter_offers`
+    :return: dict com 'total_offers', 'matching_offers' e 'offers'
+    """
+    frame = flight_offers_to_frame(flight_offers)
+    matching = filter_offers(frame, **filters)
+    best = top_k(matching, k, by)[SHORTLIST_COLUMNS]
+    offers = []
+    for record in best.to_dict('records'):
+        for column in ('departure_at', 'arrival_at', 'return_departure_at', 'return_arrival_at'):
+            record[column] = record[column].isoformat(timespec='minutes') if pd.notna(record[column]) else None
+        record['price'] = round(float(record['price']), 2)
+        record['duration_minutes'] = int(record['duration_minutes'])
+        record['stops'] = int(record['stops'])
+        record['checked_bags'] = int(record['checked_bags'])
+        offers.append(record)
+    return {'total_offers': len(frame), 'matching_offers': len(matching), 'offers': offers}
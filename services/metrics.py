@@ -0,0 +1,248 @@
+# services/metrics.py
+"""
+Métricas do processo: histogramas de latência e contadores com rótulos, no formato de texto do
+Prometheus.
+
+Registrar uma observação custa uma busca binária nos limites dos baldes e um lock curto, então
+as métricas ficam ligadas em produção (`METRICS=off` as desliga). Os contadores que já existem
+(cache de ofertas, cache e chamadas do LLM) entram como coletores registrados pelos próprios
+módulos com `register_collector`, lidos só na hora de exportar.
+
+Métricas (prefixo `chatpassagens_`):
+
+- graph_node_seconds{node, outcome}: duração de cada nó do grafo do chat;
+- tool_seconds{tool, outcome}: duração de cada chamada de ferramenta;
+- amadeus_search_seconds{status}: buscas de ofertas por status (ok, cached ou o status HTTP do erro);
+- llm_call_seconds{node, outcome} e llm_tokens_total{node, kind}: tentativas de chamada ao LLM e tokens.
+"""
+import bisect
+import math
+import os
+import re
+import threading
+
+PREFIX = 'chatpassagens'
+# Limites superiores dos baldes, em segundos (do cache local às chamadas longas ao LLM)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    'graph_node_seconds': 'Duration of each chat graph node',
+    'tool_seconds': 'Duration of each tool call',
+    'amadeus_search_seconds': 'Flight offers searches by status (ok, cached or the HTTP status of the error)',
+    'amadeus_flight_dates_seconds': 'Cheapest date searches sent to the API by status (ok or the HTTP status of the error)',
+    'llm_call_seconds': 'LLM call attempts by assistant node and outcome',
+    'llm_tokens_total': 'LLM tokens by assistant node and kind (input, output)',
+}
+
+
+class Histogram:
+    """Contagens por balde (não cumulativas), soma e total das observações."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # o último é +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimativa do quantil `q` por interpolação linear dentro do balde, como o histogram_quantile do Prometheus."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def summary(self):
+        return {'count': self.count, 'sum': self.sum, 'mean': self.sum / self.count if self.count else 0.0,
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95), 'p99': self.quantile(0.99)}
+
+
+_collectors = {}
+_collectors_lock = threading.Lock()
+
+
+def register_collector(name, collect):
+    """
+    Registra uma fonte de valores lida na exportação, como gauges `chatpassagens_<name>_<campo>`.
+
+    :param collect: Função sem argumentos que devolve um dict {campo: número}, ou None se a fonte
+        ainda não existe (ex: o cache não foi criado)
+    """
+    with _collectors_lock:
+        _collectors[name] = collect
+
+
+def _labels_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Histogramas e contadores do processo (thread-safe)."""
+
+    def __init__(self, enabled=None, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled if enabled is not None else os.getenv('METRICS', 'on') != 'off'
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, value, **labels):
+        """Registra `value` (segundos) no histograma `name` com os rótulos dados."""
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def incr(self, name, amount=1, **labels):
+        if not self.enabled or not amount:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def histograms(self):
+        """:return: {(nome, rótulos): Histogram} — cópias, seguras para ler fora do lock"""
+        with self._lock:
+            copies = {}
+            for key, histogram in self._histograms.items():
+                copy = Histogram(histogram.buckets)
+                copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+                copies[key] = copy
+            return copies
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def render(self):
+        """Todas as métricas no formato de texto do Prometheus (version 0.0.4)."""
+        lines = []
+        families = {}
+        for (name, labels), histogram in sorted(self.histograms().items()):
+            families.setdefault(name, []).append((labels, histogram))
+        for name, series in families.items():
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in series:
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+
+        counter_families = {}
+        for (name, labels), value in sorted(self.counters().items()):
+            counter_families.setdefault(name, []).append((labels, value))
+        for name, series in counter_families.items():
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{_format_labels(labels)} {_format_value(value)}" for labels, value in series)
+
+        with _collectors_lock:
+            collectors = sorted(_collectors.items())
+        for source, collect in collectors:
+            values = collect()
+            for field, value in sorted((values or {}).items()):
+                metric = f"{PREFIX}_{source}_{field}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+_SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][\w:]*)(?:\{(?P<labels>[^}]*)\})?\s+(?P<value>\S+)$')
+_LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+
+def parse_histograms(text):
+    """
+    Reconstrói os histogramas de um texto no formato do Prometheus (ex: o do endpoint /metrics).
+
+    :return: {(nome sem o prefixo, rótulos): Histogram}
+    """
+    series = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or line.startswith('#'):
+            continue
+        name, value = match.group('name'), float(match.group('value'))
+        labels = dict(_LABEL.findall(match.group('labels') or ''))
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix):
+                base = name[:-len(suffix)].removeprefix(f"{PREFIX}_")
+                break
+        else:
+            continue
+        bound = labels.pop('le', None)
+        entry = series.setdefault((base, _labels_key(labels)), {'buckets': [], 'sum': 0.0, 'count': 0})
+        if suffix == '_bucket':
+            entry['buckets'].append((math.inf if bound == '+Inf' else float(bound), value))
+        elif suffix == '_sum':
+            entry['sum'] = value
+        else:
+            entry['count'] = int(value)
+
+    histograms = {}
+    for key, entry in series.items():
+        if not entry['buckets']:
+            continue
+        cumulative = sorted(entry['buckets'])
+        histogram = Histogram(tuple(bound for bound, _ in cumulative if bound != math.inf))
+        previous = 0
+        for index, (_, total) in enumerate(cumulative):
+            histogram.counts[index] = int(total - previous)
+            previous = total
+        histogram.sum, histogram.count = entry['sum'], entry['count']
+        histograms[key] = histogram
+    return histograms
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Retorna o registro compartilhado do processo."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
+
+
+def reset_metrics():
+    """Descarta os histogramas e contadores (os coletores registrados continuam)."""
+    global _metrics
+    with _metrics_lock:
+        _metrics = None
@@ -0,0 +1,159 @@
+# services/search_logging.py
+"""
+Log das buscas de ofertas de voo sem bloquear a thread da requisição.
+
+Cada busca gera um registro compacto (hash dos parâmetros, rota, status, latência, número de
+ofertas e bytes); o corpo inteiro da resposta só vai para o log numa amostra das buscas
+(`SEARCH_LOG_PAYLOAD_SAMPLE_RATE`, padrão 0) ou com o nível DEBUG ligado.
+
+`configure_search_logging()` instala no logger raiz um `QueueHandler`: quem loga só coloca o
+registro numa fila, e um `QueueListener` escreve no arquivo (`SEARCH_LOG_FILE`, padrão
+flight_offers.log) numa thread própria. `SEARCH_LOG_FORMAT` escolhe o formato: 'text' (padrão, o
+mesmo de antes) ou 'json' (python-json-logger, um objeto por linha com os campos do registro).
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from pythonjsonlogger import jsonlogger
+from services.flight_offers_cache import make_cache_key
+from services.metrics import get_metrics
+
+DEFAULT_LOG_FILE = 'flight_offers.log'
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+JSON_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+
+def params_hash(params):
+    """Hash curto dos parâmetros normalizados (o mesmo sha256 da chave do cache)."""
+    return make_cache_key(params).rsplit(':', 1)[1][:16]
+
+
+class SearchLog:
+    """Registros compactos das buscas (no log e na métrica `amadeus_search_seconds`) e amostragem do corpo das respostas."""
+
+    def __init__(self, logger=None, payload_sample_rate=None, metrics=None):
+        self.logger = logger or logging.getLogger()
+        self.metrics = metrics
+        self.payload_sample_rate = float(payload_sample_rate if payload_sample_rate is not None
+                                         else os.getenv('SEARCH_LOG_PAYLOAD_SAMPLE_RATE', 0))
+
+    def search(self, params, status, latency, offers=None, size=None, error=None):
+        """
+        Registra uma busca.
+
+        :param status: 'ok', 'cached' ou o status HTTP / nome do erro que interrompeu a busca
+        :param latency: Duração, em segundos
+        :param offers: Número de ofertas devolvidas
+        :param size: Tamanho do corpo da resposta, em bytes
+        """
+        (self.metrics or get_metrics()).observe('amadeus_search_seconds', latency, status=status)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        fields = {
+            'event': 'flight_search',
+            'params_hash': params_hash(params),
+            'route': f"{params['originLocationCode']}-{params['destinationLocationCode']}",
+            'departure_date': params['departureDate'],
+            'status': status,
+            'latency_ms': round(latency * 1000, 1),
+            'offers': offers,
+            'bytes': size,
+        }
+        message = (f"Flight search {fields['params_hash']} {fields['route']} {fields['departure_date']}: "
+                   f"{status} in {fields['latency_ms']:.0f}ms")
+        if error is not None:
+            fields['error'] = repr(error)
+            self.logger.warning(f"{message}, error: {error!r}", extra=fields)
+        else:
+            self.logger.info(f"{message}, {offers} offers ({size} bytes)", extra=fields)
+
+    def payload(self, params, content):
+        """Registra o corpo da resposta numa amostra das buscas (sempre, com DEBUG ligado)."""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            level = logging.DEBUG
+        elif self.payload_sample_rate > 0 and random.random() < self.payload_sample_rate:
+            level = logging.INFO
+        else:
+            return
+        text = content.decode() if isinstance(content, bytes) else content
+        self.logger.log(level, f"Flight offers payload {params_hash(params)}: {text}",
+                        extra={'event': 'flight_search_payload', 'params_hash': params_hash(params)})
+
+
+def _formatter(log_format):
+    if log_format == 'json':
+        return jsonlogger.JsonFormatter(JSON_FORMAT)
+    if log_format == 'text':
+        return logging.Formatter(TEXT_FORMAT)
+    raise ValueError(f"Unknown SEARCH_LOG_FORMAT: {log_format}")
+
+
+_listener = None
+_queue_handler = None
+_logging_lock = threading.Lock()
+
+
+def configure_search_logging(log_file=None, log_format=None, force=False):
+    """
+    Liga o log em arquivo pela fila (uma vez por processo). Como o `logging.basicConfig` que
+    substitui, não faz nada se o logger raiz já tiver handlers, a menos que `force=True`. Na saída
+    do processo, `reset_search_logging` escreve o que ainda estiver na fila.
+
+    :return: O QueueListener em execução, ou None se o log já estava configurado por outro meio
+    """
+    global _listener, _queue_handler
+    with _logging_lock:
+        root = logging.getLogger()
+        if _listener is not None or (root.handlers and not force):
+            return _listener
+        handler = logging.FileHandler(log_file or os.getenv('SEARCH_LOG_FILE', DEFAULT_LOG_FILE))
+        handler.setFormatter(_formatter(log_format or os.getenv('SEARCH_LOG_FORMAT', 'text')))
+        records = queue.SimpleQueue()
+        _queue_handler = QueueHandler(records)
+        _listener = QueueListener(records, handler, respect_handler_level=True)
+        _listener.start()
+        # A thread do listener é daemon: sem isso, os registros ainda na fila se perdem na saída
+        atexit.unregister(reset_search_logging)
+        atexit.register(reset_search_logging)
+        root.addHandler(_queue_handler)
+        if root.level == logging.WARNING:  # padrão do logger raiz
+            root.setLevel(logging.INFO)
+        return _listener
+
+
+def reset_search_logging():
+    """Tira o handler da fila do logger raiz e para o listener, depois de escrever o que estiver na fila."""
+    global _listener, _queue_handler
+    with _logging_lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _queue_handler = None
+
+
+_search_log = None
+_search_log_lock = threading.Lock()
+
+
+def get_search_log():
+    """SearchLog compartilhado do processo; na primeira chamada, configura o log em arquivo."""
+    global _search_log
+    with _search_log_lock:
+        if _search_log is None:
+            configure_search_logging()
+            _search_log = SearchLog()
+        return _search_log
+
+
+def reset_search_log():
+    global _search_log
+    with _search_log_lock:
+        _search_log = None
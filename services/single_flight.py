@@ -0,0 +1,88 @@
+# services/single_flight.py
+import asyncio
+import threading
+import weakref
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicação de chamadas em andamento para callers em threads.
+
+    Enquanto uma chamada com a mesma chave estiver em execução, os demais callers aguardam
+    e recebem o mesmo resultado (ou a mesma exceção), em vez de repetir a chamada.
+    `shared` conta quantos callers foram atendidos por uma chamada de outro caller.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """
+    Equivalente de `SingleFlight` para corrotinas: a chamada roda em uma task própria e os
+    callers concorrentes no mesmo event loop (inclusive o primeiro) aguardam essa task.
+    Cada loop tem seu próprio conjunto de chamadas.
+
+    O cancelamento de um caller (ex: WebSocket fechado) não cancela a chamada compartilhada:
+    os demais callers ainda recebem o resultado.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls = weakref.WeakKeyDictionary()
+
+    async def do(self, key, coro_fn):
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = loop.create_task(coro_fn())
+            calls[key] = task
+            task.add_done_callback(lambda done: self._finish(calls, key, done))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finish(calls, key, task):
+        if calls.get(key) is task:
+            del calls[key]
+        if not task.cancelled():
+            # Marca a exceção como consumida caso nenhum caller esteja aguardando
+            task.exception()
@@ -0,0 +1,167 @@
+# services/synthetic_flight_offers.py
+"""
+Gerador de respostas sintéticas da busca de ofertas (formato da API Flight Offers Search), de 1 a
+dezenas de milhares de ofertas, para testes de escala de parsing, ranking e cache.
+
+As ofertas variam como as reais: voos diretos e com uma ou duas conexões em hubs, várias
+companhias, horários e durações diferentes, bagagem incluída ou não, ida e volta opcional, uma
+precificação por adulto e o bloco `dictionaries`. Vêm ordenadas por preço, como na Amadeus, e o
+resultado é determinístico para a mesma `seed`.
+
+Uso (grava um payload para o benchmark de ponta a ponta, por exemplo):
+    python -m services.synthetic_flight_offers --offers 10000 --output payload.json
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+
+HUBS = ('GRU', 'GIG', 'BSB', 'CNF', 'VCP', 'REC', 'SSA', 'POA', 'CGH', 'SDU', 'FOR', 'CWB')
+CARRIERS = {'LA': 'LATAM AIRLINES BRASIL', 'G3': 'GOL LINHAS AEREAS', 'AD': 'AZUL LINHAS AEREAS',
+            'TP': 'TAP PORTUGAL', 'AA': 'AMERICAN AIRLINES', 'CM': 'COPA AIRLINES'}
+AIRCRAFT = {'320': 'AIRBUS A320', '321': 'AIRBUS A321', '738': 'BOEING 737-800', '7M8': 'BOEING 737 MAX 8',
+            'E95': 'EMBRAER 195-E2', 'AT7': 'ATR 72'}
+STOPS_WEIGHTS = (0.45, 0.4, 0.15)  # 0, 1 e 2 conexões
+
+
+def iso_duration(minutes):
+    hours, minutes = divmod(minutes, 60)
+    return f"PT{hours}H{minutes}M" if minutes else f"PT{hours}H"
+
+
+def _itinerary(rng, origin, destination, day, carrier, next_segment_id):
+    stops = rng.choices(range(len(STOPS_WEIGHTS)), STOPS_WEIGHTS)[0]
+    hubs = rng.sample([hub for hub in HUBS if hub not in (origin, destination)], stops)
+    airports = [origin, *hubs, destination]
+    departure = datetime.fromisoformat(day) + timedelta(minutes=rng.randrange(5 * 60, 23 * 60, 5))
+    start, segments = departure, []
+    for leg in range(len(airports) - 1):
+        flight_minutes = rng.randrange(50, 240, 5)
+        arrival = departure + timedelta(minutes=flight_minutes)
+        segments.append({
+            "id": str(next_segment_id + leg),
+            "departure": {"iataCode": airports[leg], "at": departure.isoformat()},
+            "arrival": {"iataCode": airports[leg + 1], "terminal": str(rng.randint(1, 3)), "at": arrival.isoformat()},
+            "carrierCode": carrier,
+            "number": str(rng.randint(1000, 9999)),
+            "aircraft": {"code": rng.choice(tuple(AIRCRAFT))},
+            "operating": {"carrierCode": carrier},
+            "duration": iso_duration(flight_minutes),
+            "numberOfStops": 0,
+            "blacklistedInEU": False,
+        })
+        departure = arrival + timedelta(minutes=rng.randrange(45, 300, 5))
+    total_minutes = int((arrival - start).total_seconds() // 60)
+    return {"duration": iso_duration(total_minutes), "segments": segments}, total_minutes
+
+
+def make_synthetic_offer(rng, offer_id, origin, destination, departure_date, return_date=None, adults=1,
+                         currency='BRL'):
+    """Uma oferta sintética válida para `FlightOffer` (o id é reatribuído depois da ordenação por preço)."""
+    carrier = rng.choice(tuple(CARRIERS))
+    outbound, minutes = _itinerary(rng, origin, destination, departure_date, carrier, 1)
+    itineraries = [outbound]
+    if return_date:
+        inbound, return_minutes = _itinerary(rng, destination, origin, return_date, carrier,
+                                             len(outbound["segments"]) + 1)
+        itineraries.append(inbound)
+        minutes += return_minutes
+    segments = [segment for itinerary in itineraries for segment in itinerary["segments"]]
+    per_adult = round(150 + minutes * rng.uniform(0.8, 2.5) + 40 * (len(segments) - len(itineraries)), 2)
+    fees = round(per_adult * 0.08, 2)
+    checked_bags = rng.choice((0, 0, 1, 2))
+    branded = rng.choice((('LIGHT', 'Light'), ('STANDARD', 'Standard'), ('TOP', 'Top')))
+    fare_details = [{
+        "segmentId": segment["id"],
+        "cabin": "ECONOMY",
+        "fareBasis": f"{rng.choice('TQSLY')}{rng.randint(10, 99)}BRL",
+        "brandedFare": branded[0],
+        "brandedFareLabel": branded[1],
+        "class": rng.choice('TQSLY'),
+        "includedCheckedBags": {"quantity": checked_bags},
+    } for segment in segments]
+    traveler_pricings = [{
+        "travelerId": str(traveler),
+        "fareOption": "STANDARD",
+        "travelerType": "ADULT",
+        "price": {"currency": currency, "total": f"{per_adult + fees:.2f}", "base": f"{per_adult:.2f}"},
+        "fareDetailsBySegment": fare_details,
+    } for traveler in range(1, adults + 1)]
+    total = (per_adult + fees) * adults
+    return {
+        "type": "flight-offer",
+        "id": str(offer_id),
+        "source": "GDS",
+        "instantTicketingRequired": False,
+        "nonHomogeneous": False,
+        "oneWay": False,
+        "lastTicketingDate": departure_date,
+        "lastTicketingDateTime": departure_date,
+        "numberOfBookableSeats": rng.randint(1, 9),
+        "itineraries": itineraries,
+        "price": {
+            "currency": currency,
+            "total": f"{total:.2f}",
+            "base": f"{per_adult * adults:.2f}",
+            "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}],
+            "grandTotal": f"{total:.2f}",
+        },
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": checked_bags > 0},
+        "validatingAirlineCodes": [carrier],
+        "travelerPricings": traveler_pricings,
+    }
+
+
+def generate_flight_offers_payload(count, origin='VIX', destination='GRU', departure_date='2024-08-05',
+                                   return_date=None, adults=1, currency='BRL', seed=0):
+    """
+    Resposta sintética da busca de ofertas.
+
+    :param count: Número de ofertas (1 a 10.000 cobre o que a API devolve e o que os testes de escala pedem)
+    :param seed: Semente do gerador; a mesma semente gera o mesmo payload
+    :return: dict no formato da resposta da API (valida em `FlightOffersSearchResponse`)
+    """
+    rng = random.Random(seed)
+    offers = [make_synthetic_offer(rng, index + 1, origin, destination, departure_date, return_date, adults, currency)
+              for index in range(count)]
+    offers.sort(key=lambda offer: float(offer["price"]["grandTotal"]))
+    for index, offer in enumerate(offers, start=1):
+        offer["id"] = str(index)
+    locations = {segment[end]["iataCode"] for offer in offers for itinerary in offer["itineraries"]
+                 for segment in itinerary["segments"] for end in ("departure", "arrival")}
+    return {
+        "meta": {"count": count, "links": {"self": "https://test.api.amadeus.com/v2/shopping/flight-offers"}},
+        "data": offers,
+        "dictionaries": {
+            "locations": {code: {"cityCode": code, "countryCode": "BR"} for code in sorted(locations)},
+            "aircraft": AIRCRAFT,
+            "currencies": {currency: currency},
+            "carriers": CARRIERS,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--offers', type=int, default=250)
+    parser.add_argument('--origin', default='VIX')
+    parser.add_argument('--destination', default='GRU')
+    parser.add_argument('--departure-date', default='2024-08-05')
+    parser.add_argument('--return-date')
+    parser.add_argument('--adults', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='arquivo de saída (padrão: stdout)')
+    args = parser.parse_args()
+
+    payload = generate_flight_offers_payload(args.offers, args.origin, args.destination, args.departure_date,
+                                             args.return_date, args.adults, seed=args.seed)
+    text = json.dumps(payload, separators=(',', ':'))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+# tests/conftest.py
+import pytest
+from services.amadeus_http import reset_http_client
+from services.amadeus_rate_limiter import reset_rate_limiter
+from services.amadeus_token_provider import reset_token_providers
+from services.flight_dates_cache import reset_flight_dates_cache
+from services.flight_offers_cache import reset_flight_offers_cache
+from tests.stub_server import StubAmadeusServer
+
+
+@pytest.fixture
+def stub_amadeus(monkeypatch):
+    """Aponta os serviços Amadeus para um servidor local (ver tests/stub_server.py)."""
+    with StubAmadeusServer() as server:
+        monkeypatch.setenv('AMADEUS_BASE_URL', server.url)
+        monkeypatch.setenv('AMADEUS_API_KEY', 'stub-client')
+        monkeypatch.setenv('AMADEUS_API_SECRET', 'stub-secret')
+        # Limite alto: os testes de concorrência não devem ser estrangulados pelo padrão de 10 TPS
+        monkeypatch.setenv('AMADEUS_RATE_LIMIT', '1000')
+        monkeypatch.setenv('AMADEUS_RETRY_BASE_DELAY', '0.01')
+        reset_http_client()
+        reset_token_providers()
+        reset_flight_offers_cache()
+        reset_flight_dates_cache()
+        reset_rate_limiter()
+        yield server
+        reset_http_client()
+        reset_token_providers()
+        reset_flight_offers_cache()
+        reset_flight_dates_cache()
+        reset_rate_limiter()
@@ -0,0 +1,33 @@
+# tests/fake_redis.py
+import fnmatch
+import time
+
+
+class FakeRedis:
+    """Substituto local do cliente redis-py, com o subconjunto de comandos usado pelos serviços."""
+
+    def __init__(self):
+        self.store = {}
+        self.expires = {}
+
+    def get(self, key):
+        if key in self.expires and time.time() >= self.expires[key]:
+            self.delete(key)
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value.encode() if isinstance(value, str) else value
+        if ex is not None:
+            self.expires[key] = time.time() + ex
+        else:
+            self.expires.pop(key, None)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+        self.expires.pop(key, None)
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.store) if fnmatch.fnmatch(key, pattern)]
+
+    def info(self, section=None):
+        return {'evicted_keys': 0}
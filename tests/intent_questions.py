@@ -0,0 +1,52 @@
+# tests/intent_questions.py
+"""
+Perguntas de usuários rotuladas para o pré-roteador (chat/intent_router.py), usadas nos testes e
+em benchmarks/bench_intent_router.py. Datas relativas a TODAY.
+
+Cada item é (pergunta, parâmetros esperados): um dict quando o pedido de voo é óbvio e deve ir
+direto ao assistente de voos, None quando a decisão deve ficar com o LLM.
+"""
+from datetime import date
+
+TODAY = date(2024, 7, 1)
+
+QUESTIONS = [
+    ("Quais são as melhores opções de passagens aéreas saindo de VIX para São Paulo em 05/08/2024",
+     {'origin': 'VIX', 'destination': 'SAO', 'departure_date': '2024-08-05'}),
+    ("Voos de VIX para qualquer aeroporto de São Paulo em 05/08",
+     {'origin': 'VIX', 'destination': 'SAO', 'departure_date': '2024-08-05'}),
+    ("Quero passagem de Brasília para Salvador dia 12 de setembro, volta 20 de setembro, 2 adultos",
+     {'origin': 'BSB', 'destination': 'SSA', 'departure_date': '2024-09-12', 'return_date': '2024-09-20',
+      'adults': 2}),
+    ("voo GRU LIS 2024-10-01",
+     {'origin': 'GRU', 'destination': 'LIS', 'departure_date': '2024-10-01'}),
+    ("preciso voar pra Porto Alegre saindo de Curitiba no dia 3 de agosto",
+     {'origin': 'CWB', 'destination': 'POA', 'departure_date': '2024-08-03'}),
+    ("Flights from GRU to LIS on August 5 returning August 20 for 2 adults",
+     {'origin': 'GRU', 'destination': 'LIS', 'departure_date': '2024-08-05', 'return_date': '2024-08-20',
+      'adults': 2}),
+    ("Cheap flights to New York on 09/15",
+     {'destination': 'NYC', 'departure_date': '2024-09-15'}),
+    ("I want to fly from Miami to Orlando on 15th of July",
+     {'origin': 'MIA', 'destination': 'ORL', 'departure_date': '2024-07-15'}),
+    ("Any airfares from London to Paris next week?",
+     {'origin': 'LON', 'destination': 'PAR'}),
+    # Incertos: ficam com o LLM
+    ("Oi, tudo bem?", None),
+    ("Quais os melhores passeios no Rio de Janeiro?", None),
+    ("O que fazer em Salvador depois do voo?", None),
+    ("Quero viajar em agosto, alguma sugestão?", None),
+    ("Qual a franquia de bagagem da LATAM?", None),
+    ("Hi! Can you help me plan a trip?", None),
+    ("What are the best things to do in Lisbon after my flight?", None),
+    ("Quero um voo barato", None),
+    ("Quais são as datas mais baratas para voar de São Paulo para Paris em agosto?", None),
+    ("What are the cheapest dates to fly from Madrid to Paris in August?", None),
+    # Só destino, ou só destino e mês: vago demais para buscar
+    ("Passagens baratas para Recife em março", None),
+    ("Quanto custa uma passagem para Paris em dezembro?", None),
+    # Dúvidas sobre um voo, não pedidos de busca
+    ("O voo para Miami aceita pet?", None),
+    ("How much luggage can I take on my flight to NYC on 12/05?", None),
+    ("Posso cancelar meu voo de GRU para LIS e pedir reembolso?", None),
+]
@@ -0,0 +1,92 @@
+# tests/payloads.py
+"""Payloads no formato das APIs Flight Offers Search e Flight Cheapest Date Search, usados pelos testes e benchmarks."""
+from datetime import date, timedelta
+
+
+def make_flight_offer(offer_id="1", price="500.00", carrier="LA", origin="VIX", destination="GRU",
+                      departure_at="2024-08-05T08:00:00", arrival_at="2024-08-05T09:30:00",
+                      duration="PT1H30M", currency="BRL", checked_bags=1):
+    segment = {
+        "id": f"{offer_id}-1",
+        "departure": {"iataCode": origin, "at": departure_at},
+        "arrival": {"iataCode": destination, "terminal": "2", "at": arrival_at},
+        "carrierCode": carrier,
+        "number": str(1000 + int(offer_id) % 9000) if offer_id.isdigit() else "1000",
+        "aircraft": {"code": "320"},
+        "operating": {"carrierCode": carrier},
+        "duration": duration,
+        "numberOfStops": 0,
+        "blacklistedInEU": False,
+    }
+    price_block = {
+        "currency": currency,
+        "total": price,
+        "base": price,
+        "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}],
+        "grandTotal": price,
+    }
+    return {
+        "type": "flight-offer",
+        "id": offer_id,
+        "source": "GDS",
+        "instantTicketingRequired": False,
+        "nonHomogeneous": False,
+        "oneWay": False,
+        "lastTicketingDate": departure_at[:10],
+        "numberOfBookableSeats": 9,
+        "itineraries": [{"duration": duration, "segments": [segment]}],
+        "price": price_block,
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": False},
+        "validatingAirlineCodes": [carrier],
+        "travelerPricings": [{
+            "travelerId": "1",
+            "fareOption": "STANDARD",
+            "travelerType": "ADULT",
+            "price": {"currency": currency, "total": price, "base": price},
+            "fareDetailsBySegment": [{
+                "segmentId": segment["id"],
+                "cabin": "ECONOMY",
+                "fareBasis": "TLSA0BRL",
+                "class": "T",
+                "includedCheckedBags": {"quantity": checked_bags},
+            }],
+        }],
+    }
+
+
+CARRIERS = ("LA", "G3", "AD")
+
+
+def make_flight_offers_payload(count=1, origin="VIX", destination="GRU"):
+    """Ofertas com preços crescentes (400, 410, ...) e companhias/horários variados."""
+    offers = []
+    for index in range(count):
+        hour, minute = 6 + index % 16, index * 5 % 60
+        offers.append(make_flight_offer(
+            str(index + 1), price=f"{400 + index * 10}.00", carrier=CARRIERS[index % len(CARRIERS)],
+            origin=origin, destination=destination,
+            departure_at=f"2024-08-05T{hour:02d}:{minute:02d}:00",
+            arrival_at=f"2024-08-05T{hour + 1:02d}:{minute:02d}:00", duration="PT1H"))
+    return {"meta": {"count": count, "links": {"self": "https://test.api.amadeus.com/v2/shopping/flight-offers"}},
+            "data": offers}
+
+
+def make_flight_dates_payload(prices, origin="MAD", destination="PAR", currency="EUR", stay_days=7):
+    """
+    Resposta da Flight Cheapest Date Search com uma linha por data de partida.
+
+    :param prices: dict data (YYYY-MM-DD) -> preço total (str)
+    :param stay_days: Dias até a volta (None para só ida)
+    """
+    data = []
+    for departure_date, price in sorted(prices.items()):
+        item = {"type": "flight-date", "origin": origin, "destination": destination,
+                "departureDate": departure_date, "price": {"total": price},
+                "links": {"flightOffers": "https://test.api.amadeus.com/v2/shopping/flight-offers?..."}}
+        if stay_days is not None:
+            item["returnDate"] = (date.fromisoformat(departure_date) + timedelta(days=stay_days)).isoformat()
+        data.append(item)
+    return {"data": data,
+            "dictionaries": {"currencies": {currency: currency}, "locations": {origin: {}, destination: {}}},
+            "meta": {"currency": currency, "links": {"self": "https://test.api.amadeus.com/v1/shopping/flight-dates"},
+                     "defaults": {"oneWay": stay_days is None, "viewBy": "DATE"}}}
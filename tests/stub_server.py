@@ -0,0 +1,121 @@
+# tests/stub_server.py
+"""Servidor HTTP local que imita os endpoints da Amadeus usados pelos serviços."""
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tests.payloads import make_flight_offers_payload
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Backlog maior para aguentar rajadas de conexões simultâneas nos benchmarks
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clientes que desistem por timeout fecham a conexão antes da resposta; não é um erro do stub
+        pass
+
+
+class StubAmadeusServer:
+    """
+    Sobe um `ThreadingHTTPServer` em uma porta livre, com keep-alive (HTTP/1.1).
+
+    - POST /v1/security/oauth2/token devolve um token fixo.
+    - Qualquer GET devolve `payload` (ou o próximo item de `scripted`, se houver),
+      após aguardar `latency` segundos.
+
+    `scripted` é uma lista de tuplas (status, body, headers) consumidas em ordem, útil para
+    simular rajadas de 429/500. `handlers` mapeia um caminho a uma função que recebe a query
+    (dict de listas, como em `parse_qs`) e devolve o corpo, para endpoints que dependem dos
+    parâmetros. Os atributos `requests` e `connections` registram o tráfego.
+    """
+
+    def __init__(self, payload=None, latency=0.0, scripted=None, expires_in=1799, handlers=None):
+        self.payload = payload if payload is not None else make_flight_offers_payload(3)
+        self.latency = latency
+        self.scripted = list(scripted or [])
+        self.handlers = dict(handlers or {})
+        self.expires_in = expires_in
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        """Número de requisições recebidas em `path`."""
+        with self._lock:
+            return sum(1 for request in self.requests if request['path'] == path)
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                self._record()
+                self._send(200, {"access_token": "stub-token", "expires_in": stub.expires_in, "type": "amadeusOAuth2Token"})
+
+            def do_GET(self):
+                self._record()
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub._lock:
+                    scripted = stub.scripted.pop(0) if stub.scripted else None
+                handler = stub.handlers.get(urlparse(self.path).path)
+                if scripted is not None:
+                    status, body, headers = scripted
+                    self._send(status, body, headers)
+                elif handler is not None:
+                    self._send(200, handler(parse_qs(urlparse(self.path).query)))
+                else:
+                    self._send(200, stub.payload)
+
+            def _record(self):
+                parsed = urlparse(self.path)
+                with stub._lock:
+                    stub.requests.append({'method': self.command, 'path': parsed.path,
+                                          'query': parse_qs(parsed.query)})
+
+            def _send(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    data = gzip.compress(data)
+                    headers = {**(headers or {}), 'Content-Encoding': 'gzip'}
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
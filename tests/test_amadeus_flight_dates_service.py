@@ -0,0 +1,193 @@
+# tests/test_amadeus_flight_dates_service.py
+import asyncio
+import json
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+from chat.run_chat_with_subgraphs import flight_search_assistant_tools
+from chat.tools import find_cheapest_dates
+from services.amadeus_flight_dates_service import (
+    AmadeusFlightDatesService,
+    AsyncAmadeusFlightDatesService,
+    build_flight_dates_route,
+    cheapest_from_matrix,
+    dates_window,
+)
+from models.flight_dates_models import FlightDatesResponse
+from services.flight_dates_cache import FlightDatesMatrixCache, date_runs, get_flight_dates_cache
+from services.flight_offers_cache import MemoryCacheBackend
+from tests.payloads import make_flight_dates_payload
+
+DATES_PATH = '/v1/shopping/flight-dates'
+
+
+def price_for(day):
+    """Preço determinístico por data; os dias 10 e 20 de cada mês não têm voos."""
+    if day.day in (10, 20):
+        return None
+    return f"{200 + day.toordinal() * 37 % 300}.00"
+
+
+def flight_dates_handler(query):
+    """Responde como a API: só as datas da janela pedida em departureDate que têm preço."""
+    start, _, end = query['departureDate'][0].partition(',')
+    day, last = date.fromisoformat(start), date.fromisoformat(end or start)
+    prices = {}
+    while day <= last:
+        if price_for(day) is not None:
+            prices[day.isoformat()] = price_for(day)
+        day += timedelta(days=1)
+    stay = None if query['oneWay'] == ['true'] else 7
+    return make_flight_dates_payload(prices, query['origin'][0], query['destination'][0], stay_days=stay)
+
+
+@pytest.fixture
+def dates_api(stub_amadeus):
+    stub_amadeus.handlers[DATES_PATH] = flight_dates_handler
+    return stub_amadeus
+
+
+def windows(stub):
+    return [request['query']['departureDate'][0] for request in stub.requests if request['path'] == DATES_PATH]
+
+
+def test_route_and_window_are_normalized():
+    assert build_flight_dates_route(' mad', 'par ', duration=' 5, 10', non_stop='sim') == {
+        'origin': 'MAD', 'destination': 'PAR', 'oneWay': 'false', 'viewBy': 'DATE', 'duration': '5,10',
+        'nonStop': 'true'}
+    assert 'duration' not in build_flight_dates_route('MAD', 'PAR', one_way=True, duration=7)
+    assert dates_window(today=date(2024, 7, 1))[-1] == '2024-07-30'
+    with pytest.raises(ValueError):
+        dates_window('2024-08-10', '2024-08-01')
+    with pytest.raises(ValueError):
+        dates_window('2024-01-01', '2024-12-31')
+    assert date_runs(['2024-08-03', '2024-08-01', '2024-08-02', '2024-08-07']) == [
+        ('2024-08-01', '2024-08-03'), ('2024-08-07', '2024-08-07')]
+
+
+def test_cheapest_dates_come_from_one_call(dates_api):
+    result = AmadeusFlightDatesService().cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-31', limit=3)
+
+    assert windows(dates_api) == ['2024-08-01,2024-08-31']
+    expected = sorted((float(price_for(date(2024, 8, day))), day) for day in range(1, 32)
+                      if price_for(date(2024, 8, day)))
+    assert [option['departure_date'] for option in result['cheapest_dates']] == [
+        f"2024-08-{day:02d}" for _, day in expected[:3]]
+    assert result['cheapest_dates'][0]['return_date'] is not None
+    assert result['currency'] == 'EUR'
+    assert (result['dates_checked'], result['dates_with_price']) == (31, 29)
+
+
+def test_overlapping_windows_only_fetch_missing_dates(dates_api):
+    service = AmadeusFlightDatesService()
+    service.cheapest_dates('MAD', 'PAR', '2024-08-10', '2024-08-20')
+    service.cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-31')
+    # Janela já coberta (inclusive as datas sem voos) e filtro de preço local: nenhuma chamada nova
+    result = service.cheapest_dates('MAD', 'PAR', '2024-08-05', '2024-08-25', max_price=300, limit=50)
+
+    assert windows(dates_api) == ['2024-08-10,2024-08-20', '2024-08-01,2024-08-09', '2024-08-21,2024-08-31']
+    assert result['cheapest_dates']
+    assert all(float(option['price']) <= 300 for option in result['cheapest_dates'])
+    stats = get_flight_dates_cache().stats.as_dict()
+    assert (stats['hits'], stats['misses']) == (11 + 21, 11 + 20)
+
+
+def test_route_options_have_separate_matrices(dates_api):
+    service = AmadeusFlightDatesService()
+    round_trip = service.cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-07')
+    one_way = service.cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-07', one_way=True)
+
+    assert len(windows(dates_api)) == 2
+    assert 'return_date' in round_trip['cheapest_dates'][0]
+    assert 'return_date' not in one_way['cheapest_dates'][0]
+
+
+def test_stale_dates_are_refreshed(dates_api, monkeypatch):
+    cache = FlightDatesMatrixCache(ttl=60)
+    service = AmadeusFlightDatesService(cache=cache)
+    service.cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-05')
+    now = time.time()
+    monkeypatch.setattr('services.flight_dates_cache.time.time', lambda: now + 61)
+    service.cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-05')
+
+    assert windows(dates_api) == ['2024-08-01,2024-08-05'] * 2
+
+
+class SlowReadBackend(MemoryCacheBackend):
+    """Leitura lenta, para que atualizações concorrentes da mesma rota se sobreponham."""
+
+    def get(self, key):
+        value = super().get(key)
+        time.sleep(0.05)
+        return value
+
+
+def _response(prices, currency='EUR'):
+    payload = make_flight_dates_payload(prices, 'MAD', 'PAR', currency)
+    return FlightDatesResponse.model_validate_json(json.dumps(payload))
+
+
+def test_concurrent_updates_of_a_route_are_merged():
+    cache = FlightDatesMatrixCache(SlowReadBackend(), ttl=60)
+    route = build_flight_dates_route('MAD', 'PAR')
+    windows = [(f"2024-08-{day:02d}", f"2024-08-{day + 4:02d}") for day in (1, 6, 11, 16)]
+    threads = [threading.Thread(target=cache.update, args=(route, start, end, _response({start: '100.00'})))
+               for start, end in windows]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    matrix = cache.get(route)
+    assert len(matrix['dates']) == 20
+    assert [day for day, entry in sorted(matrix['dates'].items()) if entry['price']] == [
+        start for start, _ in windows]
+
+
+def test_dates_in_another_currency_are_fetched_again():
+    cache = FlightDatesMatrixCache(ttl=60)
+    route = build_flight_dates_route('MAD', 'PAR')
+    cache.update(route, '2024-08-01', '2024-08-05', _response({'2024-08-01': '90.00', '2024-08-04': '80.00'}))
+    matrix = cache.update(route, '2024-08-03', '2024-08-05', _response({'2024-08-03': '500.00'}, 'BRL'))
+
+    window = [f"2024-08-{day:02d}" for day in range(1, 6)]
+    assert matrix['currency'] == 'BRL'
+    assert matrix['dates']['2024-08-01']['currency'] == 'EUR'
+    assert cache.missing_dates(matrix, window) == ['2024-08-01']
+    result = cheapest_from_matrix(route, matrix, window)
+    assert [option['price'] for option in result['cheapest_dates']] == ['500.00']
+
+
+def test_no_data_is_remembered(stub_amadeus):
+    stub_amadeus.scripted = [(404, {"errors": [{"status": 404, "code": 6003, "title": "ITEM/DATA NOT FOUND"}]}, {})]
+    service = AmadeusFlightDatesService()
+    first = service.cheapest_dates('VIX', 'PAR', '2024-08-01', '2024-08-05')
+    second = service.cheapest_dates('VIX', 'PAR', '2024-08-01', '2024-08-05')
+
+    assert first == second
+    assert first['cheapest_dates'] == [] and first['dates_with_price'] == 0
+    assert stub_amadeus.count(DATES_PATH) == 1
+
+
+def test_async_service_fetches_gaps_concurrently_into_the_same_matrix(dates_api):
+    AmadeusFlightDatesService().cheapest_dates('MAD', 'PAR', '2024-08-10', '2024-08-20')
+
+    async def main():
+        return await AsyncAmadeusFlightDatesService().cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-31')
+
+    result = asyncio.run(main())
+    assert sorted(windows(dates_api)[1:]) == ['2024-08-01,2024-08-09', '2024-08-21,2024-08-31']
+    assert result['dates_with_price'] == 29
+    assert AmadeusFlightDatesService().cheapest_dates('MAD', 'PAR', '2024-08-01', '2024-08-31') == result
+    assert dates_api.count(DATES_PATH) == 3
+
+
+def test_tool_is_offered_to_the_flight_assistant(dates_api):
+    result = find_cheapest_dates.invoke({'origin': 'mad', 'destination': 'par', 'date_from': '2024-08-01',
+                                         'date_to': '2024-08-15', 'duration': '7', 'limit': 2})
+
+    assert find_cheapest_dates in flight_search_assistant_tools
+    assert len(result['cheapest_dates']) == 2
+    assert dates_api.requests[-1]['query']['duration'] == ['7']
@@ -0,0 +1,119 @@
+# tests/test_amadeus_flight_multi_search_service.py
+import asyncio
+import time
+
+import pytest
+from chat.tools import search_amadeus_flights_multi
+from models.flight_offers_models import FlightOffersSearchResponse
+from services.amadeus_flight_multi_search_service import (
+    AmadeusFlightMultiSearchService,
+    AsyncAmadeusFlightMultiSearchService,
+    build_search_combinations,
+    expand_departure_dates,
+    merge_flight_offers,
+)
+from tests.payloads import make_flight_offer
+
+ERROR_BODY = {"errors": [{"status": 400, "code": 477, "title": "INVALID FORMAT"}]}
+
+
+def _response(*offers):
+    return FlightOffersSearchResponse.model_validate({"meta": {"count": len(offers), "links": {}}, "data": list(offers)})
+
+
+def test_expand_departure_dates_merges_list_and_window():
+    dates = expand_departure_dates(['2024-08-10', '2024-08-02'], date_from='2024-08-01', date_to='2024-08-03')
+    assert dates == ['2024-08-01', '2024-08-02', '2024-08-03', '2024-08-10']
+    with pytest.raises(ValueError):
+        expand_departure_dates()
+    with pytest.raises(ValueError):
+        expand_departure_dates(date_from='2024-08-05', date_to='2024-08-01')
+
+
+def test_build_search_combinations_skips_same_airport_and_enforces_limit():
+    combinations = build_search_combinations(['vix', 'GRU'], ['GRU', 'CGH'], ['2024-08-05'])
+    assert combinations == [('VIX', 'GRU', '2024-08-05'), ('VIX', 'CGH', '2024-08-05'), ('GRU', 'CGH', '2024-08-05')]
+    with pytest.raises(ValueError):
+        build_search_combinations(['VIX'], ['GRU', 'CGH'], ['2024-08-01', '2024-08-02'], max_combinations=3)
+
+
+def test_merge_dedupes_sorts_by_price_and_renumbers():
+    gru = make_flight_offer("1", price="600.00", destination="GRU")
+    cgh = make_flight_offer("1", price="450.00", destination="CGH", carrier="G3")
+    merged = merge_flight_offers([_response(gru), _response(cgh, gru)])
+
+    assert [offer.price.grandTotal for offer in merged.data] == ["450.00", "600.00"]
+    assert [offer.id for offer in merged.data] == ["1", "2"]
+    assert merged.meta.count == 2
+
+
+def test_merge_rejects_offers_in_different_currencies():
+    brl = make_flight_offer("1", price="600.00", destination="GRU")
+    eur = make_flight_offer("1", price="120.00", destination="LIS", currency="EUR")
+    with pytest.raises(ValueError):
+        merge_flight_offers([_response(brl), _response(eur)])
+
+
+def test_fan_out_runs_searches_in_parallel(stub_amadeus):
+    stub_amadeus.latency = 0.2
+    service = AmadeusFlightMultiSearchService(max_workers=6)
+
+    start = time.perf_counter()
+    result = service.search(['VIX'], ['GRU', 'CGH'], date_from='2024-08-01', date_to='2024-08-03')
+    elapsed = time.perf_counter() - start
+
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 6
+    assert elapsed < 0.2 * 6 / 2
+    # O stub devolve as mesmas ofertas para todas as buscas: as repetidas são descartadas
+    assert len(result.data) == 3
+    query = stub_amadeus.requests[-1]['query']
+    assert query['max'] == ['50']
+
+
+def test_every_search_asks_for_the_same_currency(stub_amadeus, monkeypatch):
+    monkeypatch.delenv('AMADEUS_MULTI_SEARCH_CURRENCY', raising=False)
+
+    async def main():
+        service = AsyncAmadeusFlightMultiSearchService()
+        return await service.search(['VIX'], ['GRU'], ['2024-08-05'], currency_code='eur')
+
+    AmadeusFlightMultiSearchService().search(['VIX'], ['GRU', 'CGH'], ['2024-08-05'])
+    asyncio.run(main())
+
+    currencies = [request['query']['currencyCode'] for request in stub_amadeus.requests
+                  if request['path'] == '/v2/shopping/flight-offers']
+    assert currencies == [['BRL'], ['BRL'], ['EUR']]
+
+
+def test_failed_searches_are_skipped(stub_amadeus):
+    stub_amadeus.scripted = [(400, ERROR_BODY, {})]
+    result = AmadeusFlightMultiSearchService().search(['VIX'], ['GRU', 'CGH', 'VCP'], ['2024-08-05'])
+    assert len(result.data) == 3
+
+
+def test_error_is_raised_when_every_search_fails(stub_amadeus):
+    stub_amadeus.scripted = [(400, ERROR_BODY, {})] * 2
+    with pytest.raises(Exception):
+        AmadeusFlightMultiSearchService().search(['VIX'], ['GRU', 'CGH'], ['2024-08-05'])
+
+
+def test_async_fan_out_respects_concurrency_limit(stub_amadeus):
+    stub_amadeus.latency = 0.1
+
+    async def main():
+        service = AsyncAmadeusFlightMultiSearchService(max_concurrency=2)
+        return await service.search(['VIX'], ['GRU', 'CGH'], date_from='2024-08-01', date_to='2024-08-02')
+
+    start = time.perf_counter()
+    result = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 4
+    assert elapsed >= 0.2
+    assert len(result.data) == 3
+
+
+def test_multi_search_tool_supports_invoke_and_ainvoke(stub_amadeus):
+    args = {'origins': ['VIX'], 'destinations': ['GRU', 'CGH'], 'departure_dates': ['2024-08-05']}
+    assert len(search_amadeus_flights_multi.invoke(args).data) == 3
+    assert len(asyncio.run(search_amadeus_flights_multi.ainvoke(args)).data) == 3
@@ -0,0 +1,44 @@
+# tests/test_amadeus_http.py
+import pytest
+import requests
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+from services.amadeus_http import AmadeusHttpClient, get_http_client
+
+
+def test_pooled_client_reuses_connection(stub_amadeus):
+    client = AmadeusHttpClient()
+    for _ in range(10):
+        response = client.get(client.url('/v2/shopping/flight-offers'))
+        assert response.status_code == 200
+    assert stub_amadeus.connections == 1
+
+
+def test_bare_requests_open_one_connection_per_call(stub_amadeus):
+    for _ in range(3):
+        requests.get(stub_amadeus.url + '/v2/shopping/flight-offers')
+    assert stub_amadeus.connections == 3
+
+
+def test_gzip_responses_are_decoded(stub_amadeus):
+    client = AmadeusHttpClient()
+    response = client.get(client.url('/v2/shopping/flight-offers'))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.json()['meta']['count'] == 3
+
+
+def test_read_timeout_is_applied(stub_amadeus):
+    stub_amadeus.latency = 0.5
+    client = AmadeusHttpClient(read_timeout=0.1)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.get(client.url('/v2/shopping/flight-offers'))
+
+
+def test_services_share_the_process_client(stub_amadeus):
+    for _ in range(3):
+        service = AmadeusFlightOffersSearchService()
+        assert service.http_client is get_http_client()
+        offers = service.search_flights('VIX', 'GRU', '2024-08-05')
+        assert len(offers.data) == 3
+    # Token e buscas passam pela mesma conexão keep-alive
+    assert stub_amadeus.count('/v1/security/oauth2/token') == 1
+    assert stub_amadeus.connections == 1
@@ -0,0 +1,116 @@
+# tests/test_amadeus_recording.py
+import asyncio
+import gzip
+import json
+import time
+
+import pytest
+from models.flight_offers_models import FlightOffersSearchResponse
+from services.amadeus_errors import AmadeusServerError
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+from services.amadeus_http import reset_http_client
+from services.amadeus_recording import ReplayMissError
+from services.amadeus_token_provider import reset_token_providers
+from services.async_amadeus_flight_offers_search_service import AsyncAmadeusFlightOffersSearchService
+from services.flight_offers_cache import reset_flight_offers_cache
+from services.synthetic_flight_offers import generate_flight_offers_payload
+
+SEARCH_PATH = '/v2/shopping/flight-offers'
+
+
+def switch_mode(monkeypatch, mode, corpus, **env):
+    monkeypatch.setenv('AMADEUS_HTTP_MODE', mode)
+    monkeypatch.setenv('AMADEUS_HTTP_CORPUS', str(corpus))
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    reset_http_client()
+    reset_token_providers()
+    reset_flight_offers_cache()
+
+
+@pytest.fixture
+def recorded(stub_amadeus, monkeypatch, tmp_path):
+    """Grava uma busca síncrona e uma assíncrona no corpus e desliga o servidor da contagem."""
+    switch_mode(monkeypatch, 'record', tmp_path)
+    AmadeusFlightOffersSearchService().search_flights('VIX', 'GRU', '2024-08-05')
+
+    async def main():
+        return await AsyncAmadeusFlightOffersSearchService().search_flights('VIX', 'GIG', '2024-08-06')
+
+    asyncio.run(main())
+    assert stub_amadeus.count(SEARCH_PATH) == 2
+    return tmp_path
+
+
+def test_replay_serves_recorded_searches_without_network(recorded, stub_amadeus, monkeypatch):
+    switch_mode(monkeypatch, 'replay', recorded)
+    requests_before = len(stub_amadeus.requests)
+
+    offers = AmadeusFlightOffersSearchService().search_flights('VIX', 'GIG', '2024-08-06')
+
+    async def main():
+        return await AsyncAmadeusFlightOffersSearchService().search_flights('VIX', 'GRU', '2024-08-05')
+
+    async_offers = asyncio.run(main())
+    assert len(offers.data) == len(async_offers.data) == 3
+    assert len(stub_amadeus.requests) == requests_before
+
+
+def test_corpus_is_compressed_and_has_no_credentials(recorded):
+    files = sorted(recorded.iterdir())
+    assert [path.name.endswith('.json.gz') for path in files] == [True] * 3  # token e duas buscas
+    text = ''.join(gzip.decompress(path.read_bytes()).decode() for path in files)
+    assert 'stub-token' not in text
+    assert 'stub-secret' not in text
+    assert 'Authorization' not in text
+    assert 'Bearer' not in text
+
+
+def test_replay_misses_raise(recorded, monkeypatch):
+    switch_mode(monkeypatch, 'replay', recorded)
+
+    with pytest.raises(ReplayMissError):
+        AmadeusFlightOffersSearchService().search_flights('VIX', 'SSA', '2024-08-05')
+
+
+def test_replay_synthesizes_missing_searches(monkeypatch, tmp_path):
+    switch_mode(monkeypatch, 'replay', tmp_path, AMADEUS_REPLAY_MISSING='synthetic',
+                AMADEUS_API_KEY='key', AMADEUS_API_SECRET='secret')
+
+    offers = AmadeusFlightOffersSearchService().search_flights('VIX', 'SSA', '2024-08-05', max_results=40)
+
+    assert len(offers.data) == 40
+    assert offers.data[0].itineraries[0].segments[0].departure.iataCode == 'VIX'
+    assert offers.data[0].itineraries[0].segments[-1].arrival.iataCode == 'SSA'
+
+
+def test_replay_injects_errors_and_latency(recorded, monkeypatch):
+    switch_mode(monkeypatch, 'replay', recorded, AMADEUS_REPLAY_ERROR_RATE=1, AMADEUS_REPLAY_ERROR_STATUSES=500,
+                AMADEUS_RETRY_MAX_ATTEMPTS=2)
+
+    with pytest.raises(AmadeusServerError):
+        AmadeusFlightOffersSearchService().search_flights('VIX', 'GRU', '2024-08-05')
+
+    switch_mode(monkeypatch, 'replay', recorded, AMADEUS_REPLAY_ERROR_RATE=0, AMADEUS_REPLAY_LATENCY=0.05)
+
+    async def main():
+        service = AsyncAmadeusFlightOffersSearchService()
+        await service.token_provider.get_access_token()
+        start = time.perf_counter()
+        await service.search_flights('VIX', 'GRU', '2024-08-05')
+        return time.perf_counter() - start
+
+    assert asyncio.run(main()) >= 0.05
+
+
+@pytest.mark.parametrize('count, return_date, adults', [(1, '2024-08-12', 2), (10000, None, 1)])
+def test_synthetic_payload_validates_at_any_size(count, return_date, adults):
+    payload = generate_flight_offers_payload(count, 'VIX', 'GRU', '2024-08-05', return_date, adults, seed=7)
+
+    response = FlightOffersSearchResponse.model_validate_json(json.dumps(payload))
+    assert len(response.data) == response.meta.count == count
+    prices = [float(offer.price.grandTotal) for offer in response.data]
+    assert prices == sorted(prices)
+    assert all(len(offer.itineraries) == (2 if return_date else 1) for offer in response.data)
+    assert all(len(offer.travelerPricings) == adults for offer in response.data)
+    assert payload == generate_flight_offers_payload(count, 'VIX', 'GRU', '2024-08-05', return_date, adults, seed=7)
@@ -0,0 +1,140 @@
+# tests/test_amadeus_retry.py
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+from langchain_core.messages import AIMessage
+from chat.utils import handle_tool_error
+from services.amadeus_errors import (
+    AmadeusClientError,
+    AmadeusRateLimitError,
+    AmadeusServerError,
+    parse_retry_after,
+)
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+from services.amadeus_rate_limiter import RedisTokenBucket, TokenBucket
+from services.amadeus_retry import RetryPolicy
+from services.async_amadeus_flight_offers_search_service import AsyncAmadeusFlightOffersSearchService
+
+RATE_LIMITED = (429, {"errors": [{"status": 429, "code": 38194, "title": "Too many requests"}]}, {'Retry-After': '0.2'})
+SERVER_ERROR = (500, {"errors": [{"status": 500, "code": 141, "title": "SYSTEM ERROR HAS OCCURRED"}]}, {})
+BAD_REQUEST = (400, {"errors": [{"status": 400, "code": 425, "title": "INVALID DATE",
+                                 "detail": "Date/Time is in the past"}]}, {})
+
+SEARCH = ('VIX', 'GRU', '2024-08-05')
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    # 2 saem no burst, os outros 4 a 20/s
+    assert time.perf_counter() - start == pytest.approx(4 / 20, abs=0.05)
+
+
+def test_token_bucket_pause_blocks_every_caller_without_accumulating():
+    bucket = TokenBucket(rate=100, capacity=10)
+    bucket.pause(0.3)
+    bucket.pause(0.3)
+    assert bucket.reserve() == pytest.approx(0.31, abs=0.02)
+
+
+def test_redis_token_bucket_delegates_to_script():
+    class RecordingRedis:
+        def eval(self, script, numkeys, *args):
+            self.args = args
+            return b'0.25'
+
+    client = RecordingRedis()
+    bucket = RedisTokenBucket(rate=40, capacity=40, client=client)
+    assert bucket.reserve() == 0.25
+    assert client.args == ('amadeus:rate-limit', 40.0, 40.0, 1, 40.0)
+
+
+def test_redis_token_bucket_runs_off_the_event_loop():
+    class ThreadRecordingRedis:
+        threads = []
+
+        def eval(self, script, numkeys, *args):
+            self.threads.append(threading.get_ident())
+            return b'0'
+
+    client = ThreadRecordingRedis()
+    bucket = RedisTokenBucket(rate=40, capacity=40, client=client)
+
+    async def main():
+        await bucket.aacquire()
+        await bucket.apause(0.1)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert len(client.threads) == 2
+    assert loop_thread not in client.threads
+
+
+def test_parse_retry_after_accepts_seconds_and_http_date():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(formatdate(time.time() + 30, usegmt=True)) == pytest.approx(30, abs=2)
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_rate_limit_burst_is_retried_honoring_retry_after(stub_amadeus):
+    stub_amadeus.scripted = [RATE_LIMITED, RATE_LIMITED]
+    start = time.perf_counter()
+    offers = AmadeusFlightOffersSearchService().search_flights(*SEARCH)
+    assert len(offers.data) == 3
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 3
+    assert time.perf_counter() - start >= 0.4
+
+
+def test_server_errors_are_retried_until_attempts_run_out(stub_amadeus):
+    stub_amadeus.scripted = [SERVER_ERROR] * 5
+    service = AmadeusFlightOffersSearchService(retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01))
+    with pytest.raises(AmadeusServerError) as excinfo:
+        service.search_flights(*SEARCH)
+    assert excinfo.value.retryable
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 3
+
+
+def test_client_errors_are_not_retried(stub_amadeus):
+    stub_amadeus.scripted = [BAD_REQUEST]
+    with pytest.raises(AmadeusClientError) as excinfo:
+        AmadeusFlightOffersSearchService().search_flights(*SEARCH)
+    assert not excinfo.value.retryable
+    assert excinfo.value.detail == "INVALID DATE - Date/Time is in the past"
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 1
+
+
+def test_long_retry_after_gives_up_immediately(stub_amadeus):
+    stub_amadeus.scripted = [(429, RATE_LIMITED[1], {'Retry-After': '60'})]
+    with pytest.raises(AmadeusRateLimitError) as excinfo:
+        AmadeusFlightOffersSearchService().search_flights(*SEARCH)
+    assert excinfo.value.retry_after == 60
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 1
+
+
+def test_async_search_recovers_from_mixed_burst(stub_amadeus):
+    stub_amadeus.scripted = [SERVER_ERROR, RATE_LIMITED, SERVER_ERROR]
+
+    async def main():
+        return await AsyncAmadeusFlightOffersSearchService().search_flights(*SEARCH)
+
+    assert len(asyncio.run(main()).data) == 3
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 4
+
+
+def test_tool_error_message_depends_on_error_type():
+    tool_call = {'name': 'search_amadeus_flights', 'args': {}, 'id': 'call_1'}
+    state = {'messages': [AIMessage(content='', tool_calls=[tool_call])]}
+
+    retryable = handle_tool_error({**state, 'error': AmadeusServerError("Erro: 500", status_code=500)})
+    assert "Do not call the tool again" in retryable['messages'][0].content
+
+    fatal = handle_tool_error({**state, 'error': AmadeusClientError("Erro: 400", status_code=400,
+                                                                    detail="INVALID DATE")})
+    assert "INVALID DATE" in fatal['messages'][0].content
+    assert fatal['messages'][0].tool_call_id == 'call_1'
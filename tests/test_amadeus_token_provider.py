@@ -0,0 +1,109 @@
+# tests/test_amadeus_token_provider.py
+import threading
+import time
+
+import pytest
+from services.amadeus_auth_service import AmadeusAuthService
+from services.amadeus_token_provider import (
+    AmadeusTokenProvider,
+    DiskCacheTokenBackend,
+    InMemoryTokenBackend,
+    RedisTokenBackend,
+    get_token_provider,
+    reset_token_providers,
+)
+from tests.fake_redis import FakeRedis
+
+
+class CountingFetcher:
+    def __init__(self, expires_in=1799, delay=0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, client_id, client_secret):
+        with self._lock:
+            self.calls += 1
+            number = self.calls
+        time.sleep(self.delay)
+        return {"access_token": f"token-{number}", "expires_in": self.expires_in, "client_id": client_id}
+
+
+@pytest.fixture(autouse=True)
+def clean_providers():
+    reset_token_providers()
+    yield
+    reset_token_providers()
+
+
+def test_concurrent_callers_share_one_fetch():
+    fetcher = CountingFetcher(delay=0.05)
+    provider = AmadeusTokenProvider("client", "secret", backend=InMemoryTokenBackend(), fetcher=fetcher)
+
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(provider.get_access_token())) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetcher.calls == 1
+    assert set(tokens) == {"token-1"}
+
+
+def test_token_is_refreshed_before_expiry():
+    fetcher = CountingFetcher(expires_in=30)
+    provider = AmadeusTokenProvider("client", "secret", backend=InMemoryTokenBackend(),
+                                    refresh_margin=60, fetcher=fetcher)
+
+    # Como expires_in é menor que a margem, toda chamada cai na janela de renovação
+    assert provider.get_access_token() == "token-1"
+    assert provider.get_access_token() == "token-2"
+    assert fetcher.calls == 2
+
+
+def test_expired_token_is_fetched_again():
+    fetcher = CountingFetcher(expires_in=0)
+    provider = AmadeusTokenProvider("client", "secret", backend=InMemoryTokenBackend(),
+                                    refresh_margin=0, fetcher=fetcher)
+
+    provider.get_access_token()
+    provider.invalidate()
+    provider.get_access_token()
+    assert fetcher.calls == 2
+
+
+def test_workers_share_token_through_redis_backend():
+    fake_redis = FakeRedis()
+    fetcher = CountingFetcher()
+    # Dois provedores simulam dois workers distintos apontando para o mesmo Redis
+    worker_a = AmadeusTokenProvider("client", "secret", backend=RedisTokenBackend(client=fake_redis), fetcher=fetcher)
+    worker_b = AmadeusTokenProvider("client", "secret", backend=RedisTokenBackend(client=fake_redis), fetcher=fetcher)
+
+    assert worker_a.get_access_token() == worker_b.get_access_token() == "token-1"
+    assert fetcher.calls == 1
+
+
+def test_diskcache_backend_persists_token(tmp_path):
+    fetcher = CountingFetcher()
+    first = AmadeusTokenProvider("client", "secret", backend=DiskCacheTokenBackend(str(tmp_path)), fetcher=fetcher)
+    second = AmadeusTokenProvider("client", "secret", backend=DiskCacheTokenBackend(str(tmp_path)), fetcher=fetcher)
+
+    first.get_access_token()
+    assert second.get_access_token() == "token-1"
+    assert fetcher.calls == 1
+
+
+def test_get_token_provider_is_singleton_per_client_id():
+    assert get_token_provider("client-a", "secret") is get_token_provider("client-a", "secret")
+    assert get_token_provider("client-a", "secret") is not get_token_provider("client-b", "secret")
+
+
+def test_auth_services_reuse_provider_token():
+    fetcher = CountingFetcher()
+    provider = AmadeusTokenProvider("client", "secret", backend=InMemoryTokenBackend(), fetcher=fetcher)
+
+    tokens = [AmadeusAuthService(token_provider=provider).get_access_token() for _ in range(5)]
+    assert tokens == ["token-1"] * 5
+    assert fetcher.calls == 1
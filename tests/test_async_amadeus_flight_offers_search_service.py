@@ -0,0 +1,107 @@
+# tests/test_async_amadeus_flight_offers_search_service.py
+import asyncio
+import threading
+
+from chat.tools import search_amadeus_flights
+from services.amadeus_token_provider import (
+    AmadeusTokenProvider,
+    AsyncAmadeusTokenProvider,
+    RedisTokenBackend,
+    get_token_provider,
+)
+from services.async_amadeus_flight_offers_search_service import AsyncAmadeusFlightOffersSearchService
+from services.flight_offers_cache import FlightOffersCache, MemoryCacheBackend
+from tests.fake_redis import FakeRedis
+
+
+class ThreadRecordingRedis(FakeRedis):
+    """FakeRedis que anota em qual thread cada comando rodou."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ex=None):
+        self.threads.add(threading.get_ident())
+        return super().set(key, value, ex)
+
+
+class BlockingMemoryBackend(MemoryCacheBackend):
+    """Backend em memória que se declara de E/S (como diskcache e Redis) e anota as threads."""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl):
+        self.threads.add(threading.get_ident())
+        return super().set(key, value, ttl)
+
+
+def test_async_search_returns_parsed_offers(stub_amadeus):
+    async def main():
+        service = AsyncAmadeusFlightOffersSearchService()
+        return await service.search_flights('VIX', 'GRU', '2024-08-05', non_stop=True)
+
+    offers = asyncio.run(main())
+    assert len(offers.data) == 3
+    query = stub_amadeus.requests[-1]['query']
+    assert query['nonStop'] == ['true']
+    assert query['originLocationCode'] == ['VIX']
+
+
+def test_concurrent_async_searches_share_one_token(stub_amadeus):
+    async def main():
+        service = AsyncAmadeusFlightOffersSearchService()
+        return await asyncio.gather(*(service.search_flights('VIX', 'GRU', f'2024-08-{day:02d}')
+                                      for day in range(1, 21)))
+
+    results = asyncio.run(main())
+    assert len(results) == 20
+    assert stub_amadeus.count('/v1/security/oauth2/token') == 1
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 20
+
+
+def test_sync_and_async_paths_share_token(stub_amadeus):
+    get_token_provider().get_access_token()
+
+    async def main():
+        return await AsyncAmadeusFlightOffersSearchService().search_flights('VIX', 'GRU', '2024-08-05')
+
+    asyncio.run(main())
+    assert stub_amadeus.count('/v1/security/oauth2/token') == 1
+
+
+def test_tool_supports_ainvoke(stub_amadeus):
+    args = {'origin': 'VIX', 'destination': 'GRU', 'departure_date': '2024-08-05'}
+    offers = asyncio.run(search_amadeus_flights.ainvoke(args))
+    assert len(offers.data) == 3
+    assert len(search_amadeus_flights.invoke(args).data) == 3
+
+
+def test_blocking_cache_and_token_backends_run_off_the_event_loop(stub_amadeus):
+    redis = ThreadRecordingRedis()
+    backend = BlockingMemoryBackend()
+
+    async def main():
+        provider = AmadeusTokenProvider('stub-client', 'stub-secret', backend=RedisTokenBackend(client=redis))
+        service = AsyncAmadeusFlightOffersSearchService(token_provider=AsyncAmadeusTokenProvider(provider),
+                                                        cache=FlightOffersCache(backend))
+        await service.search_flights('VIX', 'GRU', '2024-08-05')
+        await service.search_flights('VIX', 'GRU', '2024-08-05')
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert redis.threads and loop_thread not in redis.threads
+    assert backend.threads and loop_thread not in backend.threads
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 1
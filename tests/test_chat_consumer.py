@@ -0,0 +1,169 @@
+# tests/test_chat_consumer.py
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import django
+import pytest
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_chatpassagens.settings')
+django.setup()
+
+from asgiref.testing import ApplicationCommunicator  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from chat.consumers import sign_thread_id  # noqa: E402
+from chat.graph_registry import get_graph_registry, reset_graph_registry  # noqa: E402
+from chat.llm import reset_llm  # noqa: E402
+from chat.llm_cache import reset_llm_cache  # noqa: E402
+from chat.routing import websocket_urlpatterns  # noqa: E402
+from langchain_core.language_models.fake_chat_models import FakeListChatModel  # noqa: E402
+
+ANSWER = "Olá! Para onde você quer viajar?"
+
+
+class FakeToolChatModel(FakeListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class WebsocketClient(ApplicationCommunicator):
+    """
+    Cliente WebSocket mínimo sobre o ApplicationCommunicator do asgiref. Faz o mesmo que o
+    `channels.testing.WebsocketCommunicator`, cujo pacote importa o daphne.
+    """
+
+    def __init__(self, application, path):
+        path, _, query_string = path.partition('?')
+        super().__init__(application, {"type": "websocket", "path": path, "query_string": query_string.encode(),
+                                       "headers": [], "subprotocols": []})
+
+    async def connect(self):
+        await self.send_input({"type": "websocket.connect"})
+        return (await self.receive_output(5))["type"] == "websocket.accept", None
+
+    async def send_json_to(self, data):
+        await self.send_input({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json_from(self, timeout=5):
+        return json.loads((await self.receive_output(timeout))["text"])
+
+    async def disconnect(self, code=1000):
+        await self.send_input({"type": "websocket.disconnect", "code": code})
+        await self.wait(1)
+
+
+@pytest.fixture(autouse=True)
+def chat_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('CHECKPOINT_URL', f"sqlite:///{tmp_path / 'checkpoints.sqlite'}")
+    monkeypatch.setenv('CHECKPOINT_COMPACT_INTERVAL', '0')
+    # Sem cache de respostas: um acerto devolveria a resposta inteira, sem tokens
+    monkeypatch.setenv('LLM_CACHE', 'none')
+    reset_llm_cache()
+    reset_graph_registry()
+    reset_llm(FakeToolChatModel(responses=[ANSWER], sleep=0.01))
+    yield URLRouter(websocket_urlpatterns)
+    reset_graph_registry()
+    reset_llm()
+    reset_llm_cache()
+
+
+async def _turn(communicator, message):
+    await communicator.send_json_to({"message": message})
+    events = []
+    while True:
+        event = await communicator.receive_json_from(timeout=10)
+        events.append(event)
+        if event["type"] in ("done", "error"):
+            return events
+
+
+async def _session(app, path='/ws/chat/'):
+    communicator = WebsocketClient(app, path)
+    connected, _ = await communicator.connect()
+    assert connected
+    session = await communicator.receive_json_from()
+    assert session["type"] == "session"
+    return communicator, session["thread_id"]
+
+
+def test_streams_tokens_before_the_final_message(chat_app):
+    async def main():
+        communicator, thread_id = await _session(chat_app)
+        events = await _turn(communicator, "oi")
+        await communicator.disconnect()
+        await get_graph_registry().aclose()
+        return thread_id, events
+
+    thread_id, events = asyncio.run(main())
+    types = [event["type"] for event in events]
+    assert {"type": "node", "node": "primary_assistant"} in events
+    assert "".join(event["content"] for event in events if event["type"] == "token") == ANSWER
+    assert types.index("token") < types.index("message")
+    assert events[-2] == {"type": "message", "content": ANSWER}
+    assert events[-1] == {"type": "done", "thread_id": thread_id}
+
+
+def test_session_token_resumes_the_conversation(chat_app):
+    async def main():
+        first = WebsocketClient(chat_app, '/ws/chat/')
+        await first.connect()
+        session = await first.receive_json_from()
+        await _turn(first, "oi")
+        await first.disconnect()
+        second, resumed = await _session(chat_app, f"/ws/chat/?token={session['token']}")
+        await _turn(second, "quero ir a Lisboa")
+        await second.disconnect()
+        graph = await get_graph_registry().aget()
+        state = await graph.aget_state({"configurable": {"thread_id": session["thread_id"]}})
+        await get_graph_registry().aclose()
+        return session["thread_id"], resumed, state
+
+    thread_id, resumed, state = asyncio.run(main())
+    assert thread_id == resumed
+    assert len(state.values["messages"]) == 4
+
+
+def test_forged_or_tampered_tokens_are_rejected(chat_app):
+    async def connect(path):
+        communicator = WebsocketClient(chat_app, path)
+        connected, _ = await communicator.connect()
+        return connected
+
+    async def main():
+        communicator, thread_id = await _session(chat_app)
+        await communicator.disconnect()
+        tampered = sign_thread_id(thread_id).replace(thread_id, str(uuid.uuid4()))
+        return [await connect(f"/ws/chat/?token={token}") for token in ("conversa-1", tampered)]
+
+    assert asyncio.run(main()) == [False, False]
+
+
+def test_sessions_run_concurrently_on_one_event_loop(chat_app):
+    async def main():
+        sessions = [await _session(chat_app) for _ in range(4)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*(_turn(communicator, "oi") for communicator, _ in sessions))
+        elapsed = time.perf_counter() - start
+        for communicator, _ in sessions:
+            await communicator.disconnect()
+        await get_graph_registry().aclose()
+        return sessions, results, elapsed
+
+    sessions, results, elapsed = asyncio.run(main())
+    assert len({thread_id for _, thread_id in sessions}) == 4
+    assert all(events[-1]["type"] == "done" for events in results)
+    # Cada resposta leva ~0.3s (0.01s por caractere); em série seriam ~1.2s
+    assert elapsed < 1.0
+
+
+def test_rejects_messages_without_text(chat_app):
+    async def main():
+        communicator, _ = await _session(chat_app)
+        await communicator.send_json_to({"text": "oi"})
+        event = await communicator.receive_json_from()
+        await communicator.disconnect()
+        return event
+
+    assert asyncio.run(main())["type"] == "error"
@@ -0,0 +1,274 @@
+# tests/test_checkpointers.py
+import asyncio
+import io
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Annotated
+
+import pytest
+from chat.management.commands.vacuum_checkpoints import Command as VacuumCheckpointsCommand
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import AnyMessage, add_messages
+from typing_extensions import TypedDict
+from chat.checkpointers import (
+    MESSAGE_REFS_KEY,
+    AsyncWalSqliteSaver,
+    PostgresSaver,
+    create_async_checkpointer,
+    create_checkpointer,
+    create_sqlite_saver,
+)
+
+
+class State(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+
+def _echo(state):
+    return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+
+
+async def _aecho(state):
+    return _echo(state)
+
+
+def _graph(checkpointer, node=_echo):
+    builder = StateGraph(State)
+    builder.add_node("echo", node)
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _config(thread_id="t1"):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_sqlite_file_checkpoints_survive_restart(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = create_sqlite_saver(path)
+    graph = _graph(saver)
+    graph.invoke({"messages": [("user", "oi")]}, _config())
+    graph.invoke({"messages": [("user", "tudo bem?")]}, _config())
+    assert saver.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    saver.conn.close()
+
+    restarted = _graph(create_sqlite_saver(path))
+    messages = restarted.get_state(_config()).values["messages"]
+    assert [message.content for message in messages] == ["oi", "echo: oi", "tudo bem?", "echo: tudo bem?"]
+
+
+def test_async_sqlite_saver_uses_wal(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+
+    async def main():
+        async with create_async_checkpointer(f"sqlite:///{path}") as saver:
+            assert isinstance(saver, AsyncWalSqliteSaver)
+            graph = _graph(saver, _aecho)
+            await graph.ainvoke({"messages": [("user", "oi")]}, _config())
+            state = await graph.aget_state(_config())
+            async with saver.conn.execute("PRAGMA journal_mode") as cursor:
+                journal_mode = (await cursor.fetchone())[0]
+            return state, journal_mode
+
+    state, journal_mode = asyncio.run(main())
+    assert journal_mode == "wal"
+    assert state.values["messages"][-1].content == "echo: oi"
+
+
+def _contents(state):
+    return [message.content for message in state.values["messages"]]
+
+
+def test_messages_are_stored_once_per_thread(tmp_path):
+    saver = create_sqlite_saver(str(tmp_path / "checkpoints.sqlite"))
+    graph = _graph(saver)
+    for turn in range(10):
+        graph.invoke({"messages": [("user", f"mensagem {turn}")]}, _config())
+
+    assert saver.conn.execute("SELECT COUNT(*) FROM checkpoint_messages").fetchone()[0] == 20
+    latest = saver.conn.execute("SELECT checkpoint FROM checkpoints ORDER BY thread_ts DESC LIMIT 1").fetchone()[0]
+    assert MESSAGE_REFS_KEY in saver.serde.loads(latest)["channel_values"]["messages"]
+
+    assert _contents(graph.get_state(_config()))[-2:] == ["mensagem 9", "echo: mensagem 9"]
+    history = list(graph.get_state_history(_config()))
+    assert [len(snapshot.values.get("messages", [])) for snapshot in history[:3]] == [20, 19, 18]
+
+
+def test_reads_checkpoints_written_with_full_snapshots(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    legacy = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    _graph(legacy).invoke({"messages": [("user", "oi")]}, _config())
+    legacy.conn.close()
+
+    graph = _graph(create_sqlite_saver(path))
+    graph.invoke({"messages": [("user", "de novo")]}, _config())
+    assert _contents(graph.get_state(_config())) == ["oi", "echo: oi", "de novo", "echo: de novo"]
+
+
+def test_compact_keeps_last_checkpoints_per_thread(tmp_path):
+    saver = create_sqlite_saver(str(tmp_path / "checkpoints.sqlite"))
+    graph = _graph(saver)
+    for thread_id in ("a", "b"):
+        for turn in range(5):
+            graph.invoke({"messages": [("user", f"{thread_id}{turn}")]}, _config(thread_id))
+    counts = dict(saver.conn.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id"))
+
+    deleted, orphans = saver.compact(keep_last=3)
+
+    assert deleted == counts["a"] + counts["b"] - 6
+    assert orphans == 0
+    assert dict(saver.conn.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id")) == {"a": 3, "b": 3}
+    assert len(_contents(graph.get_state(_config("a")))) == 10
+    graph.invoke({"messages": [("user", "depois")]}, _config("a"))
+    assert _contents(graph.get_state(_config("a")))[-1] == "echo: depois"
+
+
+def test_compact_deletes_messages_no_longer_referenced(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    legacy = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    _graph(legacy).invoke({"messages": [("user", "antiga")]}, _config())
+    legacy.conn.close()
+
+    saver = create_sqlite_saver(path)
+    graph = _graph(saver)
+    # Mensagem com o mesmo id substitui a anterior: a versão antiga só é referenciada por checkpoints antigos
+    graph.invoke({"messages": [HumanMessage(content="rascunho", id="m1")]}, _config())
+    graph.invoke({"messages": [HumanMessage(content="final", id="m1")]}, _config())
+    stored = saver.conn.execute("SELECT COUNT(*) FROM checkpoint_messages").fetchone()[0]
+
+    deleted, orphans = saver.compact(keep_last=1)
+
+    assert deleted > 0 and orphans == 1
+    assert saver.conn.execute("SELECT COUNT(*) FROM checkpoint_messages").fetchone()[0] == stored - 1
+    assert saver.conn.execute("SELECT COUNT(*) FROM checkpoints WHERE message_refs IS NULL").fetchone()[0] == 0
+    assert "final" in _contents(graph.get_state(_config()))
+
+
+def test_background_compaction_is_opt_in(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'c.sqlite'}"
+    monkeypatch.delenv('CHECKPOINT_COMPACT_INTERVAL', raising=False)
+    assert create_checkpointer(url).compactor is None
+    monkeypatch.setenv('CHECKPOINT_COMPACT_INTERVAL', '60')
+    with create_checkpointer(url) as saver:
+        assert saver.compactor is not None
+
+
+def test_delete_threads_removes_inactive_conversations(tmp_path):
+    saver = create_sqlite_saver(str(tmp_path / "checkpoints.sqlite"))
+    graph = _graph(saver)
+    graph.invoke({"messages": [("user", "oi")]}, _config("old"))
+
+    assert saver.delete_threads(datetime.now(timezone.utc) - timedelta(days=1)) == 0
+    assert saver.delete_threads(datetime.now(timezone.utc) + timedelta(seconds=1)) == 1
+    assert saver.conn.execute("SELECT COUNT(*) FROM checkpoint_messages").fetchone()[0] == 0
+    assert saver.get_tuple(_config("old")) is None
+
+
+def test_async_and_sync_savers_share_the_same_format(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+
+    async def main():
+        async with create_async_checkpointer(f"sqlite:///{path}") as saver:
+            graph = _graph(saver, _aecho)
+            for turn in range(3):
+                await graph.ainvoke({"messages": [("user", f"mensagem {turn}")]}, _config())
+            return _contents(await graph.aget_state(_config()))
+
+    contents = asyncio.run(main())
+    assert len(contents) == 6
+    assert _contents(_graph(create_sqlite_saver(path)).get_state(_config())) == contents
+
+
+def test_vacuum_checkpoints_command(tmp_path, monkeypatch):
+    monkeypatch.setenv('CHECKPOINT_COMPACT_INTERVAL', '0')
+    url = f"sqlite:///{tmp_path / 'checkpoints.sqlite'}"
+    graph = _graph(create_checkpointer(url))
+    for turn in range(5):
+        graph.invoke({"messages": [("user", f"mensagem {turn}")]}, _config())
+
+    stdout = io.StringIO()
+    VacuumCheckpointsCommand(stdout=stdout).handle(url=url, keep_last=2, older_than_days=None, no_vacuum=False)
+
+    assert "Checkpoints apagados" in stdout.getvalue()
+    assert len(list(create_checkpointer(url).list(_config()))) == 2
+
+
+def test_checkpoint_url_selects_backend(tmp_path, monkeypatch):
+    monkeypatch.delenv('CHECKPOINT_URL', raising=False)
+    assert create_checkpointer().conn.execute("PRAGMA database_list").fetchone()[2] == ""
+    assert create_checkpointer("memory").conn is not None
+    assert create_checkpointer(f"sqlite:///{tmp_path / 'c.sqlite'}").conn is not None
+    with pytest.raises(ValueError):
+        create_checkpointer("mysql://localhost/db")
+
+
+class RecordingConnection:
+    closed = False
+    broken = False
+
+    def __init__(self):
+        self.batches = []
+        self.checkpoints = []
+
+    def execute(self, query, params=None):
+        if query.lstrip().startswith("INSERT INTO checkpoints"):
+            self.checkpoints.append(params)
+        return self
+
+    def transaction(self):
+        return nullcontext()
+
+    def cursor(self):
+        return nullcontext(self)
+
+    def executemany(self, query, rows):
+        self.batches.append(list(rows))
+
+
+class RecordingPool:
+    def __init__(self):
+        self.conn = RecordingConnection()
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+    def close(self):
+        pass
+
+
+def _checkpoint():
+    return {"v": 1, "id": str(uuid.uuid4()), "ts": "", "channel_values": {}, "channel_versions": {},
+            "versions_seen": {}, "pending_sends": []}
+
+
+def test_postgres_saver_writes_before_put_returns():
+    pool = RecordingPool()
+    saver = PostgresSaver(pool)
+
+    for step in range(3):
+        saver.put(_config(), _checkpoint(), {"source": "loop", "step": step})
+        assert len(pool.conn.checkpoints) == step + 1
+
+    thread_id, thread_ts, parent_ts, checkpoint, metadata, message_refs = pool.conn.checkpoints[0]
+    assert thread_id == "t1" and parent_ts is None
+    assert '"step":0' in metadata.replace(' ', '')
+
+
+@pytest.mark.skipif(not os.getenv('TEST_POSTGRES_URL'), reason="TEST_POSTGRES_URL not set")
+def test_postgres_saver_round_trip():
+    thread_id = f"test-{uuid.uuid4()}"
+    with PostgresSaver.from_conn_string(os.environ['TEST_POSTGRES_URL']) as saver:
+        graph = _graph(saver)
+        graph.invoke({"messages": [("user", "oi")]}, _config(thread_id))
+        graph.invoke({"messages": [("user", "de novo")]}, _config(thread_id))
+        state = graph.get_state(_config(thread_id))
+        history = list(saver.list(_config(thread_id), filter={"source": "loop"}))
+    assert state.values["messages"][-1].content == "echo: de novo"
+    assert len(history) == 2
@@ -0,0 +1,119 @@
+# tests/test_context_window.py
+import asyncio
+import uuid
+
+from chat.context_window import (
+    ContextWindow,
+    ExtractiveSummarizer,
+    LLMSummarizer,
+    message_tokens,
+    split_turns,
+)
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from chat.run_chat_with_subgraphs import Assistant
+from langchain_core.runnables import RunnableLambda
+
+
+def _id():
+    return str(uuid.uuid4())
+
+
+def _turn(number, payload_words=300):
+    call_id = f"call_{number}"
+    return [
+        HumanMessage(content=f"Voos de VIX para GRU no dia {number}?", id=_id()),
+        AIMessage(content="", id=_id(),
+                  tool_calls=[{"name": "search_amadeus_flights", "args": {"day": number}, "id": call_id}]),
+        ToolMessage(content=f"ref=fs-{number:010x} " + "oferta " * payload_words, tool_call_id=call_id,
+                    name="search_amadeus_flights", id=_id()),
+        AIMessage(content=f"O voo mais barato do dia {number} custa R$ {400 + number},00.", id=_id()),
+    ]
+
+
+def _assert_tool_pairs_valid(messages):
+    pending = set()
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            assert not pending
+        if isinstance(message, AIMessage):
+            pending |= {tool_call["id"] for tool_call in message.tool_calls}
+        if isinstance(message, ToolMessage):
+            assert message.tool_call_id in pending
+            pending.discard(message.tool_call_id)
+    assert not pending
+
+
+def test_split_turns_starts_each_turn_at_a_user_message():
+    messages = _turn(1) + _turn(2)
+    assert [len(turn) for turn in split_turns(messages)] == [4, 4]
+
+
+def test_old_tool_payloads_become_references():
+    window = ContextWindow(ExtractiveSummarizer(), budget=100_000, tool_payload_turns=1)
+    state, updates = window.prepare({"messages": _turn(1) + _turn(2)})
+
+    assert updates == {}
+    old_tool, new_tool = [message for message in state["messages"] if isinstance(message, ToolMessage)]
+    assert old_tool.content.startswith("[search_amadeus_flights result omitted")
+    assert "ref=fs-0000000001" in old_tool.content
+    assert old_tool.tool_call_id == "call_1"
+    assert new_tool.content.startswith("ref=fs-0000000002 oferta")
+
+
+def test_window_summarizes_old_turns_and_keeps_tool_pairs():
+    window = ContextWindow(ExtractiveSummarizer(), budget=400, tool_payload_turns=1)
+    messages = [message for number in range(1, 11) for message in _turn(number, payload_words=150)]
+
+    state, updates = window.prepare({"messages": messages})
+
+    prompt = state["messages"]
+    assert isinstance(prompt[0], SystemMessage) and "Summary of the earlier conversation" in prompt[0].content
+    assert isinstance(prompt[1], HumanMessage)
+    assert prompt[-1].id == messages[-1].id
+    _assert_tool_pairs_valid(prompt[1:])
+    assert updates["summarized_until"] == messages[len(messages) - len(prompt)].id
+    assert "dia 9" in updates["conversation_summary"]
+
+
+def test_prompt_size_stays_flat_as_conversation_grows():
+    window = ContextWindow(ExtractiveSummarizer(max_tokens=200), budget=1500, tool_payload_turns=1)
+    state = {"messages": []}
+    prompt_tokens = []
+    summaries = 0
+    for number in range(1, 101):
+        state["messages"] = state["messages"] + _turn(number)
+        prompt_state, updates = window.prepare(state)
+        summaries += bool(updates)
+        state.update(updates)
+        prompt_tokens.append(sum(message_tokens(message) for message in prompt_state["messages"]))
+
+    assert max(prompt_tokens[50:]) <= 1500 + 200 + 50
+    # A folga do LOW_WATERMARK evita resumir a cada turno
+    assert summaries < 50
+
+
+def test_llm_summarizer_rolls_previous_summary():
+    llm = FakeListChatModel(responses=["resumo atualizado"])
+    summarizer = LLMSummarizer(llm, max_tokens=100)
+    assert summarizer.summarize("resumo anterior", _turn(1)) == "resumo atualizado"
+    assert asyncio.run(summarizer.asummarize("resumo anterior", _turn(2))) == "resumo atualizado"
+
+
+def test_assistant_sends_the_window_and_returns_summary_updates():
+    seen = []
+
+    def fake_llm(state):
+        seen.append(state["messages"])
+        return AIMessage(content="ok", id=_id())
+
+    window = ContextWindow(ExtractiveSummarizer(), budget=400, tool_payload_turns=1)
+    assistant = Assistant(RunnableLambda(fake_llm), window)
+    messages = [message for number in range(1, 11) for message in _turn(number, payload_words=150)]
+
+    result = assistant({"messages": messages}, {})
+
+    assert result["messages"].content == "ok"
+    assert result["summarized_until"] and result["conversation_summary"]
+    assert len(seen[0]) < len(messages)
+    assert isinstance(seen[0][0], SystemMessage)
@@ -0,0 +1,85 @@
+# tests/test_flight_offers_cache.py
+import time
+
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService, build_search_params
+from services.flight_offers_cache import (
+    DiskCacheBackend,
+    FlightOffersCache,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    make_cache_key,
+)
+from tests.fake_redis import FakeRedis
+
+
+def test_equivalent_searches_share_cache_key():
+    first = build_search_params('vix', 'gru', '2024-08-05', non_stop='false',
+                                included_airline_codes=['la', 'G3'], currency_code='brl')
+    second = build_search_params('VIX ', 'GRU', '2024-08-05', non_stop=False,
+                                 included_airline_codes=['G3', 'LA'], currency_code='BRL')
+    assert make_cache_key(first) == make_cache_key(second)
+    assert make_cache_key(first) != make_cache_key(build_search_params('VIX', 'CGH', '2024-08-05'))
+
+
+def test_memory_backend_evicts_least_recently_used_by_count():
+    cache = FlightOffersCache(MemoryCacheBackend(max_entries=2), ttl=60)
+    cache.set({'q': 1}, b'one')
+    cache.set({'q': 2}, b'two')
+    cache.get({'q': 1})
+    cache.set({'q': 3}, b'three')
+
+    assert cache.get({'q': 2}) is None
+    assert cache.get({'q': 1}) == b'one'
+    assert cache.stats.as_dict()['evictions'] == 1
+
+
+def test_memory_backend_evicts_by_bytes():
+    backend = MemoryCacheBackend(max_entries=100, max_bytes=10)
+    cache = FlightOffersCache(backend, ttl=60)
+    cache.set({'q': 1}, b'123456')
+    cache.set({'q': 2}, b'123456')
+
+    assert len(backend) == 1
+    assert backend.total_bytes == 6
+    assert cache.stats.as_dict()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = FlightOffersCache(MemoryCacheBackend(), ttl=0.05)
+    cache.set({'q': 1}, b'one')
+    time.sleep(0.06)
+
+    assert cache.get({'q': 1}) is None
+    stats = cache.stats.as_dict()
+    assert stats['expirations'] == 1
+    assert stats['misses'] == 1
+
+
+def test_diskcache_backend(tmp_path):
+    cache = FlightOffersCache(DiskCacheBackend(str(tmp_path), max_entries=2), ttl=60)
+    for index in range(3):
+        cache.set({'q': index}, b'payload')
+    assert cache.get({'q': 0}) is None
+    assert cache.get({'q': 2}) == b'payload'
+    assert cache.stats.as_dict()['evictions'] == 1
+
+
+def test_redis_backend():
+    cache = FlightOffersCache(RedisCacheBackend(client=FakeRedis()), ttl=60)
+    cache.set({'q': 1}, b'payload')
+    assert cache.get({'q': 1}) == b'payload'
+    cache.clear()
+    assert cache.get({'q': 1}) is None
+
+
+def test_repeated_search_is_served_from_cache(stub_amadeus):
+    cache = FlightOffersCache(MemoryCacheBackend(), ttl=60)
+    service = AmadeusFlightOffersSearchService(cache=cache)
+
+    first = service.search_flights('VIX', 'GRU', '2024-08-05', included_airline_codes=['LA', 'G3'])
+    second = service.search_flights('vix', 'gru', '2024-08-05', included_airline_codes=['G3', 'LA'])
+
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 1
+    assert second.model_dump() == first.model_dump()
+    stats = cache.stats.as_dict()
+    assert (stats['hits'], stats['misses'], stats['stores']) == (1, 1, 1)
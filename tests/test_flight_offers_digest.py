@@ -0,0 +1,125 @@
+# tests/test_flight_offers_digest.py
+import asyncio
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+from chat.tools import get_flight_search_result, search_amadeus_flights
+from chat.utils import CompactToolNode
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+from services.flight_offers_cache import RedisCacheBackend
+from services.flight_offers_digest import (
+    FlightSearchResultStore,
+    count_tokens,
+    dedupe_fares,
+    get_result_store,
+    reset_result_store,
+    summarize_flight_offers,
+)
+from services.flight_offers_table import flight_offers_to_frame
+from tests.fake_redis import FakeRedis
+from tests.payloads import make_flight_offer, make_flight_offers_payload
+
+
+def _offers(count=250, mode='full'):
+    return parse_flight_offers(json.dumps(make_flight_offers_payload(count)).encode(), mode)
+
+
+def test_dedupe_keeps_cheapest_fare_per_itinerary():
+    payload = {"meta": {"count": 3, "links": {}}, "data": [
+        make_flight_offer("1", price="700.00"),
+        make_flight_offer("2", price="520.00"),
+        make_flight_offer("3", price="600.00", departure_at="2024-08-05T12:00:00"),
+    ]}
+    frame = dedupe_fares(flight_offers_to_frame(parse_flight_offers(json.dumps(payload))))
+    assert sorted(frame['id']) == ['2', '3']
+
+
+def test_summary_fits_budget_and_is_much_smaller_than_full_result():
+    flight_offers = _offers()
+    text, tokens = summarize_flight_offers(flight_offers, budget=150)
+
+    assert tokens <= 150
+    assert tokens == count_tokens(text)
+    assert count_tokens(str(flight_offers)) > 50 * tokens
+    assert text.startswith("250 offers")
+    assert "#1 400.00 BRL" in text
+    assert "[cheapest" in text
+
+
+@pytest.mark.parametrize('budget', [60, 75, 90, 110])
+def test_every_offer_line_is_checked_against_the_budget(budget):
+    text, tokens = summarize_flight_offers(_offers(), budget=budget, reference='fs-0123456789')
+    header = '\n'.join(text.splitlines()[:2])
+
+    assert tokens == count_tokens(text)
+    assert tokens <= budget or text == header
+    lines = text.splitlines()[2:]
+    assert all(line.startswith('#') for line in lines)
+
+
+def test_results_are_shared_between_workers():
+    redis = FakeRedis()
+    celery_worker = FlightSearchResultStore(RedisCacheBackend(client=redis), ttl=60)
+    asgi_worker = FlightSearchResultStore(RedisCacheBackend(client=redis), ttl=60)
+
+    reference = celery_worker.put(_offers(5))
+    assert len(asgi_worker.get(reference).data) == 5
+
+
+def test_result_store_follows_the_cache_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv('AMADEUS_CACHE_BACKEND', 'none')
+    reset_result_store()
+    assert get_result_store().get(get_result_store().put(_offers(3))) is not None
+    monkeypatch.setenv('AMADEUS_CACHE_BACKEND', 'mysql')
+    reset_result_store()
+    with pytest.raises(ValueError):
+        get_result_store()
+    reset_result_store()
+
+
+def test_summary_references_the_stored_result():
+    text, _ = summarize_flight_offers(_offers(mode='lite'))
+    reference = text.split("ref=")[1].split()[0]
+
+    stored = get_result_store().get(reference)
+    assert len(stored.data) == 250
+    assert type(stored).__name__ == 'LiteFlightOffersSearchResponse'
+
+
+def test_get_flight_search_result_tool():
+    reference = get_result_store().put(_offers())
+
+    details = get_flight_search_result.invoke({'reference': reference, 'offer_ids': ['2', '7']})
+    assert [offer['id'] for offer in details['offers']] == ['2', '7']
+    assert details['offers'][0]['travelerPricings'][0]['fareDetailsBySegment'][0]['class'] == 'T'
+
+    ranked = get_flight_search_result.invoke({'reference': reference, 'limit': 3, 'sort_by': 'departure'})
+    assert ranked['reference'] == reference
+    assert len(ranked['offers']) == 3
+
+    with pytest.raises(ValueError):
+        get_flight_search_result.invoke({'reference': 'fs-missing'})
+
+
+def test_store_expires_results():
+    store = FlightSearchResultStore(ttl=0)
+    assert store.get(store.put(_offers(3))) is None
+
+
+def test_tool_node_sends_digest_instead_of_full_result(stub_amadeus):
+    stub_amadeus.payload = make_flight_offers_payload(100)
+    calls = [
+        {'name': 'search_amadeus_flights', 'args': {'origin': 'VIX', 'destination': 'GRU', 'departure_date': date},
+         'id': f'call_{date}'}
+        for date in ('2024-08-05', '2024-08-06')
+    ]
+    node = CompactToolNode([search_amadeus_flights])
+    result = node.invoke({'messages': [AIMessage(content='', tool_calls=calls)]})
+
+    messages = result['messages']
+    assert [message.tool_call_id for message in messages] == ['call_2024-08-05', 'call_2024-08-06']
+    assert all(message.content.startswith("100 offers") for message in messages)
+
+    async_result = asyncio.run(node.ainvoke([AIMessage(content='', tool_calls=calls[:1])]))
+    assert async_result[0].content.startswith("100 offers")
@@ -0,0 +1,100 @@
+# tests/test_flight_offers_table.py
+import pytest
+from chat.tools import search_amadeus_flights_shortlist
+from models.flight_offers_models import FlightOffersSearchResponse
+from services.amadeus_flight_offers_search_service import parse_flight_offers
+from services.flight_offers_table import (
+    filter_offers,
+    flight_offers_to_frame,
+    parse_iso_duration,
+    rank_offers,
+    shortlist,
+    top_k,
+)
+from tests.payloads import make_flight_offer
+
+
+def _connection_offer(offer_id, price):
+    offer = make_flight_offer(offer_id, price=price, carrier="G3", destination="BSB",
+                              arrival_at="2024-08-05T09:45:00", duration="PT1H45M", checked_bags=0)
+    second = dict(offer["itineraries"][0]["segments"][0], id=f"{offer_id}-2", carrierCode="AD", number="4100",
+                  departure={"iataCode": "BSB", "at": "2024-08-05T11:00:00"},
+                  arrival={"iataCode": "GRU", "at": "2024-08-05T12:40:00"})
+    offer["itineraries"][0] = {"duration": "PT4H40M", "segments": [offer["itineraries"][0]["segments"][0], second]}
+    return offer
+
+
+def _response():
+    offers = [
+        make_flight_offer("1", price="650.00", departure_at="2024-08-05T06:00:00", arrival_at="2024-08-05T07:30:00"),
+        _connection_offer("2", "420.50"),
+        make_flight_offer("3", price="510.00", carrier="AD", duration="PT1H20M",
+                          departure_at="2024-08-05T18:00:00", arrival_at="2024-08-05T19:20:00", checked_bags=2),
+    ]
+    return FlightOffersSearchResponse.model_validate({"meta": {"count": 3, "links": {}}, "data": offers})
+
+
+def test_parse_iso_duration():
+    assert parse_iso_duration("PT1H30M") == 90
+    assert parse_iso_duration("PT45M") == 45
+    assert parse_iso_duration("P1DT2H5M") == 1565
+    with pytest.raises(ValueError):
+        parse_iso_duration("90 minutes")
+
+
+def test_frame_has_numeric_columns():
+    frame = flight_offers_to_frame(_response())
+    connection = frame.set_index('id').loc['2']
+
+    assert frame['price'].dtype == 'float64'
+    assert connection['price'] == 420.5
+    assert connection['duration_minutes'] == 280
+    assert connection['stops'] == 1
+    assert connection['carriers'] == 'AD,G3'
+    assert connection['destination'] == 'GRU'
+    assert str(connection['arrival_at']) == '2024-08-05 12:40:00'
+    assert connection['checked_bags'] == 0
+
+
+def test_lite_and_full_models_produce_the_same_frame():
+    content = _response().model_dump_json(by_alias=True)
+    full = flight_offers_to_frame(parse_flight_offers(content, 'full'))
+    lite = flight_offers_to_frame(parse_flight_offers(content, 'lite'))
+    assert full.equals(lite)
+
+
+def test_filters_are_combined():
+    frame = flight_offers_to_frame(_response())
+    assert list(filter_offers(frame, max_stops=0)['id']) == ['1', '3']
+    assert list(filter_offers(frame, carriers=['ad'])['id']) == ['2', '3']
+    assert list(filter_offers(frame, excluded_carriers='AD')['id']) == ['1']
+    assert list(filter_offers(frame, min_checked_bags=1, depart_after='2024-08-05T12:00')['id']) == ['3']
+    assert list(filter_offers(frame, max_price=500, max_duration_minutes=120)['id']) == []
+
+
+def test_rank_and_top_k():
+    frame = flight_offers_to_frame(_response())
+    assert list(rank_offers(frame, 'price')['id']) == ['2', '3', '1']
+    assert list(rank_offers(frame, 'duration')['id']) == ['3', '1', '2']
+    assert list(rank_offers(frame, 'best')['id'])[0] == '3'
+    assert list(top_k(frame, 2, 'price')['id']) == ['2', '3']
+    with pytest.raises(ValueError):
+        rank_offers(frame, 'cheapest')
+
+
+def test_shortlist_is_compact_and_serializable():
+    result = shortlist(_response(), k=2, by='price', max_stops=0)
+    assert result['total_offers'] == 3
+    assert result['matching_offers'] == 2
+    assert result['offers'][0] == {
+        'id': '3', 'price': 510.0, 'currency': 'BRL', 'duration_minutes': 80, 'stops': 0, 'carriers': 'AD',
+        'origin': 'VIX', 'destination': 'GRU', 'departure_at': '2024-08-05T18:00', 'arrival_at': '2024-08-05T19:20',
+        'return_departure_at': None, 'return_arrival_at': None, 'checked_bags': 2,
+    }
+
+
+def test_shortlist_tool(stub_amadeus):
+    result = search_amadeus_flights_shortlist.invoke(
+        {'origin': 'VIX', 'destination': 'GRU', 'departure_date': '2024-08-05', 'limit': 2})
+    assert [offer['price'] for offer in result['offers']] == [400.0, 410.0]
+    assert stub_amadeus.requests[-1]['query']['max'] == ['250']
@@ -0,0 +1,212 @@
+# tests/test_flight_search_jobs.py
+import asyncio
+import threading
+import time
+
+import pytest
+from backend_chatpassagens.celery import app
+from chat.search_jobs import FlightSearchJobs, progress_listener, use_search_jobs
+from chat.streaming import stream_chat_turn
+from chat.tools import search_amadeus_flights, search_amadeus_flights_multi
+from langchain_core.messages import AIMessage
+
+ERROR_BODY = {"errors": [{"status": 400, "code": 477, "title": "INVALID FORMAT"}]}
+SEARCH_PATH = '/v2/shopping/flight-offers'
+
+
+@pytest.fixture
+def celery_eager(monkeypatch):
+    """Executa as tarefas no próprio processo, sem broker (como os workers fariam)."""
+    monkeypatch.setenv('FLIGHT_SEARCH_BACKEND', 'celery')
+    monkeypatch.setenv('CELERY_BROKER_URL', 'memory://')
+    # Com o namespace CELERY, as chaves do settings do Django têm o prefixo
+    app.conf.update(CELERY_TASK_ALWAYS_EAGER=True)
+    yield app
+    app.conf.update(CELERY_TASK_ALWAYS_EAGER=False)
+
+
+def test_search_jobs_need_an_explicit_broker(monkeypatch):
+    monkeypatch.setenv('FLIGHT_SEARCH_BACKEND', 'celery')
+    monkeypatch.delenv('CELERY_BROKER_URL', raising=False)
+    assert not use_search_jobs()
+    monkeypatch.setenv('CELERY_BROKER_URL', 'redis://broker:6379/0')
+    assert use_search_jobs()
+
+
+def _listen():
+    events = []
+    token = progress_listener.set(events.append)
+    return events, token
+
+
+def test_multi_search_runs_on_workers_and_reports_progress(stub_amadeus, celery_eager):
+    events, token = _listen()
+    try:
+        result = search_amadeus_flights_multi.invoke({
+            "origins": ["VIX"], "destinations": ["GRU", "CGH"],
+            "date_from": "2024-08-01", "date_to": "2024-08-02",
+        })
+    finally:
+        progress_listener.reset(token)
+
+    assert stub_amadeus.count(SEARCH_PATH) == 4
+    # O stub devolve as mesmas ofertas para todas as buscas: as repetidas são descartadas
+    assert len(result.data) == 3
+    assert stub_amadeus.requests[-1]['query']['max'] == ['50']
+    assert events[-1] == {"type": "progress", "name": "search_amadeus_flights_multi", "completed": 4, "total": 4}
+
+
+def test_worker_side_cache_answers_repeated_searches(stub_amadeus, celery_eager):
+    arguments = {"origin": "VIX", "destination": "GRU", "departure_date": "2024-08-05"}
+    first = asyncio.run(search_amadeus_flights.ainvoke(arguments))
+    second = asyncio.run(search_amadeus_flights.ainvoke(arguments))
+
+    assert stub_amadeus.count(SEARCH_PATH) == 1
+    assert first == second
+
+
+def test_failed_jobs_are_skipped_unless_all_fail(stub_amadeus, celery_eager):
+    stub_amadeus.scripted = [(400, ERROR_BODY, {})]
+    result = search_amadeus_flights_multi.invoke({"origins": ["VIX"], "destinations": ["GRU", "CGH"],
+                                                  "departure_dates": ["2024-08-05"]})
+    assert len(result.data) == 3
+
+    stub_amadeus.scripted = [(400, ERROR_BODY, {})]
+    with pytest.raises(Exception):
+        search_amadeus_flights.invoke({"origin": "VIX", "destination": "REC", "departure_date": "2024-08-05"})
+
+
+class _SlowResult:
+    def __init__(self, polls):
+        self.polls = polls
+
+    def ready(self):
+        self.polls -= 1
+        return self.polls <= 0
+
+
+class _SlowGroup:
+    id = 'group-1'
+
+    def __init__(self, polls):
+        self.results = [_SlowResult(polls), _SlowResult(polls * 2)]
+
+    def __len__(self):
+        return len(self.results)
+
+    def revoke(self):
+        pass
+
+
+class _SlowJobs(FlightSearchJobs):
+    def submit(self, searches):
+        return _SlowGroup(polls=5)
+
+    def _collect(self, searches, group_result):
+        return 'merged'
+
+
+def test_async_wait_keeps_event_loop_responsive():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticking = asyncio.create_task(ticker())
+        events, token = _listen()
+        try:
+            result = await _SlowJobs(poll_interval=0.01).asearch([{}, {}])
+        finally:
+            progress_listener.reset(token)
+            ticking.cancel()
+        return result, ticks, events
+
+    result, ticks, events = asyncio.run(scenario())
+
+    assert result == 'merged'
+    assert ticks > 10
+    assert [event["completed"] for event in events] == [0, 1, 2]
+
+
+class _BlockingResult:
+    """Result backend lento (ex: Redis distante): cada `ready()` bloqueia a thread que consulta."""
+
+    threads = set()
+
+    def ready(self):
+        self.threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return True
+
+
+class _BlockingJobs(FlightSearchJobs):
+    def submit(self, searches):
+        group_result = _SlowGroup(polls=1)
+        group_result.results = [_BlockingResult(), _BlockingResult()]
+        return group_result
+
+    def _collect(self, searches, group_result):
+        return 'merged'
+
+
+def test_async_wait_runs_result_backend_calls_off_the_event_loop():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.create_task(ticker())
+        try:
+            result = await _BlockingJobs().asearch([{}, {}])
+        finally:
+            ticking.cancel()
+        return result, ticks, threading.get_ident()
+
+    result, ticks, loop_thread = asyncio.run(scenario())
+
+    assert result == 'merged'
+    assert loop_thread not in _BlockingResult.threads
+    # As duas consultas levam ~0.1s: o ticker continuou rodando enquanto isso
+    assert ticks >= 10
+
+
+def test_wait_gives_up_after_timeout():
+    with pytest.raises(TimeoutError):
+        _SlowJobs(timeout=0.02, poll_interval=0.01).search([{}, {}])
+
+
+class _ProgressGraph:
+    """Grafo falso: a ferramenta reporta o andamento entre os eventos do `astream_events`."""
+
+    async def astream_events(self, inputs, config, version):
+        yield {"event": "on_tool_start", "name": "search_amadeus_flights_multi", "data": {"input": {}}}
+        listener = progress_listener.get()
+        for completed in range(3):
+            listener({"type": "progress", "name": "search_amadeus_flights_multi", "completed": completed,
+                      "total": 2})
+            await asyncio.sleep(0)
+        yield {"event": "on_tool_end", "name": "search_amadeus_flights_multi", "data": {}}
+
+    async def aget_state(self, config):
+        class _State:
+            values = {"messages": [AIMessage(content="pronto")]}
+        return _State()
+
+
+def test_stream_chat_turn_interleaves_progress_events():
+    async def collect():
+        return [event async for event in stream_chat_turn(_ProgressGraph(), "oi", "t1")]
+
+    events = asyncio.run(collect())
+
+    assert [event["type"] for event in events] == [
+        "tool_start", "progress", "progress", "progress", "tool_end", "message", "done"]
+    assert events[3]["completed"] == 2
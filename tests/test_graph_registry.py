@@ -0,0 +1,83 @@
+# tests/test_graph_registry.py
+import asyncio
+import uuid
+
+import pytest
+from chat import llm as chat_llm
+from chat.graph_registry import aget_graph, get_graph, get_graph_registry, reset_graph_registry
+from chat.llm import reset_llm
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+
+class FakeToolChatModel(FakeListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setenv('CHECKPOINT_COMPACT_INTERVAL', '0')
+    reset_graph_registry()
+    reset_llm()
+    yield
+    reset_graph_registry()
+    reset_llm()
+
+
+def _config():
+    return {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+
+def test_graph_is_compiled_once_per_configuration(tmp_path):
+    reset_llm(FakeToolChatModel(responses=["Olá!"]))
+    graph = get_graph(checkpoint_url='memory')
+
+    assert get_graph(checkpoint_url='memory') is graph
+    assert get_graph(checkpoint_url=f"sqlite:///{tmp_path / 'c.sqlite'}") is not graph
+    assert get_graph('simple', checkpoint_url='memory') is not graph
+    with pytest.raises(ValueError):
+        get_graph('unknown', checkpoint_url='memory')
+
+
+def test_llm_client_is_created_on_first_call():
+    get_graph(checkpoint_url='memory')
+    assert chat_llm._llm is None
+
+
+def test_cached_graph_serves_many_conversations():
+    reset_llm(FakeToolChatModel(responses=["Olá! Para onde você quer viajar?"]))
+    graph = get_graph(checkpoint_url='memory')
+
+    first, second = _config(), _config()
+    graph.invoke({"messages": [("user", "oi")]}, first)
+    graph.invoke({"messages": [("user", "bom dia")]}, second)
+    graph.invoke({"messages": [("user", "quero ir a Lisboa")]}, first)
+
+    assert len(graph.get_state(first).values["messages"]) == 4
+    assert len(graph.get_state(second).values["messages"]) == 2
+
+
+def test_async_graph_is_cached(tmp_path):
+    reset_llm(FakeToolChatModel(responses=["Olá!"]))
+    url = f"sqlite:///{tmp_path / 'c.sqlite'}"
+
+    async def main():
+        graph = await aget_graph(checkpoint_url=url)
+        assert await aget_graph(checkpoint_url=url) is graph
+        config = _config()
+        await graph.ainvoke({"messages": [("user", "oi")]}, config)
+        state = await graph.aget_state(config)
+        await get_graph_registry().aclose()
+        return state
+
+    assert asyncio.run(main()).values["messages"][-1].content == "Olá!"
+
+
+def test_async_graphs_are_cached_per_event_loop():
+    async def main():
+        graph = await aget_graph(checkpoint_url='memory')
+        assert await aget_graph(checkpoint_url='memory') is graph
+        return graph
+
+    first, second = asyncio.run(main()), asyncio.run(main())
+    assert first is not second
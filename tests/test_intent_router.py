@@ -0,0 +1,141 @@
+# tests/test_intent_router.py
+import uuid
+from collections import Counter
+
+import pytest
+from chat.intent_router import IntentRouter, create_intent_router
+from chat.llm import reset_llm
+from chat.llm_cache import reset_llm_cache
+from chat.run_chat_with_subgraphs import build_graph
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from tests.intent_questions import QUESTIONS, TODAY
+
+CALLS = Counter()
+
+
+class CountingChatModel(GenericFakeChatModel):
+    """Modelo falso que conta as chamadas (o grafo usa cópias do modelo, então o contador é do módulo)."""
+
+    def _generate(self, *args, **kwargs):
+        CALLS['model'] += 1
+        return super()._generate(*args, **kwargs)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture
+def scripted_llm(monkeypatch):
+    monkeypatch.setenv('LLM_CACHE', 'none')
+    monkeypatch.setattr('chat.run_chat_with_subgraphs.intent_router', IntentRouter())
+    reset_llm_cache()
+    CALLS.clear()
+
+    def install(*messages):
+        reset_llm(CountingChatModel(messages=iter(messages)))
+    yield install
+    reset_llm()
+    reset_llm_cache()
+
+
+def _run(graph, config, question):
+    graph.invoke({"messages": [("user", question)]}, config)
+    return graph.get_state(config).values
+
+
+@pytest.mark.parametrize("question, expected", QUESTIONS)
+def test_classifies_labeled_questions(question, expected):
+    intent = IntentRouter().classify(question, TODAY)
+
+    assert (intent.params() if intent else None) == expected
+
+
+def test_date_without_year_is_the_next_occurrence():
+    intent = IntentRouter().classify("voos para Recife em 05/03", TODAY)
+
+    assert intent.departure_date.isoformat() == '2025-03-05'
+
+
+def test_route_only_classifies_a_trailing_user_message():
+    router = IntentRouter()
+    question = HumanMessage(content="Voos de VIX para São Paulo em 05/08")
+
+    assert router.route([question], TODAY) is not None
+    assert router.route([question, AIMessage(content="Para quando?")], TODAY) is None
+
+
+def test_pre_router_can_be_disabled(monkeypatch):
+    monkeypatch.setenv('INTENT_PRE_ROUTER', 'off')
+
+    assert create_intent_router() is None
+
+
+def test_obvious_flight_question_skips_the_primary_assistant(scripted_llm):
+    scripted_llm(AIMessage(content="Para qual data?"))
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+    values = _run(build_graph(MemorySaver()), config, "Passagens de VIX para São Paulo em 05/08, 2 adultos")
+
+    assert CALLS['model'] == 1
+    assert values["dialog_state"] == ["flight_search_assistant"]
+    handoff = values["messages"][1]
+    assert handoff.response_metadata["router"] == "rules"
+    assert handoff.tool_calls[0]["name"] == "ToFlightSearchAssistant"
+    assert "origin=VIX, destination=SAO" in handoff.tool_calls[0]["args"]["request"]
+    assert "adults=2" in handoff.tool_calls[0]["args"]["request"]
+    assert values["messages"][-1].content == "Para qual data?"
+
+
+def test_each_turn_is_classified_once_and_the_intent_kept_in_state(scripted_llm, monkeypatch):
+    router = IntentRouter()
+    classified = []
+    monkeypatch.setattr(router, 'route', lambda messages: classified.append(messages) or IntentRouter.route(
+        router, messages, TODAY))
+    monkeypatch.setattr('chat.run_chat_with_subgraphs.intent_router', router)
+    scripted_llm(AIMessage(content="Buscando."), AIMessage(content="Olá!"))
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    graph = build_graph(MemorySaver())
+
+    values = _run(graph, config, "Voos de VIX para São Paulo em 05/08")
+
+    assert len(classified) == 1
+    assert values["pre_routed_intent"] == {'origin': 'VIX', 'destination': 'SAO', 'departure_date': '2024-08-05'}
+
+
+def test_questions_about_a_flight_go_to_the_primary_assistant(scripted_llm):
+    scripted_llm(AIMessage(content="Depende da companhia."))
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+    values = _run(build_graph(MemorySaver()), config, "O voo para Miami aceita pet?")
+
+    assert not values.get("dialog_state")
+    assert values.get("pre_routed_intent") is None
+    assert values["messages"][-1].content == "Depende da companhia."
+
+
+def test_uncertain_question_goes_to_the_primary_assistant(scripted_llm):
+    scripted_llm(AIMessage(content="Olá! Como posso ajudar?"))
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+    values = _run(build_graph(MemorySaver()), config, "Oi, tudo bem?")
+
+    assert CALLS['model'] == 1
+    assert not values.get("dialog_state")
+    assert values["messages"][-1].content == "Olá! Como posso ajudar?"
+
+
+def test_follow_up_in_a_delegated_dialog_is_not_pre_routed_again(scripted_llm):
+    scripted_llm(AIMessage(content="Para qual data?"), AIMessage(content="Buscando."))
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    graph = build_graph(MemorySaver())
+
+    _run(graph, config, "Voos de Vitória para Recife")
+    values = _run(graph, config, "voos para Recife em 05/08")
+
+    handoffs = [message for message in values["messages"] if isinstance(message, AIMessage)
+                and any(tc["name"] == "ToFlightSearchAssistant" for tc in message.tool_calls)]
+    assert len(handoffs) == 1
+    assert values["dialog_state"] == ["flight_search_assistant"]
+    assert CALLS['model'] == 2
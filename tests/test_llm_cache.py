@@ -0,0 +1,185 @@
+# tests/test_llm_cache.py
+import re
+import time
+from collections import Counter
+
+import pytest
+from chat.llm_cache import (
+    LLMResponseCache,
+    MemoryVectorIndex,
+    QdrantVectorIndex,
+    cached_llm,
+    normalize_prompt,
+    reset_llm_cache,
+)
+from chat.run_chat_with_subgraphs import assistant_runnable
+from langchain_core.language_models.fake_chat_models import FakeListChatModel, GenericFakeChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+VOCABULARY = ['quero', 'dicas', 'passeios', 'passeio', 'rio', 'janeiro', 'voos', 'para', 'salvador', 'praia']
+
+
+class BagOfWordsEmbeddings:
+    """Embeddings de teste: contagem das palavras do vocabulário (perguntas parecidas ficam próximas)."""
+
+    def embed_query(self, text):
+        counts = Counter(re.findall(r'\w+', text.casefold()))
+        return [float(counts[word]) for word in VOCABULARY] + [0.1]
+
+
+class FailingChatModel(FakeListChatModel):
+    def _call(self, *args, **kwargs):
+        raise TimeoutError("LLM timeout")
+
+
+class SlowChatModel(FakeListChatModel):
+    """Modelo falso que demora um pouco e conta as chamadas."""
+
+    calls: int = 0
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+        time.sleep(0.05)
+        return super()._call(*args, **kwargs)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture
+def llm_cache():
+    def install(**kwargs):
+        cache = LLMResponseCache(**kwargs)
+        reset_llm_cache(cache)
+        return cache
+    yield install
+    reset_llm_cache()
+
+
+def _ask(llm, question, now="2024-08-05 10:00:00.123456"):
+    messages = [SystemMessage(content=f"You are a travel assistant.\nCurrent time: {now}."),
+                HumanMessage(content=question)]
+    return llm.invoke(messages)
+
+
+def test_normalize_prompt_ignores_ids_case_spaces_and_time_of_day():
+    first = dumps([SystemMessage(content="Current time: 2024-08-05 10:00:00.1."),
+                   HumanMessage(content="Voos  para Salvador?", id="a")])
+    second = dumps([SystemMessage(content="Current time: 2024-08-05 18:30:12.9."),
+                    HumanMessage(content="voos para salvador?", id="b")])
+    assert normalize_prompt(first) == normalize_prompt(second)
+    assert normalize_prompt(first)[1] == "voos para salvador?"
+
+
+def test_exact_hit_skips_the_model_and_regenerates_ids(llm_cache):
+    cache = llm_cache()
+    model = SlowChatModel(responses=["Dicas do Rio"], cache=cache)
+
+    first = _ask(model, "Quero dicas de passeios no Rio de Janeiro")
+    second = _ask(model, "  quero DICAS de passeios no rio de janeiro ", now="2024-08-05 17:45:00.5")
+
+    assert model.calls == 1
+    assert second.content == first.content
+    assert second.id != first.id
+    stats = cache.stats.as_dict()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+    assert stats["latency_saved"] >= 0.05
+
+
+def test_cached_tool_calls_get_new_ids(llm_cache):
+    cache = llm_cache()
+    routing = AIMessage(content="", tool_calls=[{"name": "ToTourismAssistant", "args": {"request": "Rio"},
+                                                 "id": "call_original"}])
+    model = GenericFakeChatModel(messages=iter([routing]), cache=cache)
+
+    first = _ask(model, "Dicas no Rio")
+    second = _ask(model, "Dicas no Rio")
+
+    assert first.tool_calls[0]["id"] == "call_original"
+    assert second.tool_calls[0]["name"] == "ToTourismAssistant"
+    assert second.tool_calls[0]["id"] != "call_original"
+
+
+@pytest.mark.parametrize("index", [MemoryVectorIndex, QdrantVectorIndex])
+def test_semantic_hit_for_similar_question(llm_cache, index):
+    cache = llm_cache(embeddings=BagOfWordsEmbeddings(), index=index(), threshold=0.8)
+    model = SlowChatModel(responses=["Dicas do Rio", "Voos para Salvador"], cache=cache)
+
+    _ask(model, "Quero dicas de passeios no Rio de Janeiro")
+    similar = _ask(model, "dicas de passeio no Rio de Janeiro, quero!")
+    different = _ask(model, "Voos para Salvador")
+
+    assert similar.content == "Dicas do Rio"
+    assert different.content == "Voos para Salvador"
+    assert model.calls == 2
+    assert cache.stats.as_dict()["semantic_hits"] == 1
+
+
+def test_semantic_hit_requires_the_same_dates_and_airports(llm_cache):
+    cache = llm_cache(embeddings=BagOfWordsEmbeddings(), threshold=0.8)
+    model = SlowChatModel(responses=["Busca GRU-SSA dia 10", "Busca GRU-SSA dia 11", "Busca GRU-REC dia 10"],
+                          cache=cache)
+
+    first = _ask(model, "Quero voos de GRU para Salvador dia 10")
+    same = _ask(model, "voos de GRU para Salvador dia 10, quero")
+    other_day = _ask(model, "Quero voos de GRU para Salvador dia 11")
+    other_city = _ask(model, "Quero voos de GRU para Recife dia 10")
+
+    assert same.content == first.content == "Busca GRU-SSA dia 10"
+    assert other_day.content == "Busca GRU-SSA dia 11"
+    assert other_city.content == "Busca GRU-REC dia 10"
+    assert model.calls == 3
+    assert cache.stats.as_dict()["semantic_hits"] == 1
+
+
+def test_entries_expire(llm_cache):
+    cache = llm_cache(ttl=0.05, embeddings=BagOfWordsEmbeddings(), threshold=0.8)
+    model = SlowChatModel(responses=["primeira", "segunda"], cache=cache)
+
+    _ask(model, "Dicas no Rio")
+    time.sleep(0.1)
+
+    assert _ask(model, "Dicas no Rio").content == "segunda"
+    assert model.calls == 2
+
+
+def test_memory_index_evicts_least_recently_added():
+    index = MemoryVectorIndex(max_entries=2)
+    for key in ("a", "b", "c"):
+        index.add("ns", key, [1.0, 0.0], ttl=60)
+    assert index.search("ns", [1.0, 0.0], 0.9)[0] in ("b", "c")
+    assert len(index._order) == 2
+
+
+def test_primary_assistant_routing_is_cached(llm_cache):
+    cache = llm_cache()
+    runnable = assistant_runnable(SlowChatModel(responses=["Posso ajudar com voos ou turismo."]))
+
+    for question in ("Oi, tudo bem?", "oi,   tudo bem?"):
+        runnable.invoke({"messages": [("user", question)]})
+
+    stats = cache.stats.as_dict()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_failed_calls_do_not_leave_pending_entries(llm_cache):
+    cache = llm_cache()
+    model = cached_llm(FailingChatModel(responses=["nunca"]))
+
+    for question in ("Dicas no Rio", "Voos para Salvador"):
+        with pytest.raises(TimeoutError):
+            _ask(model, question)
+
+    assert cache._pending == {}
+    assert cache.stats.as_dict()["stores"] == 0
+
+
+def test_empty_responses_are_not_cached(llm_cache):
+    cache = llm_cache()
+    model = SlowChatModel(responses=["", "Dicas do Rio"], cache=cache)
+
+    assert _ask(model, "Dicas no Rio").content == ""
+    assert _ask(model, "Dicas no Rio").content == "Dicas do Rio"
+    assert model.calls == 2
+    assert cache.stats.as_dict()["stores"] == 1
@@ -0,0 +1,146 @@
+# tests/test_llm_retry.py
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+from chat.llm import get_llm, reset_llm
+from chat.llm_retry import (
+    EXHAUSTED_REPLY,
+    LLMRetryPolicy,
+    ainvoke_with_retry,
+    get_llm_call_stats,
+    invoke_with_retry,
+    reset_llm_call_stats,
+)
+from chat.run_chat_with_subgraphs import Assistant
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from openai import APITimeoutError
+
+STATE = {"messages": [("user", "Voos de VIX para GRU?")]}
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    reset_llm_call_stats()
+    yield
+    reset_llm_call_stats()
+
+
+def _chat(*responses):
+    return RunnableLambda(lambda state: state["messages"]) | FakeListChatModel(responses=list(responses))
+
+
+def _policy(**kwargs):
+    return LLMRetryPolicy(**{"max_attempts": 3, "call_timeout": 5, "deadline": 10, "fallback_after": 2,
+                             "base_delay": 0, **kwargs})
+
+
+def test_empty_responses_are_capped():
+    calls = []
+
+    def empty(state):
+        calls.append(len(state["messages"]))
+        return AIMessage(content="")
+
+    result = invoke_with_retry(RunnableLambda(empty), STATE, _policy())
+
+    assert result.content == EXHAUSTED_REPLY
+    # Cada nova tentativa pede "Respond with a real output."
+    assert calls == [1, 2, 3]
+    stats = get_llm_call_stats().as_dict()
+    assert (stats["attempts"], stats["empty"], stats["exhausted"]) == (3, 3, 1)
+
+
+def test_fallback_model_after_repeated_empty_outputs():
+    primary = _chat("", "")
+    fallback = _chat("Resposta do modelo reserva")
+
+    result = asyncio.run(ainvoke_with_retry(primary, STATE, _policy(), fallback=fallback))
+
+    assert result.content == "Resposta do modelo reserva"
+    stats = get_llm_call_stats().as_dict()
+    assert (stats["attempts"], stats["fallbacks"], stats["ok"]) == (3, 1, 1)
+
+
+def test_errors_are_retried_then_raised():
+    def failing(state):
+        raise ConnectionError("provider down")
+
+    with pytest.raises(ConnectionError):
+        invoke_with_retry(RunnableLambda(failing), STATE, _policy(max_attempts=2))
+    assert get_llm_call_stats().as_dict()["errors"] == 2
+
+
+def test_call_timeout_bounds_each_attempt():
+    async def slow(state):
+        await asyncio.sleep(1)
+
+    runnable = RunnableLambda(lambda state: None, afunc=slow)
+    policy = _policy(max_attempts=2, call_timeout=0.05)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        asyncio.run(ainvoke_with_retry(runnable, STATE, policy))
+    assert time.perf_counter() - start < 0.5
+    assert get_llm_call_stats().as_dict()["timeouts"] == 2
+
+
+@pytest.fixture
+def hanging_provider(monkeypatch):
+    """Provedor que aceita as conexões e nunca responde; conta as requisições recebidas."""
+    server = socket.create_server(('127.0.0.1', 0))
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                connections.append(server.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setenv('OPENAI_API_BASE', f"http://127.0.0.1:{server.getsockname()[1]}/v1")
+    monkeypatch.setenv('LLM_CALL_TIMEOUT', '0.1')
+    reset_llm()
+    yield connections
+    reset_llm()
+    server.close()
+    for connection in connections:
+        connection.close()
+
+
+def test_sync_attempts_are_bounded_by_the_client_timeout(hanging_provider):
+    start = time.perf_counter()
+    with pytest.raises(APITimeoutError):
+        invoke_with_retry(get_llm(), STATE["messages"], _policy(max_attempts=2))
+
+    assert time.perf_counter() - start < 1
+    assert get_llm_call_stats().as_dict()["timeouts"] == 2
+    # Sem novas tentativas internas do cliente: uma requisição por tentativa
+    assert len(hanging_provider) == 2
+
+
+def test_deadline_stops_new_attempts():
+    def failing(state):
+        time.sleep(0.06)
+        raise ConnectionError("provider down")
+
+    start = time.perf_counter()
+    # Nenhuma tentativa começa depois do prazo: a última termina com o erro do provedor
+    with pytest.raises(ConnectionError):
+        invoke_with_retry(RunnableLambda(failing), STATE, _policy(max_attempts=100, deadline=0.2))
+    assert time.perf_counter() - start < 0.4
+    assert get_llm_call_stats().as_dict()["attempts"] < 5
+
+
+def test_assistant_node_uses_the_retry_policy():
+    assistant = Assistant(_chat("", "Encontrei 3 voos."), retry_policy=_policy())
+    result = assistant(STATE, {"metadata": {"langgraph_node": "flight_search_assistant"}})
+
+    assert result["messages"].content == "Encontrei 3 voos."
+    assert get_llm_call_stats().as_dict()["attempts"] == 2
@@ -0,0 +1,142 @@
+# tests/test_metrics.py
+import io
+import os
+import uuid
+
+import django
+import pytest
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_chatpassagens.settings')
+django.setup()
+
+from chat.llm import reset_llm  # noqa: E402
+from chat.run_chat_with_subgraphs import build_graph  # noqa: E402
+from chat.views import metrics as metrics_view  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+from services.metrics import Histogram, MetricsRegistry, get_metrics, parse_histograms, reset_metrics  # noqa: E402
+
+
+class ScriptedToolChatModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture
+def metrics():
+    reset_metrics()
+    yield get_metrics()
+    reset_metrics()
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram((0.1, 0.2, 0.4))
+    for value in (0.05, 0.15, 0.15, 0.3, 1.0):
+        histogram.observe(value)
+
+    summary = histogram.summary()
+    assert summary['count'] == 5
+    assert summary['mean'] == pytest.approx(0.33)
+    assert 0.1 < summary['p50'] <= 0.2
+    assert summary['p99'] == 0.4  # acima do último limite: o próprio limite
+
+
+def test_render_and_parse_round_trip():
+    registry = MetricsRegistry(enabled=True)
+    for value in (0.002, 0.03, 0.03, 0.7):
+        registry.observe('graph_node_seconds', value, node='primary_assistant', outcome='ok')
+    registry.incr('llm_tokens_total', 120, node='primary_assistant', kind='input')
+
+    text = registry.render()
+
+    assert '# TYPE chatpassagens_graph_node_seconds histogram' in text
+    assert 'chatpassagens_graph_node_seconds_bucket{node="primary_assistant",outcome="ok",le="+Inf"} 4' in text
+    assert 'chatpassagens_llm_tokens_total{kind="input",node="primary_assistant"} 120' in text
+    parsed = parse_histograms(text)
+    original = registry.histograms()
+    key = ('graph_node_seconds', (('node', 'primary_assistant'), ('outcome', 'ok')))
+    assert parsed[key].counts == original[key].counts
+    assert parsed[key].summary() == pytest.approx(original[key].summary())
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    registry.observe('tool_seconds', 0.1, tool='x', outcome='ok')
+    registry.incr('llm_tokens_total', 5, node='x', kind='input')
+
+    assert registry.histograms() == {}
+    assert registry.counters() == {}
+
+
+def test_chat_turn_records_nodes_tools_llm_and_amadeus(stub_amadeus, metrics, monkeypatch):
+    monkeypatch.setattr('chat.run_chat_with_subgraphs.intent_router', None)
+    reset_llm(ScriptedToolChatModel(messages=iter([
+        AIMessage(content="", tool_calls=[{"name": "ToFlightSearchAssistant", "args": {"request": "voos"}, "id": "c1"}]),
+        AIMessage(content="", tool_calls=[{"name": "search_amadeus_flights", "id": "c2",
+                                           "args": {"origin": "VIX", "destination": "GRU",
+                                                    "departure_date": "2024-08-05"}}]),
+        AIMessage(content="Encontrei 3 voos."),
+    ])))
+    try:
+        graph = build_graph(MemorySaver())
+        graph.invoke({"messages": [("user", "Quero viajar")]}, {"configurable": {"thread_id": str(uuid.uuid4())}})
+    finally:
+        reset_llm()
+
+    histograms = metrics.histograms()
+    nodes = {dict(labels)['node'] for name, labels in histograms if name == 'graph_node_seconds'}
+    assert {'primary_assistant', 'enter_flight_search_assistant', 'flight_search_assistant',
+            'flight_search_tools'} <= nodes
+    assert ('tool_seconds', (('outcome', 'ok'), ('tool', 'search_amadeus_flights'))) in histograms
+    assert ('amadeus_search_seconds', (('status', 'ok'),)) in histograms
+    assert histograms[('llm_call_seconds', (('node', 'flight_search_assistant'), ('outcome', 'ok')))].count == 2
+
+
+def test_metrics_endpoint_includes_collectors(metrics):
+    metrics.observe('tool_seconds', 0.01, tool='search_amadeus_flights', outcome='ok')
+
+    response = metrics_view(RequestFactory().get('/metrics'))
+
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert 'chatpassagens_tool_seconds_count{outcome="ok",tool="search_amadeus_flights"} 1' in response.content.decode()
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1', '10.0.0.0/8'])
+def test_metrics_endpoint_is_restricted_to_internal_ips_and_staff(metrics):
+    factory = RequestFactory()
+
+    assert metrics_view(factory.get('/metrics', REMOTE_ADDR='10.1.2.3')).status_code == 200
+    assert metrics_view(factory.get('/metrics', REMOTE_ADDR='203.0.113.7')).status_code == 403
+    forwarded = factory.get('/metrics', REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR='127.0.0.1')
+    assert metrics_view(forwarded).status_code == 403
+
+    request = factory.get('/metrics', REMOTE_ADDR='203.0.113.7')
+    request.user = User(username='ops', is_staff=True)
+    assert metrics_view(request).status_code == 200
+    request.user = User(username='visitor')
+    assert metrics_view(request).status_code == 403
+
+
+def test_summary_command_reads_the_endpoint(metrics, monkeypatch):
+    for value in (0.01, 0.02, 0.5):
+        metrics.observe('graph_node_seconds', value, node='flight_search_tools', outcome='ok')
+    text = metrics.render()
+
+    class Response:
+        def __init__(self):
+            self.text = text
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr('requests.get', lambda url, timeout: Response())
+    out = io.StringIO()
+    call_command('metrics_summary', url='http://server/metrics', stdout=out)
+
+    line = next(line for line in out.getvalue().splitlines() if 'flight_search_tools' in line)
+    assert line.split()[2] == '3'
@@ -0,0 +1,116 @@
+# tests/test_parallel_tool_calls.py
+import asyncio
+import time
+import uuid
+
+import pytest
+from chat.llm import reset_llm
+from chat.run_chat_with_subgraphs import build_graph, pending_tool_calls
+from chat.utils import CompactToolNode
+from chat.tools import search_amadeus_flights
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+SEARCH_PATH = '/v2/shopping/flight-offers'
+
+
+class ScriptedToolChatModel(GenericFakeChatModel):
+    """Modelo falso que devolve as AIMessages do roteiro, na ordem, para todos os assistentes."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _call(name, **args):
+    return {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}
+
+
+def _search(destination):
+    return _call("search_amadeus_flights", origin="VIX", destination=destination, departure_date="2024-08-05")
+
+
+def _assert_every_call_answered_once(messages):
+    calls = [tc["id"] for message in messages if isinstance(message, AIMessage) for tc in message.tool_calls]
+    answers = [message.tool_call_id for message in messages if isinstance(message, ToolMessage)]
+    assert sorted(calls) == sorted(answers)
+
+
+@pytest.fixture
+def scripted_llm(monkeypatch):
+    # O roteiro começa pela transferência do assistente principal: sem o pré-roteador por regras
+    monkeypatch.setattr('chat.run_chat_with_subgraphs.intent_router', None)
+
+    def install(*messages):
+        reset_llm(ScriptedToolChatModel(messages=iter(messages)))
+    yield install
+    reset_llm()
+
+
+def _run(graph, question):
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    graph.invoke({"messages": [("user", question)]}, config)
+    return graph.get_state(config).values
+
+
+def test_parallel_searches_run_concurrently_with_one_tool_message_each(stub_amadeus, scripted_llm):
+    stub_amadeus.latency = 0.5
+    scripted_llm(
+        AIMessage(content="", tool_calls=[_call("ToFlightSearchAssistant", request="VIX para SP")]),
+        AIMessage(content="", tool_calls=[_search("GRU"), _search("CGH"), _search("VCP")]),
+        AIMessage(content="O mais barato é para CGH."),
+    )
+    graph = build_graph(MemorySaver())
+
+    start = time.perf_counter()
+    values = _run(graph, "Voos de VIX para qualquer aeroporto de São Paulo em 05/08")
+    elapsed = time.perf_counter() - start
+
+    assert stub_amadeus.count(SEARCH_PATH) == 3
+    # Em série seriam pelo menos 1.5s só de buscas
+    assert elapsed < 0.5 * 3 * 0.8
+    tool_messages = [message for message in values["messages"] if message.name == "search_amadeus_flights"]
+    assert len(tool_messages) == 3
+    _assert_every_call_answered_once(values["messages"])
+    assert values["messages"][-1].content == "O mais barato é para CGH."
+
+
+def test_handoff_mixed_with_searches_runs_them_before_leaving(stub_amadeus, scripted_llm):
+    scripted_llm(
+        AIMessage(content="", tool_calls=[_call("ToFlightSearchAssistant", request="voos"),
+                                          _call("ToTourismAssistant", request="passeios")]),
+        AIMessage(content="", tool_calls=[_search("GRU"), _search("CGH"),
+                                          _call("CompleteOrEscalate", cancel=True, reason="done")]),
+        AIMessage(content="Buscas feitas; posso sugerir passeios em SP."),
+    )
+    values = _run(build_graph(MemorySaver()), "Voos para SP e passeios por lá")
+
+    messages = values["messages"]
+    _assert_every_call_answered_once(messages)
+    assert stub_amadeus.count(SEARCH_PATH) == 2
+    assert values["dialog_state"] == []
+    contents = [message.content for message in messages if isinstance(message, ToolMessage)]
+    assert any(content.startswith("The assistant is now the Flight Search Assistant") for content in contents)
+    assert any(content.startswith("Not started: the Flight Search Assistant") for content in contents)
+    assert any(content.startswith("Resuming dialog with the host assistant") for content in contents)
+    assert messages[-1].content == "Buscas feitas; posso sugerir passeios em SP."
+
+
+def test_failed_call_does_not_discard_parallel_results(stub_amadeus):
+    stub_amadeus.scripted = [(400, {"errors": [{"status": 400, "code": 477, "title": "INVALID FORMAT"}]}, {})]
+    message = AIMessage(content="", tool_calls=[_search("GRU"), _search("CGH")])
+    node = CompactToolNode([search_amadeus_flights])
+
+    outputs = asyncio.run(node.ainvoke({"messages": [HumanMessage(content="oi"), message]}))["messages"]
+
+    assert [output.tool_call_id for output in outputs] == [tc["id"] for tc in message.tool_calls]
+    assert sum(output.content.startswith("Error:") for output in outputs) == 1
+    assert sum("ref=fs-" in output.content for output in outputs) == 1
+
+
+def test_pending_tool_calls_skips_answered_calls():
+    first, second = _search("GRU"), _call("CompleteOrEscalate", cancel=True, reason="ok")
+    messages = [HumanMessage(content="oi"), AIMessage(content="", tool_calls=[first, second]),
+                ToolMessage(content="ok", tool_call_id=first["id"])]
+    assert pending_tool_calls(messages) == [second]
+    assert pending_tool_calls(messages + [AIMessage(content="fim")]) == []
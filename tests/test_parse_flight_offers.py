@@ -0,0 +1,55 @@
+# tests/test_parse_flight_offers.py
+import json
+import logging
+
+import pytest
+from models.flight_offers_models import FlightOffersSearchResponse, LiteFlightOffersSearchResponse
+from services.amadeus_errors import AmadeusValidationError
+from services.amadeus_flight_multi_search_service import AmadeusFlightMultiSearchService
+from services.amadeus_flight_offers_search_service import (
+    AmadeusFlightOffersSearchService,
+    handle_flight_offers_response,
+    parse_flight_offers,
+)
+from services.amadeus_http import AmadeusResponse
+from tests.payloads import make_flight_offers_payload
+
+CONTENT = json.dumps(make_flight_offers_payload(5)).encode()
+
+
+def test_lite_mode_keeps_the_fields_the_chat_uses():
+    full = parse_flight_offers(CONTENT, 'full')
+    lite = parse_flight_offers(CONTENT, 'lite')
+
+    assert isinstance(full, FlightOffersSearchResponse)
+    assert isinstance(lite, LiteFlightOffersSearchResponse)
+    for full_offer, lite_offer in zip(full.data, lite.data):
+        assert lite_offer.price.grandTotal == full_offer.price.grandTotal
+        assert lite_offer.itineraries[0].segments[0].departure == full_offer.itineraries[0].segments[0].departure
+        bags = lite_offer.travelerPricings[0].fareDetailsBySegment[0].includedCheckedBags
+        assert bags.quantity == 1
+    assert len(lite.model_dump_json()) < len(full.model_dump_json())
+
+
+def test_invalid_body_raises_validation_error():
+    logger = logging.getLogger()
+    with pytest.raises(AmadeusValidationError):
+        handle_flight_offers_response(AmadeusResponse(200, {}, b'{"meta": {"count": 0, "links": {}}, "data": []}'), logger)
+    with pytest.raises(AmadeusValidationError):
+        handle_flight_offers_response(AmadeusResponse(200, {}, b'not json'), logger)
+
+
+def test_parse_mode_comes_from_environment(stub_amadeus, monkeypatch):
+    monkeypatch.setenv('AMADEUS_PARSE_MODE', 'lite')
+    service = AmadeusFlightOffersSearchService()
+    first = service.search_flights('VIX', 'GRU', '2024-08-05')
+    cached = service.search_flights('VIX', 'GRU', '2024-08-05')
+    assert isinstance(first, LiteFlightOffersSearchResponse)
+    assert isinstance(cached, LiteFlightOffersSearchResponse)
+
+    merged = AmadeusFlightMultiSearchService().search(['VIX'], ['GRU', 'CGH'], ['2024-08-05'])
+    assert isinstance(merged, LiteFlightOffersSearchResponse)
+
+    monkeypatch.setenv('AMADEUS_PARSE_MODE', 'fast')
+    with pytest.raises(ValueError):
+        parse_flight_offers(CONTENT)
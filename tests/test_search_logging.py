@@ -0,0 +1,115 @@
+# tests/test_search_logging.py
+import json
+import logging
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from services.amadeus_errors import AmadeusClientError
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService, build_search_params
+from services.search_logging import SearchLog, configure_search_logging, params_hash, reset_search_logging
+from tests.payloads import make_flight_offers_payload
+
+SEARCH_PATH = '/v2/shopping/flight-offers'
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def search_logger():
+    logger = logging.getLogger('tests.search_logging')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = ListHandler()
+    logger.addHandler(handler)
+    yield logger, handler.records
+    logger.removeHandler(handler)
+
+
+def test_search_record_is_compact(search_logger):
+    logger, records = search_logger
+    params = build_search_params('vix', 'gru', '2024-08-05')
+
+    SearchLog(logger, payload_sample_rate=0).search(params, 'ok', 0.1234, 250, 180_000)
+
+    record = records[0]
+    assert record.event == 'flight_search'
+    assert record.params_hash == params_hash(params)
+    assert record.route == 'VIX-GRU'
+    assert (record.status, record.latency_ms, record.offers, record.bytes) == ('ok', 123.4, 250, 180_000)
+    assert len(record.getMessage()) < 120
+
+
+def test_payload_is_logged_only_for_the_sample(search_logger):
+    logger, records = search_logger
+    params = build_search_params('VIX', 'GRU', '2024-08-05')
+
+    SearchLog(logger, payload_sample_rate=0).payload(params, b'{"data": []}')
+    assert records == []
+
+    SearchLog(logger, payload_sample_rate=1).payload(params, b'{"data": []}')
+    assert records[0].event == 'flight_search_payload'
+    assert '{"data": []}' in records[0].getMessage()
+
+
+def test_json_lines_are_written_by_the_listener_thread(tmp_path, monkeypatch):
+    log_file = tmp_path / 'search.log'
+    writers = []
+    emit = logging.FileHandler.emit
+
+    def record_writer(handler, record):
+        if handler.baseFilename == str(log_file):
+            writers.append(threading.current_thread())
+        emit(handler, record)
+
+    monkeypatch.setattr(logging.FileHandler, 'emit', record_writer)
+    configure_search_logging(str(log_file), 'json', force=True)
+    try:
+        SearchLog(logging.getLogger()).search(build_search_params('VIX', 'GRU', '2024-08-05'), 'ok', 0.05, 3, 1024)
+    finally:
+        reset_search_logging()
+
+    line = json.loads(log_file.read_text().splitlines()[-1])
+    assert (line['event'], line['route'], line['offers'], line['bytes']) == ('flight_search', 'VIX-GRU', 3, 1024)
+    assert writers and threading.main_thread() not in writers
+
+
+def test_queued_records_are_written_at_exit(tmp_path):
+    log_file = tmp_path / 'search.log'
+    # Escrita lenta: na saída do processo ainda há registros na fila do listener
+    script = f"""
+import logging, time
+emit = logging.FileHandler.emit
+logging.FileHandler.emit = lambda handler, record: (time.sleep(0.01), emit(handler, record))
+from services.search_logging import configure_search_logging
+configure_search_logging({str(log_file)!r}, 'text', force=True)
+for number in range(50):
+    logging.getLogger().info(f"record {{number}}")
+"""
+    subprocess.run([sys.executable, '-c', script], check=True, cwd=Path(__file__).resolve().parent.parent)
+
+    assert len(log_file.read_text().splitlines()) == 50
+
+
+def test_service_logs_upstream_cached_and_failed_searches(stub_amadeus, search_logger):
+    logger, records = search_logger
+    stub_amadeus.payload = make_flight_offers_payload(5)
+    service = AmadeusFlightOffersSearchService(search_log=SearchLog(logger, payload_sample_rate=0))
+
+    service.search_flights('VIX', 'GRU', '2024-08-05')
+    service.search_flights('VIX', 'GRU', '2024-08-05')
+    stub_amadeus.scripted = [(400, {"errors": [{"status": 400, "code": 425, "title": "INVALID DATE"}]}, None)]
+    with pytest.raises(AmadeusClientError):
+        service.search_flights('VIX', 'GRU', '2024-08-06')
+
+    assert [(record.status, record.offers) for record in records] == [('ok', 5), ('cached', 5), (400, None)]
+    assert records[2].levelno == logging.WARNING
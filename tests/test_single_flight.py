@@ -0,0 +1,138 @@
+# tests/test_single_flight.py
+import asyncio
+import threading
+import time
+
+import pytest
+from services.amadeus_flight_offers_search_service import AmadeusFlightOffersSearchService
+from services.async_amadeus_flight_offers_search_service import AsyncAmadeusFlightOffersSearchService
+from services.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        time.sleep(0.1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', slow_call))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({id(result) for result in results}) == 1
+    assert flight.shared == 9
+
+
+def test_errors_are_propagated_to_every_waiting_caller():
+    flight = SingleFlight()
+    errors = []
+
+    def failing_call():
+        time.sleep(0.05)
+        raise ValueError("upstream failed")
+
+    def caller():
+        try:
+            flight.do('key', failing_call)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 5
+
+
+def test_async_callers_share_one_call():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow_call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return object()
+
+    async def main():
+        return await asyncio.gather(*(flight.do('key', slow_call) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert len({id(result) for result in results}) == 1
+
+
+def test_async_error_is_shared():
+    flight = AsyncSingleFlight()
+
+    async def failing_call():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main():
+        return await asyncio.gather(*(flight.do('key', failing_call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_others():
+    flight = AsyncSingleFlight()
+
+    async def slow_call():
+        await asyncio.sleep(0.05)
+        return 'offers'
+
+    async def main():
+        leader = asyncio.create_task(flight.do('key', slow_call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('key', slow_call))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return result
+
+    assert asyncio.run(main()) == 'offers'
+
+
+@pytest.fixture
+def uncached(monkeypatch):
+    monkeypatch.setenv('AMADEUS_CACHE_BACKEND', 'none')
+
+
+def test_identical_threaded_searches_hit_upstream_once(stub_amadeus, uncached):
+    stub_amadeus.latency = 0.2
+    results = []
+
+    def search():
+        results.append(AmadeusFlightOffersSearchService().search_flights('VIX', 'GRU', '2024-08-05'))
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_identical_async_searches_hit_upstream_once(stub_amadeus, uncached):
+    stub_amadeus.latency = 0.2
+
+    async def main():
+        service = AsyncAmadeusFlightOffersSearchService()
+        return await asyncio.gather(*(service.search_flights('VIX', 'GRU', '2024-08-05') for _ in range(8)))
+
+    results = asyncio.run(main())
+    assert stub_amadeus.count('/v2/shopping/flight-offers') == 1
+    assert all(result is results[0] for result in results)